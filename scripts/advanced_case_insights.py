@@ -3,14 +3,21 @@
 from __future__ import annotations
 
 import argparse
-import json
 import re
+import sys
 from collections import Counter, defaultdict
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Iterable, List, Tuple
 
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.instrumentation import add_metrics_arguments, metrics_from_args  # noqa: E402
+from scripts.warm_cache import load_json  # noqa: E402
+
 MONTHS = {
     "jan": 1,
     "january": 1,
@@ -287,7 +294,7 @@ def _extract_dates(text: str, min_year: int, max_year: int) -> List[datetime]:
 
 
 def _iter_pages(json_path: Path) -> Iterable[PageRecord]:
-    payload = json.loads(json_path.read_text(encoding="utf-8"))
+    payload = load_json(json_path)
     for page in payload.get("pages", []):
         yield PageRecord(page_number=page["page_number"], text=page.get("text", ""))
 
@@ -639,25 +646,30 @@ def _parse_args() -> argparse.Namespace:
     parser.add_argument("--max-exhibit-pages", type=int, default=25, help="Max pages per exhibit label.")
     parser.add_argument("--max-correspondence", type=int, default=200, help="Max correspondence hits.")
     parser.add_argument("--max-docket-entries", type=int, default=1500, help="Max docket entries.")
+    add_metrics_arguments(parser)
     return parser.parse_args()
 
 
 def main() -> None:
     args = _parse_args()
+    metrics = metrics_from_args(args, "advanced_case_insights")
     json_path = args.json.expanduser().resolve()
     output_dir = args.output_dir.expanduser().resolve()
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    pages = list(_iter_pages(json_path))
+    with metrics.stage("load"):
+        pages = list(_iter_pages(json_path))
+    metrics.count("pages", len(pages))
 
     total_chars = sum(len(page.text) for page in pages)
     all_dates: List[datetime] = []
     category_counts: Dict[str, int] = {category: 0 for category in ISSUE_CATEGORIES}
 
-    for page in pages:
-        all_dates.extend(_extract_dates(page.text, args.min_year, args.max_year))
-        for category, keywords in ISSUE_CATEGORIES.items():
-            category_counts[category] += _score_keywords(page.text, keywords)
+    with metrics.stage("scan"):
+        for page in pages:
+            all_dates.extend(_extract_dates(page.text, args.min_year, args.max_year))
+            for category, keywords in ISSUE_CATEGORIES.items():
+                category_counts[category] += _score_keywords(page.text, keywords)
 
     date_stats = {
         "min_date": min(all_dates).strftime("%Y-%m-%d") if all_dates else "unknown",
@@ -665,32 +677,35 @@ def main() -> None:
         "unique_dates": len({dt.date() for dt in all_dates}) if all_dates else 0,
     }
 
-    hotspots = _collect_hotspots(pages, ISSUE_CATEGORIES, args.max_hotspots)
-    flags = _collect_procedural_flags(pages, PROCEDURAL_FLAGS, args.max_flag_hits)
-    outcomes = _collect_outcomes(pages, args.max_outcomes, args.max_outcome_per_term)
-    actors = _collect_actors(pages)
-    exhibits = _collect_exhibits(pages, args.max_exhibit_pages)
-    correspondence = _collect_correspondence(pages, args.max_correspondence)
-    docket_entries = _collect_docket_entries(pages, args.max_docket_entries)
-
-    _write_advanced_summary(
-        output_dir / f"{args.label}_advanced_insights.md",
-        page_count=len(pages),
-        total_chars=total_chars,
-        date_stats=date_stats,
-        category_counts=category_counts,
-        hotspots=hotspots,
-    )
-    _write_procedural_flags(output_dir / f"{args.label}_procedural_flags.md", flags)
-    _write_outcomes(output_dir / f"{args.label}_motion_outcomes.md", outcomes)
-    _write_actor_map(output_dir / f"{args.label}_actor_map.md", actors, args.max_actors)
-    _write_exhibits(output_dir / f"{args.label}_exhibit_index.md", exhibits)
-    _write_correspondence(
-        output_dir / f"{args.label}_correspondence_index.md", correspondence
-    )
-    _write_docket_entries(output_dir / f"{args.label}_docket_entries.md", docket_entries)
+    with metrics.stage("collect"):
+        hotspots = _collect_hotspots(pages, ISSUE_CATEGORIES, args.max_hotspots)
+        flags = _collect_procedural_flags(pages, PROCEDURAL_FLAGS, args.max_flag_hits)
+        outcomes = _collect_outcomes(pages, args.max_outcomes, args.max_outcome_per_term)
+        actors = _collect_actors(pages)
+        exhibits = _collect_exhibits(pages, args.max_exhibit_pages)
+        correspondence = _collect_correspondence(pages, args.max_correspondence)
+        docket_entries = _collect_docket_entries(pages, args.max_docket_entries)
+
+    with metrics.stage("write"):
+        _write_advanced_summary(
+            output_dir / f"{args.label}_advanced_insights.md",
+            page_count=len(pages),
+            total_chars=total_chars,
+            date_stats=date_stats,
+            category_counts=category_counts,
+            hotspots=hotspots,
+        )
+        _write_procedural_flags(output_dir / f"{args.label}_procedural_flags.md", flags)
+        _write_outcomes(output_dir / f"{args.label}_motion_outcomes.md", outcomes)
+        _write_actor_map(output_dir / f"{args.label}_actor_map.md", actors, args.max_actors)
+        _write_exhibits(output_dir / f"{args.label}_exhibit_index.md", exhibits)
+        _write_correspondence(
+            output_dir / f"{args.label}_correspondence_index.md", correspondence
+        )
+        _write_docket_entries(output_dir / f"{args.label}_docket_entries.md", docket_entries)
 
     print(f"Wrote advanced reports to {output_dir}")
+    metrics.finish()
 
 
 if __name__ == "__main__":
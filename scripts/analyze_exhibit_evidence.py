@@ -3,8 +3,8 @@
 from __future__ import annotations
 
 import argparse
-import json
 import re
+import sys
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
@@ -13,6 +13,12 @@ from typing import Dict, List, Tuple
 import numpy as np
 
 ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.disk_cache import add_cache_arguments, cache_from_args, memoize  # noqa: E402
+from scripts.instrumentation import add_metrics_arguments, metrics_from_args  # noqa: E402
+from scripts.warm_cache import load_json, load_store  # noqa: E402
 
 
 NEGATION_TERMS = [
@@ -167,7 +173,7 @@ def _load_exhibit_text(exhibit_dir: Path) -> Tuple[str, int, str]:
     json_path = exhibit_dir / f"{exhibit_dir.name}.json"
     text_path = exhibit_dir / f"{exhibit_dir.name}.txt"
     if json_path.exists():
-        payload = json.loads(json_path.read_text(encoding="utf-8"))
+        payload = load_json(json_path)
         pages = [page.get("text", "") for page in payload.get("pages", [])]
         return "\n".join(pages), len(pages), payload.get("source", exhibit_dir.name)
     if text_path.exists():
@@ -235,16 +241,7 @@ def _polarity_sign(text: str, min_hits: int) -> int:
     return 0
 
 
-def _load_store(store_dir: Path) -> Tuple[np.ndarray, List[dict]]:
-    embeddings = np.load(store_dir / "embeddings.npy")
-    records = [
-        json.loads(line)
-        for line in (store_dir / "metadata.jsonl").read_text(encoding="utf-8").splitlines()
-        if line.strip()
-    ]
-    return embeddings, records
-
-
+@memoize()
 def _find_contradictions(
     embeddings: np.ndarray,
     records: List[dict],
@@ -506,37 +503,48 @@ def _parse_args() -> argparse.Namespace:
         default=0.82,
         help="Cosine similarity threshold for overlap pairs.",
     )
+    add_cache_arguments(parser)
+    add_metrics_arguments(parser)
     return parser.parse_args()
 
 
 def main() -> None:
     args = _parse_args()
+    metrics = metrics_from_args(args, "analyze_exhibit_evidence")
+    cache_from_args(args)
     exhibit_root = args.exhibit_root.expanduser().resolve()
     store_dir = args.store.expanduser().resolve()
 
-    exhibits = _collect_exhibits(exhibit_root)
-    if not exhibits:
-        raise ValueError(f"No exhibit OCR outputs found under {exhibit_root}")
-
-    embeddings, records = _load_store(store_dir)
-    overlaps = _find_overlap(
-        embeddings,
-        records,
-        similarity_threshold=args.overlap_threshold,
-        top_k=args.top_k,
-    )
-    contradictions = _find_contradictions(
-        embeddings,
-        records,
-        similarity_threshold=args.similarity_threshold,
-        min_polarity_hits=args.min_polarity_hits,
-        top_k=args.top_k,
-    )
+    with metrics.stage("load"):
+        exhibits = _collect_exhibits(exhibit_root)
+        if not exhibits:
+            raise ValueError(f"No exhibit OCR outputs found under {exhibit_root}")
+        embeddings, records = load_store(store_dir)
+    metrics.count("exhibits", len(exhibits))
+    metrics.count("chunks", len(records))
+
+    with metrics.stage("overlap"):
+        overlaps = _find_overlap(
+            embeddings,
+            records,
+            similarity_threshold=args.overlap_threshold,
+            top_k=args.top_k,
+        )
+    with metrics.stage("contradictions"):
+        contradictions = _find_contradictions(
+            embeddings,
+            records,
+            similarity_threshold=args.similarity_threshold,
+            min_polarity_hits=args.min_polarity_hits,
+            top_k=args.top_k,
+        )
 
-    _write_contradictions_csv(args.contradictions_csv.expanduser().resolve(), contradictions)
-    _write_report(args.report.expanduser().resolve(), exhibits, overlaps, contradictions)
+    with metrics.stage("write"):
+        _write_contradictions_csv(args.contradictions_csv.expanduser().resolve(), contradictions)
+        _write_report(args.report.expanduser().resolve(), exhibits, overlaps, contradictions)
 
     print(f"Wrote report to {args.report}")
+    metrics.finish()
 
 
 if __name__ == "__main__":
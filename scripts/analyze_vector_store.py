@@ -3,14 +3,24 @@
 from __future__ import annotations
 
 import argparse
-import json
 import re
+import sys
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple
 
 import numpy as np
-from sentence_transformers import SentenceTransformer
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.citation_index import CitationIndex, load_or_update_index, mention_counts  # noqa: E402
+from scripts.instrumentation import add_metrics_arguments, metrics_from_args  # noqa: E402
+from scripts.warm_cache import load_sentence_model, load_store  # noqa: E402
 
 
 ISSUES = {
@@ -98,24 +108,6 @@ DATE_PATTERNS = [
     re.compile(r"\b\d{1,2}[./-]\d{1,2}[./-](?:\d{2}|\d{4})\b"),
 ]
 
-RE_CASE_V = re.compile(
-    r"\b[A-Z][A-Za-z0-9.&'\- ]{1,50}\s+v\.?\s+[A-Z][A-Za-z0-9.&'\- ]{1,50}\b"
-)
-RE_IN_RE = re.compile(r"\bIn re\s+[A-Z][A-Za-z0-9.&'\- ]{1,50}\b")
-RE_DOCKET = re.compile(r"\b\d{2}-\d{2}-\d{5}(?:-CV)?\b")
-RE_TRIAL_NO = re.compile(r"\b\d{3}-\d{6}-\d{2}\b")
-RE_RULE = re.compile(
-    r"\b(?:Tex\.?\s+R\.?\s+(?:Civ|App)\.?\s+P\.?|TRCP|Rule)\s*\d+(?:\.\d+)?\b",
-    re.IGNORECASE,
-)
-RE_USC = re.compile(r"\b\d+\s*U\.S\.C\.?\s*§+\s*\d+[A-Za-z0-9.-]*\b")
-RE_TEX_CODE = re.compile(
-    r"\bTex\.?\s+(?:Fam|Gov|Penal|Civ\.?\s+Prac\.?\s+&\s+Rem\.?|Code\s+Crim\.?\s+"
-    r"Proc\.?)\s+Code\b[^\n]{0,60}",
-    re.IGNORECASE,
-)
-
-
 def _timestamp() -> str:
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
@@ -189,13 +181,6 @@ def _extract_dates(text: str) -> List[Tuple[str, datetime | None, Tuple[int, int
     return results
 
 
-def _load_store(store_dir: Path) -> Tuple[np.ndarray, List[dict]]:
-    embeddings = np.load(store_dir / "embeddings.npy")
-    metadata_path = store_dir / "metadata.jsonl"
-    records = [json.loads(line) for line in metadata_path.read_text(encoding="utf-8").splitlines()]
-    return embeddings, records
-
-
 def _issue_search(
     embeddings: np.ndarray,
     records: List[dict],
@@ -360,44 +345,7 @@ def _write_timeline(
     output_path.write_text("\n".join(lines), encoding="utf-8")
 
 
-def _collect_citations(records: List[dict]) -> Dict[str, Dict[str, List[int]]]:
-    buckets = {
-        "docket_numbers": {},
-        "trial_numbers": {},
-        "case_captions": {},
-        "rules": {},
-        "statutes": {},
-    }
-    for record in records:
-        text = record["text"]
-        vector_id = record["vector_id"]
-
-        def _add(bucket: Dict[str, List[int]], match: str) -> None:
-            normalized = _normalize_ascii(_normalize_ws(match))
-            if not normalized:
-                return
-            bucket.setdefault(normalized, [])
-            if vector_id not in bucket[normalized]:
-                bucket[normalized].append(vector_id)
-
-        for match in RE_DOCKET.findall(text):
-            _add(buckets["docket_numbers"], match)
-        for match in RE_TRIAL_NO.findall(text):
-            _add(buckets["trial_numbers"], match)
-        for match in RE_CASE_V.findall(text):
-            _add(buckets["case_captions"], match)
-        for match in RE_IN_RE.findall(text):
-            _add(buckets["case_captions"], match)
-        for match in RE_RULE.findall(text):
-            _add(buckets["rules"], match)
-        for match in RE_USC.findall(text):
-            _add(buckets["statutes"], match)
-        for match in RE_TEX_CODE.findall(text):
-            _add(buckets["statutes"], match)
-    return buckets
-
-
-def _write_citations(output_path: Path, citations: Dict[str, Dict[str, List[int]]]) -> None:
+def _write_citations(output_path: Path, index: CitationIndex) -> None:
     lines = [
         "# 28B Citation Spotting",
         "",
@@ -411,17 +359,13 @@ def _write_citations(output_path: Path, citations: Dict[str, Dict[str, List[int]
             lines.append("- None found.")
             lines.append("")
             return
-        items = sorted(bucket.items(), key=lambda item: (-len(item[1]), item[0]))
-        for citation, ids in items[:max_items]:
-            sample_ids = ", ".join(str(i) for i in ids[:5])
-            lines.append(f"- {citation} (count: {len(ids)}; vector_ids: {sample_ids})")
+        for citation, count in mention_counts(bucket)[:max_items]:
+            sample_ids = ", ".join(str(i) for i in bucket[citation][:5])
+            lines.append(f"- {citation} (count: {count}; vector_ids: {sample_ids})")
         lines.append("")
 
-    _write_section("Docket Numbers", citations["docket_numbers"])
-    _write_section("Trial Court Numbers", citations["trial_numbers"])
-    _write_section("Case Captions", citations["case_captions"])
-    _write_section("Rule References", citations["rules"])
-    _write_section("Statutes and Codes", citations["statutes"])
+    for title, bucket in index.sections():
+        _write_section(title, bucket)
 
     output_path.write_text("\n".join(lines), encoding="utf-8")
 
@@ -596,19 +540,25 @@ def _parse_args() -> argparse.Namespace:
         default=5,
         help="Max members per duplicate cluster to show.",
     )
+    add_metrics_arguments(parser)
     return parser.parse_args()
 
 
 def main() -> None:
     args = _parse_args()
+    metrics = metrics_from_args(args, "analyze_vector_store")
     store_dir = args.store.expanduser().resolve()
     output_dir = args.output_dir.expanduser().resolve()
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    embeddings, records = _load_store(store_dir)
-    model = SentenceTransformer(args.model)
+    with metrics.stage("load"):
+        embeddings, records = load_store(store_dir)
+    metrics.count("chunks", len(records))
+    with metrics.stage("load_model"):
+        model = load_sentence_model(args.model)
 
-    issue_hits = _issue_search(embeddings, records, model, ISSUES, args.top_k)
+    with metrics.stage("issue_search"):
+        issue_hits = _issue_search(embeddings, records, model, ISSUES, args.top_k)
 
     _write_issue_matrix(
         output_dir / f"{args.label}_issue_evidence_matrix.md",
@@ -616,27 +566,31 @@ def main() -> None:
         store_dir,
         args.top_k,
     )
-    _write_timeline(
-        output_dir / f"{args.label}_timeline.md",
-        records,
-        issue_hits,
-        args.timeline_events,
-        args.timeline_scope,
-        args.timeline_max_dates_per_chunk,
-    )
-    citations = _collect_citations(records)
-    _write_citations(output_dir / f"{args.label}_citations.md", citations)
-    _write_consistency(
-        output_dir / f"{args.label}_consistency_clusters.md",
-        records,
-        embeddings,
-        args.dup_threshold,
-        args.dup_clusters,
-        args.dup_members,
-    )
+    with metrics.stage("timeline"):
+        _write_timeline(
+            output_dir / f"{args.label}_timeline.md",
+            records,
+            issue_hits,
+            args.timeline_events,
+            args.timeline_scope,
+            args.timeline_max_dates_per_chunk,
+        )
+    with metrics.stage("citations"):
+        citations = load_or_update_index(store_dir, records)
+        _write_citations(output_dir / f"{args.label}_citations.md", citations)
+    with metrics.stage("consistency"):
+        _write_consistency(
+            output_dir / f"{args.label}_consistency_clusters.md",
+            records,
+            embeddings,
+            args.dup_threshold,
+            args.dup_clusters,
+            args.dup_members,
+        )
     _write_scaffolds(output_dir / f"{args.label}_draft_scaffolds.md", issue_hits)
 
     print(f"Wrote reports to {output_dir}")
+    metrics.finish()
 
 
 if __name__ == "__main__":
@@ -3,21 +3,35 @@
 from __future__ import annotations
 
 import argparse
-import json
 import math
 import re
+import sys
 from collections import Counter, defaultdict
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple
 
-import matplotlib
-
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
 import numpy as np
-from sentence_transformers import SentenceTransformer
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.disk_cache import add_cache_arguments, cache_from_args, encoder_fingerprint, memoize  # noqa: E402
+from scripts.instrumentation import add_metrics_arguments, metrics_from_args  # noqa: E402
+from scripts.plotting import pyplot  # noqa: E402
+from scripts.term_matrix import (  # noqa: E402
+    TermMatrix,
+    bin_rows,
+    build_term_matrix,
+    category_terms,
+    dominant_flows,
+)
+from scripts.warm_cache import load_json, load_sentence_model  # noqa: E402
 
 MONTHS = {
     "jan": 1,
@@ -314,7 +328,7 @@ def _extract_dates(text: str, min_year: int, max_year: int) -> List[datetime]:
 
 
 def _iter_pages(json_path: Path) -> Iterable[PageRecord]:
-    payload = json.loads(json_path.read_text(encoding="utf-8"))
+    payload = load_json(json_path)
     for page in payload.get("pages", []):
         yield PageRecord(page_number=page["page_number"], text=page.get("text", ""))
 
@@ -339,6 +353,16 @@ def _doc_type(text_lower: str) -> str | None:
     return None
 
 
+def _page_terms(pages: List[PageRecord]) -> TermMatrix:
+    """Count issue, authority and statutory keywords on every page once."""
+
+    texts = [_normalize_ascii(page.text).lower() for page in pages]
+    keywords = category_terms(
+        ISSUE_CATEGORIES, {"authority": AUTHORITY_TERMS, "statutory": STATUTORY_TERMS}
+    )
+    return build_term_matrix(texts, keywords)
+
+
 def _issue_tags(text_lower: str) -> List[str]:
     tags = []
     for issue, keywords in ISSUE_CATEGORIES.items():
@@ -371,6 +395,7 @@ def _bin_series(values: List[float], bin_size: int) -> Tuple[np.ndarray, np.ndar
     return x, binned
 
 
+@memoize(ignore=("batch_size",), fingerprints={"model": encoder_fingerprint})
 def _page_embeddings(
     model: SentenceTransformer, pages: List[PageRecord], batch_size: int
 ) -> np.ndarray:
@@ -398,20 +423,22 @@ def _semantic_drift(
     issues: List[str],
     min_year: int,
     max_year: int,
+    terms: TermMatrix | None = None,
 ) -> List[str]:
+    plt = pyplot()
+    terms = terms or _page_terms(pages)
+    issue_names = list(ISSUE_CATEGORIES)
+    tagged = terms.category_counts(ISSUE_CATEGORIES) > 0
     outputs = []
     for issue in issues:
-        keywords = ISSUE_CATEGORIES[issue]
+        issue_tagged = tagged[:, issue_names.index(issue)]
         plt.figure(figsize=(10, 5))
         plotted = False
         for party in parties:
             points = []
-            for idx, page in enumerate(pages):
-                text_norm = _normalize_ascii(page.text)
-                text_lower = text_norm.lower()
-                if party.lower() not in text_lower:
-                    continue
-                if not any(keyword in text_lower for keyword in keywords):
+            for idx in np.flatnonzero(issue_tagged):
+                text_norm = _normalize_ascii(pages[idx].text)
+                if party.lower() not in text_norm.lower():
                     continue
                 dates = _extract_dates(text_norm, min_year, max_year)
                 if not dates:
@@ -452,6 +479,7 @@ def _contradiction_map(
     max_nodes: int,
     similarity_threshold: float,
 ) -> Tuple[str, str]:
+    plt = pyplot()
     candidates = []
     for idx, page in enumerate(pages):
         text_norm = _normalize_ascii(page.text)
@@ -535,17 +563,18 @@ def _contradiction_map(
 
 
 def _authority_leakage(
-    output_path: Path, pages: List[PageRecord], bin_size: int
+    output_path: Path,
+    pages: List[PageRecord],
+    bin_size: int,
+    terms: TermMatrix | None = None,
 ) -> None:
-    authority = []
-    statutory = []
-    for page in pages:
-        text_lower = _normalize_ascii(page.text).lower()
-        authority.append(sum(text_lower.count(term) for term in AUTHORITY_TERMS))
-        statutory.append(sum(text_lower.count(term) for term in STATUTORY_TERMS))
-
-    x, authority_binned = _bin_series(authority, bin_size)
-    _, statutory_binned = _bin_series(statutory, bin_size)
+    plt = pyplot()
+    terms = terms or _page_terms(pages)
+    counts = terms.category_counts({"authority": AUTHORITY_TERMS, "statutory": STATUTORY_TERMS})
+    binned = bin_rows(counts, bin_size).astype(float)
+    x = np.arange(len(binned)) * bin_size + 1
+    authority_binned = binned[:, 0]
+    statutory_binned = binned[:, 1]
     ratio = np.divide(
         authority_binned + 1,
         statutory_binned + 1,
@@ -572,18 +601,19 @@ def _authority_leakage(
 
 
 def _issue_centroids(
-    pages: List[PageRecord], embeddings: np.ndarray
+    pages: List[PageRecord],
+    embeddings: np.ndarray,
+    terms: TermMatrix | None = None,
 ) -> Dict[str, np.ndarray]:
+    terms = terms or _page_terms(pages)
+    tagged = terms.category_counts(ISSUE_CATEGORIES) > 0
+    sizes = tagged.sum(axis=0)
+    sums = tagged.T.astype(embeddings.dtype) @ embeddings
     centroids = {}
-    for issue, keywords in ISSUE_CATEGORIES.items():
-        idxs = []
-        for i, page in enumerate(pages):
-            text_lower = _normalize_ascii(page.text).lower()
-            if any(keyword in text_lower for keyword in keywords):
-                idxs.append(i)
-        if not idxs:
+    for col, issue in enumerate(ISSUE_CATEGORIES):
+        if not sizes[col]:
             continue
-        centroid = embeddings[idxs].mean(axis=0)
+        centroid = sums[col] / sizes[col]
         if np.linalg.norm(centroid) > 0:
             centroid = centroid / np.linalg.norm(centroid)
         centroids[issue] = centroid
@@ -594,26 +624,19 @@ def _procedural_gravity(
     output_path: Path,
     pages: List[PageRecord],
     embeddings: np.ndarray,
+    terms: TermMatrix | None = None,
 ) -> None:
-    centroids = _issue_centroids(pages, embeddings)
+    plt = pyplot()
+    terms = terms or _page_terms(pages)
+    centroids = _issue_centroids(pages, embeddings, terms)
     issues = list(centroids.keys())
-    index = {issue: idx for idx, issue in enumerate(issues)}
-    flows = np.zeros((len(issues), len(issues)), dtype=int)
-
-    for i, page in enumerate(pages):
-        text_lower = _normalize_ascii(page.text).lower()
-        tags = [issue for issue, keywords in ISSUE_CATEGORIES.items() if any(k in text_lower for k in keywords)]
-        if len(tags) < 2:
-            continue
-        vector = embeddings[i]
-        sims = {issue: float(np.dot(vector, centroids[issue])) for issue in tags if issue in centroids}
-        if not sims:
-            continue
-        dominant = max(sims, key=sims.get)
-        for tag in tags:
-            if tag not in centroids:
-                continue
-            flows[index[dominant], index[tag]] += 1
+    columns = [list(ISSUE_CATEGORIES).index(issue) for issue in issues]
+    tagged = terms.category_counts(ISSUE_CATEGORIES)[:, columns] > 0
+    if issues:
+        sims = embeddings @ np.stack([centroids[issue] for issue in issues]).T
+    else:
+        sims = np.zeros((len(pages), 0), dtype=np.float32)
+    flows = dominant_flows(sims, tagged)
 
     plt.figure(figsize=(8, 7))
     plt.imshow(flows, cmap="viridis")
@@ -632,6 +655,7 @@ def _selective_attention(
     embeddings: np.ndarray,
     bin_size: int,
 ) -> None:
+    plt = pyplot()
     brief_idxs = []
     order_idxs = []
     for idx, page in enumerate(pages):
@@ -677,6 +701,7 @@ def _role_blind_plots(
     embeddings: np.ndarray,
     sample_size: int,
 ) -> Tuple[str, str]:
+    plt = pyplot()
     if sample_size <= 0 or sample_size >= len(pages):
         idxs = list(range(len(pages)))
     else:
@@ -741,6 +766,7 @@ def _counterfactual_overlay(
     baseline_embeddings: np.ndarray | None,
     bin_size: int,
 ) -> None:
+    plt = pyplot()
     if baseline_embeddings is None or baseline_embeddings.size == 0:
         return
     baseline = baseline_embeddings.mean(axis=0)
@@ -763,22 +789,13 @@ def _counterfactual_overlay(
 def _issue_cannibalization(
     output_path: Path,
     pages: List[PageRecord],
+    terms: TermMatrix | None = None,
 ) -> None:
+    plt = pyplot()
+    terms = terms or _page_terms(pages)
     issues = list(ISSUE_CATEGORIES.keys())
-    index = {issue: idx for idx, issue in enumerate(issues)}
-    matrix = np.zeros((len(issues), len(issues)), dtype=int)
-
-    for page in pages:
-        text_lower = _normalize_ascii(page.text).lower()
-        scores = {issue: sum(text_lower.count(term) for term in keywords) for issue, keywords in ISSUE_CATEGORIES.items()}
-        active = {issue: score for issue, score in scores.items() if score > 0}
-        if len(active) < 2:
-            continue
-        dominant = max(active, key=active.get)
-        for issue in active:
-            if issue == dominant:
-                continue
-            matrix[index[dominant], index[issue]] += 1
+    scores = terms.category_counts(ISSUE_CATEGORIES)
+    matrix = dominant_flows(scores, scores > 0, include_dominant=False)
 
     plt.figure(figsize=(8, 7))
     plt.imshow(matrix, cmap="plasma")
@@ -795,14 +812,11 @@ def _authority_terms(series: List[int], bin_size: int) -> Tuple[np.ndarray, np.n
     return _bin_series(series, bin_size)
 
 
-def _issue_ranking(pages: List[PageRecord]) -> List[str]:
-    totals = {}
-    for issue, keywords in ISSUE_CATEGORIES.items():
-        totals[issue] = sum(
-            sum(_normalize_ascii(page.text).lower().count(term) for term in keywords)
-            for page in pages
-        )
-    return sorted(totals, key=totals.get, reverse=True)
+def _issue_ranking(pages: List[PageRecord], terms: TermMatrix | None = None) -> List[str]:
+    terms = terms or _page_terms(pages)
+    totals = terms.category_counts(ISSUE_CATEGORIES).sum(axis=0)
+    issues = list(ISSUE_CATEGORIES)
+    return [issues[idx] for idx in np.argsort(-totals, kind="stable")]
 
 
 def _write_index(output_path: Path, images: List[Tuple[str, str]]) -> None:
@@ -888,65 +902,84 @@ def _parse_args() -> argparse.Namespace:
         default=0,
         help="Sample size for role plots (0 = all pages).",
     )
+    add_cache_arguments(parser)
+    add_metrics_arguments(parser)
     return parser.parse_args()
 
 
 def main() -> None:
     args = _parse_args()
+    metrics = metrics_from_args(args, "build_advanced_semantic_visuals")
+    cache_from_args(args)
     json_path = args.json.expanduser().resolve()
     output_dir = args.output_dir.expanduser().resolve()
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    pages = list(_iter_pages(json_path))
+    with metrics.stage("load"):
+        pages = list(_iter_pages(json_path))
     if not pages:
         raise ValueError("No pages found in JSON input.")
+    metrics.count("pages", len(pages))
 
     header = _extract_case_header(pages[0].text)
     parties = [value for key, value in header.items() if key.startswith("party_")]
     if len(parties) < 2:
         parties = ["relator", "respondent"]
 
-    model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
-    embeddings = _page_embeddings(model, pages, args.batch_size)
-
-    ranked_issues = _issue_ranking(pages)[: args.top_issues]
-    drift_images = _semantic_drift(
-        output_dir,
-        pages,
-        embeddings,
-        parties,
-        ranked_issues,
-        args.min_year,
-        args.max_year,
-    )
+    with metrics.stage("load_model"):
+        model = load_sentence_model("sentence-transformers/all-MiniLM-L6-v2")
+    with metrics.stage("embed"):
+        embeddings = _page_embeddings(model, pages, args.batch_size)
+
+    with metrics.stage("terms"):
+        terms = _page_terms(pages)
+        ranked_issues = _issue_ranking(pages, terms)[: args.top_issues]
+    with metrics.stage("semantic_drift"):
+        drift_images = _semantic_drift(
+            output_dir,
+            pages,
+            embeddings,
+            parties,
+            ranked_issues,
+            args.min_year,
+            args.max_year,
+            terms,
+        )
 
-    contradiction_img, contradiction_edges = _contradiction_map(
-        output_dir,
-        pages,
-        embeddings,
-        args.contradiction_nodes,
-        args.contradiction_threshold,
-    )
+    with metrics.stage("contradiction_map"):
+        contradiction_img, contradiction_edges = _contradiction_map(
+            output_dir,
+            pages,
+            embeddings,
+            args.contradiction_nodes,
+            args.contradiction_threshold,
+        )
 
     authority_img = "authority_leakage.png"
-    _authority_leakage(output_dir / authority_img, pages, args.bin_size)
+    with metrics.stage("authority_leakage"):
+        _authority_leakage(output_dir / authority_img, pages, args.bin_size, terms)
 
     gravity_img = "procedural_gravity_wells.png"
-    _procedural_gravity(output_dir / gravity_img, pages, embeddings)
+    with metrics.stage("procedural_gravity"):
+        _procedural_gravity(output_dir / gravity_img, pages, embeddings, terms)
 
     attention_img = "selective_attention.png"
-    _selective_attention(output_dir / attention_img, pages, embeddings, args.bin_size)
+    with metrics.stage("selective_attention"):
+        _selective_attention(output_dir / attention_img, pages, embeddings, args.bin_size)
 
-    role_blind, role_labeled = _role_blind_plots(
-        output_dir, pages, embeddings, args.role_sample
-    )
+    with metrics.stage("role_blind"):
+        role_blind, role_labeled = _role_blind_plots(
+            output_dir, pages, embeddings, args.role_sample
+        )
 
-    baseline_embeddings = _load_baseline_embeddings(args.baseline_store)
     anomaly_img = "counterfactual_anomaly_overlay.png"
-    _counterfactual_overlay(output_dir / anomaly_img, embeddings, baseline_embeddings, args.bin_size)
+    with metrics.stage("counterfactual_overlay"):
+        baseline_embeddings = _load_baseline_embeddings(args.baseline_store)
+        _counterfactual_overlay(output_dir / anomaly_img, embeddings, baseline_embeddings, args.bin_size)
 
     cannibal_img = "issue_cannibalization.png"
-    _issue_cannibalization(output_dir / cannibal_img, pages)
+    with metrics.stage("issue_cannibalization"):
+        _issue_cannibalization(output_dir / cannibal_img, pages, terms)
 
     images = []
     for name in drift_images:
@@ -971,6 +1004,7 @@ def main() -> None:
     if contradiction_edges:
         print(f"Saved contradiction edges to {contradiction_edges}")
     print(f"Wrote advanced visuals to {output_dir}")
+    metrics.finish()
 
 
 if __name__ == "__main__":
@@ -4,15 +4,24 @@ from __future__ import annotations
 
 import argparse
 import csv
-import json
 import re
+import sys
 from collections import Counter, defaultdict
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple
 
-import PyPDF2
+if TYPE_CHECKING:
+    import PyPDF2
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.filer_rules import detect_filemark, load_docket_filer_map, score_filer  # noqa: E402
+from scripts.instrumentation import add_metrics_arguments, metrics_from_args  # noqa: E402
+from scripts.warm_cache import load_json  # noqa: E402
 
 
 DATE_PATTERNS = [
@@ -27,7 +36,10 @@ DATE_PATTERNS = [
     ),
 ]
 
-FILER_RULES = {
+# Bookmark titles name a document ("Respondent's Answer", "Order on Motion")
+# rather than carry its signature block, so they are scored with this
+# vocabulary. Page text falls back to the content rules in filer_rules.
+TITLE_RULES = {
     "charles_dustin_myers": [
         (re.compile(r"/s/\s*charles\s+dustin\s+myers", re.IGNORECASE), 6),
         (re.compile(r"charles\s+dustin\s+myers", re.IGNORECASE), 5),
@@ -148,8 +160,6 @@ NON_ASCII_MAP = str.maketrans(
 
 DOCKET_HEADER = "ALL TRANSACTIONS FOR A CASE"
 DOCKET_ENTRY = re.compile(r"^\s*(\d{1,4})\s+(\d{2}/\d{2}/\d{4})\s+(.+)$")
-FILEMARK_STAMP = re.compile(r"(?i)\bfilemark\b[^0-9]{0,6}(\d{1,4})")
-DOCKET_LINE = re.compile(r"^\s*(\d{1,4})\s+\d{2}/\d{2}/\d{4}\b")
 
 STOP_WORDS = {
     "the",
@@ -304,10 +314,10 @@ def _strip_date(title: str, date_text: str) -> str:
     return cleaned.strip()
 
 
-def _score_filer(title: str) -> Tuple[str, int, List[str]]:
+def _score_title(title: str) -> Tuple[str, int, List[str]]:
     scores: Dict[str, int] = defaultdict(int)
     signals: Dict[str, List[str]] = defaultdict(list)
-    for filer, rules in FILER_RULES.items():
+    for filer, rules in TITLE_RULES.items():
         for pattern, weight in rules:
             if pattern.search(title):
                 scores[filer] += weight
@@ -349,7 +359,7 @@ def _normalize_for_match(text: str) -> str:
 
 
 def _load_page_text(json_path: Path) -> Dict[int, str]:
-    payload = json.loads(json_path.read_text(encoding="utf-8"))
+    payload = load_json(json_path)
     pages: Dict[int, str] = {}
     for page in payload.get("pages", []):
         page_number = page.get("page_number")
@@ -363,20 +373,6 @@ def _load_page_text(json_path: Path) -> Dict[int, str]:
     return pages
 
 
-def _load_docket_filer_map(path: Path | None) -> Dict[str, str]:
-    if not path or not path.exists():
-        return {}
-    mapping: Dict[str, str] = {}
-    with path.open("r", encoding="utf-8") as handle:
-        reader = csv.DictReader(handle)
-        for row in reader:
-            filemark = row.get("filemark")
-            filer = row.get("filer")
-            if filemark and filer:
-                mapping[filemark.strip()] = filer.strip()
-    return mapping
-
-
 def _parse_index(value: str) -> int | None:
     if value is None:
         return None
@@ -471,17 +467,6 @@ def _build_match_key(description: str) -> str:
     return " ".join(tokens[:6])
 
 
-def _detect_filemark(text: str) -> str | None:
-    match = FILEMARK_STAMP.search(text)
-    if match:
-        return match.group(1)
-    for line in text.splitlines():
-        match = DOCKET_LINE.match(line)
-        if match:
-            return match.group(1)
-    return None
-
-
 def _compute_ranges(flat: List[dict], total_pages: int) -> None:
     ordered = [
         (idx, entry["start_page"])
@@ -512,7 +497,7 @@ def _build_entries(flat: List[dict]) -> List[BookmarkEntry]:
     for idx, item in enumerate(flat, start=1):
         title = item["title"]
         date, substance = _extract_date(title)
-        filer, score, _signals = _score_filer(title)
+        filer, score, _signals = _score_title(title)
         start_page = item["start_page"]
         end_page = item.get("end_page")
         results.append(
@@ -611,7 +596,7 @@ def _resolve_unknowns_by_context(
             continue
         sample_text = "\n".join(sample_parts)
 
-        filemark = _detect_filemark(sample_text)
+        filemark = detect_filemark(sample_text)
         if filemark and filemark in docket_map:
             old_filer = entry.filer
             entry.filer = docket_map[filemark]
@@ -654,7 +639,7 @@ def _resolve_unknowns_by_context(
         if matched:
             continue
 
-        filer, score, signals = _score_filer(sample_text)
+        filer, score, signals = score_filer(sample_text)
         if filer != "unknown" and score >= min_score:
             old_filer = entry.filer
             entry.filer = filer
@@ -880,45 +865,53 @@ def _parse_args() -> argparse.Namespace:
         default=6,
         help="Score to assign to manual overrides.",
     )
+    add_metrics_arguments(parser)
     return parser.parse_args()
 
 
 def main() -> None:
     args = _parse_args()
+    metrics = metrics_from_args(args, "build_bookmark_filer_map")
     pdf_path = args.pdf.expanduser().resolve()
     output_dir = args.output_dir.expanduser().resolve()
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    reader = PyPDF2.PdfReader(str(pdf_path))
-    total_pages = len(reader.pages)
-    try:
-        outlines = reader.outline
-    except Exception:
-        outlines = reader.outlines
-
-    nodes = _parse_outline(reader, outlines)
-    flat: List[dict] = []
-    _flatten(nodes, flat)
-    _compute_ranges(flat, total_pages)
-    entries = _build_entries(flat)
-    entries = _apply_parent_child_mapping(entries)
+    with metrics.stage("outline"):
+        import PyPDF2
+
+        reader = PyPDF2.PdfReader(str(pdf_path))
+        total_pages = len(reader.pages)
+        try:
+            outlines = reader.outline
+        except Exception:
+            outlines = reader.outlines
+
+        nodes = _parse_outline(reader, outlines)
+        flat: List[dict] = []
+        _flatten(nodes, flat)
+        _compute_ranges(flat, total_pages)
+        entries = _build_entries(flat)
+        entries = _apply_parent_child_mapping(entries)
+    metrics.count("pages", total_pages)
+    metrics.count("bookmarks", len(entries))
     overrides: List[dict] = []
 
     if args.json:
         json_path = args.json.expanduser().resolve()
         if json_path.exists():
-            pages = _load_page_text(json_path)
-            docket_map = _load_docket_filer_map(args.docket_filer_map.expanduser().resolve())
-            docket_entries = _extract_docket_entries(pages)
-            entries, overrides = _resolve_unknowns_by_context(
-                entries,
-                pages,
-                docket_map,
-                docket_entries,
-                args.context_pages,
-                args.min_context_score,
-            )
-            entries = _apply_parent_child_mapping(entries)
+            with metrics.stage("context"):
+                pages = _load_page_text(json_path)
+                docket_map = load_docket_filer_map(args.docket_filer_map.expanduser().resolve())
+                docket_entries = _extract_docket_entries(pages)
+                entries, overrides = _resolve_unknowns_by_context(
+                    entries,
+                    pages,
+                    docket_map,
+                    docket_entries,
+                    args.context_pages,
+                    args.min_context_score,
+                )
+                entries = _apply_parent_child_mapping(entries)
 
     manual_overrides = _load_manual_overrides(args.manual_overrides.expanduser().resolve()) if args.manual_overrides else {}
     manual_applied: List[dict] = []
@@ -926,16 +919,18 @@ def main() -> None:
         entries, manual_applied = _apply_manual_overrides(entries, manual_overrides, args.manual_score)
         entries = _apply_parent_child_mapping(entries)
 
-    _write_csv(output_dir / "28b_bookmark_index.csv", entries, leaf_only=False)
-    _write_csv(output_dir / "28b_bookmark_documents.csv", entries, leaf_only=True)
-    _write_summary(output_dir / "28b_bookmark_filer_summary.md", entries, leaf_only=False)
-    _write_summary(output_dir / "28b_bookmark_filer_summary_leaf.md", entries, leaf_only=True)
-    if overrides:
-        _write_overrides(output_dir / "28b_bookmark_context_overrides.csv", overrides)
-    if manual_applied:
-        _write_overrides(output_dir / "28b_bookmark_manual_overrides.csv", manual_applied)
+    with metrics.stage("write"):
+        _write_csv(output_dir / "28b_bookmark_index.csv", entries, leaf_only=False)
+        _write_csv(output_dir / "28b_bookmark_documents.csv", entries, leaf_only=True)
+        _write_summary(output_dir / "28b_bookmark_filer_summary.md", entries, leaf_only=False)
+        _write_summary(output_dir / "28b_bookmark_filer_summary_leaf.md", entries, leaf_only=True)
+        if overrides:
+            _write_overrides(output_dir / "28b_bookmark_context_overrides.csv", overrides)
+        if manual_applied:
+            _write_overrides(output_dir / "28b_bookmark_manual_overrides.csv", manual_applied)
 
     print(f"Wrote bookmark reports to {output_dir}")
+    metrics.finish()
 
 
 if __name__ == "__main__":
@@ -3,14 +3,21 @@
 from __future__ import annotations
 
 import argparse
-import json
 import re
+import sys
 from collections import Counter, defaultdict
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Iterable, List, Tuple
 
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.instrumentation import add_metrics_arguments, metrics_from_args  # noqa: E402
+from scripts.warm_cache import load_json  # noqa: E402
+
 MONTHS = {
     "jan": 1,
     "january": 1,
@@ -245,7 +252,7 @@ def _parse_date(date_text: str, min_year: int, max_year: int) -> datetime | None
 
 
 def _iter_pages(json_path: Path) -> Iterable[PageRecord]:
-    payload = json.loads(json_path.read_text(encoding="utf-8"))
+    payload = load_json(json_path)
     for page in payload.get("pages", []):
         yield PageRecord(page_number=page["page_number"], text=page.get("text", ""))
 
@@ -613,50 +620,57 @@ def _parse_args() -> argparse.Namespace:
     parser.add_argument("--max-flag-hits", type=int, default=8, help="Flag hits per category.")
     parser.add_argument("--max-exhibit-pages", type=int, default=8, help="Exhibit pages per label.")
     parser.add_argument("--max-correspondence", type=int, default=20, help="Correspondence hits.")
+    add_metrics_arguments(parser)
     return parser.parse_args()
 
 
 def main() -> None:
     args = _parse_args()
+    metrics = metrics_from_args(args, "build_case_memorandum")
     json_path = args.json.expanduser().resolve()
     output_path = args.output.expanduser().resolve()
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    pages = list(_iter_pages(json_path))
+    with metrics.stage("load"):
+        pages = list(_iter_pages(json_path))
+    metrics.count("pages", len(pages))
     total_chars = sum(len(page.text) for page in pages)
     case_info = _extract_case_info(pages[0].text if pages else "")
-    date_stats = _collect_date_stats(pages, args.min_year, args.max_year)
-    issue_counts = _collect_issue_counts(pages)
-    hotspots = _collect_hotspots(pages, args.max_hotspots)
-    events = _collect_events(
-        pages,
-        args.min_year,
-        args.max_year,
-        args.max_events,
-        args.max_events_per_date,
-        args.max_events_per_page,
-    )
-    outcomes = _collect_outcomes(pages, args.max_outcomes, args.max_outcome_per_term)
-    flags = _collect_procedural_flags(pages, args.max_flag_hits)
-    exhibits = _collect_exhibits(pages, args.max_exhibit_pages)
-    correspondence = _collect_correspondence(pages, args.max_correspondence)
-
-    _write_memo(
-        output_path,
-        case_info=case_info,
-        page_count=len(pages),
-        total_chars=total_chars,
-        date_stats=date_stats,
-        issue_counts=issue_counts,
-        hotspots=hotspots,
-        events=events,
-        outcomes=outcomes,
-        flags=flags,
-        exhibits=exhibits,
-        correspondence=correspondence,
-    )
+    with metrics.stage("collect"):
+        date_stats = _collect_date_stats(pages, args.min_year, args.max_year)
+        issue_counts = _collect_issue_counts(pages)
+        hotspots = _collect_hotspots(pages, args.max_hotspots)
+        events = _collect_events(
+            pages,
+            args.min_year,
+            args.max_year,
+            args.max_events,
+            args.max_events_per_date,
+            args.max_events_per_page,
+        )
+        outcomes = _collect_outcomes(pages, args.max_outcomes, args.max_outcome_per_term)
+        flags = _collect_procedural_flags(pages, args.max_flag_hits)
+        exhibits = _collect_exhibits(pages, args.max_exhibit_pages)
+        correspondence = _collect_correspondence(pages, args.max_correspondence)
+
+    with metrics.stage("write"):
+        _write_memo(
+            output_path,
+            case_info=case_info,
+            page_count=len(pages),
+            total_chars=total_chars,
+            date_stats=date_stats,
+            issue_counts=issue_counts,
+            hotspots=hotspots,
+            events=events,
+            outcomes=outcomes,
+            flags=flags,
+            exhibits=exhibits,
+            correspondence=correspondence,
+        )
 
     print(f"Wrote case memorandum to {output_path}")
+    metrics.finish()
 
 
 if __name__ == "__main__":
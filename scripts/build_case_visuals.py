@@ -3,21 +3,27 @@
 from __future__ import annotations
 
 import argparse
-import json
 import math
 import re
+import sys
 from collections import Counter, defaultdict
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Iterable, List, Tuple
 
-import matplotlib
-
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
 import numpy as np
 
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.disk_cache import add_cache_arguments, cache_from_args, memoize  # noqa: E402
+from scripts.figure_jobs import DEFAULT_WORKERS, FigureJob, render_figures  # noqa: E402
+from scripts.instrumentation import add_metrics_arguments, metrics_from_args  # noqa: E402
+from scripts.plotting import pyplot  # noqa: E402
+from scripts.warm_cache import load_json  # noqa: E402
+
 MONTHS = {
     "jan": 1,
     "january": 1,
@@ -240,7 +246,7 @@ def _parse_date(date_text: str, min_year: int, max_year: int) -> datetime | None
 
 
 def _iter_pages(json_path: Path) -> Iterable[PageRecord]:
-    payload = json.loads(json_path.read_text(encoding="utf-8"))
+    payload = load_json(json_path)
     for page in payload.get("pages", []):
         yield PageRecord(page_number=page["page_number"], text=page.get("text", ""))
 
@@ -257,6 +263,7 @@ def _count_keywords(text_lower: str, keywords: List[str]) -> int:
     return sum(text_lower.count(keyword) for keyword in keywords)
 
 
+@memoize()
 def _collect_metrics(
     pages: List[PageRecord],
     min_year: int,
@@ -349,6 +356,7 @@ def _bin_series(values: List[int], bin_size: int) -> Tuple[np.ndarray, np.ndarra
 
 
 def _plot_issue_distribution(output_path: Path, issue_counts: Dict[str, int]) -> None:
+    plt = pyplot()
     labels = list(issue_counts.keys())
     values = [issue_counts[label] for label in labels]
     order = np.argsort(values)
@@ -370,6 +378,7 @@ def _plot_timeline_heatmap(
     fallback_start: int,
     fallback_end: int,
 ) -> None:
+    plt = pyplot()
     timeline = _year_month_range(date_counts, fallback_start, fallback_end)
     years = sorted({year for year, _ in timeline})
     year_index = {year: idx for idx, year in enumerate(years)}
@@ -402,6 +411,7 @@ def _plot_issue_timeline(
     fallback_start: int,
     fallback_end: int,
 ) -> None:
+    plt = pyplot()
     totals = {issue: sum(counts.values()) for issue, counts in issue_counts_by_month.items()}
     top_issues = sorted(totals, key=totals.get, reverse=True)[:top_n]
     timeline = _year_month_range(date_counts, fallback_start, fallback_end)
@@ -431,6 +441,7 @@ def _plot_flags_by_page(
     bin_size: int,
     top_n: int,
 ) -> None:
+    plt = pyplot()
     totals = {flag: sum(values) for flag, values in flag_counts_by_page.items()}
     top_flags = sorted(totals, key=totals.get, reverse=True)[:top_n]
 
@@ -455,6 +466,7 @@ def _plot_flags_by_page(
 
 
 def _plot_outcome_frequency(output_path: Path, outcome_counts: Counter) -> None:
+    plt = pyplot()
     labels = OUTCOME_TERMS
     values = [outcome_counts.get(term, 0) for term in labels]
     plt.figure(figsize=(10, 5))
@@ -472,6 +484,7 @@ def _plot_exhibit_correspondence(
     correspondence_counts_by_page: List[int],
     bin_size: int,
 ) -> None:
+    plt = pyplot()
     x, exhibits = _bin_series(exhibit_counts_by_page, bin_size)
     _, correspondence = _bin_series(correspondence_counts_by_page, bin_size)
 
@@ -540,17 +553,30 @@ def _parse_args() -> argparse.Namespace:
     parser.add_argument("--bin-size", type=int, default=100, help="Page bin size for density charts.")
     parser.add_argument("--top-issues", type=int, default=5, help="Top issues in stacked timeline.")
     parser.add_argument("--top-flags", type=int, default=5, help="Top flags in stacked bars.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="Processes rendering figures (1 = render in-process).",
+    )
+    add_cache_arguments(parser)
+    add_metrics_arguments(parser)
     return parser.parse_args()
 
 
 def main() -> None:
     args = _parse_args()
+    run_metrics = metrics_from_args(args, "build_case_visuals")
+    cache_from_args(args)
     json_path = args.json.expanduser().resolve()
     output_dir = args.output_dir.expanduser().resolve()
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    pages = list(_iter_pages(json_path))
-    metrics = _collect_metrics(pages, args.min_year, args.max_year)
+    with run_metrics.stage("load"):
+        pages = list(_iter_pages(json_path))
+    run_metrics.count("pages", len(pages))
+    with run_metrics.stage("collect"):
+        metrics = _collect_metrics(pages, args.min_year, args.max_year)
 
     issue_dist_path = output_dir / "issue_keyword_distribution.png"
     timeline_heatmap_path = output_dir / "timeline_heatmap.png"
@@ -559,34 +585,41 @@ def main() -> None:
     outcomes_path = output_dir / "outcome_term_frequency.png"
     exhibit_path = output_dir / "exhibit_correspondence_density.png"
 
-    _plot_issue_distribution(issue_dist_path, metrics["issue_counts"])
-    _plot_timeline_heatmap(
-        timeline_heatmap_path,
-        metrics["date_counts"],
-        args.min_year,
-        args.max_year,
-    )
-    _plot_issue_timeline(
-        issue_timeline_path,
-        metrics["issue_counts_by_month"],
-        metrics["date_counts"],
-        args.top_issues,
-        args.min_year,
-        args.max_year,
-    )
-    _plot_flags_by_page(
-        flags_path,
-        metrics["flag_counts_by_page"],
-        args.bin_size,
-        args.top_flags,
-    )
-    _plot_outcome_frequency(outcomes_path, metrics["outcome_counts"])
-    _plot_exhibit_correspondence(
-        exhibit_path,
-        metrics["exhibit_counts_by_page"],
-        metrics["correspondence_counts_by_page"],
-        args.bin_size,
-    )
+    jobs = [
+        FigureJob(_plot_issue_distribution, (issue_dist_path, metrics["issue_counts"])),
+        FigureJob(
+            _plot_timeline_heatmap,
+            (timeline_heatmap_path, metrics["date_counts"], args.min_year, args.max_year),
+        ),
+        FigureJob(
+            _plot_issue_timeline,
+            (
+                issue_timeline_path,
+                metrics["issue_counts_by_month"],
+                metrics["date_counts"],
+                args.top_issues,
+                args.min_year,
+                args.max_year,
+            ),
+        ),
+        FigureJob(
+            _plot_flags_by_page,
+            (flags_path, metrics["flag_counts_by_page"], args.bin_size, args.top_flags),
+        ),
+        FigureJob(_plot_outcome_frequency, (outcomes_path, metrics["outcome_counts"])),
+        FigureJob(
+            _plot_exhibit_correspondence,
+            (
+                exhibit_path,
+                metrics["exhibit_counts_by_page"],
+                metrics["correspondence_counts_by_page"],
+                args.bin_size,
+            ),
+        ),
+    ]
+    with run_metrics.stage("plot"):
+        render_figures(jobs, args.workers)
+    run_metrics.count("figures", len(jobs))
 
     index_path = output_dir / "index.html"
     images = [
@@ -600,6 +633,7 @@ def main() -> None:
     _write_index(index_path, images)
 
     print(f"Wrote visuals to {output_dir}")
+    run_metrics.finish()
 
 
 if __name__ == "__main__":
@@ -1,18 +1,22 @@
-"""Create visuals from the citation spotting report."""
+"""Create visuals from the citation spotting report or a store's citation index."""
 
 from __future__ import annotations
 
 import argparse
 import re
+import sys
 import textwrap
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Tuple
 
-import matplotlib
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
 
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+from scripts.citation_index import load_or_update_index, mention_counts, read_index  # noqa: E402
+from scripts.instrumentation import add_metrics_arguments, metrics_from_args  # noqa: E402
+from scripts.plotting import pyplot  # noqa: E402
 
 NON_ASCII_MAP = str.maketrans(
     {
@@ -68,6 +72,21 @@ def _parse_citations(path: Path) -> Dict[str, List[Tuple[str, int]]]:
     return sections
 
 
+def _sections_from_index(path: Path) -> Dict[str, List[Tuple[str, int]]]:
+    """Read counts straight from ``citation_index.json`` (or a store directory)."""
+
+    if path.is_dir() and (path / "metadata.jsonl").exists():
+        index = load_or_update_index(path)
+    else:
+        index = read_index(path)
+    if index is None:
+        raise FileNotFoundError(f"Missing citation index: {path}")
+    return {
+        _normalize_ascii(title): mention_counts(postings)
+        for title, postings in index.sections()
+    }
+
+
 def _wrap_labels(labels: List[str], width: int = 40) -> List[str]:
     wrapped = []
     for label in labels:
@@ -76,6 +95,7 @@ def _wrap_labels(labels: List[str], width: int = 40) -> List[str]:
 
 
 def _plot_bar(path: Path, items: List[Tuple[str, int]], title: str, xlabel: str) -> None:
+    plt = pyplot()
     if not items:
         return
     labels = [label for label, _count in items]
@@ -99,6 +119,7 @@ def _plot_category_summary(
     title: str,
     xlabel: str,
 ) -> None:
+    plt = pyplot()
     if not items:
         return
     labels = [label for label, _count in items]
@@ -163,6 +184,15 @@ def _parse_args() -> argparse.Namespace:
         default=Path("reports/28b_citations.md"),
         help="Path to the citations markdown report.",
     )
+    parser.add_argument(
+        "--index",
+        type=Path,
+        default=None,
+        help=(
+            "Citation index (citation_index.json) or vector store directory; "
+            "used instead of --input when given."
+        ),
+    )
     parser.add_argument(
         "--output-dir",
         type=Path,
@@ -170,43 +200,51 @@ def _parse_args() -> argparse.Namespace:
         help="Directory to write images and HTML.",
     )
     parser.add_argument("--top", type=int, default=20, help="Top items per category.")
+    add_metrics_arguments(parser)
     return parser.parse_args()
 
 
 def main() -> None:
     args = _parse_args()
-    input_path = args.input.expanduser().resolve()
+    metrics = metrics_from_args(args, "build_citation_visuals")
     output_dir = args.output_dir.expanduser().resolve()
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    sections = _parse_citations(input_path)
+    with metrics.stage("load"):
+        if args.index:
+            sections = _sections_from_index(args.index.expanduser().resolve())
+        else:
+            sections = _parse_citations(args.input.expanduser().resolve())
 
     unique_counts = [(section, len(items)) for section, items in sections.items()]
-    mention_counts = [(section, sum(count for _label, count in items)) for section, items in sections.items()]
+    section_totals = [(section, sum(count for _label, count in items)) for section, items in sections.items()]
     unique_counts.sort(key=lambda item: item[1], reverse=True)
-    mention_counts.sort(key=lambda item: item[1], reverse=True)
+    section_totals.sort(key=lambda item: item[1], reverse=True)
 
     images: List[Tuple[str, str]] = []
 
     unique_path = output_dir / "citation_unique_counts.png"
-    _plot_category_summary(unique_path, unique_counts, "Unique citations by category", "Unique items")
-    images.append((unique_path.name, "Unique citations by category"))
-
-    mentions_path = output_dir / "citation_total_mentions.png"
-    _plot_category_summary(mentions_path, mention_counts, "Total citation mentions by category", "Total mentions")
-    images.append((mentions_path.name, "Total citation mentions by category"))
-
-    for section, items in sections.items():
-        sorted_items = sorted(items, key=lambda item: item[1], reverse=True)[: args.top]
-        filename = f"citations_{_safe_slug(section)}.png"
-        path = output_dir / filename
-        _plot_bar(path, sorted_items, f"Top citations: {section}", "Count")
-        images.append((filename, f"Top citations: {section}"))
+    with metrics.stage("plot"):
+        _plot_category_summary(unique_path, unique_counts, "Unique citations by category", "Unique items")
+        images.append((unique_path.name, "Unique citations by category"))
+
+        mentions_path = output_dir / "citation_total_mentions.png"
+        _plot_category_summary(mentions_path, section_totals, "Total citation mentions by category", "Total mentions")
+        images.append((mentions_path.name, "Total citation mentions by category"))
+
+        for section, items in sections.items():
+            sorted_items = sorted(items, key=lambda item: item[1], reverse=True)[: args.top]
+            filename = f"citations_{_safe_slug(section)}.png"
+            path = output_dir / filename
+            _plot_bar(path, sorted_items, f"Top citations: {section}", "Count")
+            images.append((filename, f"Top citations: {section}"))
+    metrics.count("figures", len(images))
 
     index_path = output_dir / "index.html"
     _write_index(index_path, images)
 
     print(f"Wrote citation visuals to {output_dir}")
+    metrics.finish()
 
 
 if __name__ == "__main__":
@@ -7,15 +7,27 @@ import csv
 import json
 import os
 import re
+import sys
 from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from hashlib import sha1
 from pathlib import Path
 from typing import Dict, Iterable, List, Tuple
 
-import cv2
 import numpy as np
-import pytesseract
 
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.instrumentation import add_metrics_arguments, metrics_from_args  # noqa: E402
+from scripts.ocr_backend import (  # noqa: E402
+    BACKENDS,
+    OcrBackend,
+    make_backend,
+)
+from scripts.warm_cache import load_json  # noqa: E402
 
 COLOR_BANDS = {
     "red": [(0, 15), (170, 179)],
@@ -43,6 +55,13 @@ DEFAULT_FILER_BY_ROLE = {
 
 DOCKET_LINE = re.compile(r"^\s*(\d{1,4})\s+\d{2}/\d{2}/\d{4}\b")
 
+# Bump when segmentation or OCR preprocessing changes so cached results are redone.
+PARSER_VERSION = 1
+CACHE_FILENAME = "28b_docket_filer_ocr_cache.json"
+
+LINE_CONFIG = "--psm 7 -c tessedit_char_whitelist=0123456789"
+BLOCK_CONFIG = "--psm 6 -c tessedit_char_whitelist=0123456789"
+
 
 @dataclass
 class OcrHit:
@@ -98,27 +117,60 @@ def _edit_distance(a: str, b: str) -> int:
     return dp[-1][-1]
 
 
-def _correct_filemark(raw: str, valid_set: set[str]) -> Tuple[str | None, bool]:
+@dataclass
+class FilemarkIndex:
+    """Valid filemarks plus their one-deletion neighbourhoods.
+
+    Two strings are within one edit only if they share a member of
+    ``{s} | {s minus one character}``, so ``neighbours`` maps each such
+    variant to the filemarks that produce it.
+    """
+
+    valid: set[str]
+    neighbours: Dict[str, List[str]]
+
+
+def _deletion_variants(value: str) -> set[str]:
+    return {value} | {value[:idx] + value[idx + 1 :] for idx in range(len(value))}
+
+
+def _build_filemark_index(valid_set: set[str]) -> FilemarkIndex:
+    neighbours: Dict[str, List[str]] = defaultdict(list)
+    for filemark in valid_set:
+        for variant in _deletion_variants(filemark):
+            neighbours[variant].append(filemark)
+    return FilemarkIndex(valid=set(valid_set), neighbours=dict(neighbours))
+
+
+def _correct_filemark(raw: str, index: FilemarkIndex) -> Tuple[str | None, bool]:
     if not raw:
         return None, False
-    if raw in valid_set:
+    if raw in index.valid:
         return raw, False
+    # Shared variants also pair some distance-2 strings (e.g. "12"/"21"),
+    # so each candidate is still confirmed with the full edit distance.
+    found = {
+        candidate
+        for variant in _deletion_variants(raw)
+        for candidate in index.neighbours.get(variant, ())
+    }
     candidates = []
-    for candidate in valid_set:
-        if abs(len(candidate) - len(raw)) > 1:
-            continue
+    for candidate in found:
         distance = _edit_distance(raw, candidate)
         if distance <= 1:
             diff = abs(int(candidate) - int(raw))
             candidates.append((distance, diff, len(candidate), candidate))
     if candidates:
         candidates.sort()
+        # Equally close on both counts (e.g. "15" -> "14" or "16"): don't guess.
+        if len(candidates) > 1 and candidates[1][:2] == candidates[0][:2]:
+            return None, False
         return candidates[0][3], True
     return raw, False
 
 
 def _extract_filemarks(json_path: Path) -> set[str]:
-    payload = json.loads(json_path.read_text(encoding="utf-8"))
+    payload = load_json(json_path)
     filemarks: set[str] = set()
     for page in payload.get("pages", []):
         text = page.get("text", "")
@@ -129,16 +181,77 @@ def _extract_filemarks(json_path: Path) -> set[str]:
     return filemarks
 
 
-def _mask_for_color(hsv: np.ndarray, bands: List[Tuple[int, int]], s_thr: int, v_thr: int) -> np.ndarray:
-    mask = np.zeros(hsv.shape[:2], dtype=np.uint8)
-    for lo, hi in bands:
-        lower = np.array([lo, s_thr, v_thr])
-        upper = np.array([hi, 255, 255])
-        mask = cv2.bitwise_or(mask, cv2.inRange(hsv, lower, upper))
-    return mask
+def _build_hue_lut(color_bands: Dict[str, List[Tuple[int, int]]]) -> np.ndarray:
+    """Map every OpenCV hue to a bitmask of the colour classes whose bands hold it.
+
+    Bands may overlap (green and light blue share 80-85), so one pixel can
+    carry several class bits; bit ``k`` is the ``k``-th entry of ``color_bands``.
+    """
+
+    if len(color_bands) > 8:
+        raise ValueError("At most 8 colour classes fit the uint8 label bitmask.")
+    lut = np.zeros(256, dtype=np.uint8)
+    for bit, bands in enumerate(color_bands.values()):
+        for lo, hi in bands:
+            lut[lo : hi + 1] |= 1 << bit
+    return lut
+
+
+HUE_CLASS_LUT = _build_hue_lut(COLOR_BANDS)
+
+
+def _label_classes(hsv: np.ndarray, s_thr: int, v_thr: int) -> np.ndarray:
+    labels = HUE_CLASS_LUT[hsv[..., 0]]
+    labels[(hsv[..., 1] < s_thr) | (hsv[..., 2] < v_thr)] = 0
+    return labels
+
+
+def _reduce_3x3(image: np.ndarray, op: np.ufunc, border: int) -> np.ndarray:
+    padded = np.pad(image, 1, constant_values=border)
+    rows = op(op(padded[:-2], padded[1:-1]), padded[2:])
+    return op(op(rows[:, :-2], rows[:, 1:-1]), rows[:, 2:])
+
+
+def _open_classes(labels: np.ndarray) -> np.ndarray:
+    """3x3 opening of every class bit plane of ``labels`` at once.
+
+    On a binary plane erosion is the AND of the neighbourhood and dilation
+    the OR, so bitwise AND/OR over shifted copies opens all classes together.
+    Borders match OpenCV's defaults: outside pixels neither erode nor dilate.
+    """
+
+    return _reduce_3x3(_reduce_3x3(labels, np.bitwise_and, 0xFF), np.bitwise_or, 0)
+
+
+def _class_boxes(labels: np.ndarray, n_classes: int) -> List[List[Tuple[int, int, int, int]]]:
+    """Bounding boxes of each class's outer components from one ``findContours`` call.
+
+    The class bit planes are laid side by side with a blank column between
+    them, so components of different classes never touch or nest.
+    """
+
+    import cv2
 
+    height, width = labels.shape
+    stride = width + 1
+    bits = np.arange(n_classes, dtype=np.uint8)[:, None, None]
+    planes = ((labels[None] >> bits) & 1) * np.uint8(255)
+    planes = np.pad(planes, ((0, 0), (0, 0), (0, 1)))
+    tiled = np.ascontiguousarray(planes.transpose(1, 0, 2).reshape(height, n_classes * stride))
+    contours, _ = cv2.findContours(tiled, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    boxes: List[List[Tuple[int, int, int, int]]] = [[] for _ in range(n_classes)]
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        bit = x // stride
+        boxes[bit].append((x - bit * stride, y, w, h))
+    return boxes
+
+
+def _prepare_block(block: np.ndarray) -> Tuple[List[np.ndarray], np.ndarray]:
+    """Return the per-line OCR crops of a filemark box and its whole-box image."""
+
+    import cv2
 
-def _extract_numbers(block: np.ndarray) -> List[str]:
     scale = 6
     block_big = cv2.resize(block, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
     gray = cv2.cvtColor(block_big, cv2.COLOR_BGR2GRAY)
@@ -161,52 +274,68 @@ def _extract_numbers(block: np.ndarray) -> List[str]:
     if start is not None:
         segments.append((start, len(row_counts) - 1))
 
-    numbers: List[str] = []
     if not segments:
         segments = [(0, bw.shape[0])]
 
+    lines: List[np.ndarray] = []
     for y0, y1 in segments:
         line = bw[y0:y1, :]
         inv = 255 - line
-        inv = cv2.copyMakeBorder(inv, 6, 6, 6, 6, cv2.BORDER_CONSTANT, value=255)
-        text = pytesseract.image_to_string(
-            inv, config="--psm 7 -c tessedit_char_whitelist=0123456789"
-        )
-        text = "".join(ch for ch in text if ch.isdigit())
-        if text:
-            numbers.append(text)
+        lines.append(cv2.copyMakeBorder(inv, 6, 6, 6, 6, cv2.BORDER_CONSTANT, value=255))
+    return lines, 255 - bw
 
-    if not numbers:
-        text = pytesseract.image_to_string(
-            255 - bw, config="--psm 6 -c tessedit_char_whitelist=0123456789"
-        )
+
+def _extract_numbers_batch(blocks: List[np.ndarray], ocr: OcrBackend) -> List[List[str]]:
+    """OCR the filemark numbers of many boxes with two backend calls.
+
+    Every line crop of every box is read in one batch; boxes that yield no
+    digits fall back to a single whole-box read, batched the same way.
+    """
+
+    prepared = [_prepare_block(block) for block in blocks]
+    line_images = [line for lines, _whole in prepared for line in lines]
+    line_texts = iter(ocr.image_to_string(line_images, LINE_CONFIG))
+
+    results: List[List[str]] = []
+    for lines, _whole in prepared:
+        numbers: List[str] = []
+        for _line in lines:
+            text = "".join(ch for ch in next(line_texts) if ch.isdigit())
+            if text:
+                numbers.append(text)
+        results.append(numbers)
+
+    retry = [idx for idx, numbers in enumerate(results) if not numbers]
+    block_texts = ocr.image_to_string([prepared[idx][1] for idx in retry], BLOCK_CONFIG)
+    for idx, text in zip(retry, block_texts):
         for line in text.splitlines():
             digits = "".join(ch for ch in line if ch.isdigit())
             if digits:
-                numbers.append(digits)
+                results[idx].append(digits)
+    return results
 
-    return numbers
 
+def _parse_image(image_path: Path, ocr: OcrBackend) -> List[Tuple[str, List[str]]]:
+    import cv2
 
-def _parse_image(image_path: Path) -> List[Tuple[str, List[str]]]:
     img = cv2.imread(str(image_path))
     if img is None:
         return []
-    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-    height, width = hsv.shape[:2]
+    height, width = img.shape[:2]
     margin_limit = min(160, max(60, int(width * 0.2)))
-    results: List[Tuple[str, List[str]]] = []
     s_thr = 40
     v_thr = 40
-    for color, bands in COLOR_BANDS.items():
-        mask = _mask_for_color(hsv, bands, s_thr, v_thr)
-        mask[:, margin_limit:] = 0
-        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
-        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel, iterations=1)
-        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    # Filemark boxes sit in the left margin; only that strip is labelled.
+    hsv = cv2.cvtColor(img[:, :margin_limit], cv2.COLOR_BGR2HSV)
+    labels = _label_classes(hsv, s_thr, v_thr)
+    if margin_limit < width:
+        # Keep the cleared column right of the strip so the opening erodes there.
+        labels = np.pad(labels, ((0, 0), (0, 1)))
+    labels = _open_classes(labels)
+    crops: List[Tuple[str, np.ndarray]] = []
+    for color, class_boxes in zip(COLOR_BANDS, _class_boxes(labels, len(COLOR_BANDS))):
         boxes: List[Tuple[int, int, int, int]] = []
-        for contour in contours:
-            x, y, w, h = cv2.boundingRect(contour)
+        for x, y, w, h in class_boxes:
             if w < 10 or h < 10:
                 continue
             area = w * h
@@ -215,11 +344,85 @@ def _parse_image(image_path: Path) -> List[Tuple[str, List[str]]]:
             boxes.append((x, y, w, h))
         boxes.sort(key=lambda b: (b[1], b[0]))
         for x, y, w, h in boxes:
-            crop = img[y : y + h, x : x + w]
-            numbers = _extract_numbers(crop)
-            if numbers:
-                results.append((color, numbers))
-    return results
+            crops.append((color, img[y : y + h, x : x + w]))
+
+    numbers_by_box = _extract_numbers_batch([crop for _color, crop in crops], ocr)
+    return [
+        (color, numbers)
+        for (color, _crop), numbers in zip(crops, numbers_by_box)
+        if numbers
+    ]
+
+
+def _image_digest(image_path: Path) -> str:
+    return sha1(image_path.read_bytes()).hexdigest()
+
+
+def _parse_job(job: Tuple[Path, str, int | None]) -> List[Tuple[str, List[str]]]:
+    image_path, backend, ocr_workers = job
+    return _parse_image(image_path, make_backend(backend, workers=ocr_workers))
+
+
+def _load_parse_cache(cache_path: Path) -> Dict[str, List[Tuple[str, List[str]]]]:
+    """Return cached ``_parse_image`` results keyed by image content hash."""
+
+    if not cache_path.exists():
+        return {}
+    try:
+        payload = json.loads(cache_path.read_text(encoding="utf-8"))
+    except (ValueError, OSError):
+        return {}
+    if payload.get("version") != PARSER_VERSION:
+        return {}
+    return {
+        digest: [(color, list(numbers)) for color, numbers in entry["results"]]
+        for digest, entry in payload.get("images", {}).items()
+    }
+
+
+def _save_parse_cache(
+    cache_path: Path,
+    images: List[Path],
+    digests: List[str],
+    cache: Dict[str, List[Tuple[str, List[str]]]],
+) -> None:
+    payload = {
+        "version": PARSER_VERSION,
+        "images": {
+            digest: {"image": image_path.name, "results": cache[digest]}
+            for image_path, digest in zip(images, digests)
+        },
+    }
+    tmp_path = cache_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    tmp_path.replace(cache_path)
+
+
+def _parse_images(
+    images: List[Path],
+    digests: List[str],
+    cache: Dict[str, List[Tuple[str, List[str]]]],
+    *,
+    backend: str,
+    workers: int,
+    ocr_workers: int | None,
+) -> int:
+    """Parse images whose content hash is not cached yet; return how many ran."""
+
+    pending: Dict[str, Path] = {}
+    for image_path, digest in zip(images, digests):
+        if digest not in cache:
+            pending.setdefault(digest, image_path)
+    if workers > 1 and len(pending) > 1:
+        # Each process already runs its own tesseract; don't multiply them.
+        jobs = [(path, backend, ocr_workers or 1) for path in pending.values()]
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            parsed = list(executor.map(_parse_job, jobs))
+    else:
+        ocr = make_backend(backend, workers=ocr_workers)
+        parsed = [_parse_image(path, ocr) for path in pending.values()]
+    cache.update(zip(pending, parsed))
+    return len(pending)
 
 
 def _write_ocr_hits(output_path: Path, hits: List[OcrHit]) -> None:
@@ -306,44 +509,101 @@ def _parse_args() -> argparse.Namespace:
         default=Path("reports"),
         help="Directory to write mapping outputs.",
     )
+    parser.add_argument(
+        "--ocr-backend",
+        choices=BACKENDS,
+        default="batch",
+        help="batch: one tesseract process per list of crops; per-call: one per crop.",
+    )
+    parser.add_argument(
+        "--ocr-workers",
+        type=int,
+        default=None,
+        help="Concurrent tesseract processes for the batch backend (default: CPU count).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes for parsing docket images (1 = parse in-process).",
+    )
+    parser.add_argument(
+        "--cache",
+        type=Path,
+        default=None,
+        help=f"Per-image result cache (default: <output-dir>/{CACHE_FILENAME}).",
+    )
+    parser.add_argument(
+        "--rebuild-cache",
+        action="store_true",
+        help="Ignore cached results and re-parse every image.",
+    )
+    add_metrics_arguments(parser)
     return parser.parse_args()
 
 
 def main() -> None:
     args = _parse_args()
+    metrics = metrics_from_args(args, "build_docket_filer_map")
     images_dir = args.images_dir.expanduser().resolve()
     json_path = args.json.expanduser().resolve()
     output_dir = args.output_dir.expanduser().resolve()
     output_dir.mkdir(parents=True, exist_ok=True)
 
     _ensure_tesseract()
-    valid_set = _extract_filemarks(json_path) if json_path.exists() else set()
+    with metrics.stage("filemarks"):
+        valid_set = _extract_filemarks(json_path) if json_path.exists() else set()
+        filemark_index = _build_filemark_index(valid_set) if valid_set else None
+
+    cache_path = (args.cache or output_dir / CACHE_FILENAME).expanduser().resolve()
+    cache = {} if args.rebuild_cache else _load_parse_cache(cache_path)
+    images = list(_iter_images(images_dir))
+    with metrics.stage("digest"):
+        digests = [_image_digest(image_path) for image_path in images]
+    with metrics.stage("ocr"):
+        parsed_count = _parse_images(
+            images,
+            digests,
+            cache,
+            backend=args.ocr_backend,
+            workers=args.workers,
+            ocr_workers=args.ocr_workers,
+        )
+    metrics.count("images", len(images))
+    metrics.count("images.ocr", parsed_count)
+    metrics.count("images.ocr_cache", len(images) - parsed_count)
+    _save_parse_cache(cache_path, images, digests, cache)
+    print(f"Parsed {parsed_count} new or changed images; reused {len(images) - parsed_count} from cache.")
 
     hits: List[OcrHit] = []
-    for image_path in _iter_images(images_dir):
-        parsed = _parse_image(image_path)
-        for color, numbers in parsed:
-            role = ROLE_BY_COLOR.get(color, "unknown")
-            filer = DEFAULT_FILER_BY_ROLE.get(role, "unknown")
-            for raw in numbers:
-                corrected, corrected_flag = _correct_filemark(raw, valid_set) if valid_set else (raw, False)
-                hits.append(
-                    OcrHit(
-                        filemark_raw=raw,
-                        filemark=corrected,
-                        corrected=corrected_flag,
-                        color=color,
-                        role=role,
-                        filer=filer,
-                        source_image=image_path.name,
+    with metrics.stage("correct"):
+        for image_path, digest in zip(images, digests):
+            for color, numbers in cache[digest]:
+                role = ROLE_BY_COLOR.get(color, "unknown")
+                filer = DEFAULT_FILER_BY_ROLE.get(role, "unknown")
+                for raw in numbers:
+                    corrected, corrected_flag = (
+                        _correct_filemark(raw, filemark_index) if filemark_index else (raw, False)
+                    )
+                    hits.append(
+                        OcrHit(
+                            filemark_raw=raw,
+                            filemark=corrected,
+                            corrected=corrected_flag,
+                            color=color,
+                            role=role,
+                            filer=filer,
+                            source_image=image_path.name,
+                        )
                     )
-                )
 
-    _write_ocr_hits(output_dir / "28b_docket_filer_ocr.csv", hits)
-    _write_aggregated_map(output_dir / "28b_docket_filer_map.csv", hits)
-    _write_conflicts(output_dir / "28b_docket_filer_conflicts.md", hits)
+    with metrics.stage("write"):
+        _write_ocr_hits(output_dir / "28b_docket_filer_ocr.csv", hits)
+        _write_aggregated_map(output_dir / "28b_docket_filer_map.csv", hits)
+        _write_conflicts(output_dir / "28b_docket_filer_conflicts.md", hits)
 
     print(f"Wrote docket filer mapping to {output_dir}")
+    metrics.finish()
 
 
 if __name__ == "__main__":
@@ -7,12 +7,9 @@ from datetime import datetime
 from pathlib import Path
 from typing import List
 
-import matplotlib
-
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-
 from scripts import analyze_exhibit_evidence as evidence
+from scripts.instrumentation import add_metrics_arguments, metrics_from_args
+from scripts.plotting import pyplot
 
 
 def _timestamp() -> str:
@@ -26,6 +23,7 @@ def _short_label(name: str, max_len: int = 30) -> str:
 
 
 def _plot_marker_balance(output_path: Path, exhibits: List[evidence.ExhibitSummary]) -> None:
+    plt = pyplot()
     labels = [_short_label(Path(exhibit.source).stem) for exhibit in exhibits]
     evidence_counts = [
         exhibit.marker_counts.get("affidavit_or_sworn", 0)
@@ -100,21 +98,26 @@ def _parse_args() -> argparse.Namespace:
         default=Path("reports/visuals_exhibits"),
         help="Output directory for images and HTML.",
     )
+    add_metrics_arguments(parser)
     return parser.parse_args()
 
 
 def main() -> None:
     args = _parse_args()
+    metrics = metrics_from_args(args, "build_exhibit_evidence_visuals")
     exhibit_root = args.exhibit_root.expanduser().resolve()
     output_dir = args.output_dir.expanduser().resolve()
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    exhibits = evidence._collect_exhibits(exhibit_root)
+    with metrics.stage("load"):
+        exhibits = evidence._collect_exhibits(exhibit_root)
     if not exhibits:
         raise ValueError(f"No exhibit OCR outputs found under {exhibit_root}")
+    metrics.count("exhibits", len(exhibits))
 
     chart_path = output_dir / "exhibit_evidence_markers.png"
-    _plot_marker_balance(chart_path, exhibits)
+    with metrics.stage("plot"):
+        _plot_marker_balance(chart_path, exhibits)
 
     index_path = output_dir / "index.html"
     images = [
@@ -123,6 +126,7 @@ def main() -> None:
     _write_index(index_path, images)
 
     print(f"Wrote visuals to {output_dir}")
+    metrics.finish()
 
 
 if __name__ == "__main__":
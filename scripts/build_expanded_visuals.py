@@ -4,20 +4,26 @@ from __future__ import annotations
 
 import argparse
 import csv
-import json
 import math
 import re
+import sys
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Iterable, List, Tuple
 
-import matplotlib
-
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
 import numpy as np
 
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.figure_jobs import DEFAULT_WORKERS, FigureJob, render_figures  # noqa: E402
+from scripts.instrumentation import add_metrics_arguments, metrics_from_args  # noqa: E402
+from scripts.plotting import pyplot  # noqa: E402
+from scripts.term_matrix import TermMatrix, bin_rows, build_term_matrix, category_terms  # noqa: E402
+from scripts.warm_cache import load_json, load_store  # noqa: E402
+
 
 MONTHS = {
     "jan": 1,
@@ -280,7 +286,7 @@ def _normalize_ws(text: str) -> str:
 
 
 def _iter_pages(json_path: Path) -> Iterable[PageRecord]:
-    payload = json.loads(json_path.read_text(encoding="utf-8"))
+    payload = load_json(json_path)
     for page in payload.get("pages", []):
         yield PageRecord(page_number=page["page_number"], text=page.get("text", ""))
 
@@ -451,6 +457,7 @@ def _month_series(month_counts: Dict[str, int]) -> Tuple[List[str], List[int]]:
 def _plot_line_series(
     output_path: Path, months: List[str], values: List[int], title: str, ylabel: str
 ) -> None:
+    plt = pyplot()
     if not months:
         return
     x = np.arange(len(months))
@@ -468,6 +475,7 @@ def _plot_line_series(
 def _plot_stack_series(
     output_path: Path, months: List[str], series: Dict[str, List[int]], title: str
 ) -> None:
+    plt = pyplot()
     if not months or not series:
         return
     x = np.arange(len(months))
@@ -495,32 +503,31 @@ def _bin_series(values: List[int], bin_size: int) -> Tuple[np.ndarray, np.ndarra
     return x, binned
 
 
+def _page_terms(pages: List[PageRecord]) -> TermMatrix:
+    texts = [_normalize_ascii(page.text).lower() for page in pages]
+    return build_term_matrix(texts, category_terms(ISSUE_CATEGORIES, CLAIM_CATEGORIES))
+
+
 def _issue_counts_by_page(
-    pages: List[PageRecord], categories: Dict[str, List[str]]
-) -> Dict[str, List[int]]:
-    results: Dict[str, List[int]] = {key: [0] * len(pages) for key in categories}
-    for idx, page in enumerate(pages):
-        text_lower = _normalize_ascii(page.text).lower()
-        for label, keywords in categories.items():
-            results[label][idx] = sum(text_lower.count(keyword) for keyword in keywords)
-    return results
+    terms: TermMatrix, categories: Dict[str, List[str]]
+) -> Dict[str, np.ndarray]:
+    counts = terms.category_counts(categories)
+    return {label: counts[:, col] for col, label in enumerate(categories)}
 
 
 def _plot_heatmap(
     output_path: Path,
-    counts_by_page: Dict[str, List[int]],
+    counts_by_page: Dict[str, np.ndarray],
     bin_size: int,
     title: str,
 ) -> None:
+    plt = pyplot()
     labels = list(counts_by_page.keys())
     if not labels:
         return
     total_pages = len(next(iter(counts_by_page.values())))
     bins = math.ceil(total_pages / bin_size)
-    matrix = np.zeros((len(labels), bins), dtype=int)
-    for row, label in enumerate(labels):
-        _, binned = _bin_series(counts_by_page[label], bin_size)
-        matrix[row, :] = binned
+    matrix = bin_rows(np.column_stack(list(counts_by_page.values())), bin_size).T
 
     x_labels = []
     for idx in range(bins):
@@ -584,6 +591,7 @@ def _series_by_filer(
 def _plot_filer_stack(
     output_path: Path, months: List[str], series: Dict[str, List[int]]
 ) -> None:
+    plt = pyplot()
     if not months or not series:
         return
     filers = [f for f in FILER_ORDER if f in series]
@@ -605,6 +613,7 @@ def _plot_filer_stack(
 def _plot_filer_cumulative(
     output_path: Path, months: List[str], series: Dict[str, List[int]]
 ) -> None:
+    plt = pyplot()
     if not months or not series:
         return
     x = np.arange(len(months))
@@ -659,6 +668,7 @@ def _load_page_filer_labels(
 
 
 def _plot_page_share(output_path: Path, labels: List[str]) -> None:
+    plt = pyplot()
     counts: Dict[str, int] = {}
     for label in labels:
         counts[label] = counts.get(label, 0) + 1
@@ -673,16 +683,6 @@ def _plot_page_share(output_path: Path, labels: List[str]) -> None:
     plt.close()
 
 
-def _load_vector_store(store_dir: Path) -> Tuple[np.ndarray, List[dict]]:
-    embeddings = np.load(store_dir / "embeddings.npy")
-    records = [
-        json.loads(line)
-        for line in (store_dir / "metadata.jsonl").read_text(encoding="utf-8").splitlines()
-        if line.strip()
-    ]
-    return embeddings, records
-
-
 def _polarity_sign(text: str, min_hits: int) -> int:
     text_lower = text.lower()
     pos = sum(text_lower.count(term) for term in AFFIRM_TERMS)
@@ -768,17 +768,31 @@ def _pca_2d(vectors: np.ndarray) -> np.ndarray:
     return coords
 
 
-def _plot_contradiction_network(
-    output_path: Path,
+def _contradiction_layout(
     edges: List[dict],
     embeddings: np.ndarray,
     records: List[dict],
+) -> Tuple[List[int], np.ndarray, List[object]]:
+    """Return the network's node ids, their 2-D positions and their vector_id labels."""
+
+    node_ids = sorted({edge["affidavit_idx"] for edge in edges} | {edge["filing_idx"] for edge in edges})
+    if not node_ids:
+        return [], np.zeros((0, 2)), []
+    coords = _pca_2d(embeddings[node_ids])
+    labels = [records[node_id].get("vector_id", node_id) for node_id in node_ids]
+    return node_ids, coords, labels
+
+
+def _plot_contradiction_network(
+    output_path: Path,
+    edges: List[dict],
+    node_ids: List[int],
+    coords: np.ndarray,
+    node_labels: List[object],
 ) -> None:
+    plt = pyplot()
     if not edges:
         return
-    node_ids = sorted({edge["affidavit_idx"] for edge in edges} | {edge["filing_idx"] for edge in edges})
-    vectors = embeddings[node_ids]
-    coords = _pca_2d(vectors)
     node_pos = {node_id: coords[idx] for idx, node_id in enumerate(node_ids)}
 
     aff_nodes = {edge["affidavit_idx"] for edge in edges}
@@ -815,8 +829,7 @@ def _plot_contradiction_network(
         )
 
     if len(node_ids) <= 40:
-        for node_id in node_ids:
-            vector_id = records[node_id].get("vector_id", node_id)
+        for node_id, vector_id in zip(node_ids, node_labels):
             x, y = node_pos[node_id]
             plt.text(x, y, f"{vector_id}", fontsize=7, ha="center", va="center")
 
@@ -876,6 +889,7 @@ def _evidence_counts_by_page(pages: List[PageRecord]) -> Dict[str, List[int]]:
 
 
 def _plot_evidence_totals(output_path: Path, counts_by_page: Dict[str, List[int]]) -> None:
+    plt = pyplot()
     labels = list(counts_by_page.keys())
     totals = [sum(counts_by_page[label]) for label in labels]
     plt.figure(figsize=(10, 6))
@@ -891,6 +905,7 @@ def _plot_evidence_totals(output_path: Path, counts_by_page: Dict[str, List[int]
 def _plot_evidence_density(
     output_path: Path, counts_by_page: Dict[str, List[int]], bin_size: int
 ) -> None:
+    plt = pyplot()
     plt.figure(figsize=(12, 6))
     for label, counts in counts_by_page.items():
         x, binned = _bin_series(counts, bin_size)
@@ -907,6 +922,7 @@ def _plot_evidence_density(
 def _plot_evidence_compare(
     output_path: Path, counts_by_page: Dict[str, List[int]], bin_size: int
 ) -> None:
+    plt = pyplot()
     x, affidavit = _bin_series(counts_by_page.get("affidavit_or_sworn", []), bin_size)
     _, auth = _bin_series(counts_by_page.get("authentication", []), bin_size)
     _, screenshots = _bin_series(counts_by_page.get("screenshot", []), bin_size)
@@ -1000,94 +1016,133 @@ def _parse_args() -> argparse.Namespace:
     parser.add_argument("--min-polarity-hits", type=int, default=2)
     parser.add_argument("--top-k", type=int, default=6)
     parser.add_argument("--max-edges", type=int, default=140)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="Processes rendering figures (1 = render in-process).",
+    )
+    add_metrics_arguments(parser)
     return parser.parse_args()
 
 
 def main() -> None:
     args = _parse_args()
+    metrics = metrics_from_args(args, "build_expanded_visuals")
     json_path = args.json.expanduser().resolve()
     output_dir = args.output_dir.expanduser().resolve()
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    pages = list(_iter_pages(json_path))
+    with metrics.stage("load"):
+        pages = list(_iter_pages(json_path))
     if not pages:
         raise ValueError("No pages found in JSON input.")
+    metrics.count("pages", len(pages))
+
+    jobs: List[FigureJob] = []
+    with metrics.stage("timeline"):
+        total_counts, type_counts = _timeline_counts(pages, args.min_year, args.max_year)
+        months, totals = _month_series(total_counts)
+
+        timeline_total_path = output_dir / "timeline_event_mentions.png"
+        jobs.append(
+            FigureJob(
+                _plot_line_series,
+                (timeline_total_path, months, totals, "Event Date Mentions by Month", "Mentions"),
+            )
+        )
 
-    total_counts, type_counts = _timeline_counts(pages, args.min_year, args.max_year)
-    months, totals = _month_series(total_counts)
+        timeline_type_months = months
+        type_series = {}
+        for label in ["filings", "orders", "hearings", "events"]:
+            values = [type_counts.get(label, {}).get(month, 0) for month in timeline_type_months]
+            type_series[label] = values
+        timeline_type_path = output_dir / "timeline_event_types.png"
+        jobs.append(
+            FigureJob(
+                _plot_stack_series,
+                (
+                    timeline_type_path,
+                    timeline_type_months,
+                    type_series,
+                    "Event Types Over Time (Date Mentions)",
+                ),
+            )
+        )
 
-    timeline_total_path = output_dir / "timeline_event_mentions.png"
-    _plot_line_series(
-        timeline_total_path, months, totals, "Event Date Mentions by Month", "Mentions"
-    )
+    with metrics.stage("docket"):
+        docket_entries = _parse_docket_entries(json_path)
+        docket_month_counts: Dict[str, int] = {}
+        for entry in docket_entries:
+            month = _month_key(entry.date)
+            docket_month_counts[month] = docket_month_counts.get(month, 0) + 1
+        docket_months, docket_values = _month_series(docket_month_counts)
+        docket_timeline_path = output_dir / "timeline_docket_filings.png"
+        jobs.append(
+            FigureJob(
+                _plot_line_series,
+                (docket_timeline_path, docket_months, docket_values, "Docket Filings by Month", "Filings"),
+            )
+        )
 
-    timeline_type_months = months
-    type_series = {}
-    for label in ["filings", "orders", "hearings", "events"]:
-        values = [type_counts.get(label, {}).get(month, 0) for month in timeline_type_months]
-        type_series[label] = values
-    timeline_type_path = output_dir / "timeline_event_types.png"
-    _plot_stack_series(
-        timeline_type_path,
-        timeline_type_months,
-        type_series,
-        "Event Types Over Time (Date Mentions)",
-    )
+    with metrics.stage("heatmaps"):
+        terms = _page_terms(pages)
+        issue_counts = _issue_counts_by_page(terms, ISSUE_CATEGORIES)
+        issue_heatmap_path = output_dir / "issue_heatmap.png"
+        jobs.append(
+            FigureJob(_plot_heatmap, (issue_heatmap_path, issue_counts, args.bin_size, "Issue Heatmap Across 28B"))
+        )
 
-    docket_entries = _parse_docket_entries(json_path)
-    docket_month_counts: Dict[str, int] = {}
-    for entry in docket_entries:
-        month = _month_key(entry.date)
-        docket_month_counts[month] = docket_month_counts.get(month, 0) + 1
-    docket_months, docket_values = _month_series(docket_month_counts)
-    docket_timeline_path = output_dir / "timeline_docket_filings.png"
-    _plot_line_series(
-        docket_timeline_path,
-        docket_months,
-        docket_values,
-        "Docket Filings by Month",
-        "Filings",
-    )
+        claim_counts = _issue_counts_by_page(terms, CLAIM_CATEGORIES)
+        claim_heatmap_path = output_dir / "claim_heatmap.png"
+        jobs.append(
+            FigureJob(_plot_heatmap, (claim_heatmap_path, claim_counts, args.bin_size, "Claim Heatmap Across 28B"))
+        )
 
-    issue_counts = _issue_counts_by_page(pages, ISSUE_CATEGORIES)
-    issue_heatmap_path = output_dir / "issue_heatmap.png"
-    _plot_heatmap(issue_heatmap_path, issue_counts, args.bin_size, "Issue Heatmap Across 28B")
-
-    claim_counts = _issue_counts_by_page(pages, CLAIM_CATEGORIES)
-    claim_heatmap_path = output_dir / "claim_heatmap.png"
-    _plot_heatmap(claim_heatmap_path, claim_counts, args.bin_size, "Claim Heatmap Across 28B")
-
-    docket_map = _load_docket_filer_map(args.docket_filer_map.expanduser().resolve())
-    filer_months, filer_series = _series_by_filer(docket_entries, docket_map)
-    filer_stack_path = output_dir / "filer_filings_by_month.png"
-    _plot_filer_stack(filer_stack_path, filer_months, filer_series)
-    filer_cumulative_path = output_dir / "filer_filings_cumulative.png"
-    _plot_filer_cumulative(filer_cumulative_path, filer_months, filer_series)
-
-    page_labels = _load_page_filer_labels(args.page_filer_map.expanduser().resolve(), pages)
-    page_share_path = output_dir / "filer_page_share.png"
-    _plot_page_share(page_share_path, page_labels)
-
-    embeddings, records = _load_vector_store(args.store.expanduser().resolve())
-    contradiction_edges = _find_contradictions(
-        embeddings,
-        records,
-        similarity_threshold=args.similarity_threshold,
-        min_polarity_hits=args.min_polarity_hits,
-        top_k=args.top_k,
-        max_edges=args.max_edges,
-    )
-    contradiction_path = output_dir / "affidavit_contradiction_network.png"
-    _plot_contradiction_network(contradiction_path, contradiction_edges, embeddings, records)
-    _write_edges_csv(output_dir / "affidavit_contradiction_edges.csv", contradiction_edges)
-
-    evidence_counts = _evidence_counts_by_page(pages)
-    evidence_totals_path = output_dir / "evidence_marker_totals.png"
-    evidence_density_path = output_dir / "evidence_marker_density.png"
-    evidence_compare_path = output_dir / "evidence_marker_comparison.png"
-    _plot_evidence_totals(evidence_totals_path, evidence_counts)
-    _plot_evidence_density(evidence_density_path, evidence_counts, args.bin_size)
-    _plot_evidence_compare(evidence_compare_path, evidence_counts, args.bin_size)
+    with metrics.stage("filer_trends"):
+        docket_map = _load_docket_filer_map(args.docket_filer_map.expanduser().resolve())
+        filer_months, filer_series = _series_by_filer(docket_entries, docket_map)
+        filer_stack_path = output_dir / "filer_filings_by_month.png"
+        jobs.append(FigureJob(_plot_filer_stack, (filer_stack_path, filer_months, filer_series)))
+        filer_cumulative_path = output_dir / "filer_filings_cumulative.png"
+        jobs.append(FigureJob(_plot_filer_cumulative, (filer_cumulative_path, filer_months, filer_series)))
+
+        page_labels = _load_page_filer_labels(args.page_filer_map.expanduser().resolve(), pages)
+        page_share_path = output_dir / "filer_page_share.png"
+        jobs.append(FigureJob(_plot_page_share, (page_share_path, page_labels)))
+
+    with metrics.stage("contradictions"):
+        embeddings, records = load_store(args.store.expanduser().resolve())
+        contradiction_edges = _find_contradictions(
+            embeddings,
+            records,
+            similarity_threshold=args.similarity_threshold,
+            min_polarity_hits=args.min_polarity_hits,
+            top_k=args.top_k,
+            max_edges=args.max_edges,
+        )
+        contradiction_path = output_dir / "affidavit_contradiction_network.png"
+        node_ids, coords, node_labels = _contradiction_layout(contradiction_edges, embeddings, records)
+        jobs.append(
+            FigureJob(
+                _plot_contradiction_network,
+                (contradiction_path, contradiction_edges, node_ids, coords, node_labels),
+            )
+        )
+        _write_edges_csv(output_dir / "affidavit_contradiction_edges.csv", contradiction_edges)
+
+    with metrics.stage("evidence"):
+        evidence_counts = _evidence_counts_by_page(pages)
+        evidence_totals_path = output_dir / "evidence_marker_totals.png"
+        evidence_density_path = output_dir / "evidence_marker_density.png"
+        evidence_compare_path = output_dir / "evidence_marker_comparison.png"
+        jobs.append(FigureJob(_plot_evidence_totals, (evidence_totals_path, evidence_counts)))
+        jobs.append(FigureJob(_plot_evidence_density, (evidence_density_path, evidence_counts, args.bin_size)))
+        jobs.append(FigureJob(_plot_evidence_compare, (evidence_compare_path, evidence_counts, args.bin_size)))
+
+    with metrics.stage("plot"):
+        render_figures(jobs, args.workers)
+    metrics.count("figures", len(jobs))
 
     sections = [
         (
@@ -1134,6 +1189,7 @@ def main() -> None:
     _write_index(output_dir / "index.html", sections)
 
     print(f"Wrote expanded visuals to {output_dir}")
+    metrics.finish()
 
 
 if __name__ == "__main__":
@@ -4,20 +4,24 @@ from __future__ import annotations
 
 import argparse
 import csv
-import json
 import re
+import sys
 from collections import Counter, defaultdict
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Iterable, List, Tuple
 
-import matplotlib
-
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
 import numpy as np
 
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.instrumentation import add_metrics_arguments, metrics_from_args  # noqa: E402
+from scripts.plotting import pyplot  # noqa: E402
+from scripts.warm_cache import load_json  # noqa: E402
+
 
 DOCKET_HEADER = "ALL TRANSACTIONS FOR A CASE"
 DOCKET_ENTRY = re.compile(r"(\d{1,4})\s+(\d{2}/\d{2}/\d{4})\s+")
@@ -55,7 +59,7 @@ def _normalize_ascii(text: str) -> str:
 
 
 def _iter_pages(json_path: Path) -> Iterable[str]:
-    payload = json.loads(json_path.read_text(encoding="utf-8"))
+    payload = load_json(json_path)
     for page in payload.get("pages", []):
         yield page.get("text", "")
 
@@ -160,6 +164,7 @@ def _series_by_filer(
 def _plot_stacked_monthly(
     output_path: Path, months: List[str], series: Dict[str, List[int]]
 ) -> None:
+    plt = pyplot()
     if not months or not series:
         return
     filers = [f for f in FILER_ORDER if f in series]
@@ -182,6 +187,7 @@ def _plot_stacked_monthly(
 def _plot_cumulative(
     output_path: Path, months: List[str], series: Dict[str, List[int]]
 ) -> None:
+    plt = pyplot()
     if not months or not series:
         return
     filers = [f for f in FILER_ORDER if f in series]
@@ -204,6 +210,7 @@ def _plot_cumulative(
 def _plot_per_filer(
     output_dir: Path, months: List[str], series: Dict[str, List[int]]
 ) -> List[str]:
+    plt = pyplot()
     if not months or not series:
         return []
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -322,11 +329,13 @@ def _parse_args() -> argparse.Namespace:
         default=Path("reports"),
         help="Directory to write summary and CSV outputs.",
     )
+    add_metrics_arguments(parser)
     return parser.parse_args()
 
 
 def main() -> None:
     args = _parse_args()
+    metrics = metrics_from_args(args, "build_filer_date_visuals")
     json_path = args.json.expanduser().resolve()
     docket_map_path = args.docket_filer_map.expanduser().resolve()
     output_dir = args.output_dir.expanduser().resolve()
@@ -334,8 +343,10 @@ def main() -> None:
     output_dir.mkdir(parents=True, exist_ok=True)
     summary_dir.mkdir(parents=True, exist_ok=True)
 
-    entries = _parse_docket_entries(json_path)
-    docket_map = _load_docket_filer_map(docket_map_path)
+    with metrics.stage("load"):
+        entries = _parse_docket_entries(json_path)
+        docket_map = _load_docket_filer_map(docket_map_path)
+    metrics.count("docket_entries", len(entries))
 
     rows = []
     for entry in entries:
@@ -349,15 +360,17 @@ def main() -> None:
             }
         )
 
-    _write_entries_csv(summary_dir / "28b_filer_filing_dates.csv", rows)
-    _write_summary(summary_dir / "28b_filer_filing_dates_summary.md", rows)
+    with metrics.stage("write"):
+        _write_entries_csv(summary_dir / "28b_filer_filing_dates.csv", rows)
+        _write_summary(summary_dir / "28b_filer_filing_dates_summary.md", rows)
 
-    months, series = _series_by_filer(entries, docket_map)
-    stacked_path = output_dir / "filings_by_filer_monthly.png"
-    cumulative_path = output_dir / "cumulative_filings_by_filer.png"
-    _plot_stacked_monthly(stacked_path, months, series)
-    _plot_cumulative(cumulative_path, months, series)
-    per_filer_images = _plot_per_filer(output_dir, months, series)
+    with metrics.stage("plot"):
+        months, series = _series_by_filer(entries, docket_map)
+        stacked_path = output_dir / "filings_by_filer_monthly.png"
+        cumulative_path = output_dir / "cumulative_filings_by_filer.png"
+        _plot_stacked_monthly(stacked_path, months, series)
+        _plot_cumulative(cumulative_path, months, series)
+        per_filer_images = _plot_per_filer(output_dir, months, series)
 
     images = [
         (stacked_path.name, "Filings by month (stacked by filer)"),
@@ -370,6 +383,7 @@ def main() -> None:
 
     _write_index(output_dir / "index.html", images)
     print(f"Wrote filer date visuals to {output_dir}")
+    metrics.finish()
 
 
 if __name__ == "__main__":
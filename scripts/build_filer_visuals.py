@@ -4,7 +4,6 @@ from __future__ import annotations
 
 import argparse
 import csv
-import json
 import re
 from collections import Counter, defaultdict
 from dataclasses import dataclass
@@ -12,9 +11,18 @@ from pathlib import Path
 from typing import Dict, Iterable, List, Tuple
 
 import numpy as np
-from sentence_transformers import SentenceTransformer
 
 from scripts import build_advanced_semantic_visuals as vis
+from scripts.filer_rules import (
+    FILER_PRIORITY,
+    detect_filemark,
+    load_docket_filer_map,
+    score_filer,
+)
+from scripts.disk_cache import add_cache_arguments, cache_from_args
+from scripts.figure_jobs import DEFAULT_WORKERS, FigureJob, render_figures
+from scripts.instrumentation import add_metrics_arguments, metrics_from_args
+from scripts.warm_cache import load_json, load_sentence_model
 
 
 @dataclass
@@ -23,62 +31,6 @@ class PageRecord:
     text: str
 
 
-FILER_RULES = {
-    "charles_dustin_myers": [
-        (re.compile(r"/s/\s*Charles\s+Dustin\s+Myers", re.IGNORECASE), 6),
-        (re.compile(r"Charles\s+Dustin\s+Myers", re.IGNORECASE), 3),
-        (re.compile(r"Charles\s+D\s+Myers", re.IGNORECASE), 3),
-        (re.compile(r"chuckdustin12@gmail\.com", re.IGNORECASE), 4),
-        (re.compile(r"CSD-legal", re.IGNORECASE), 4),
-        (re.compile(r"pro\s+se", re.IGNORECASE), 2),
-    ],
-    "cooper_carter": [
-        (re.compile(r"/s/\s*Cooper\s+L\.?\s+Carter", re.IGNORECASE), 6),
-        (re.compile(r"Cooper\s+L\.?\s+Carter", re.IGNORECASE), 4),
-        (re.compile(r"Cooper\s+Carter", re.IGNORECASE), 3),
-        (re.compile(r"majadmin\.com", re.IGNORECASE), 3),
-        (re.compile(r"Max\s+Altman\s*&\s*Johnson", re.IGNORECASE), 2),
-    ],
-    "morgan_michelle_myers": [
-        (re.compile(r"/s/\s*Morgan\s+Michelle\s+Myers", re.IGNORECASE), 6),
-        (re.compile(r"Morgan\s+Michelle\s+Myers", re.IGNORECASE), 3),
-        (re.compile(r"Morgan\s+Myers", re.IGNORECASE), 2),
-    ],
-    "court": [
-        (re.compile(r"Court\s+of\s+Appeals", re.IGNORECASE), 4),
-        (re.compile(r"Supreme\s+Court\s+of\s+Texas", re.IGNORECASE), 4),
-        (re.compile(r"Per\s+Curiam", re.IGNORECASE), 4),
-        (re.compile(r"MEMORANDUM\s+OPINION", re.IGNORECASE), 4),
-        (re.compile(r"\bOPINION\b", re.IGNORECASE), 2),
-        (re.compile(r"\bPanel:\b", re.IGNORECASE), 3),
-        (re.compile(r"\bJudgment\b", re.IGNORECASE), 2),
-        (re.compile(r"\bORDER\b", re.IGNORECASE), 1),
-    ],
-    "clerk": [
-        (re.compile(r"District\s+Clerk", re.IGNORECASE), 4),
-        (re.compile(r"Clerk's\s+Office", re.IGNORECASE), 4),
-        (re.compile(r"ALL\s+TRANSACTIONS\s+FOR\s+A\s+CASE", re.IGNORECASE), 6),
-        (re.compile(r"FILE\s+COPY", re.IGNORECASE), 3),
-        (re.compile(r"Certified\s+Copy", re.IGNORECASE), 3),
-        (re.compile(r"Payment\s+received", re.IGNORECASE), 2),
-    ],
-    "oag": [
-        (re.compile(r"Office\s+of\s+the\s+Attorney\s+General", re.IGNORECASE), 4),
-        (re.compile(r"oag\.texas\.gov", re.IGNORECASE), 4),
-        (re.compile(r"OAG", re.IGNORECASE), 2),
-    ],
-}
-
-FILER_PRIORITY = [
-    "charles_dustin_myers",
-    "cooper_carter",
-    "morgan_michelle_myers",
-    "court",
-    "clerk",
-    "oag",
-    "unknown",
-]
-
 DOC_START_PATTERNS = [
     re.compile(r"(?i)\bpage[: ]+1\b"),
     re.compile(r"(?i)\bpage\s+1\s+of\b"),
@@ -89,8 +41,6 @@ DOC_START_PATTERNS = [
 
 DOCKET_HEADER = "ALL TRANSACTIONS FOR A CASE"
 DOCKET_ENTRY = re.compile(r"^\s*(\d{1,4})\s+(\d{2}/\d{2}/\d{4})\s+(.+)$")
-FILEMARK_STAMP = re.compile(r"(?i)\bfilemark\b[^0-9]{0,6}(\d{1,4})")
-DOCKET_LINE = re.compile(r"^\s*(\d{1,4})\s+\d{2}/\d{2}/\d{4}\b")
 
 STOP_WORDS = {
     "the",
@@ -123,7 +73,7 @@ def _normalize_for_match(text: str) -> str:
 
 
 def _iter_pages(json_path: Path) -> Iterable[PageRecord]:
-    payload = json.loads(json_path.read_text(encoding="utf-8"))
+    payload = load_json(json_path)
     for page in payload.get("pages", []):
         yield PageRecord(page_number=page["page_number"], text=page.get("text", ""))
 
@@ -135,26 +85,6 @@ def _is_doc_start(text: str) -> bool:
     return False
 
 
-def _score_filer(text: str) -> Tuple[str, int, List[str]]:
-    scores: Dict[str, int] = defaultdict(int)
-    signals: Dict[str, List[str]] = defaultdict(list)
-    for filer, rules in FILER_RULES.items():
-        for pattern, weight in rules:
-            if pattern.search(text):
-                scores[filer] += weight
-                signals[filer].append(pattern.pattern)
-
-    if not scores:
-        return "unknown", 0, []
-
-    max_score = max(scores.values())
-    winners = [filer for filer, score in scores.items() if score == max_score]
-    for filer in FILER_PRIORITY:
-        if filer in winners:
-            return filer, max_score, signals.get(filer, [])
-    return "unknown", 0, []
-
-
 def _smooth_labels(labels: List[str], window: int = 2) -> List[str]:
     smoothed = labels[:]
     for idx, label in enumerate(labels):
@@ -171,22 +101,6 @@ def _smooth_labels(labels: List[str], window: int = 2) -> List[str]:
     return smoothed
 
 
-def _load_docket_filer_map(path: Path | None) -> Dict[str, str]:
-    if not path:
-        return {}
-    if not path.exists():
-        return {}
-    mapping: Dict[str, str] = {}
-    with path.open("r", encoding="utf-8") as handle:
-        reader = csv.DictReader(handle)
-        for row in reader:
-            filemark = row.get("filemark")
-            filer = row.get("filer")
-            if filemark and filer:
-                mapping[filemark.strip()] = filer.strip()
-    return mapping
-
-
 def _extract_docket_entries(pages: List[PageRecord]) -> List[dict]:
     entries: List[dict] = []
     for page in pages:
@@ -222,17 +136,6 @@ def _build_match_key(description: str) -> str:
     return " ".join(tokens[:6])
 
 
-def _detect_filemark(text: str) -> str | None:
-    match = FILEMARK_STAMP.search(text)
-    if match:
-        return match.group(1)
-    for line in text.splitlines():
-        match = DOCKET_LINE.match(line)
-        if match:
-            return match.group(1)
-    return None
-
-
 def _apply_docket_overrides(
     docs: List[dict],
     pages: List[PageRecord],
@@ -269,7 +172,7 @@ def _apply_docket_overrides(
         match_type = None
         match_value = None
 
-        filemark = _detect_filemark(raw_text)
+        filemark = detect_filemark(raw_text)
         if filemark and filemark in docket_map:
             matched_filer = docket_map[filemark]
             match_type = "filemark"
@@ -388,7 +291,8 @@ def _render_for_filer(
     role_sample: int,
 ) -> None:
     output_dir.mkdir(parents=True, exist_ok=True)
-    ranked_issues = vis._issue_ranking(pages)[:top_issues]
+    terms = vis._page_terms(pages)
+    ranked_issues = vis._issue_ranking(pages, terms)[:top_issues]
     drift_images = vis._semantic_drift(
         output_dir,
         pages,
@@ -397,6 +301,7 @@ def _render_for_filer(
         ranked_issues,
         min_year,
         max_year,
+        terms,
     )
     contradiction_img, contradiction_edges = vis._contradiction_map(
         output_dir,
@@ -405,8 +310,8 @@ def _render_for_filer(
         contradiction_nodes,
         contradiction_threshold,
     )
-    vis._authority_leakage(output_dir / "authority_leakage.png", pages, bin_size)
-    vis._procedural_gravity(output_dir / "procedural_gravity_wells.png", pages, embeddings)
+    vis._authority_leakage(output_dir / "authority_leakage.png", pages, bin_size, terms)
+    vis._procedural_gravity(output_dir / "procedural_gravity_wells.png", pages, embeddings, terms)
     vis._selective_attention(output_dir / "selective_attention.png", pages, embeddings, bin_size)
     role_blind, role_labeled = vis._role_blind_plots(output_dir, pages, embeddings, role_sample)
     vis._counterfactual_overlay(
@@ -415,7 +320,7 @@ def _render_for_filer(
         baseline_embeddings,
         bin_size,
     )
-    vis._issue_cannibalization(output_dir / "issue_cannibalization.png", pages)
+    vis._issue_cannibalization(output_dir / "issue_cannibalization.png", pages, terms)
 
     images = []
     for name in drift_images:
@@ -487,47 +392,64 @@ def _parse_args() -> argparse.Namespace:
         default=None,
         help="CSV map of filemark-to-filer from color-coded docket images.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="Processes rendering filers in parallel (1 = render in-process).",
+    )
+    add_cache_arguments(parser)
+    add_metrics_arguments(parser)
     return parser.parse_args()
 
 
 def main() -> None:
     args = _parse_args()
+    metrics = metrics_from_args(args, "build_filer_visuals")
+    cache_from_args(args)
     json_path = args.json.expanduser().resolve()
     output_root = args.output_dir.expanduser().resolve()
     summary_dir = args.summary_dir.expanduser().resolve()
     summary_dir.mkdir(parents=True, exist_ok=True)
     output_root.mkdir(parents=True, exist_ok=True)
 
-    pages = list(_iter_pages(json_path))
+    with metrics.stage("load"):
+        pages = list(_iter_pages(json_path))
     if not pages:
         raise ValueError("No pages found in JSON input.")
-
-    labels = []
-    for page in pages:
-        filer, score, _signals = _score_filer(_normalize_ascii(page.text))
-        labels.append(filer)
-
-    labels = _smooth_labels(labels, window=2)
-    docs = _group_documents(pages, labels)
-
-    docket_map = _load_docket_filer_map(args.docket_filer_map)
-    if docket_map:
-        docket_entries = _extract_docket_entries(pages)
-        docs, overrides = _apply_docket_overrides(docs, pages, docket_map, docket_entries)
-        _write_docket_overrides(summary_dir / "28b_filer_docket_overrides.csv", overrides)
-        page_index = {page.page_number: idx for idx, page in enumerate(pages)}
-        for doc in docs:
-            for page_num in doc["pages"]:
-                idx = page_index.get(page_num)
-                if idx is not None:
-                    labels[idx] = doc["filer"]
-
-    _write_page_map(summary_dir / "28b_filer_pages.csv", pages, labels)
-    _write_doc_map(summary_dir / "28b_filer_docs.csv", docs)
-    _write_summary(summary_dir / "28b_filer_summary.md", labels)
-
-    model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
-    embeddings = vis._page_embeddings(model, pages, args.batch_size)
+    metrics.count("pages", len(pages))
+
+    with metrics.stage("classify"):
+        labels = []
+        for page in pages:
+            filer, score, _signals = score_filer(_normalize_ascii(page.text))
+            labels.append(filer)
+
+        labels = _smooth_labels(labels, window=2)
+        docs = _group_documents(pages, labels)
+
+    with metrics.stage("docket_overrides"):
+        docket_map = load_docket_filer_map(args.docket_filer_map)
+        if docket_map:
+            docket_entries = _extract_docket_entries(pages)
+            docs, overrides = _apply_docket_overrides(docs, pages, docket_map, docket_entries)
+            _write_docket_overrides(summary_dir / "28b_filer_docket_overrides.csv", overrides)
+            page_index = {page.page_number: idx for idx, page in enumerate(pages)}
+            for doc in docs:
+                for page_num in doc["pages"]:
+                    idx = page_index.get(page_num)
+                    if idx is not None:
+                        labels[idx] = doc["filer"]
+
+    with metrics.stage("write"):
+        _write_page_map(summary_dir / "28b_filer_pages.csv", pages, labels)
+        _write_doc_map(summary_dir / "28b_filer_docs.csv", docs)
+        _write_summary(summary_dir / "28b_filer_summary.md", labels)
+
+    with metrics.stage("load_model"):
+        model = load_sentence_model("sentence-transformers/all-MiniLM-L6-v2")
+    with metrics.stage("embed"):
+        embeddings = vis._page_embeddings(model, pages, args.batch_size)
 
     header = vis._extract_case_header(pages[0].text)
     parties = [value for key, value in header.items() if key.startswith("party_")]
@@ -540,29 +462,37 @@ def main() -> None:
     for idx, label in enumerate(labels):
         filer_indices[label].append(idx)
 
+    # Each filer's figures and index are independent: one job per filer.
+    jobs = []
     for filer in FILER_PRIORITY:
         idxs = filer_indices.get(filer, [])
         if len(idxs) < args.min_pages:
             continue
-        filer_pages = [pages[idx] for idx in idxs]
-        filer_embeddings = embeddings[idxs]
-        filer_dir = output_root / filer
-        _render_for_filer(
-            filer_dir,
-            filer_pages,
-            filer_embeddings,
-            parties,
-            baseline_embeddings,
-            args.min_year,
-            args.max_year,
-            args.bin_size,
-            args.top_issues,
-            args.contradiction_nodes,
-            args.contradiction_threshold,
-            args.role_sample,
+        jobs.append(
+            FigureJob(
+                _render_for_filer,
+                (
+                    output_root / filer,
+                    [pages[idx] for idx in idxs],
+                    embeddings[idxs],
+                    parties,
+                    baseline_embeddings,
+                    args.min_year,
+                    args.max_year,
+                    args.bin_size,
+                    args.top_issues,
+                    args.contradiction_nodes,
+                    args.contradiction_threshold,
+                    args.role_sample,
+                ),
+            )
         )
+    with metrics.stage("render"):
+        render_figures(jobs, args.workers)
+    metrics.count("filers", len(jobs))
 
     print(f"Wrote filer visuals to {output_root}")
+    metrics.finish()
 
 
 if __name__ == "__main__":
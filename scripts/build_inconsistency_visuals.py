@@ -3,21 +3,29 @@
 from __future__ import annotations
 
 import argparse
-import json
 import math
 import re
+import sys
 import textwrap
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple
 
-import matplotlib
-
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
 import numpy as np
-from sentence_transformers import SentenceTransformer
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.disk_cache import add_cache_arguments, cache_from_args, encoder_fingerprint, memoize  # noqa: E402
+from scripts.figure_jobs import DEFAULT_WORKERS, FigureJob, render_figures  # noqa: E402
+from scripts.instrumentation import add_metrics_arguments, metrics_from_args  # noqa: E402
+from scripts.plotting import pyplot  # noqa: E402
+from scripts.warm_cache import load_sentence_model, load_store  # noqa: E402
 
 NON_ASCII_MAP = str.maketrans(
     {
@@ -201,16 +209,6 @@ def _snippet_around_match(text: str, patterns: List[re.Pattern], max_len: int =
     return _snippet(cleaned, max_len)
 
 
-def _load_store(store_dir: Path) -> Tuple[np.ndarray, List[dict]]:
-    embeddings = np.load(store_dir / "embeddings.npy")
-    records = [
-        json.loads(line)
-        for line in (store_dir / "metadata.jsonl").read_text(encoding="utf-8").splitlines()
-        if line.strip()
-    ]
-    return embeddings, records
-
-
 def _clean_label(name: str) -> str:
     cleaned = re.sub(r"[_]+", " ", name).strip()
     cleaned = re.sub(r"\s+", " ", cleaned)
@@ -347,6 +345,7 @@ def _wrap_labels(labels: List[str], width: int = 24) -> List[str]:
 def _plot_doc_similarity(
     output_path: Path, docs: List[DocInfo], doc_vectors: np.ndarray
 ) -> None:
+    plt = pyplot()
     sim = doc_vectors @ doc_vectors.T
     labels = _wrap_labels([doc.short_label for doc in docs], width=20)
     fig, ax = plt.subplots(figsize=(10, 8))
@@ -362,12 +361,11 @@ def _plot_doc_similarity(
     plt.close(fig)
 
 
-def _plot_polarity_balance(
-    output_path: Path, docs: List[DocInfo], records: List[dict]
-) -> None:
-    neg_counts = []
+def _polarity_totals(docs: List[DocInfo], records: List[dict]) -> Tuple[List[int], List[int]]:
+    """Affirmation and negation term hits per document."""
+
     pos_counts = []
-    labels = []
+    neg_counts = []
     for doc in docs:
         pos = 0
         neg = 0
@@ -376,10 +374,15 @@ def _plot_polarity_balance(
             pos_chunk, neg_chunk = _polarity_counts(text)
             pos += pos_chunk
             neg += neg_chunk
-        labels.append(doc.short_label)
         pos_counts.append(pos)
         neg_counts.append(neg)
+    return pos_counts, neg_counts
+
 
+def _plot_polarity_balance(
+    output_path: Path, labels: List[str], pos_counts: List[int], neg_counts: List[int]
+) -> None:
+    plt = pyplot()
     x = np.arange(len(labels))
     fig, ax = plt.subplots(figsize=(10, 5))
     ax.bar(x - 0.2, pos_counts, width=0.4, label="affirmation")
@@ -395,27 +398,26 @@ def _plot_polarity_balance(
     plt.close(fig)
 
 
-def _topic_trends(
+def _topic_trends(doc_vectors: np.ndarray, model: SentenceTransformer) -> Dict[str, np.ndarray]:
+    """Best similarity of each document to each topic's queries."""
+
+    scores: Dict[str, np.ndarray] = {}
+    for topic, queries in TOPIC_QUERIES.items():
+        q_embeds = model.encode(queries, normalize_embeddings=True)
+        scores[topic] = (doc_vectors @ q_embeds.T).max(axis=1)
+    return scores
+
+
+def _plot_topic_trends(
     output_path: Path,
     docs: List[DocInfo],
-    doc_vectors: np.ndarray,
-    model: SentenceTransformer,
+    scores: Dict[str, np.ndarray],
 ) -> None:
-    topic_names = list(TOPIC_QUERIES.keys())
-    query_lists = list(TOPIC_QUERIES.values())
-    query_embeddings = [
-        model.encode(queries, normalize_embeddings=True) for queries in query_lists
-    ]
-
-    scores = []
-    for q_embeds in query_embeddings:
-        topic_scores = doc_vectors @ q_embeds.T
-        scores.append(topic_scores.max(axis=1))
-
+    plt = pyplot()
     x = np.arange(len(docs))
     fig, ax = plt.subplots(figsize=(11, 5))
-    for idx, topic in enumerate(topic_names):
-        ax.plot(x, scores[idx], marker="o", label=topic)
+    for topic, topic_scores in scores.items():
+        ax.plot(x, topic_scores, marker="o", label=topic)
     labels = [doc.short_label for doc in docs]
     ax.set_xticks(x)
     ax.set_xticklabels(_wrap_labels(labels, width=18), rotation=45, ha="right")
@@ -441,6 +443,7 @@ def _best_topic_hit(
     return float(max_scores[best_pos]), doc_indices[best_pos]
 
 
+@memoize(fingerprints={"model": encoder_fingerprint})
 def _shift_topic_scores(
     embeddings: np.ndarray,
     records: List[dict],
@@ -496,6 +499,7 @@ def _plot_shift_timeline(
     docs: List[DocInfo],
     topic_counts: Dict[str, List[int]],
 ) -> None:
+    plt = pyplot()
     labels = [
         f"{doc.date.strftime('%Y-%m-%d') if doc.date else 'unknown'}\n{doc.short_label}"
         for doc in docs
@@ -703,6 +707,7 @@ def _plot_contradiction_map(
     edges: List[dict],
     edge_indices: List[Tuple[int, int]],
 ) -> None:
+    plt = pyplot()
     if coords.size == 0:
         return
     unique_docs = sorted(set(doc_labels))
@@ -924,39 +929,58 @@ def _parse_args() -> argparse.Namespace:
         default=None,
         help="Regex to exclude documents by label/path.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="Processes rendering figures (1 = render in-process).",
+    )
+    add_cache_arguments(parser)
+    add_metrics_arguments(parser)
     return parser.parse_args()
 
 
 def main() -> None:
     args = _parse_args()
+    metrics = metrics_from_args(args, "build_inconsistency_visuals")
+    cache_from_args(args)
     store_dir = args.store.expanduser().resolve()
     output_dir = args.output_dir.expanduser().resolve()
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    embeddings, records = _load_store(store_dir)
-    docs = _doc_info(records)
-    docs = _filter_docs(docs, args.include, args.exclude)
-    embeddings, records, docs = _subset_by_docs(embeddings, records, docs)
-    if not docs:
-        raise ValueError("No documents matched the include/exclude filters.")
-    doc_vectors = _doc_embeddings(embeddings, docs)
+    with metrics.stage("load"):
+        embeddings, records = load_store(store_dir)
+        docs = _doc_info(records)
+        docs = _filter_docs(docs, args.include, args.exclude)
+        embeddings, records, docs = _subset_by_docs(embeddings, records, docs)
+        if not docs:
+            raise ValueError("No documents matched the include/exclude filters.")
+        doc_vectors = _doc_embeddings(embeddings, docs)
+    metrics.count("chunks", len(records))
 
-    model = SentenceTransformer(args.model)
+    with metrics.stage("load_model"):
+        model = load_sentence_model(args.model)
 
     similarity_img = output_dir / "document_similarity_heatmap.png"
-    _plot_doc_similarity(similarity_img, docs, doc_vectors)
+    jobs = [FigureJob(_plot_doc_similarity, (similarity_img, docs, doc_vectors))]
 
     polarity_img = output_dir / "polarity_balance.png"
-    _plot_polarity_balance(polarity_img, docs, records)
+    with metrics.stage("polarity_balance"):
+        pos_counts, neg_counts = _polarity_totals(docs, records)
+    labels = [doc.short_label for doc in docs]
+    jobs.append(FigureJob(_plot_polarity_balance, (polarity_img, labels, pos_counts, neg_counts)))
 
     topic_img = output_dir / "topic_emphasis.png"
-    _topic_trends(topic_img, docs, doc_vectors, model)
+    with metrics.stage("topic_trends"):
+        topic_scores = _topic_trends(doc_vectors, model)
+    jobs.append(FigureJob(_plot_topic_trends, (topic_img, docs, topic_scores)))
 
-    shift_counts, shift_keyword_hits, shift_semantic_hits = _shift_topic_scores(
-        embeddings, records, docs, model
-    )
+    with metrics.stage("narrative_shift"):
+        shift_counts, shift_keyword_hits, shift_semantic_hits = _shift_topic_scores(
+            embeddings, records, docs, model
+        )
     shift_img = output_dir / "narrative_shift_timeline.png"
-    _plot_shift_timeline(shift_img, docs, shift_counts)
+    jobs.append(FigureJob(_plot_shift_timeline, (shift_img, docs, shift_counts)))
     _write_shift_report(
         args.shift_report.expanduser().resolve(),
         docs,
@@ -966,59 +990,67 @@ def main() -> None:
         shift_semantic_hits,
     )
 
-    edges, coords, candidates, doc_labels, signs, strengths = _build_contradictions(
-        embeddings,
-        records,
-        docs,
-        min_polarity_hits=args.min_polarity_hits,
-        max_candidates=args.max_candidates,
-        similarity_threshold=args.similarity_threshold,
-        max_edges=args.max_edges,
-    )
-
-    contradiction_img = output_dir / "contradiction_map.png"
-    if coords.size:
-        edge_indices = []
-        if edges:
-            cand_lookup = {}
-            for pos, idx in enumerate(candidates):
-                record = records[idx]
-                key = (record.get("chunk_index"), record.get("source_pdf"))
-                cand_lookup[key] = pos
-            for edge in edges:
-                chunk_a = edge.get("chunk_a")
-                chunk_b = edge.get("chunk_b")
-                source_a = edge.get("source_a", "")
-                source_b = edge.get("source_b", "")
-                idx_a = cand_lookup.get((chunk_a, source_a))
-                idx_b = cand_lookup.get((chunk_b, source_b))
-                if idx_a is None or idx_b is None:
-                    continue
-                edge_indices.append((idx_a, idx_b))
-        _plot_contradiction_map(contradiction_img, coords, doc_labels, edges, edge_indices)
+    with metrics.stage("contradictions"):
+        edges, coords, candidates, doc_labels, signs, strengths = _build_contradictions(
+            embeddings,
+            records,
+            docs,
+            min_polarity_hits=args.min_polarity_hits,
+            max_candidates=args.max_candidates,
+            similarity_threshold=args.similarity_threshold,
+            max_edges=args.max_edges,
+        )
 
-    _write_edges(args.edges.expanduser().resolve(), edges)
+        contradiction_img = output_dir / "contradiction_map.png"
+        if coords.size:
+            edge_indices = []
+            if edges:
+                cand_lookup = {}
+                for pos, idx in enumerate(candidates):
+                    record = records[idx]
+                    key = (record.get("chunk_index"), record.get("source_pdf"))
+                    cand_lookup[key] = pos
+                for edge in edges:
+                    chunk_a = edge.get("chunk_a")
+                    chunk_b = edge.get("chunk_b")
+                    source_a = edge.get("source_a", "")
+                    source_b = edge.get("source_b", "")
+                    idx_a = cand_lookup.get((chunk_a, source_a))
+                    idx_b = cand_lookup.get((chunk_b, source_b))
+                    if idx_a is None or idx_b is None:
+                        continue
+                    edge_indices.append((idx_a, idx_b))
+            jobs.append(
+                FigureJob(_plot_contradiction_map, (contradiction_img, coords, doc_labels, edges, edge_indices))
+            )
 
-    topic_hits: Dict[str, List[Tuple[float, int]]] = {}
-    for topic, queries in TOPIC_QUERIES.items():
-        query_embeddings = model.encode(queries, normalize_embeddings=True)
-        scores = embeddings @ query_embeddings.T
-        best_scores = scores.max(axis=1)
-        ranked = np.argsort(-best_scores)
-        seen = set()
-        picks: List[Tuple[float, int]] = []
-        for idx in ranked:
-            text = records[idx]["text"]
-            if text in seen:
-                continue
-            seen.add(text)
-            picks.append((float(best_scores[idx]), idx))
-            if len(picks) >= args.top_hits:
-                break
-        topic_hits[topic] = picks
+        _write_edges(args.edges.expanduser().resolve(), edges)
+
+    with metrics.stage("topic_hits"):
+        topic_hits: Dict[str, List[Tuple[float, int]]] = {}
+        for topic, queries in TOPIC_QUERIES.items():
+            query_embeddings = model.encode(queries, normalize_embeddings=True)
+            scores = embeddings @ query_embeddings.T
+            best_scores = scores.max(axis=1)
+            ranked = np.argsort(-best_scores)
+            seen = set()
+            picks: List[Tuple[float, int]] = []
+            for idx in ranked:
+                text = records[idx]["text"]
+                if text in seen:
+                    continue
+                seen.add(text)
+                picks.append((float(best_scores[idx]), idx))
+                if len(picks) >= args.top_hits:
+                    break
+            topic_hits[topic] = picks
 
     _write_report(args.report.expanduser().resolve(), docs, records, edges, topic_hits)
 
+    with metrics.stage("plot"):
+        render_figures(jobs, args.workers)
+    metrics.count("figures", len(jobs))
+
     images = [
         ("document_similarity_heatmap.png", "Document similarity heatmap"),
         ("polarity_balance.png", "Polarity balance by document"),
@@ -1032,6 +1064,7 @@ def main() -> None:
     _write_index(index_path, images)
 
     print(f"Wrote visuals to {output_dir}")
+    metrics.finish()
 
 
 if __name__ == "__main__":
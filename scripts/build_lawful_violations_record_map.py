@@ -4,12 +4,27 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable, List
+from typing import Dict, List, Sequence, Tuple
 
 ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.instrumentation import add_metrics_arguments, metrics_from_args  # noqa: E402
+
+# Stores smaller than this are scanned in-process; pool start-up costs more.
+PARALLEL_MIN_RECORDS = 2000
+SCAN_BATCH_SIZE = 500
+# A query's leading literal ends at any of these (or an escape class like \d).
+REGEX_SPECIAL = frozenset(".^$*+?{}[]()|\\")
+QUANTIFIERS = frozenset("*+?{")
 
 NON_ASCII_MAP = str.maketrans(
     {
@@ -42,19 +57,151 @@ def _normalize_ws(text: str) -> str:
     return re.sub(r"\s+", " ", text).strip()
 
 
-def _snippet_around_match(text: str, patterns: List[re.Pattern], max_len: int = 320) -> str:
+@dataclass
+class ClaimScanner:
+    """All claim queries compiled into one matcher.
+
+    ``combined`` is a zero-width alternation of each query's leading literal
+    (lowercased), run once over the lowercased chunk. An anchor seen there
+    marks its queries -- and the queries of any anchor it starts with -- as
+    candidates; only those are confirmed with the full pattern. Queries
+    without a literal prefix (``unanchored_ids``) are searched in every chunk.
+    ``claim_pattern_ids`` maps each claim to its queries in draft order.
+    """
+
+    combined: re.Pattern
+    patterns: List[re.Pattern]
+    anchor_pattern_ids: Dict[str, List[int]]
+    unanchored_ids: List[int]
+    claim_pattern_ids: List[List[int]]
+
+
+@dataclass
+class ChunkScan:
+    """First match span per query id, measured on the normalized text."""
+
+    spans: Dict[int, Tuple[int, int]]
+    cleaned: str
+
+
+def _literal_prefix(query: str) -> str:
+    """Leading literal run of ``query``, skipping a leading ``^``, ``\\A`` or ``\\b``.
+
+    Read off the query text: the run stops at the first metacharacter or
+    escape class, and a character under a quantifier is left out. A query
+    with ``|`` anywhere has no prefix every match must start with, so it
+    gets none and is searched on its own.
+    """
+
+    if "|" in query:
+        return ""
+    chars: List[str] = []
+    pos = 0
+    while pos < len(query):
+        char = query[pos]
+        if char == "\\" and pos + 1 < len(query):
+            escaped = query[pos + 1]
+            if escaped.isalnum():
+                if not chars and escaped in "AbB":
+                    pos += 2
+                    continue
+                break
+            char, step = escaped, 2
+        elif char == "^" and not chars:
+            pos += 1
+            continue
+        elif char in REGEX_SPECIAL:
+            break
+        else:
+            step = 1
+        pos += step
+        if pos < len(query) and query[pos] in QUANTIFIERS:
+            break
+        chars.append(char)
+    return "".join(chars).lower()
+
+
+def _compile_scanner(claims: Sequence[dict]) -> ClaimScanner:
+    unique: Dict[str, int] = {}
+    claim_pattern_ids: List[List[int]] = []
+    for entry in claims:
+        claim_pattern_ids.append([unique.setdefault(query, len(unique)) for query in entry["queries"]])
+    by_anchor: Dict[str, List[int]] = {}
+    unanchored: List[int] = []
+    for query, idx in unique.items():
+        anchor = _literal_prefix(query)
+        if anchor:
+            by_anchor.setdefault(anchor, []).append(idx)
+        else:
+            unanchored.append(idx)
+    # The alternation reports one anchor per position (longest first), so each
+    # anchor also claims the queries of every shorter anchor it starts with.
+    anchor_pattern_ids = {
+        anchor: [idx for other, ids in by_anchor.items() if anchor.startswith(other) for idx in ids]
+        for anchor in by_anchor
+    }
+    ordered = sorted(by_anchor, key=lambda anchor: (-len(anchor), anchor))
+    alternatives = "|".join(re.escape(anchor) for anchor in ordered)
+    return ClaimScanner(
+        combined=re.compile(f"(?=({alternatives}))"),
+        patterns=[re.compile(query, re.IGNORECASE) for query in unique],
+        anchor_pattern_ids=anchor_pattern_ids,
+        unanchored_ids=unanchored,
+        claim_pattern_ids=claim_pattern_ids,
+    )
+
+
+def _scan_text(text: str, scanner: ClaimScanner) -> ChunkScan | None:
+    """Record the first span of every query that occurs in ``text``.
+
+    The normalized text is pure ASCII, so lowercasing it is length-preserving
+    and a case-sensitive pass over it finds every anchor an ``IGNORECASE``
+    query could start with. Confirmed spans come from the full pattern.
+    """
+
     cleaned = _normalize_ws(_normalize_ascii(text))
-    for pattern in patterns:
-        match = pattern.search(cleaned)
+    anchors = {match.group(1) for match in scanner.combined.finditer(cleaned.lower())}
+    candidates = set(scanner.unanchored_ids)
+    for anchor in anchors:
+        candidates.update(scanner.anchor_pattern_ids[anchor])
+    spans: Dict[int, Tuple[int, int]] = {}
+    for idx in sorted(candidates):
+        match = scanner.patterns[idx].search(cleaned)
         if match:
-            start = max(0, match.start() - max_len // 2)
-            end = min(len(cleaned), start + max_len)
-            snippet = cleaned[start:end].strip()
-            if start > 0:
-                snippet = "..." + snippet
-            if end < len(cleaned):
-                snippet = snippet + "..."
-            return snippet
+            spans[idx] = match.span()
+    if not spans:
+        return None
+    return ChunkScan(spans=spans, cleaned=cleaned)
+
+
+def _scan_batch(texts: List[str]) -> List[ChunkScan | None]:
+    return [_scan_text(text, SCANNER) for text in texts]
+
+
+def _scan_records(records: List[dict], workers: int) -> List[ChunkScan | None]:
+    """Read each chunk's text exactly once, fanning out for big stores."""
+
+    texts = [record.get("text", "") for record in records]
+    if workers <= 1 or len(texts) < PARALLEL_MIN_RECORDS:
+        return _scan_batch(texts)
+    batches = [texts[start : start + SCAN_BATCH_SIZE] for start in range(0, len(texts), SCAN_BATCH_SIZE)]
+    scans: List[ChunkScan | None] = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for batch in executor.map(_scan_batch, batches):
+            scans.extend(batch)
+    return scans
+
+
+def _snippet_from_span(cleaned: str, span: Tuple[int, int] | None, max_len: int = 320) -> str:
+    if span is not None:
+        start = max(0, span[0] - max_len // 2)
+        end = min(len(cleaned), start + max_len)
+        snippet = cleaned[start:end].strip()
+        if start > 0:
+            snippet = "..." + snippet
+        if end < len(cleaned):
+            snippet = snippet + "..."
+        return snippet
     if len(cleaned) <= max_len:
         return cleaned
     return cleaned[: max_len - 3].rstrip() + "..."
@@ -65,38 +212,42 @@ def _load_records(store_dir: Path) -> List[dict]:
     return [json.loads(line) for line in metadata_path.read_text(encoding="utf-8").splitlines()]
 
 
-def _score_record(text: str, patterns: Iterable[re.Pattern]) -> int:
-    return sum(1 for pattern in patterns if pattern.search(text))
-
-
 def _claim_hits(
     records: List[dict],
-    patterns: List[re.Pattern],
+    scans: List[ChunkScan | None],
+    pattern_ids: List[int],
     max_hits: int,
 ) -> List[dict]:
-    scored: List[tuple[int, dict]] = []
-    for record in records:
-        text = record.get("text", "")
-        score = _score_record(text, patterns)
+    scored: List[tuple[int, int]] = []
+    for row, scan in enumerate(scans):
+        if scan is None:
+            continue
+        score = sum(1 for pattern_id in pattern_ids if pattern_id in scan.spans)
         if score <= 0:
             continue
-        scored.append((score, record))
-    scored.sort(key=lambda item: (-item[0], item[1].get("vector_id", 0)))
+        scored.append((score, row))
+    scored.sort(key=lambda item: (-item[0], records[item[1]].get("vector_id", 0)))
 
     hits: List[dict] = []
     seen = set()
-    for score, record in scored:
+    for score, row in scored:
+        record = records[row]
+        scan = scans[row]
         key = record.get("id")
         if key in seen:
             continue
         seen.add(key)
+        first_span = next(
+            (scan.spans[pattern_id] for pattern_id in pattern_ids if pattern_id in scan.spans),
+            None,
+        )
         hits.append(
             {
                 "score": score,
                 "vector_id": record.get("vector_id"),
                 "chunk_index": record.get("chunk_index"),
                 "source_pdf": record.get("source_pdf", ""),
-                "snippet": _snippet_around_match(record.get("text", ""), patterns),
+                "snippet": _snippet_from_span(scan.cleaned, first_span),
             }
         )
         if len(hits) >= max_hits:
@@ -273,11 +424,14 @@ CLAIMS = [
     },
 ]
 
+SCANNER = _compile_scanner(CLAIMS)
+
 
 def _write_report(
     output_path: Path,
     records: List[dict],
     max_hits: int,
+    workers: int = 1,
 ) -> None:
     lines = [
         "# 28B Record Integration - Lawful Violations Draft",
@@ -289,9 +443,9 @@ def _write_report(
         "",
     ]
 
-    for entry in CLAIMS:
-        patterns = [re.compile(q, re.IGNORECASE) for q in entry["queries"]]
-        hits = _claim_hits(records, patterns, max_hits)
+    scans = _scan_records(records, workers)
+    for entry, pattern_ids in zip(CLAIMS, SCANNER.claim_pattern_ids):
+        hits = _claim_hits(records, scans, pattern_ids, max_hits)
         lines.append(f"## {entry['id']} | {entry['section']}")
         lines.append("")
         lines.append(f"Draft claim: {entry['claim']}")
@@ -335,17 +489,29 @@ def _parse_args() -> argparse.Namespace:
         default=3,
         help="Max excerpts per claim.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes for scanning large stores (1 = scan in-process).",
+    )
+    add_metrics_arguments(parser)
     return parser.parse_args()
 
 
 def main() -> None:
     args = _parse_args()
+    metrics = metrics_from_args(args, "build_lawful_violations_record_map")
     store_dir = args.store.expanduser().resolve()
-    records = _load_records(store_dir)
+    with metrics.stage("load"):
+        records = _load_records(store_dir)
+    metrics.count("chunks", len(records))
     output_path = args.output.expanduser().resolve()
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    _write_report(output_path, records, args.max_hits)
+    with metrics.stage("scan"):
+        _write_report(output_path, records, args.max_hits, args.workers)
     print(f"Wrote record map to {output_path}")
+    metrics.finish()
 
 
 if __name__ == "__main__":
@@ -3,12 +3,22 @@
 from __future__ import annotations
 
 import argparse
+import bisect
 import json
+import os
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
+from typing import Dict, List, Sequence, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.instrumentation import add_metrics_arguments, metrics_from_args  # noqa: E402
 
 MONTHS = {
     "jan": 1,
@@ -75,6 +85,27 @@ class Party:
     patterns: List[re.Pattern]
 
 
+@dataclass
+class PartyMatcher:
+    """Every party variant compiled into one matcher.
+
+    ``combined`` is a zero-width alternation of the lowercased variants,
+    longest first, so one ``finditer`` over a lowercased chunk reports the
+    longest variant starting at each position. Shorter variants that are a
+    prefix of it (``prefix_ids``) are confirmed with an anchored match.
+    """
+
+    combined: re.Pattern
+    patterns: List[re.Pattern]
+    variant_ids: Dict[str, int]
+    prefix_ids: List[List[int]]
+    variant_parties: List[List[int]]
+
+
+# (sentence, source_pdf, vector_id, chunk_index) for one party mention.
+SentenceHit = Tuple[str, str, int, int]
+
+
 @dataclass
 class ActionHit:
     date_text: str | None
@@ -158,11 +189,21 @@ def _extract_dates(text: str) -> List[Tuple[str, datetime | None]]:
     return results
 
 
-def _split_sentences(text: str) -> List[str]:
-    if not text:
-        return []
-    chunks = re.split(r"(?<=[.!?])\s+|\n{2,}", text)
-    return [chunk.strip() for chunk in chunks if chunk.strip()]
+def _sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """Offsets of stripped sentences split on terminal punctuation or blank lines."""
+
+    spans: List[Tuple[int, int]] = []
+    start = 0
+    for match in list(re.finditer(r"(?<=[.!?])\s+|\n{2,}", text)) + [None]:
+        end = match.start() if match else len(text)
+        piece = text[start:end]
+        stripped = piece.strip()
+        if stripped:
+            offset = start + len(piece) - len(piece.lstrip())
+            spans.append((offset, offset + len(stripped)))
+        if match:
+            start = match.end()
+    return spans
 
 
 def _load_party_list(names_path: Path | None, names: List[str]) -> List[Party]:
@@ -197,43 +238,140 @@ def _load_party_list(names_path: Path | None, names: List[str]) -> List[Party]:
     return parties
 
 
-def _iter_records(store_root: Path) -> Iterable[Tuple[str, dict]]:
-    for store_dir in sorted(store_root.iterdir(), key=lambda p: p.name.lower()):
-        metadata_path = store_dir / "metadata.jsonl"
-        if not metadata_path.exists():
+def _compile_matcher(parties: Sequence[Party]) -> PartyMatcher:
+    variant_ids: Dict[str, int] = {}
+    variant_parties: List[List[int]] = []
+    for party_idx, party in enumerate(parties):
+        for variant in party.variants:
+            key = variant.lower()
+            if key not in variant_ids:
+                variant_ids[key] = len(variant_ids)
+                variant_parties.append([])
+            owners = variant_parties[variant_ids[key]]
+            if party_idx not in owners:
+                owners.append(party_idx)
+    ordered = sorted(variant_ids, key=lambda key: (-len(key), key))
+    alternatives = "|".join(re.escape(key) for key in ordered)
+    prefix_ids = [
+        [variant_ids[other] for other in ordered if other != key and key.startswith(other)]
+        for key in variant_ids
+    ]
+    return PartyMatcher(
+        combined=re.compile(rf"(?=\b({alternatives})\b)"),
+        patterns=[re.compile(rf"\b{re.escape(key)}\b", re.IGNORECASE) for key in variant_ids],
+        variant_ids=variant_ids,
+        prefix_ids=prefix_ids,
+        variant_parties=variant_parties,
+    )
+
+
+def _party_sentences(normalized: str, matcher: PartyMatcher) -> List[Tuple[int, Tuple[int, int]]]:
+    """Return (party index, sentence span) pairs in sentence order.
+
+    A mention counts only when it lies inside one sentence, matching what a
+    per-sentence search would find. Normalized text is pure ASCII, so the
+    lowercased copy keeps offsets aligned with ``normalized``.
+    """
+
+    spans: List[Tuple[int, int]] | None = None
+    starts: List[int] = []
+    found: Dict[Tuple[int, int], None] = {}
+    for match in matcher.combined.finditer(normalized.lower()):
+        if spans is None:
+            spans = _sentence_spans(normalized)
+            starts = [span[0] for span in spans]
+        pos = match.start()
+        variant_id = matcher.variant_ids[match.group(1)]
+        hits = [(variant_id, pos + len(match.group(1)))]
+        for prefix_id in matcher.prefix_ids[variant_id]:
+            anchored = matcher.patterns[prefix_id].match(normalized, pos)
+            if anchored:
+                hits.append((prefix_id, anchored.end()))
+        sentence_idx = bisect.bisect_right(starts, pos) - 1
+        if sentence_idx < 0:
             continue
-        for line in metadata_path.read_text(encoding="utf-8").splitlines():
-            if not line.strip():
+        sentence_end = spans[sentence_idx][1]
+        for hit_id, end in hits:
+            if end > sentence_end:
                 continue
-            yield store_dir.name, json.loads(line)
+            for party_idx in matcher.variant_parties[hit_id]:
+                found.setdefault((sentence_idx, party_idx), None)
+    return [(party_idx, spans[sentence_idx]) for sentence_idx, party_idx in sorted(found)]
 
 
-def _matches_party(text: str, party: Party) -> bool:
-    return any(pattern.search(text) for pattern in party.patterns)
+def _iter_stores(store_root: Path) -> List[Tuple[str, Path]]:
+    """List (filer, store_dir) pairs under a merged or per-source root.
+
+    Merged roots hold ``<filer>/metadata.jsonl``; per-source roots nest one
+    store per document under ``<filer>/<doc>/``.
+    """
+
+    stores: List[Tuple[str, Path]] = []
+    for filer_dir in sorted(store_root.iterdir(), key=lambda p: p.name.lower()):
+        if not filer_dir.is_dir():
+            continue
+        if (filer_dir / "metadata.jsonl").exists():
+            stores.append((filer_dir.name, filer_dir))
+            continue
+        nested = sorted(filer_dir.rglob("metadata.jsonl"), key=lambda p: str(p).lower())
+        stores.extend((filer_dir.name, path.parent) for path in nested)
+    return stores
+
+
+def _scan_store(
+    job: Tuple[Path, PartyMatcher, int],
+) -> Dict[int, List[SentenceHit]]:
+    """Collect every party sentence in one store, in record order."""
+
+    store_dir, matcher, party_count = job
+    hits: Dict[int, List[SentenceHit]] = {idx: [] for idx in range(party_count)}
+    metadata_path = store_dir / "metadata.jsonl"
+    for line in metadata_path.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        text = record.get("text", "")
+        if not text:
+            continue
+        normalized = _normalize_ascii(_normalize_ws(text))
+        for party_idx, (start, end) in _party_sentences(normalized, matcher):
+            hits[party_idx].append(
+                (
+                    normalized[start:end],
+                    record.get("source_pdf", ""),
+                    int(record.get("vector_id", 0)),
+                    int(record.get("chunk_index", 0)),
+                )
+            )
+    return hits
 
 
 def _extract_party_hits(
     store_root: Path,
     parties: List[Party],
     max_per_party: int,
+    workers: int = 1,
 ) -> Dict[str, List[ActionHit]]:
     results: Dict[str, List[ActionHit]] = {party.label: [] for party in parties}
     seen: Dict[str, set] = {party.label: set() for party in parties}
-
-    for filer, record in _iter_records(store_root):
-        text = record.get("text", "")
-        if not text:
-            continue
-        normalized = _normalize_ascii(_normalize_ws(text))
-        sentences = _split_sentences(normalized)
-
-        for party in parties:
-            if not _matches_party(normalized, party):
-                continue
-            for sentence in sentences:
-                if not _matches_party(sentence, party):
-                    continue
-                key = (sentence, record.get("source_pdf", ""))
+    stores = _iter_stores(store_root)
+    matcher = _compile_matcher(parties)
+    jobs = [(store_dir, matcher, len(parties)) for _, store_dir in stores]
+
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            scanned = list(executor.map(_scan_store, jobs))
+    else:
+        scanned = [_scan_store(job) for job in jobs]
+
+    # Merge in store order so dedupe and caps match a sequential walk.
+    for (filer, _), store_hits in zip(stores, scanned):
+        for party_idx, party in enumerate(parties):
+            bucket = results[party.label]
+            for sentence, source_pdf, vector_id, chunk_index in store_hits[party_idx]:
+                if len(bucket) >= max_per_party:
+                    break
+                key = (sentence, source_pdf)
                 if key in seen[party.label]:
                     continue
                 seen[party.label].add(key)
@@ -242,20 +380,17 @@ def _extract_party_hits(
                     date_text, date_value = dates[0]
                 else:
                     date_text, date_value = (None, None)
-                hit = ActionHit(
-                    date_text=date_text,
-                    date_value=date_value,
-                    snippet=_snippet(sentence),
-                    source_pdf=record.get("source_pdf", ""),
-                    vector_id=int(record.get("vector_id", 0)),
-                    chunk_index=int(record.get("chunk_index", 0)),
-                    filer=filer,
+                bucket.append(
+                    ActionHit(
+                        date_text=date_text,
+                        date_value=date_value,
+                        snippet=_snippet(sentence),
+                        source_pdf=source_pdf,
+                        vector_id=vector_id,
+                        chunk_index=chunk_index,
+                        filer=filer,
+                    )
                 )
-                results[party.label].append(hit)
-                if len(results[party.label]) >= max_per_party:
-                    break
-            if len(results[party.label]) >= max_per_party:
-                continue
 
     return results
 
@@ -318,7 +453,10 @@ def _parse_args() -> argparse.Namespace:
         "--store-root",
         type=Path,
         default=Path("vector_store_case_docs_by_filer"),
-        help="Root directory containing merged per-filer vector stores.",
+        help=(
+            "Root directory containing merged per-filer vector stores "
+            "or per-source stores nested under each filer."
+        ),
     )
     parser.add_argument(
         "--names-file",
@@ -344,20 +482,31 @@ def _parse_args() -> argparse.Namespace:
         default=80,
         help="Maximum entries per party.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes for scanning stores (1 = scan in-process).",
+    )
+    add_metrics_arguments(parser)
     return parser.parse_args()
 
 
 def main() -> None:
     args = _parse_args()
+    metrics = metrics_from_args(args, "build_party_action_map")
     store_root = args.store_root.expanduser().resolve()
     if not store_root.exists():
         raise FileNotFoundError(f"Missing store root: {store_root}")
 
     names_path = args.names_file.expanduser()
     parties = _load_party_list(names_path, args.names)
-    hits = _extract_party_hits(store_root, parties, args.max_per_party)
-    _write_report(args.output, store_root, parties, hits, args.max_per_party)
+    with metrics.stage("scan"):
+        hits = _extract_party_hits(store_root, parties, args.max_per_party, args.workers)
+    with metrics.stage("write"):
+        _write_report(args.output, store_root, parties, hits, args.max_per_party)
     print(f"Wrote {args.output}")
+    metrics.finish()
 
 
 if __name__ == "__main__":
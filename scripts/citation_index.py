@@ -0,0 +1,285 @@
+"""Persistent citation posting lists for a vector store.
+
+Docket numbers, trial court numbers, case captions, rules and statutes are
+extracted once per chunk and stored as ``citation -> sorted vector_ids``
+postings in ``citation_index.json`` next to ``metadata.jsonl``. Re-running
+the stage only scans chunks whose ids are not in the index yet; if existing
+chunks were renumbered or removed the index is rebuilt from scratch.
+
+Usage:
+    python scripts/citation_index.py --store vector_store_28b
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.instrumentation import add_metrics_arguments, get_metrics, metrics_from_args  # noqa: E402
+
+INDEX_FILENAME = "citation_index.json"
+INDEX_VERSION = 1
+
+NON_ASCII_MAP = str.maketrans(
+    {
+        "\u2018": "'",
+        "\u2019": "'",
+        "\u201c": '"',
+        "\u201d": '"',
+        "\u2013": "-",
+        "\u2014": "--",
+        "\u2026": "...",
+        "\u00a0": " ",
+        "\u2011": "-",
+        "\u2212": "-",
+        "\u00ad": "",
+        "\u2022": "-",
+        "\u00a7": "sec.",
+    }
+)
+
+RE_CASE_V = re.compile(
+    r"\b[A-Z][A-Za-z0-9.&'\- ]{1,50}\s+v\.?\s+[A-Z][A-Za-z0-9.&'\- ]{1,50}\b"
+)
+RE_IN_RE = re.compile(r"\bIn re\s+[A-Z][A-Za-z0-9.&'\- ]{1,50}\b")
+RE_DOCKET = re.compile(r"\b\d{2}-\d{2}-\d{5}(?:-CV)?\b")
+RE_TRIAL_NO = re.compile(r"\b\d{3}-\d{6}-\d{2}\b")
+RE_RULE = re.compile(
+    r"\b(?:Tex\.?\s+R\.?\s+(?:Civ|App)\.?\s+P\.?|TRCP|Rule)\s*\d+(?:\.\d+)?\b",
+    re.IGNORECASE,
+)
+RE_USC = re.compile(r"\b\d+\s*U\.S\.C\.?\s*§+\s*\d+[A-Za-z0-9.-]*\b")
+RE_TEX_CODE = re.compile(
+    r"\bTex\.?\s+(?:Fam|Gov|Penal|Civ\.?\s+Prac\.?\s+&\s+Rem\.?|Code\s+Crim\.?\s+"
+    r"Proc\.?)\s+Code\b[^\n]{0,60}",
+    re.IGNORECASE,
+)
+
+# (category key, report heading, patterns) in report order.
+CATEGORIES: List[Tuple[str, str, List[re.Pattern]]] = [
+    ("docket_numbers", "Docket Numbers", [RE_DOCKET]),
+    ("trial_numbers", "Trial Court Numbers", [RE_TRIAL_NO]),
+    ("case_captions", "Case Captions", [RE_CASE_V, RE_IN_RE]),
+    ("rules", "Rule References", [RE_RULE]),
+    ("statutes", "Statutes and Codes", [RE_USC, RE_TEX_CODE]),
+]
+
+
+@dataclass
+class CitationIndex:
+    """Citation postings plus the chunk ids they were built from.
+
+    ``postings`` maps category -> citation -> ascending vector ids.
+    ``records`` maps each indexed chunk id to its vector id so later runs can
+    tell new chunks from renumbered ones.
+    """
+
+    postings: Dict[str, Dict[str, List[int]]] = field(
+        default_factory=lambda: {key: {} for key, _title, _patterns in CATEGORIES}
+    )
+    records: Dict[str, int] = field(default_factory=dict)
+    fingerprint: str = ""
+
+    def sections(self) -> List[Tuple[str, Dict[str, List[int]]]]:
+        """Return ``(heading, postings)`` pairs in report order."""
+
+        return [(title, self.postings.get(key, {})) for key, title, _patterns in CATEGORIES]
+
+
+def _normalize_ascii(text: str) -> str:
+    cleaned = text.translate(NON_ASCII_MAP)
+    return cleaned.encode("ascii", "ignore").decode("ascii")
+
+
+def _normalize_ws(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _fingerprint(path: Path) -> str:
+    stat = path.stat()
+    return f"v{INDEX_VERSION}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _record_key(record: dict) -> str:
+    return str(record.get("id", record["vector_id"]))
+
+
+def _load_records(metadata_path: Path) -> List[dict]:
+    return [
+        json.loads(line)
+        for line in metadata_path.read_text(encoding="utf-8").splitlines()
+        if line.strip()
+    ]
+
+
+def extract_citations(text: str) -> Dict[str, Set[str]]:
+    """Return the distinct normalized citations in ``text`` by category."""
+
+    found: Dict[str, Set[str]] = {}
+    for key, _title, patterns in CATEGORIES:
+        matches: Set[str] = set()
+        for pattern in patterns:
+            matches.update(pattern.findall(text))
+        normalized = {_normalize_ascii(_normalize_ws(match)) for match in matches}
+        normalized.discard("")
+        if normalized:
+            found[key] = normalized
+    return found
+
+
+def update_index(index: CitationIndex, records: Sequence[dict]) -> int:
+    """Add unseen chunks from ``records`` to ``index``; return how many were scanned.
+
+    When a previously indexed chunk is missing or has a different vector id,
+    the postings no longer describe the store and are rebuilt from scratch.
+    """
+
+    current = {_record_key(record): int(record["vector_id"]) for record in records}
+    if any(current.get(key) != vector_id for key, vector_id in index.records.items()):
+        fresh = CitationIndex()
+        index.postings = fresh.postings
+        index.records = fresh.records
+
+    pending: Dict[str, Dict[str, List[int]]] = {}
+    scanned = 0
+    for record in records:
+        key = _record_key(record)
+        if key in index.records:
+            continue
+        vector_id = int(record["vector_id"])
+        index.records[key] = vector_id
+        scanned += 1
+        for category, citations in extract_citations(record.get("text", "")).items():
+            bucket = pending.setdefault(category, {})
+            for citation in citations:
+                bucket.setdefault(citation, []).append(vector_id)
+
+    for category, bucket in pending.items():
+        postings = index.postings.setdefault(category, {})
+        for citation, new_ids in bucket.items():
+            new_ids.sort()
+            existing = postings.get(citation)
+            if not existing:
+                postings[citation] = new_ids
+            elif new_ids[0] > existing[-1]:
+                existing.extend(new_ids)
+            else:
+                postings[citation] = sorted(set(existing).union(new_ids))
+    return scanned
+
+
+def read_index(path: Path) -> CitationIndex | None:
+    """Load an index file (or a store directory holding one)."""
+
+    if path.is_dir():
+        path = path / INDEX_FILENAME
+    if not path.exists():
+        return None
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    if payload.get("version") != INDEX_VERSION:
+        return None
+    return CitationIndex(
+        postings=payload["postings"],
+        records={key: int(value) for key, value in payload["records"].items()},
+        fingerprint=payload.get("fingerprint", ""),
+    )
+
+
+def save_index(index: CitationIndex, path: Path) -> None:
+    payload = {
+        "version": INDEX_VERSION,
+        "fingerprint": index.fingerprint,
+        "records": index.records,
+        "postings": index.postings,
+    }
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(payload, ensure_ascii=True), encoding="utf-8")
+    tmp_path.replace(path)
+
+
+def load_or_update_index(
+    store_dir: Path,
+    records: Sequence[dict] | None = None,
+    *,
+    rebuild: bool = False,
+) -> CitationIndex:
+    """Return the store's citation index, scanning only chunks it has not seen.
+
+    ``records`` may be passed when the caller already loaded the metadata;
+    otherwise it is read only if ``metadata.jsonl`` changed since the last run.
+    """
+
+    metadata_path = store_dir / "metadata.jsonl"
+    index_path = store_dir / INDEX_FILENAME
+    fingerprint = _fingerprint(metadata_path)
+    index = None if rebuild else read_index(index_path)
+    if index is not None and index.fingerprint == fingerprint:
+        get_metrics().count("citation_index.cache_hits")
+        return index
+    if index is None:
+        index = CitationIndex()
+    if records is None:
+        records = _load_records(metadata_path)
+    get_metrics().count("citation_index.chunks_scanned", update_index(index, records))
+    index.fingerprint = fingerprint
+    save_index(index, index_path)
+    return index
+
+
+def mention_counts(postings: Dict[str, List[int]]) -> List[Tuple[str, int]]:
+    """Return ``(citation, chunk count)`` pairs, most cited first."""
+
+    return sorted(
+        ((citation, len(ids)) for citation, ids in postings.items()),
+        key=lambda item: (-item[1], item[0]),
+    )
+
+
+def _iter_summary(index: CitationIndex) -> Iterable[str]:
+    for title, postings in index.sections():
+        mentions = sum(len(ids) for ids in postings.values())
+        yield f"{title}: {len(postings)} unique, {mentions} chunk mentions"
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build or update a store's citation index.")
+    parser.add_argument(
+        "--store",
+        type=Path,
+        required=True,
+        help="Vector store directory (contains metadata.jsonl).",
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Ignore the existing index and rescan every chunk.",
+    )
+    add_metrics_arguments(parser)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    metrics = metrics_from_args(args, "citation_index")
+    store_dir = args.store.expanduser().resolve()
+    if not (store_dir / "metadata.jsonl").exists():
+        raise FileNotFoundError(f"Missing metadata.jsonl in {store_dir}")
+    with metrics.stage("index"):
+        index = load_or_update_index(store_dir, rebuild=args.rebuild)
+    print(f"Indexed {len(index.records)} chunks -> {store_dir / INDEX_FILENAME}")
+    for line in _iter_summary(index):
+        print(f"- {line}")
+    metrics.finish()
+
+
+if __name__ == "__main__":
+    main()
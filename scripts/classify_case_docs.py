@@ -0,0 +1,319 @@
+"""Provisional filer labels for CASE DOCS PDFs from caption and signature regions.
+
+Full-text OCR of a scanned filing is slow, but the filer is usually decided
+by two small areas: the caption at the top of the first page, and the
+signature block and clerk's file stamp at the bottom of the last page. This
+script reads only those bands, from the text layer when it is dense enough
+and otherwise by OCR at a moderate DPI, and scores them with the shared
+filer rules. A detected filemark found in the docket filer map overrides
+the rule score. The CSV lets later stages route and prioritize documents
+before full-text OCR has run. A PDF that cannot be opened or rendered is
+listed with ``basis`` ``error`` and the reason in ``signals``; the rest of
+the folder is still labelled.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import fitz
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.filer_rules import (  # noqa: E402
+    detect_filemark,
+    load_docket_filer_map,
+    score_filer,
+)
+from scripts.instrumentation import add_metrics_arguments, metrics_from_args  # noqa: E402
+from scripts.ocr_pages import (  # noqa: E402
+    DEFAULT_MIN_DENSITY,
+    ensure_tesseract,
+    needs_ocr,
+    ocr_page,
+    text_layer_density,
+)
+
+NON_ASCII_MAP = str.maketrans(
+    {
+        "\u2018": "'",
+        "\u2019": "'",
+        "\u201c": '"',
+        "\u201d": '"',
+        "\u2013": "-",
+        "\u2014": "--",
+        "\u2026": "...",
+        "\u00a0": " ",
+        "\u2011": "-",
+        "\u2212": "-",
+        "\u00ad": "",
+        "\u2022": "-",
+        "\u00a7": "sec.",
+    }
+)
+
+# Caption and cause number sit in the top third of the first page; the
+# signature block, certificate and file stamp in the bottom 40% of the last.
+DEFAULT_HEADER_BAND = 0.3
+DEFAULT_SIGNATURE_BAND = 0.4
+DEFAULT_DPI = 200
+
+
+@dataclass
+class Classification:
+    pdf: str
+    folder: str
+    pages: int
+    filer: str
+    score: int
+    basis: str
+    filemark: str | None
+    ocr_regions: int
+    signals: List[str] = field(default_factory=list)
+
+
+def _normalize_ascii(text: str) -> str:
+    cleaned = text.translate(NON_ASCII_MAP)
+    return cleaned.encode("ascii", "ignore").decode("ascii")
+
+
+def _regions(
+    doc: fitz.Document, header_band: float, signature_band: float
+) -> List[Tuple[fitz.Page, fitz.Rect]]:
+    import fitz
+
+    first = doc[0]
+    last = doc[-1]
+    top = first.rect
+    bottom = last.rect
+    header = fitz.Rect(top.x0, top.y0, top.x1, top.y0 + top.height * header_band)
+    signature = fitz.Rect(bottom.x0, bottom.y1 - bottom.height * signature_band, bottom.x1, bottom.y1)
+    return [(first, header), (last, signature)]
+
+
+def _region_text(
+    page: fitz.Page,
+    clip: fitz.Rect,
+    *,
+    dpi: int,
+    lang: str,
+    min_density: float,
+) -> Tuple[str, bool]:
+    """Return the region's text and whether it came from OCR."""
+
+    text = page.get_text(clip=clip).strip()
+    if not needs_ocr(page, text_layer_density(text, clip), min_density):
+        return text, False
+    ocr_text, _confidence = ocr_page(page, dpi=dpi, lang=lang, clip=clip)
+    ocr_text = ocr_text.strip()
+    if len(ocr_text) >= len(text):
+        return ocr_text, True
+    return text, False
+
+
+def classify_pdf(
+    pdf_path: Path,
+    *,
+    dpi: int = DEFAULT_DPI,
+    lang: str = "eng",
+    header_band: float = DEFAULT_HEADER_BAND,
+    signature_band: float = DEFAULT_SIGNATURE_BAND,
+    min_density: float = DEFAULT_MIN_DENSITY,
+    docket_map: Dict[str, str] | None = None,
+) -> Classification:
+    import fitz
+
+    doc = fitz.open(str(pdf_path))
+    try:
+        page_count = doc.page_count
+        texts: List[str] = []
+        ocr_regions = 0
+        if page_count:
+            for page, clip in _regions(doc, header_band, signature_band):
+                text, from_ocr = _region_text(
+                    page, clip, dpi=dpi, lang=lang, min_density=min_density
+                )
+                texts.append(text)
+                ocr_regions += int(from_ocr)
+    finally:
+        doc.close()
+
+    combined = _normalize_ascii("\n".join(texts))
+    filer, score, signals = score_filer(combined)
+    filemark = detect_filemark(combined)
+    basis = "rules" if score else "none"
+    if filemark and docket_map and filemark in docket_map:
+        filer = docket_map[filemark]
+        basis = "filemark"
+    return Classification(
+        pdf=str(pdf_path),
+        folder=pdf_path.parent.name,
+        pages=page_count,
+        filer=filer,
+        score=score,
+        basis=basis,
+        filemark=filemark,
+        ocr_regions=ocr_regions,
+        signals=signals,
+    )
+
+
+def classify_all(pdfs: Sequence[Path], **options: object) -> List[Classification]:
+    """Classify every PDF; one that fails to open or render becomes an ``error`` row.
+
+    ``options`` are passed on to ``classify_pdf``.
+    """
+
+    rows: List[Classification] = []
+    for pdf_path in pdfs:
+        try:
+            rows.append(classify_pdf(pdf_path, **options))
+        except Exception as exc:
+            print(f"Warning: could not classify {pdf_path}: {exc}", file=sys.stderr)
+            rows.append(
+                Classification(
+                    pdf=str(pdf_path),
+                    folder=pdf_path.parent.name,
+                    pages=0,
+                    filer="unknown",
+                    score=0,
+                    basis="error",
+                    filemark=None,
+                    ocr_regions=0,
+                    signals=[f"{type(exc).__name__}: {exc}"],
+                )
+            )
+    return rows
+
+
+def _write_csv(output_path: Path, rows: List[Classification]) -> None:
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with output_path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(
+            [
+                "pdf",
+                "folder",
+                "pages",
+                "provisional_filer",
+                "score",
+                "basis",
+                "filemark",
+                "ocr_regions",
+                "signals",
+            ]
+        )
+        for row in rows:
+            writer.writerow(
+                [
+                    row.pdf,
+                    row.folder,
+                    row.pages,
+                    row.filer,
+                    row.score,
+                    row.basis,
+                    row.filemark or "",
+                    row.ocr_regions,
+                    "; ".join(row.signals),
+                ]
+            )
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Label CASE DOCS PDFs by filer from their caption and signature regions."
+    )
+    parser.add_argument(
+        "--input-dir",
+        type=Path,
+        default=Path("CASE DOCS"),
+        help="Directory searched recursively for PDFs.",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("reports/case_docs_provisional_filers.csv"),
+        help="CSV of provisional filer labels.",
+    )
+    parser.add_argument(
+        "--docket-filer-map",
+        type=Path,
+        default=Path("reports/28b_docket_filer_map.csv"),
+        help="Filemark -> filer CSV from build_docket_filer_map (optional).",
+    )
+    parser.add_argument("--dpi", type=int, default=DEFAULT_DPI, help="Render DPI for region OCR.")
+    parser.add_argument("--lang", type=str, default="eng", help="OCR language.")
+    parser.add_argument(
+        "--header-band",
+        type=float,
+        default=DEFAULT_HEADER_BAND,
+        help="Fraction of the first page, from the top, read as the caption.",
+    )
+    parser.add_argument(
+        "--signature-band",
+        type=float,
+        default=DEFAULT_SIGNATURE_BAND,
+        help="Fraction of the last page, from the bottom, read as signature and stamp.",
+    )
+    parser.add_argument(
+        "--min-text-density",
+        type=float,
+        default=DEFAULT_MIN_DENSITY,
+        help="OCR regions whose text layer has fewer non-space chars per square inch.",
+    )
+    add_metrics_arguments(parser)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    metrics = metrics_from_args(args, "classify_case_docs")
+    input_dir = args.input_dir.expanduser().resolve()
+    if not input_dir.exists():
+        raise FileNotFoundError(f"Missing input directory: {input_dir}")
+    pdfs = sorted(input_dir.rglob("*.pdf"))
+    if not pdfs:
+        raise FileNotFoundError(f"No PDFs found under {input_dir}")
+
+    ensure_tesseract()
+    docket_map = load_docket_filer_map(args.docket_filer_map.expanduser().resolve())
+    started = time.perf_counter()
+    with metrics.stage("classify"):
+        rows = classify_all(
+            pdfs,
+            dpi=args.dpi,
+            lang=args.lang,
+            header_band=args.header_band,
+            signature_band=args.signature_band,
+            min_density=args.min_text_density,
+            docket_map=docket_map,
+        )
+    output_path = args.output.expanduser().resolve()
+    _write_csv(output_path, rows)
+
+    elapsed = time.perf_counter() - started
+    ocr_regions = sum(row.ocr_regions for row in rows)
+    failed = sum(1 for row in rows if row.basis == "error")
+    metrics.count("documents", len(rows))
+    metrics.count("documents_failed", failed)
+    metrics.count("ocr_regions", ocr_regions)
+    print(f"Classified {len(rows)} PDFs in {elapsed:.1f}s ({ocr_regions} regions OCR'd) -> {output_path}")
+    if failed:
+        print(f"{failed} PDF(s) could not be read; see rows with basis 'error'.")
+    for filer, count in Counter(row.filer for row in rows).most_common():
+        print(f"- {filer}: {count}")
+    metrics.finish()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+"""Disk memoization for expensive, pure stage functions.
+
+``@memoize()`` caches a function's result under ``--cache-dir`` (default
+``reports/stage_cache``), keyed by a fingerprint of:
+
+- its arguments: array bytes, file contents for ``Path`` arguments,
+  dataclass fields, and containers hashed recursively;
+- the source of the module that defines it, so editing the module
+  invalidates its entries;
+- ``version``.
+
+Array results are stored as ``.npy``, everything else is pickled. When the
+directory grows past ``--cache-max-mb``, the least recently used entries are
+deleted (a hit refreshes an entry's mtime).
+
+Caching is off until a script calls ``cache_from_args`` (or ``configure``),
+so library callers and benchmarks always compute. Hits, misses, stores and
+evictions are kept per function (``stats()``) and counted in the run's
+metrics as ``cache.<function>.<event>``.
+
+Arguments that cannot be hashed directly, such as an encoder, are mapped to
+a stand-in with ``fingerprints={"model": encoder_fingerprint}``. Arguments
+that do not change the result go in ``ignore``.
+
+Usage:
+    python scripts/disk_cache.py --cache-dir reports/stage_cache
+    python scripts/disk_cache.py --cache-dir reports/stage_cache --clear
+"""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import re
+import sys
+import threading
+from collections import defaultdict
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping, Sequence, Tuple, TypeVar
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.instrumentation import get_metrics  # noqa: E402
+
+F = TypeVar("F", bound=Callable[..., object])
+
+DEFAULT_CACHE_DIR = Path("reports/stage_cache")
+DEFAULT_MAX_MB = 2048
+# Bump to invalidate every entry (e.g. when the fingerprint format changes).
+CACHE_VERSION = 1
+PROBE_TEXT = "Order of referral to the associate judge; motion to recuse denied."
+
+_CACHE_DIR: Path | None = None
+_MAX_BYTES = DEFAULT_MAX_MB * 1024 * 1024
+_LOCK = threading.Lock()
+_STATS: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0, "stores": 0, "evictions": 0})
+_FILE_DIGESTS: Dict[Tuple[str, int, int], str] = {}
+
+
+def configure(cache_dir: Path | None, max_mb: int = DEFAULT_MAX_MB) -> None:
+    """Cache memoized results under ``cache_dir``; ``None`` turns caching off."""
+
+    global _CACHE_DIR, _MAX_BYTES
+    _CACHE_DIR = cache_dir.expanduser().resolve() if cache_dir is not None else None
+    _MAX_BYTES = max_mb * 1024 * 1024
+
+
+def add_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=DEFAULT_CACHE_DIR,
+        help="Directory for memoized stage results.",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=DEFAULT_MAX_MB,
+        help="Evict least recently used stage results beyond this size.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Recompute every memoized stage and leave the cache untouched.",
+    )
+
+
+def cache_from_args(args: argparse.Namespace) -> None:
+    configure(None if args.no_cache else args.cache_dir, args.cache_max_mb)
+
+
+def stats() -> Dict[str, Dict[str, int]]:
+    """Per-function hit/miss/store/eviction counts for this process."""
+
+    with _LOCK:
+        return {name: dict(counts) for name, counts in _STATS.items()}
+
+
+def _count(name: str, event: str) -> None:
+    with _LOCK:
+        _STATS[name][event] += 1
+    get_metrics().count(f"cache.{name}.{event}")
+
+
+# Fingerprints ------------------------------------------------------------
+
+
+def file_digest(path: Path) -> str:
+    """SHA-1 of a file's contents, reused while its size and mtime are unchanged."""
+
+    stat = path.stat()
+    key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+    with _LOCK:
+        cached = _FILE_DIGESTS.get(key)
+    if cached is None:
+        digest = hashlib.sha1()
+        with path.open("rb") as handle:
+            for block in iter(lambda: handle.read(1 << 20), b""):
+                digest.update(block)
+        cached = digest.hexdigest()
+        with _LOCK:
+            _FILE_DIGESTS[key] = cached
+    return cached
+
+
+def encoder_fingerprint(encoder: object) -> object:
+    """Identify an encoder by its class and its (rounded) embedding of a fixed probe sentence."""
+
+    vector = np.asarray(encoder.encode([PROBE_TEXT], normalize_embeddings=True), dtype=np.float32)
+    return type(encoder).__name__, np.round(vector, 4)
+
+
+def _feed(digest: hashlib._Hash, value: object) -> None:
+    if value is None or isinstance(value, (bool, int, float, complex)):
+        digest.update(f"{type(value).__name__}:{value!r};".encode("utf-8"))
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+        digest.update(b"str:%d:" % len(data))
+        digest.update(data)
+    elif isinstance(value, bytes):
+        digest.update(b"bytes:%d:" % len(value))
+        digest.update(value)
+    elif isinstance(value, Path):
+        if value.is_file():
+            digest.update(f"file:{file_digest(value)};".encode("utf-8"))
+        else:
+            digest.update(f"path:{value};".encode("utf-8"))
+    elif isinstance(value, np.ndarray):
+        digest.update(f"ndarray:{value.dtype.str}:{value.shape};".encode("utf-8"))
+        digest.update(np.ascontiguousarray(value).data)
+    elif isinstance(value, np.generic):
+        _feed(digest, value.item())
+    elif isinstance(value, (datetime, date)):
+        digest.update(f"{type(value).__name__}:{value.isoformat()};".encode("utf-8"))
+    elif isinstance(value, re.Pattern):
+        digest.update(f"pattern:{value.flags}:".encode("utf-8"))
+        _feed(digest, value.pattern)
+    elif dataclasses.is_dataclass(value) and not isinstance(value, type):
+        digest.update(f"{type(value).__name__}(".encode("utf-8"))
+        for item in dataclasses.fields(value):
+            digest.update(f"{item.name}=".encode("utf-8"))
+            _feed(digest, getattr(value, item.name))
+        digest.update(b")")
+    elif isinstance(value, Mapping):
+        digest.update(b"map:%d{" % len(value))
+        for key, item in value.items():
+            _feed(digest, key)
+            _feed(digest, item)
+        digest.update(b"}")
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}:{len(value)}[".encode("utf-8"))
+        for item in value:
+            _feed(digest, item)
+        digest.update(b"]")
+    elif isinstance(value, (set, frozenset)):
+        digest.update(b"set:%d:" % len(value))
+        for item_digest in sorted(fingerprint(item) for item in value):
+            digest.update(item_digest.encode("ascii"))
+    else:
+        raise TypeError(
+            f"Cannot fingerprint {type(value).__name__}; map the argument with memoize(fingerprints=...) "
+            "or list it in ignore"
+        )
+
+
+def fingerprint(value: object) -> str:
+    """Content digest of ``value`` (see the module docstring for what is supported)."""
+
+    digest = hashlib.sha1()
+    _feed(digest, value)
+    return digest.hexdigest()
+
+
+# Storage -------------------------------------------------------------------
+
+
+def _entries(cache_dir: Path) -> List[Path]:
+    return [path for path in cache_dir.glob("*/*") if path.suffix in (".npy", ".pkl")]
+
+
+def _load(path: Path) -> object:
+    if path.suffix == ".npy":
+        return np.load(path, allow_pickle=False)
+    with path.open("rb") as handle:
+        return pickle.load(handle)
+
+
+def _store(path: Path, value: object) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with tmp_path.open("wb") as handle:
+        if path.suffix == ".npy":
+            np.save(handle, value, allow_pickle=False)
+        else:
+            pickle.dump(value, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp_path.replace(path)
+
+
+def evict(cache_dir: Path, max_bytes: int, keep: Path | None = None) -> List[Path]:
+    """Delete least recently used entries until ``cache_dir`` fits in ``max_bytes``."""
+
+    entries = []
+    for path in _entries(cache_dir):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime_ns, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    removed: List[Path] = []
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        path.unlink(missing_ok=True)
+        total -= size
+        removed.append(path)
+    return removed
+
+
+def memoize(
+    *,
+    version: int = 1,
+    ignore: Sequence[str] = (),
+    fingerprints: Mapping[str, Callable[[object], object]] | None = None,
+) -> Callable[[F], F]:
+    """Cache the decorated function's results on disk (once ``configure`` has been called).
+
+    ``version`` is part of the key; bump it when a helper in another module
+    changes the result. ``ignore`` lists arguments that do not affect the
+    result, and ``fingerprints`` maps arguments to hashable stand-ins.
+    """
+
+    fingerprints = dict(fingerprints or {})
+
+    def decorate(func: F) -> F:
+        source = Path(inspect.getfile(func))
+        # The file stem, not __module__, so ``python scripts/x.py`` and ``scripts.x`` share entries.
+        name = f"{source.stem}.{func.__qualname__}"
+        signature = inspect.signature(func)
+
+        def key(args: tuple, kwargs: dict) -> str:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            digest = hashlib.sha1(f"{CACHE_VERSION}:{name}:{version}:".encode("utf-8"))
+            digest.update(file_digest(source).encode("ascii"))
+            for arg_name, value in bound.arguments.items():
+                if arg_name in ignore:
+                    continue
+                digest.update(f"{arg_name}=".encode("utf-8"))
+                _feed(digest, fingerprints[arg_name](value) if arg_name in fingerprints else value)
+            return digest.hexdigest()
+
+        @functools.wraps(func)
+        def wrapper(*args: object, **kwargs: object) -> object:
+            cache_dir = _CACHE_DIR
+            if cache_dir is None:
+                return func(*args, **kwargs)
+            entry_key = key(args, kwargs)
+            for suffix in (".npy", ".pkl"):
+                path = cache_dir / name / f"{entry_key}{suffix}"
+                try:
+                    value = _load(path)
+                except FileNotFoundError:
+                    continue
+                except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+                    # Truncated or unreadable: drop it and recompute.
+                    path.unlink(missing_ok=True)
+                    continue
+                os.utime(path)
+                _count(name, "hits")
+                return value
+
+            _count(name, "misses")
+            value = func(*args, **kwargs)
+            suffix = ".npy" if type(value) is np.ndarray and not value.dtype.hasobject else ".pkl"
+            path = cache_dir / name / f"{entry_key}{suffix}"
+            try:
+                _store(path, value)
+            except (OSError, pickle.PicklingError, TypeError, AttributeError) as exc:
+                print(f"Warning: could not cache {name}: {exc}", file=sys.stderr)
+                return value
+            _count(name, "stores")
+            for removed in evict(cache_dir, _MAX_BYTES, keep=path):
+                _count(removed.parent.name, "evictions")
+            return value
+
+        wrapper.cache_name = name  # type: ignore[attr-defined]
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Show or clear memoized stage results.")
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=DEFAULT_CACHE_DIR,
+        help="Directory for memoized stage results.",
+    )
+    parser.add_argument("--clear", action="store_true", help="Delete every cached result.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    cache_dir = args.cache_dir.expanduser().resolve()
+    if not cache_dir.exists():
+        print(f"No cache at {cache_dir}")
+        return
+    sizes: Dict[str, List[int]] = defaultdict(list)
+    for path in _entries(cache_dir):
+        sizes[path.parent.name].append(path.stat().st_size)
+    if args.clear:
+        for path in _entries(cache_dir):
+            path.unlink(missing_ok=True)
+        print(f"Removed {sum(len(values) for values in sizes.values())} cached results from {cache_dir}")
+        return
+    print(f"{cache_dir}: {sum(map(sum, sizes.values())) / 1e6:.1f} MB")
+    for name, values in sorted(sizes.items()):
+        print(f"  {name}: {len(values)} entries, {sum(values) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
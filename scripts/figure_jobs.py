@@ -0,0 +1,51 @@
+"""Render independent figures in a process pool.
+
+Each figure script builds its data first, then describes every figure as a
+``FigureJob``: a module-level plot function plus the precomputed data it
+draws from. ``render_figures`` runs the jobs in ``workers`` processes
+(matplotlib on the Agg backend, see ``scripts.plotting``). Rendering and
+``savefig`` are CPU-bound and single-threaded, so a full regeneration
+scales with the number of cores. ``workers=1`` renders in-process, in job
+order.
+
+Job arguments are pickled to the worker, so jobs should carry the small
+arrays a figure draws rather than whole stores or models.
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from scripts.plotting import pyplot
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+
+@dataclass
+class FigureJob:
+    """``render(*args, **kwargs)``; ``render`` must be a module-level function."""
+
+    render: Callable[..., object]
+    args: Tuple[object, ...] = ()
+    kwargs: Dict[str, object] = field(default_factory=dict)
+
+
+def _init_worker() -> None:
+    # Select the Agg backend before any job imports pyplot.
+    pyplot()
+
+
+def _run(job: FigureJob) -> object:
+    return job.render(*job.args, **job.kwargs)
+
+
+def render_figures(jobs: Sequence[FigureJob], workers: int = DEFAULT_WORKERS) -> List[object]:
+    """Run ``jobs`` and return their results in job order; a failing job raises here."""
+
+    if workers <= 1 or len(jobs) <= 1:
+        return [_run(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), initializer=_init_worker) as executor:
+        return list(executor.map(_run, jobs))
@@ -0,0 +1,121 @@
+"""Content-based filer rules shared by the filer mapping scripts.
+
+``FILER_RULES`` weighs signature lines, e-mail addresses and court
+captions per filer; ``score_filer`` picks the highest-scoring filer with
+``FILER_PRIORITY`` breaking ties. ``detect_filemark`` finds a clerk's
+filemark stamp or docket line number in page text.
+"""
+
+from __future__ import annotations
+
+import csv
+import re
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+FILER_RULES = {
+    "charles_dustin_myers": [
+        (re.compile(r"/s/\s*Charles\s+Dustin\s+Myers", re.IGNORECASE), 6),
+        (re.compile(r"Charles\s+Dustin\s+Myers", re.IGNORECASE), 3),
+        (re.compile(r"Charles\s+D\s+Myers", re.IGNORECASE), 3),
+        (re.compile(r"chuckdustin12@gmail\.com", re.IGNORECASE), 4),
+        (re.compile(r"CSD-legal", re.IGNORECASE), 4),
+        (re.compile(r"pro\s+se", re.IGNORECASE), 2),
+    ],
+    "cooper_carter": [
+        (re.compile(r"/s/\s*Cooper\s+L\.?\s+Carter", re.IGNORECASE), 6),
+        (re.compile(r"Cooper\s+L\.?\s+Carter", re.IGNORECASE), 4),
+        (re.compile(r"Cooper\s+Carter", re.IGNORECASE), 3),
+        (re.compile(r"majadmin\.com", re.IGNORECASE), 3),
+        (re.compile(r"Max\s+Altman\s*&\s*Johnson", re.IGNORECASE), 2),
+    ],
+    "morgan_michelle_myers": [
+        (re.compile(r"/s/\s*Morgan\s+Michelle\s+Myers", re.IGNORECASE), 6),
+        (re.compile(r"Morgan\s+Michelle\s+Myers", re.IGNORECASE), 3),
+        (re.compile(r"Morgan\s+Myers", re.IGNORECASE), 2),
+    ],
+    "court": [
+        (re.compile(r"Court\s+of\s+Appeals", re.IGNORECASE), 4),
+        (re.compile(r"Supreme\s+Court\s+of\s+Texas", re.IGNORECASE), 4),
+        (re.compile(r"Per\s+Curiam", re.IGNORECASE), 4),
+        (re.compile(r"MEMORANDUM\s+OPINION", re.IGNORECASE), 4),
+        (re.compile(r"\bOPINION\b", re.IGNORECASE), 2),
+        (re.compile(r"\bPanel:\b", re.IGNORECASE), 3),
+        (re.compile(r"\bJudgment\b", re.IGNORECASE), 2),
+        (re.compile(r"\bORDER\b", re.IGNORECASE), 1),
+    ],
+    "clerk": [
+        (re.compile(r"District\s+Clerk", re.IGNORECASE), 4),
+        (re.compile(r"Clerk's\s+Office", re.IGNORECASE), 4),
+        (re.compile(r"ALL\s+TRANSACTIONS\s+FOR\s+A\s+CASE", re.IGNORECASE), 6),
+        (re.compile(r"FILE\s+COPY", re.IGNORECASE), 3),
+        (re.compile(r"Certified\s+Copy", re.IGNORECASE), 3),
+        (re.compile(r"Payment\s+received", re.IGNORECASE), 2),
+    ],
+    "oag": [
+        (re.compile(r"Office\s+of\s+the\s+Attorney\s+General", re.IGNORECASE), 4),
+        (re.compile(r"oag\.texas\.gov", re.IGNORECASE), 4),
+        (re.compile(r"OAG", re.IGNORECASE), 2),
+    ],
+}
+
+FILER_PRIORITY = [
+    "charles_dustin_myers",
+    "cooper_carter",
+    "morgan_michelle_myers",
+    "court",
+    "clerk",
+    "oag",
+    "unknown",
+]
+
+FILEMARK_STAMP = re.compile(r"(?i)\bfilemark\b[^0-9]{0,6}(\d{1,4})")
+DOCKET_LINE = re.compile(r"^\s*(\d{1,4})\s+\d{2}/\d{2}/\d{4}\b")
+
+
+def score_filer(text: str) -> Tuple[str, int, List[str]]:
+    scores: Dict[str, int] = defaultdict(int)
+    signals: Dict[str, List[str]] = defaultdict(list)
+    for filer, rules in FILER_RULES.items():
+        for pattern, weight in rules:
+            if pattern.search(text):
+                scores[filer] += weight
+                signals[filer].append(pattern.pattern)
+
+    if not scores:
+        return "unknown", 0, []
+
+    max_score = max(scores.values())
+    winners = [filer for filer, score in scores.items() if score == max_score]
+    for filer in FILER_PRIORITY:
+        if filer in winners:
+            return filer, max_score, signals.get(filer, [])
+    return "unknown", 0, []
+
+
+def detect_filemark(text: str) -> str | None:
+    match = FILEMARK_STAMP.search(text)
+    if match:
+        return match.group(1)
+    for line in text.splitlines():
+        match = DOCKET_LINE.match(line)
+        if match:
+            return match.group(1)
+    return None
+
+
+def load_docket_filer_map(path: Path | None) -> Dict[str, str]:
+    if not path:
+        return {}
+    if not path.exists():
+        return {}
+    mapping: Dict[str, str] = {}
+    with path.open("r", encoding="utf-8") as handle:
+        reader = csv.DictReader(handle)
+        for row in reader:
+            filemark = row.get("filemark")
+            filer = row.get("filer")
+            if filemark and filer:
+                mapping[filemark.strip()] = filer.strip()
+    return mapping
@@ -0,0 +1,648 @@
+"""Hybrid BM25 + vector retrieval over one or more vector stores.
+
+The keyword leg scores chunks with BM25 from an inverted index that is
+persisted next to each store (``bm25_index.npz``) and rebuilt only when
+``metadata.jsonl`` changes. Query cost is proportional to the postings of
+the query terms, not to the store size. The semantic leg scans the
+memory-mapped ``embeddings.npy`` in fixed-size blocks and keeps a running
+top-k. The two rankings are fused with reciprocal rank fusion.
+
+Usage:
+    python scripts/hybrid_search.py --store vector_store_case_docs_by_filer \
+        --query "motion to recuse" --filer associate_judge --top-k 10
+
+``--store`` accepts a single store directory, a root of per-filer stores
+(``vector_store_case_docs_by_filer``) or a root of per-document stores
+grouped by filer (``vector_store_case_docs_by_filer_sources``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import re
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.instrumentation import add_metrics_arguments, get_metrics, metrics_from_args  # noqa: E402
+from scripts.warm_cache import load_sentence_model  # noqa: E402
+
+INDEX_FILENAME = "bm25_index.npz"
+INDEX_VERSION = 1
+MAX_TOKEN_LEN = 40
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+NON_ASCII_MAP = str.maketrans(
+    {
+        "\u2018": "'",
+        "\u2019": "'",
+        "\u201c": '"',
+        "\u201d": '"',
+        "\u2013": "-",
+        "\u2014": "--",
+        "\u2026": "...",
+        "\u00a0": " ",
+        "\u2011": "-",
+        "\u2212": "-",
+        "\u00ad": "",
+        "\u2022": "-",
+        "\u00a7": "sec.",
+    }
+)
+
+
+@dataclass
+class Bm25Index:
+    """CSR-style inverted index for a single store."""
+
+    vocab: Dict[str, int]
+    term_offsets: np.ndarray
+    doc_ids: np.ndarray
+    term_freqs: np.ndarray
+    doc_lengths: np.ndarray
+
+    def document_frequency(self, term: str) -> int:
+        term_id = self.vocab.get(term)
+        if term_id is None:
+            return 0
+        return int(self.term_offsets[term_id + 1] - self.term_offsets[term_id])
+
+    def postings(self, term: str) -> Tuple[np.ndarray, np.ndarray] | None:
+        term_id = self.vocab.get(term)
+        if term_id is None:
+            return None
+        start = int(self.term_offsets[term_id])
+        end = int(self.term_offsets[term_id + 1])
+        return self.doc_ids[start:end], self.term_freqs[start:end]
+
+
+@dataclass
+class StoreView:
+    """A loaded store: metadata, memory-mapped embeddings and BM25 index."""
+
+    filer: str
+    store_dir: Path
+    records: List[dict]
+    embeddings: np.ndarray
+    index: Bm25Index
+    sources: List[str]
+    source_ids: np.ndarray
+
+
+@dataclass
+class SearchHit:
+    score: float
+    record: dict
+    filer: str
+    bm25_rank: int | None = None
+    bm25_score: float | None = None
+    vector_rank: int | None = None
+    vector_score: float | None = None
+
+
+def _normalize_ascii(text: str) -> str:
+    cleaned = text.translate(NON_ASCII_MAP)
+    return cleaned.encode("ascii", "ignore").decode("ascii")
+
+
+def _normalize_ws(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _snippet(text: str, max_len: int = 320) -> str:
+    cleaned = _normalize_ascii(_normalize_ws(text))
+    if len(cleaned) <= max_len:
+        return cleaned
+    return cleaned[: max_len - 3].rstrip() + "..."
+
+
+def _tokenize(text: str) -> List[str]:
+    lowered = _normalize_ascii(text).lower()
+    return [token for token in TOKEN_RE.findall(lowered) if len(token) <= MAX_TOKEN_LEN]
+
+
+def _fingerprint(path: Path) -> str:
+    stat = path.stat()
+    return f"v{INDEX_VERSION}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _load_records(metadata_path: Path) -> List[dict]:
+    return [
+        json.loads(line)
+        for line in metadata_path.read_text(encoding="utf-8").splitlines()
+        if line.strip()
+    ]
+
+
+def build_bm25_index(records: Sequence[dict]) -> Bm25Index:
+    """Tokenize every chunk once and lay the postings out in CSR order."""
+
+    vocab: Dict[str, int] = {}
+    term_ids: List[int] = []
+    doc_ids: List[int] = []
+    term_freqs: List[int] = []
+    doc_lengths = np.zeros(len(records), dtype=np.int32)
+    for doc_id, record in enumerate(records):
+        tokens = _tokenize(record.get("text", ""))
+        doc_lengths[doc_id] = len(tokens)
+        for token, freq in Counter(tokens).items():
+            term_ids.append(vocab.setdefault(token, len(vocab)))
+            doc_ids.append(doc_id)
+            term_freqs.append(freq)
+
+    term_array = np.asarray(term_ids, dtype=np.int64)
+    order = np.argsort(term_array, kind="stable")
+    term_offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+    term_offsets[1:] = np.cumsum(np.bincount(term_array, minlength=len(vocab)))
+    return Bm25Index(
+        vocab=vocab,
+        term_offsets=term_offsets,
+        doc_ids=np.asarray(doc_ids, dtype=np.int32)[order],
+        term_freqs=np.asarray(term_freqs, dtype=np.int32)[order],
+        doc_lengths=doc_lengths,
+    )
+
+
+def save_bm25_index(index: Bm25Index, path: Path, fingerprint: str) -> None:
+    terms = sorted(index.vocab, key=index.vocab.get)
+    vocab_blob = np.frombuffer("\n".join(terms).encode("ascii"), dtype=np.uint8)
+    np.savez(
+        path,
+        fingerprint=np.array(fingerprint),
+        vocab=vocab_blob,
+        term_offsets=index.term_offsets,
+        doc_ids=index.doc_ids,
+        term_freqs=index.term_freqs,
+        doc_lengths=index.doc_lengths,
+    )
+
+
+def _read_bm25_index(path: Path, fingerprint: str) -> Bm25Index | None:
+    try:
+        with np.load(path) as payload:
+            if str(payload["fingerprint"]) != fingerprint:
+                return None
+            blob = payload["vocab"].tobytes().decode("ascii")
+            terms = blob.split("\n") if blob else []
+            return Bm25Index(
+                vocab={term: idx for idx, term in enumerate(terms)},
+                term_offsets=payload["term_offsets"],
+                doc_ids=payload["doc_ids"],
+                term_freqs=payload["term_freqs"],
+                doc_lengths=payload["doc_lengths"],
+            )
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def load_or_build_bm25_index(
+    store_dir: Path, records: Sequence[dict], *, rebuild: bool = False
+) -> Bm25Index:
+    """Return the on-disk index for ``store_dir``, rebuilding it when stale."""
+
+    index_path = store_dir / INDEX_FILENAME
+    fingerprint = _fingerprint(store_dir / "metadata.jsonl")
+    if not rebuild and index_path.exists():
+        index = _read_bm25_index(index_path, fingerprint)
+        if index is not None and len(index.doc_lengths) == len(records):
+            get_metrics().count("bm25_index.cache_hits")
+            return index
+    get_metrics().count("bm25_index.builds")
+    index = build_bm25_index(records)
+    save_bm25_index(index, index_path, fingerprint)
+    return index
+
+
+def discover_stores(path: Path) -> List[Tuple[str, Path]]:
+    """Return ``(filer, store_dir)`` pairs under a store or store root."""
+
+    path = path.expanduser().resolve()
+    if (path / "metadata.jsonl").exists():
+        return [(path.name, path)]
+    stores: List[Tuple[str, Path]] = []
+    for child in sorted(path.iterdir(), key=lambda p: p.name.lower()):
+        if not child.is_dir():
+            continue
+        if (child / "metadata.jsonl").exists():
+            stores.append((child.name, child))
+            continue
+        for nested in sorted(child.iterdir(), key=lambda p: p.name.lower()):
+            if nested.is_dir() and (nested / "metadata.jsonl").exists():
+                stores.append((child.name, nested))
+    return stores
+
+
+def load_store_view(filer: str, store_dir: Path, *, rebuild_index: bool = False) -> StoreView:
+    records = _load_records(store_dir / "metadata.jsonl")
+    embeddings_path = store_dir / "embeddings.npy"
+    if embeddings_path.exists():
+        embeddings = np.load(embeddings_path, mmap_mode="r")
+    else:
+        embeddings = np.zeros((len(records), 0), dtype=np.float32)
+    if embeddings.shape[0] != len(records):
+        raise ValueError(f"Embeddings and metadata length mismatch for {store_dir}")
+    index = load_or_build_bm25_index(store_dir, records, rebuild=rebuild_index)
+
+    sources: List[str] = []
+    source_lookup: Dict[str, int] = {}
+    source_ids = np.empty(len(records), dtype=np.int32)
+    for row, record in enumerate(records):
+        source = str(record.get("source_pdf", ""))
+        source_id = source_lookup.get(source)
+        if source_id is None:
+            source_id = len(sources)
+            source_lookup[source] = source_id
+            sources.append(source)
+        source_ids[row] = source_id
+    return StoreView(
+        filer=filer,
+        store_dir=store_dir,
+        records=records,
+        embeddings=embeddings,
+        index=index,
+        sources=sources,
+        source_ids=source_ids,
+    )
+
+
+def _normalize_filter(value: str) -> str:
+    return value.replace("\\", "/").lower()
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` largest scores, best first (stable on ties)."""
+
+    if k <= 0 or scores.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    if k < scores.size:
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(scores.size)
+    order = np.lexsort((part, -scores[part]))
+    return part[order]
+
+
+class HybridSearcher:
+    """Keyword, semantic and fused retrieval over a set of stores."""
+
+    def __init__(
+        self,
+        stores: List[StoreView],
+        *,
+        encoder: object | None = None,
+        block_size: int = 8192,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ) -> None:
+        self.stores = stores
+        self.encoder = encoder
+        self.block_size = block_size
+        self.k1 = k1
+        self.b = b
+        self.total_docs = sum(len(store.records) for store in stores)
+        total_length = sum(int(store.index.doc_lengths.sum()) for store in stores)
+        self.avg_doc_length = total_length / self.total_docs if self.total_docs else 0.0
+
+    @classmethod
+    def from_path(
+        cls,
+        path: Path,
+        *,
+        encoder: object | None = None,
+        rebuild_index: bool = False,
+        block_size: int = 8192,
+    ) -> "HybridSearcher":
+        stores = [
+            load_store_view(filer, store_dir, rebuild_index=rebuild_index)
+            for filer, store_dir in discover_stores(path)
+        ]
+        if not stores:
+            raise FileNotFoundError(f"No vector stores found under {path}")
+        return cls(stores, encoder=encoder, block_size=block_size)
+
+    @property
+    def filers(self) -> List[str]:
+        return sorted({store.filer for store in self.stores})
+
+    def _active_stores(self, filers: Iterable[str] | None) -> List[Tuple[int, StoreView]]:
+        wanted = {name.lower() for name in filers} if filers else None
+        return [
+            (pos, store)
+            for pos, store in enumerate(self.stores)
+            if wanted is None or store.filer.lower() in wanted
+        ]
+
+    def _row_mask(self, store: StoreView, source: str | None) -> np.ndarray | None:
+        if not source:
+            return None
+        needle = _normalize_filter(source)
+        allowed = [idx for idx, name in enumerate(store.sources) if needle in _normalize_filter(name)]
+        if not allowed:
+            return np.zeros(len(store.records), dtype=bool)
+        return np.isin(store.source_ids, np.asarray(allowed, dtype=np.int32))
+
+    def keyword(
+        self,
+        query: str,
+        top_k: int = 10,
+        *,
+        filers: Iterable[str] | None = None,
+        source: str | None = None,
+    ) -> List[SearchHit]:
+        terms = list(dict.fromkeys(_tokenize(query)))
+        active = self._active_stores(filers)
+        if not terms or not active or self.total_docs == 0:
+            return []
+
+        idf: Dict[str, float] = {}
+        for term in terms:
+            df = sum(store.index.document_frequency(term) for store in self.stores)
+            if df:
+                idf[term] = math.log(1.0 + (self.total_docs - df + 0.5) / (df + 0.5))
+
+        candidates: List[Tuple[float, int, int]] = []
+        for pos, store in active:
+            doc_parts: List[np.ndarray] = []
+            score_parts: List[np.ndarray] = []
+            for term, weight in idf.items():
+                postings = store.index.postings(term)
+                if postings is None:
+                    continue
+                doc_ids, freqs = postings
+                lengths = store.index.doc_lengths[doc_ids]
+                norm = self.k1 * (1.0 - self.b + self.b * lengths / max(self.avg_doc_length, 1e-9))
+                tf = freqs.astype(np.float64)
+                doc_parts.append(doc_ids)
+                score_parts.append(weight * tf * (self.k1 + 1.0) / (tf + norm))
+            if not doc_parts:
+                continue
+            doc_ids = np.concatenate(doc_parts)
+            contributions = np.concatenate(score_parts)
+            unique_ids, inverse = np.unique(doc_ids, return_inverse=True)
+            scores = np.bincount(inverse, weights=contributions)
+            mask = self._row_mask(store, source)
+            if mask is not None:
+                keep = mask[unique_ids]
+                unique_ids = unique_ids[keep]
+                scores = scores[keep]
+            for row in _top_k(scores, top_k):
+                candidates.append((float(scores[row]), pos, int(unique_ids[row])))
+
+        candidates.sort(key=lambda item: (-item[0], item[1], item[2]))
+        hits: List[SearchHit] = []
+        for rank, (score, pos, row) in enumerate(candidates[:top_k], start=1):
+            store = self.stores[pos]
+            hits.append(
+                SearchHit(
+                    score=score,
+                    record=store.records[row],
+                    filer=store.filer,
+                    bm25_rank=rank,
+                    bm25_score=score,
+                )
+            )
+        return hits
+
+    def encode(self, queries: Sequence[str]) -> np.ndarray:
+        if self.encoder is None:
+            raise ValueError("Semantic search requires an encoder.")
+        vectors = self.encoder.encode(list(queries), normalize_embeddings=True)
+        return np.asarray(vectors, dtype=np.float32)
+
+    def semantic(
+        self,
+        query: str | np.ndarray,
+        top_k: int = 10,
+        *,
+        filers: Iterable[str] | None = None,
+        source: str | None = None,
+    ) -> List[SearchHit]:
+        if isinstance(query, str):
+            vectors = self.encode([query])
+        else:
+            vectors = np.asarray(query, dtype=np.float32)[None, :]
+        return self.semantic_batch(vectors, top_k, filers=[filers], sources=[source])[0]
+
+    def semantic_batch(
+        self,
+        queries: Sequence[str] | np.ndarray,
+        top_k: int | Sequence[int] = 10,
+        *,
+        filers: Sequence[Iterable[str] | None] | None = None,
+        sources: Sequence[str | None] | None = None,
+    ) -> List[List[SearchHit]]:
+        """Semantic search for several queries in one pass over the stores.
+
+        ``queries`` are texts (encoded in one batch) or a 2-D array of query
+        vectors. Each embedding block is multiplied with every query that
+        wants its store at once; ``top_k``, ``filers`` and ``sources`` may be
+        given per query.
+        """
+
+        vectors = queries if isinstance(queries, np.ndarray) else self.encode(queries)
+        count = vectors.shape[0]
+        ks = [top_k] * count if isinstance(top_k, int) else list(top_k)
+        wanted = [{name.lower() for name in names} if names else None for names in filers or [None] * count]
+        wanted_sources = list(sources or [None] * count)
+        candidates: List[List[Tuple[float, int, int]]] = [[] for _ in range(count)]
+        for pos, store in enumerate(self.stores):
+            if store.embeddings.shape[0] == 0 or store.embeddings.shape[1] != vectors.shape[1]:
+                continue
+            columns = [idx for idx in range(count) if wanted[idx] is None or store.filer.lower() in wanted[idx]]
+            if not columns:
+                continue
+            masks = [self._row_mask(store, wanted_sources[idx]) for idx in columns]
+            query_block = vectors[columns].T
+            for start in range(0, store.embeddings.shape[0], self.block_size):
+                block = np.asarray(store.embeddings[start : start + self.block_size])
+                block_scores = block @ query_block
+                for col, idx in enumerate(columns):
+                    scores = block_scores[:, col]
+                    if masks[col] is not None:
+                        scores = np.where(masks[col][start : start + block.shape[0]], scores, -np.inf)
+                    for row in _top_k(scores, ks[idx]):
+                        if np.isfinite(scores[row]):
+                            candidates[idx].append((float(scores[row]), pos, start + int(row)))
+
+        results: List[List[SearchHit]] = []
+        for idx, found in enumerate(candidates):
+            found.sort(key=lambda item: (-item[0], item[1], item[2]))
+            hits: List[SearchHit] = []
+            for rank, (score, pos, row) in enumerate(found[: ks[idx]], start=1):
+                store = self.stores[pos]
+                hits.append(
+                    SearchHit(
+                        score=score,
+                        record=store.records[row],
+                        filer=store.filer,
+                        vector_rank=rank,
+                        vector_score=score,
+                    )
+                )
+            results.append(hits)
+        return results
+
+    def hybrid(
+        self,
+        query: str,
+        top_k: int = 10,
+        *,
+        filers: Iterable[str] | None = None,
+        source: str | None = None,
+        rrf_k: int = 60,
+        candidates: int | None = None,
+        query_vector: np.ndarray | None = None,
+    ) -> List[SearchHit]:
+        depth = candidates or max(top_k * 4, 50)
+        keyword_hits = self.keyword(query, depth, filers=filers, source=source)
+        semantic_hits: List[SearchHit] = []
+        if self.encoder is not None or query_vector is not None:
+            semantic_hits = self.semantic(
+                query if query_vector is None else query_vector,
+                depth,
+                filers=filers,
+                source=source,
+            )
+        return fuse_rankings(keyword_hits, semantic_hits, top_k=top_k, rrf_k=rrf_k)
+
+
+def fuse_rankings(
+    keyword_hits: List[SearchHit],
+    semantic_hits: List[SearchHit],
+    *,
+    top_k: int,
+    rrf_k: int = 60,
+) -> List[SearchHit]:
+    """Reciprocal rank fusion of two ranked lists, deduplicated by chunk text."""
+
+    fused: Dict[Tuple[str, object], SearchHit] = {}
+    for hits in (keyword_hits, semantic_hits):
+        for rank, hit in enumerate(hits, start=1):
+            key = (hit.filer, hit.record.get("id", id(hit.record)))
+            entry = fused.get(key)
+            if entry is None:
+                entry = SearchHit(score=0.0, record=hit.record, filer=hit.filer)
+                fused[key] = entry
+            entry.score += 1.0 / (rrf_k + rank)
+            if hit.bm25_rank is not None:
+                entry.bm25_rank = hit.bm25_rank
+                entry.bm25_score = hit.bm25_score
+            if hit.vector_rank is not None:
+                entry.vector_rank = hit.vector_rank
+                entry.vector_score = hit.vector_score
+
+    ranked = sorted(fused.values(), key=lambda hit: -hit.score)
+    results: List[SearchHit] = []
+    seen_text = set()
+    for hit in ranked:
+        text = hit.record.get("text", "")
+        if text in seen_text:
+            continue
+        seen_text.add(text)
+        results.append(hit)
+        if len(results) >= top_k:
+            break
+    return results
+
+
+def _format_hit(rank: int, hit: SearchHit) -> List[str]:
+    record = hit.record
+    legs = []
+    if hit.bm25_rank is not None:
+        legs.append(f"bm25 #{hit.bm25_rank} ({hit.bm25_score:.3f})")
+    if hit.vector_rank is not None:
+        legs.append(f"vector #{hit.vector_rank} ({hit.vector_score:.3f})")
+    return [
+        f"{rank}. score {hit.score:.4f} | {'; '.join(legs)} | filer {hit.filer} | "
+        f"vector_id {record.get('vector_id')} | chunk {record.get('chunk_index')}",
+        f"   source: {_normalize_ascii(str(record.get('source_pdf', '')))}",
+        f"   {_snippet(record.get('text', ''))}",
+    ]
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Hybrid BM25 + vector search over vector stores.")
+    parser.add_argument(
+        "--store",
+        type=Path,
+        default=Path("vector_store_case_docs_by_filer"),
+        help="Vector store directory or root of per-filer stores.",
+    )
+    parser.add_argument("--query", type=str, required=True, help="Search query text.")
+    parser.add_argument(
+        "--mode",
+        choices=["hybrid", "keyword", "semantic"],
+        default="hybrid",
+        help="Retrieval mode.",
+    )
+    parser.add_argument("--top-k", type=int, default=10, help="Number of results to return.")
+    parser.add_argument(
+        "--filer",
+        nargs="*",
+        default=None,
+        help="Restrict results to these filer store names.",
+    )
+    parser.add_argument(
+        "--source",
+        type=str,
+        default=None,
+        help="Restrict results to sources whose path contains this text (case-insensitive).",
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="sentence-transformers/all-MiniLM-L6-v2",
+        help="SentenceTransformer model name (hybrid/semantic modes).",
+    )
+    parser.add_argument("--rrf-k", type=int, default=60, help="Reciprocal rank fusion constant.")
+    parser.add_argument(
+        "--rebuild-index",
+        action="store_true",
+        help="Rebuild the on-disk BM25 indexes even if they are current.",
+    )
+    add_metrics_arguments(parser)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    metrics = metrics_from_args(args, "hybrid_search")
+    encoder = None
+    if args.mode != "keyword":
+        with metrics.stage("load_model"):
+            encoder = load_sentence_model(args.model)
+    with metrics.stage("load"):
+        searcher = HybridSearcher.from_path(args.store, encoder=encoder, rebuild_index=args.rebuild_index)
+
+    started = time.perf_counter()
+    with metrics.stage("search"):
+        if args.mode == "keyword":
+            hits = searcher.keyword(args.query, args.top_k, filers=args.filer, source=args.source)
+        elif args.mode == "semantic":
+            hits = searcher.semantic(args.query, args.top_k, filers=args.filer, source=args.source)
+        else:
+            hits = searcher.hybrid(
+                args.query, args.top_k, filers=args.filer, source=args.source, rrf_k=args.rrf_k
+            )
+    elapsed_ms = (time.perf_counter() - started) * 1000.0
+
+    print(f"{len(hits)} hits for {args.query!r} ({args.mode}, {elapsed_ms:.1f} ms)")
+    for rank, hit in enumerate(hits, start=1):
+        for line in _format_hit(rank, hit):
+            print(line)
+    metrics.finish()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,18 +9,33 @@ Usage:
         --output extracted_text_full/28b_merged
 
 The script is intentionally small and dependency-light. The functions
-are separated to make unit testing straightforward.
+are separated to make unit testing straightforward. ``--ocr`` enables a
+hybrid mode that OCRs only pages whose text layer is too sparse; it needs
+PyMuPDF and pytesseract, which are imported only when the flag is used.
 """
 
 from __future__ import annotations
 
 import argparse
 import json
+import sys
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List
+from typing import Iterable, List, Tuple
 
-from pypdf import PdfReader
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.instrumentation import add_metrics_arguments, get_metrics, metrics_from_args  # noqa: E402
+from scripts.ocr_pages import (  # noqa: E402
+    DEFAULT_FAST_DPI,
+    DEFAULT_MIN_CONFIDENCE,
+    DEFAULT_MIN_DENSITY,
+    PageResult,
+    ensure_tesseract,
+    extract_pages,
+)
 
 
 @dataclass
@@ -39,6 +54,17 @@ class UnsupportedFileTypeError(ValueError):
 SUPPORTED_SUFFIXES = {".pdf", ".txt"}
 
 
+@dataclass
+class OcrOptions:
+    """Settings for hybrid text-layer/OCR extraction of PDF pages."""
+
+    dpi: int = 300
+    lang: str = "eng"
+    min_density: float = DEFAULT_MIN_DENSITY
+    fast_dpi: int = DEFAULT_FAST_DPI
+    min_confidence: float = DEFAULT_MIN_CONFIDENCE
+
+
 def _extract_pages_from_pdf(pdf_path: Path) -> List[str]:
     """Return a list of page texts extracted from a PDF.
 
@@ -46,6 +72,8 @@ def _extract_pages_from_pdf(pdf_path: Path) -> List[str]:
     always return an entry per page to keep indices aligned.
     """
 
+    from pypdf import PdfReader
+
     reader = PdfReader(str(pdf_path))
     pages: List[str] = []
     for page in reader.pages:
@@ -61,14 +89,41 @@ def _extract_pages_from_text(txt_path: Path) -> List[str]:
     return [content.strip()]
 
 
-def _iter_pages(input_path: Path) -> List[str]:
-    """Dispatch to the appropriate extractor based on file suffix."""
+def _ocr_sparse_pages(pdf_path: Path, pages: List[str], ocr: OcrOptions) -> List[PageResult]:
+    """OCR pages whose text layer is too sparse, keeping the rest as extracted."""
+
+    with get_metrics().stage("ocr"):
+        results = extract_pages(
+            pdf_path,
+            dpi=ocr.dpi,
+            lang=ocr.lang,
+            min_density=ocr.min_density,
+            text_layer=pages,
+            fast_dpi=ocr.fast_dpi,
+            min_confidence=ocr.min_confidence,
+        )
+    return results
+
+
+def _iter_pages(
+    input_path: Path, ocr: OcrOptions | None = None
+) -> Tuple[List[str], List[str] | None, List[PageResult] | None]:
+    """Dispatch to the appropriate extractor based on file suffix.
+
+    Returns the page texts, for PDFs where each page's text came from
+    (``text_layer`` or ``ocr``), and with ``ocr`` the per-page results
+    carrying the text-layer density, DPI and confidence.
+    """
 
     suffix = input_path.suffix.lower()
     if suffix == ".pdf":
-        return _extract_pages_from_pdf(input_path)
+        pages = _extract_pages_from_pdf(input_path)
+        if ocr is not None:
+            results = _ocr_sparse_pages(input_path, pages, ocr)
+            return [result.text for result in results], [result.source for result in results], results
+        return pages, ["text_layer"] * len(pages), None
     if suffix == ".txt":
-        return _extract_pages_from_text(input_path)
+        return _extract_pages_from_text(input_path), None, None
     raise UnsupportedFileTypeError(
         f"Unsupported file type {suffix}; supported types: {sorted(SUPPORTED_SUFFIXES)}"
     )
@@ -83,33 +138,57 @@ def _write_text_output(pages: Iterable[str], output_path: Path) -> None:
 
 
 def _write_json_output(
-    pages: List[str], source: Path, base_name: str, output_path: Path
+    pages: List[str],
+    source: Path,
+    base_name: str,
+    output_path: Path,
+    page_sources: List[str] | None = None,
+    page_results: List[PageResult] | None = None,
 ) -> None:
-    """Persist structured metadata about the ingested document."""
+    """Persist structured metadata about the ingested document.
 
+    ``page_results`` from an OCR run add each page's text-layer density and
+    the DPI and confidence its OCR text was read at, as in
+    ``ocr_pages.write_outputs``.
+    """
+
+    entries = []
+    for idx, page in enumerate(pages):
+        entry = {
+            "page_number": idx + 1,
+            "text": page,
+            "char_length": len(page),
+        }
+        if page_sources is not None:
+            entry["source"] = page_sources[idx]
+        if page_results is not None:
+            result = page_results[idx]
+            entry["text_layer_density"] = round(result.text_layer_density, 2)
+            entry["dpi"] = result.dpi
+            entry["confidence"] = None if result.confidence is None else round(result.confidence, 1)
+        entries.append(entry)
     payload = {
         "source": str(source),
         "base_name": base_name,
         "page_count": len(pages),
-        "pages": [
-            {
-                "page_number": idx + 1,
-                "text": page,
-                "char_length": len(page),
-            }
-            for idx, page in enumerate(pages)
-        ],
+        "pages": entries,
     }
     output_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
 
 
-def ingest_file(input_path: Path, output_dir: Path, base_name: str | None = None) -> IngestionResult:
+def ingest_file(
+    input_path: Path,
+    output_dir: Path,
+    base_name: str | None = None,
+    ocr: OcrOptions | None = None,
+) -> IngestionResult:
     """Extract text from `input_path` and write JSON + text outputs.
 
     Args:
         input_path: Path to the PDF or plain-text document.
         output_dir: Directory to contain the extracted outputs.
         base_name: Optional override for the output file names (without extension).
+        ocr: Optional settings to OCR PDF pages that lack a usable text layer.
 
     Returns:
         IngestionResult describing the saved artifact paths and page count.
@@ -119,14 +198,18 @@ def ingest_file(input_path: Path, output_dir: Path, base_name: str | None = None
     output_dir = output_dir.expanduser().resolve()
     output_dir.mkdir(parents=True, exist_ok=True)
 
+    metrics = get_metrics()
     base_name = base_name or input_path.stem
-    pages = _iter_pages(input_path)
+    with metrics.stage("extract"):
+        pages, page_sources, page_results = _iter_pages(input_path, ocr)
+    metrics.count("pages", len(pages))
 
     text_path = output_dir / f"{base_name}.txt"
     json_path = output_dir / f"{base_name}.json"
 
-    _write_text_output(pages, text_path)
-    _write_json_output(pages, input_path, base_name, json_path)
+    with metrics.stage("write"):
+        _write_text_output(pages, text_path)
+        _write_json_output(pages, input_path, base_name, json_path, page_sources, page_results)
 
     return IngestionResult(text_path=text_path, json_path=json_path, page_count=len(pages))
 
@@ -152,15 +235,53 @@ def _parse_args() -> argparse.Namespace:
         default=None,
         help="Optional base name for output files; defaults to the input stem.",
     )
+    parser.add_argument(
+        "--ocr",
+        action="store_true",
+        help="OCR PDF pages whose text layer is too sparse (needs PyMuPDF + pytesseract).",
+    )
+    parser.add_argument("--dpi", type=int, default=300, help="Render DPI for OCR.")
+    parser.add_argument(
+        "--fast-dpi",
+        type=int,
+        default=DEFAULT_FAST_DPI,
+        help="First-pass OCR DPI; low-confidence pages re-render at --dpi (0 = single pass).",
+    )
+    parser.add_argument(
+        "--min-confidence",
+        type=float,
+        default=DEFAULT_MIN_CONFIDENCE,
+        help="Mean Tesseract word confidence needed to keep the first-pass text.",
+    )
+    parser.add_argument("--lang", type=str, default="eng", help="OCR language.")
+    parser.add_argument(
+        "--min-text-density",
+        type=float,
+        default=DEFAULT_MIN_DENSITY,
+        help="OCR pages with fewer non-space text-layer chars per square inch.",
+    )
+    add_metrics_arguments(parser)
     return parser.parse_args()
 
 
 def main() -> None:
     args = _parse_args()
-    result = ingest_file(args.input, args.output, base_name=args.base_name)
+    metrics = metrics_from_args(args, "ingest_merged_case")
+    ocr = None
+    if args.ocr:
+        ensure_tesseract()
+        ocr = OcrOptions(
+            dpi=args.dpi,
+            lang=args.lang,
+            min_density=args.min_text_density,
+            fast_dpi=args.fast_dpi,
+            min_confidence=args.min_confidence,
+        )
+    result = ingest_file(args.input, args.output, base_name=args.base_name, ocr=ocr)
     print(f"Saved text to {result.text_path}")
     print(f"Saved JSON to {result.json_path}")
     print(f"Page count: {result.page_count}")
+    metrics.finish()
 
 
 if __name__ == "__main__":
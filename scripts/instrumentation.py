@@ -0,0 +1,290 @@
+"""Stage timers, counters and memory snapshots shared by the scripts.
+
+Every script's ``main()`` creates a ``Metrics`` with ``metrics_from_args``
+and wraps its phases in ``metrics.stage(...)``; library code reports
+counters (pages, chunks, OCR pages, cache hits) through ``get_metrics()``
+without having the object threaded through. Timers are always on and
+cost a ``perf_counter`` call; nothing is written unless asked:
+
+``--metrics-out PATH``
+    Write a JSON report: wall time per stage (nested stages are named
+    ``outer/inner``), call counts, counters, peak RSS and the RSS after
+    each stage.
+``--profile``
+    Also trace allocations (per-stage ``tracemalloc`` peaks), run each
+    top-level stage under ``cProfile``, keep the dump of the slowest one
+    next to the report (``.prof``) and print a summary.
+``--metrics-textfile PATH`` / ``--metrics-port PORT``
+    Publish the live counters, gauges and throughput while the script runs,
+    in Prometheus text format (see ``scripts/metrics_exporter.py``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import cProfile
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+try:  # Not available on Windows.
+    import resource
+except ImportError:  # pragma: no cover - platform dependent
+    resource = None
+
+DEFAULT_METRICS_DIR = Path("reports/metrics")
+REPORT_VERSION = 1
+
+
+def peak_rss_bytes() -> int | None:
+    """Peak resident set size of this process so far."""
+
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and KiB elsewhere.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def peak_rss_mb() -> float | None:
+    peak = peak_rss_bytes()
+    return None if peak is None else round(peak / (1024 * 1024), 1)
+
+
+@dataclass
+class StageStats:
+    seconds: float = 0.0
+    calls: int = 0
+    errors: int = 0
+    peak_rss_mb: float | None = None
+    tracemalloc_peak_mb: float | None = None
+
+
+class Metrics:
+    """Collects stage timings and counters for one script run."""
+
+    def __init__(
+        self,
+        script: str,
+        *,
+        output: Path | None = None,
+        profile: bool = False,
+    ) -> None:
+        self.script = script
+        self.output = output
+        self.profile = profile
+        self.stages: Dict[str, StageStats] = {}
+        self.counters: Dict[str, float] = {}
+        self.gauges: Dict[str, float] = {}
+        self.active: Dict[str, int] = {}
+        self.exporter = None
+        self.started_unix = time.time()
+        self.last_progress_unix = self.started_unix
+        self._started = time.perf_counter()
+        self._started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._slowest: Tuple[float, str, cProfile.Profile] | None = None
+        self._tracing = profile and not tracemalloc.is_tracing()
+        if self._tracing:
+            tracemalloc.start()
+
+    def _stack(self) -> List[List]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as ``name`` (nested under any open stage)."""
+
+        stack = self._stack()
+        path = "/".join([*(frame[0] for frame in stack), name])
+        profiler = None
+        if self.profile and not stack and threading.current_thread() is threading.main_thread():
+            profiler = cProfile.Profile()
+        if self.profile:
+            # Hand the peak so far to the enclosing stages before resetting it.
+            traced = tracemalloc.get_traced_memory()[1]
+            for frame in stack:
+                frame[1] = max(frame[1], traced)
+            tracemalloc.reset_peak()
+        frame = [name, 0]
+        stack.append(frame)
+        with self._lock:
+            self.active[path] = self.active.get(path, 0) + 1
+        failed = False
+        started = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            elapsed = time.perf_counter() - started
+            stack.pop()
+            traced_peak = None
+            if self.profile:
+                traced_peak = max(frame[1], tracemalloc.get_traced_memory()[1])
+                if stack:
+                    stack[-1][1] = max(stack[-1][1], traced_peak)
+            with self._lock:
+                self.active[path] -= 1
+                stats = self.stages.setdefault(path, StageStats())
+                stats.seconds += elapsed
+                stats.calls += 1
+                stats.errors += int(failed)
+                stats.peak_rss_mb = peak_rss_mb()
+                if traced_peak is not None:
+                    mb = round(traced_peak / (1024 * 1024), 1)
+                    stats.tracemalloc_peak_mb = max(stats.tracemalloc_peak_mb or 0.0, mb)
+                if profiler is not None and (self._slowest is None or elapsed > self._slowest[0]):
+                    self._slowest = (elapsed, path, profiler)
+
+    def count(self, name: str, amount: float = 1) -> None:
+        """Add ``amount`` to counter ``name``."""
+
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+            self.last_progress_unix = time.time()
+
+    def gauge(self, name: str, value: float) -> None:
+        """Set gauge ``name`` (e.g. a queue depth) to its current ``value``."""
+
+        with self._lock:
+            self.gauges[name] = value
+
+    def snapshot(self) -> Tuple[Dict[str, StageStats], Dict[str, float], Dict[str, float], Dict[str, int]]:
+        """Consistent copies of the stages, counters, gauges and open stages."""
+
+        with self._lock:
+            stages = {name: StageStats(**vars(stats)) for name, stats in self.stages.items()}
+            return stages, dict(self.counters), dict(self.gauges), dict(self.active)
+
+    def report(self) -> dict:
+        return {
+            "version": REPORT_VERSION,
+            "script": self.script,
+            "started_at": self._started_at,
+            "argv": sys.argv[1:],
+            "total_seconds": round(time.perf_counter() - self._started, 4),
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": {
+                name: {
+                    "seconds": round(stats.seconds, 4),
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                    "peak_rss_mb": stats.peak_rss_mb,
+                    "tracemalloc_peak_mb": stats.tracemalloc_peak_mb,
+                }
+                for name, stats in self.stages.items()
+            },
+            "counters": self.counters,
+            "gauges": self.gauges,
+        }
+
+    def finish(self) -> dict | None:
+        """Write the report (and profile) if requested; return the report."""
+
+        if self.exporter is not None:
+            self.exporter.stop()
+        if not (self.output or self.profile):
+            return None
+        payload = self.report()
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+        output = self.output or DEFAULT_METRICS_DIR / f"{self.script}.json"
+        output.parent.mkdir(parents=True, exist_ok=True)
+        if self._slowest is not None:
+            _elapsed, path, profiler = self._slowest
+            profile_path = output.with_suffix(".prof")
+            profiler.dump_stats(str(profile_path))
+            payload["profile"] = {"stage": path, "path": str(profile_path)}
+        output.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        if self.profile:
+            for line in _summary(payload):
+                print(line)
+        print(f"Metrics -> {output}")
+        return payload
+
+
+def _summary(payload: dict) -> List[str]:
+    lines = [f"{payload['script']}: {payload['total_seconds']:.2f}s, peak RSS {payload['peak_rss_mb']} MiB"]
+    for name, stats in sorted(payload["stages"].items(), key=lambda item: -item[1]["seconds"]):
+        lines.append(f"  {stats['seconds']:9.3f}s  x{stats['calls']:<5} {name}")
+    for name, value in sorted(payload["counters"].items()):
+        lines.append(f"  {name}: {value:g}")
+    if "profile" in payload:
+        lines.append(f"  cProfile of {payload['profile']['stage']} -> {payload['profile']['path']}")
+    return lines
+
+
+_ACTIVE = Metrics("default")
+
+
+def get_metrics() -> Metrics:
+    """Return the metrics of the running script (a throwaway one if none was set up)."""
+
+    return _ACTIVE
+
+
+def add_metrics_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--metrics-out",
+        type=Path,
+        default=None,
+        help="Write stage timings, counters and peak memory to this JSON file.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Trace allocations, cProfile the slowest stage and print a timing summary.",
+    )
+    parser.add_argument(
+        "--metrics-textfile",
+        type=Path,
+        default=None,
+        help="Rewrite live metrics in Prometheus text format to this file (e.g. for node_exporter).",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Serve live metrics in Prometheus text format on http://127.0.0.1:PORT/metrics.",
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=15.0,
+        help="Seconds between --metrics-textfile rewrites and throughput samples.",
+    )
+
+
+def metrics_from_args(args: argparse.Namespace, script: str) -> Metrics:
+    """Create the run's ``Metrics`` from the parsed flags and make it current."""
+
+    global _ACTIVE
+    output = args.metrics_out.expanduser().resolve() if args.metrics_out else None
+    _ACTIVE = Metrics(script, output=output, profile=args.profile)
+    if args.metrics_textfile or args.metrics_port is not None:
+        from scripts.metrics_exporter import MetricsExporter
+
+        textfile = args.metrics_textfile.expanduser().resolve() if args.metrics_textfile else None
+        _ACTIVE.exporter = MetricsExporter(
+            _ACTIVE, textfile=textfile, port=args.metrics_port, interval=args.metrics_interval
+        )
+        _ACTIVE.exporter.start()
+    return _ACTIVE
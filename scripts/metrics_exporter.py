@@ -0,0 +1,233 @@
+"""Expose a running script's metrics in Prometheus text format.
+
+``MetricsExporter`` samples a ``scripts.instrumentation.Metrics`` every
+``interval`` seconds. It can rewrite a textfile atomically, for the
+node_exporter textfile collector, and it can serve
+``http://127.0.0.1:PORT/metrics``. Both are plain stdlib; nothing has to
+be installed or running besides the script itself.
+
+Series (all labelled ``script`` and ``run``; ``run`` is the textfile stem,
+so stages of one pipeline run stay distinct):
+
+- ``pipeline_<counter>_total``: counters such as pages, chunks or cache hits.
+- ``pipeline_<counter>_per_second``: the rate over the last minute.
+- ``pipeline_<gauge>``: gauges such as OCR queue depths.
+- ``pipeline_stage_seconds_total`` / ``_calls_total`` / ``_errors_total``
+  and ``pipeline_stage_active``, labelled by ``stage``.
+- ``pipeline_start_time_seconds``, ``pipeline_last_progress_time_seconds``
+  (alert when it stops moving) and ``pipeline_peak_rss_bytes``.
+
+Scripts opt in through ``--metrics-textfile`` / ``--metrics-port``, e.g.:
+    python scripts/ocr_case_docs_by_filer.py --metrics-port 9108
+    python scripts/vectorize_case_docs_by_filer.py --metrics-textfile /var/lib/node_exporter/vectorize.prom
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import TYPE_CHECKING, Deque, Dict, List, Tuple
+
+if TYPE_CHECKING:
+    from scripts.instrumentation import Metrics
+
+PREFIX = "pipeline"
+RATE_WINDOW_SECONDS = 60.0
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]+", "_", name).strip("_").lower()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Families:
+    """Collects samples grouped by metric, each family written once."""
+
+    def __init__(self) -> None:
+        self.families: Dict[str, Tuple[str, str, List[str]]] = {}
+
+    def add(self, name: str, kind: str, help_text: str, labels: Dict[str, str], value: float) -> None:
+        family = self.families.setdefault(name, (kind, help_text, []))
+        family[2].append(f"{name}{_labels(labels)} {_number(value)}")
+
+    def text(self) -> str:
+        lines: List[str] = []
+        for name, (kind, help_text, samples) in self.families.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    """Publishes ``metrics`` as a textfile and/or over HTTP until stopped."""
+
+    def __init__(
+        self,
+        metrics: "Metrics",
+        *,
+        textfile: Path | None = None,
+        port: int | None = None,
+        host: str = "127.0.0.1",
+        interval: float = 15.0,
+    ) -> None:
+        self.metrics = metrics
+        self.textfile = textfile
+        self.interval = max(0.1, interval)
+        self.labels = {"script": metrics.script, "run": textfile.stem if textfile else metrics.script}
+        self._samples: Deque[Tuple[float, Dict[str, float]]] = deque()
+        self._samples_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._server: ThreadingHTTPServer | None = None
+        if port is not None:
+            self._server = ThreadingHTTPServer((host, port), _handler(self))
+            self._server.daemon_threads = True
+
+    @property
+    def port(self) -> int | None:
+        return self._server.server_address[1] if self._server is not None else None
+
+    def start(self) -> None:
+        self._sample()
+        self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+        self._thread.start()
+        if self._server is not None:
+            threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+            print(f"Serving metrics on http://{self._server.server_address[0]}:{self.port}/metrics")
+        # Leave a final textfile behind even when the script dies with an exception.
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._sample()
+        self.write_textfile()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        atexit.unregister(self.stop)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+            self.write_textfile()
+
+    def _sample(self) -> None:
+        _stages, counters, _gauges, _active = self.metrics.snapshot()
+        now = time.time()
+        with self._samples_lock:
+            self._samples.append((now, counters))
+            # Keep one sample older than the window so rates span all of it.
+            while len(self._samples) > 1 and self._samples[1][0] <= now - RATE_WINDOW_SECONDS:
+                self._samples.popleft()
+
+    def _rates(self, counters: Dict[str, float], now: float) -> Dict[str, float]:
+        with self._samples_lock:
+            since, base = self._samples[0] if self._samples else (self.metrics.started_unix, {})
+        if now - since < 1.0:
+            # Too little history for a stable rate; average over the whole run.
+            since, base = self.metrics.started_unix, {}
+        elapsed = max(now - since, 1e-6)
+        return {name: (value - base.get(name, 0)) / elapsed for name, value in counters.items()}
+
+    def render(self) -> str:
+        """Return the current metrics in Prometheus text exposition format."""
+
+        from scripts.instrumentation import peak_rss_bytes
+
+        stages, counters, gauges, active = self.metrics.snapshot()
+        now = time.time()
+        labels = self.labels
+        families = _Families()
+        families.add(
+            f"{PREFIX}_start_time_seconds", "gauge", "Unix time the script started.", labels,
+            self.metrics.started_unix,
+        )
+        families.add(
+            f"{PREFIX}_last_progress_time_seconds", "gauge", "Unix time a counter last moved.", labels,
+            self.metrics.last_progress_unix,
+        )
+        rss = peak_rss_bytes()
+        if rss is not None:
+            families.add(f"{PREFIX}_peak_rss_bytes", "gauge", "Peak resident set size.", labels, rss)
+        rates = self._rates(counters, now)
+        for name in sorted(counters):
+            base = f"{PREFIX}_{metric_name(name)}"
+            families.add(f"{base}_total", "counter", f"Count of {name}.", labels, counters[name])
+            families.add(
+                f"{base}_per_second", "gauge", f"Rate of {name} over the last minute.", labels, rates[name]
+            )
+        for name in sorted(gauges):
+            families.add(f"{PREFIX}_{metric_name(name)}", "gauge", f"Current {name}.", labels, gauges[name])
+        for path in sorted(set(stages) | set(active)):
+            stage_labels = {**labels, "stage": path}
+            stats = stages.get(path)
+            if stats is not None:
+                families.add(
+                    f"{PREFIX}_stage_seconds_total", "counter", "Wall time spent in finished stage runs.",
+                    stage_labels, round(stats.seconds, 6),
+                )
+                families.add(
+                    f"{PREFIX}_stage_calls_total", "counter", "Finished stage runs.", stage_labels, stats.calls
+                )
+                families.add(
+                    f"{PREFIX}_stage_errors_total", "counter", "Stage runs that raised.", stage_labels,
+                    stats.errors,
+                )
+            families.add(
+                f"{PREFIX}_stage_active", "gauge", "Stage runs in progress.", stage_labels,
+                active.get(path, 0),
+            )
+        return families.text()
+
+    def write_textfile(self) -> None:
+        if self.textfile is None:
+            return
+        self.textfile.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so a collector never reads a half-written file.
+        partial = self.textfile.with_name(f".{self.textfile.name}.{os.getpid()}.tmp")
+        partial.write_text(self.render(), encoding="utf-8")
+        os.replace(partial, self.textfile)
+
+
+def _handler(exporter: MetricsExporter) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802 - http.server naming
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = exporter.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+            pass
+
+    return Handler
@@ -0,0 +1,124 @@
+"""Tesseract backends for OCR'ing many small crops.
+
+``pytesseract.image_to_string`` starts a fresh ``tesseract`` process, writes
+a temp image and reloads the language model for every call, which dominates
+when a docket screenshot yields hundreds of one-line crops. ``BatchTesseract``
+writes a batch of crops to one temporary directory and gives each worker
+process a list file instead: ``tesseract`` reads every image in the list with
+a single model load and ends each page text with a separator unique to that
+call. Up to ``workers`` of those processes run side by side. ``PerCallTesseract`` keeps
+the one-process-per-image behaviour behind the same interface.
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Sequence, Union
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+BACKENDS = ("batch", "per-call")
+# Prefix of the per-call ``page_separator``; no whitespace, since
+# pytesseract splits the config string like a shell command line.
+PAGE_SEPARATOR_PREFIX = "<<ocr-page-break-"
+# Below this many crops a list file saves nothing over direct calls.
+MIN_BATCH = 3
+# Keep each worker's list long enough to amortize its model load.
+MIN_CROPS_PER_WORKER = 16
+
+
+def _as_image(image: np.ndarray | Image.Image) -> Image.Image:
+    from PIL import Image
+
+    return image if isinstance(image, Image.Image) else Image.fromarray(image)
+
+
+class PerCallTesseract:
+    """One ``tesseract`` process per image (the plain pytesseract path)."""
+
+    def __init__(self, *, lang: str | None = None) -> None:
+        self.lang = lang
+
+    def image_to_string(
+        self, images: Sequence[np.ndarray | Image.Image], config: str = ""
+    ) -> List[str]:
+        import pytesseract
+
+        return [
+            pytesseract.image_to_string(_as_image(image), lang=self.lang, config=config)
+            for image in images
+        ]
+
+
+class BatchTesseract:
+    """OCR image batches through list files, one model load per worker process."""
+
+    def __init__(self, *, lang: str | None = None, workers: int | None = None) -> None:
+        self.lang = lang
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self._fallback = PerCallTesseract(lang=lang)
+
+    def image_to_string(
+        self, images: Sequence[np.ndarray | Image.Image], config: str = ""
+    ) -> List[str]:
+        if len(images) < MIN_BATCH:
+            return self._fallback.image_to_string(images, config)
+        workers = max(1, min(self.workers, len(images) // MIN_CROPS_PER_WORKER))
+        bounds = np.linspace(0, len(images), workers + 1).astype(int)
+        with tempfile.TemporaryDirectory(prefix="ocr_batch_") as tmp:
+            tmp_dir = Path(tmp)
+            paths: List[Path] = []
+            for idx, image in enumerate(images):
+                path = tmp_dir / f"{idx:05d}.png"
+                _as_image(image).save(path)
+                paths.append(path)
+            chunks = [
+                (tmp_dir / f"batch_{worker}", paths[start:end])
+                for worker, (start, end) in enumerate(zip(bounds[:-1], bounds[1:]))
+            ]
+            if workers == 1:
+                texts = [self._run_list(base, chunk, config) for base, chunk in chunks]
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    texts = list(
+                        pool.map(lambda item: self._run_list(item[0], item[1], config), chunks)
+                    )
+        return [text for chunk_texts in texts for text in chunk_texts]
+
+    def _run_list(self, base: Path, paths: List[Path], config: str) -> List[str]:
+        import pytesseract
+        from PIL import Image
+
+        separator = f"{PAGE_SEPARATOR_PREFIX}{uuid.uuid4().hex}>>"
+        list_path = base.with_suffix(".list")
+        list_path.write_text("\n".join(str(path) for path in paths) + "\n", encoding="utf-8")
+        pytesseract.pytesseract.run_tesseract(
+            str(list_path), str(base), "txt", self.lang, f"{config} -c page_separator={separator}"
+        )
+        output = Path(f"{base}.txt").read_text(encoding="utf-8")
+        pages = output.split(separator)
+        if pages and not pages[-1].strip():
+            pages.pop()
+        # One text per image, or some were dropped (or the build ignored the
+        # separator) and there is no telling which text belongs to which crop.
+        if len(pages) != len(paths):
+            return self._fallback.image_to_string([Image.open(path) for path in paths], config)
+        return pages
+
+
+OcrBackend = Union[BatchTesseract, PerCallTesseract]
+
+
+def make_backend(name: str, *, lang: str | None = None, workers: int | None = None) -> OcrBackend:
+    if name == "batch":
+        return BatchTesseract(lang=lang, workers=workers)
+    if name == "per-call":
+        return PerCallTesseract(lang=lang)
+    raise ValueError(f"Unknown OCR backend: {name} (expected one of {', '.join(BACKENDS)})")
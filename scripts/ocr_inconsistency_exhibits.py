@@ -3,86 +3,87 @@
 from __future__ import annotations
 
 import argparse
-import json
-import os
 import re
-from datetime import datetime
+import sys
 from pathlib import Path
-from typing import List
-
-import fitz
-import pytesseract
-from PIL import Image, ImageOps
+from typing import Dict
 
 ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.instrumentation import add_metrics_arguments, metrics_from_args  # noqa: E402
+from scripts.ocr_pages import (  # noqa: E402
+    DEFAULT_FAST_DPI,
+    DEFAULT_MIN_CONFIDENCE,
+    DEFAULT_MIN_DENSITY,
+    SOURCE_BLANK,
+    SOURCE_CACHE,
+    SOURCE_OCR,
+    OcrCache,
+    ensure_tesseract,
+    iter_pages,
+    source_counts,
+    write_outputs,
+)
 
 
-def _timestamp() -> str:
-    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+def _slugify(name: str) -> str:
+    cleaned = re.sub(r"[^a-zA-Z0-9]+", "_", name).strip("_").lower()
+    return cleaned or "document"
 
 
-def _ensure_tesseract() -> None:
-    current = os.environ.get("TESSDATA_PREFIX")
-    if current and (Path(current) / "eng.traineddata").exists():
-        return
-    candidates = [
-        r"C:\Program Files\Tesseract-OCR\tessdata",
-        r"C:\Program Files (x86)\Tesseract-OCR\tessdata",
-    ]
-    for candidate in candidates:
-        if (Path(candidate) / "eng.traineddata").exists():
-            os.environ["TESSDATA_PREFIX"] = candidate
-            return
+def _ocr_pdf(
+    pdf_path: Path,
+    output_dir: Path,
+    *,
+    base_name: str,
+    dpi: int,
+    lang: str,
+    min_density: float,
+    ocr_all: bool,
+    fast_dpi: int,
+    min_confidence: float,
+    cache: OcrCache | None,
+    skip_blank: bool,
+    workers: int | None,
+) -> Dict[str, int]:
+    pages = iter_pages(
+        pdf_path,
+        dpi=dpi,
+        lang=lang,
+        min_density=min_density,
+        ocr_all=ocr_all,
+        fast_dpi=fast_dpi,
+        min_confidence=min_confidence,
+        cache=cache,
+        skip_blank=skip_blank,
+        workers=workers,
+    )
+    results = write_outputs(
+        pages,
+        pdf_path,
+        base_name,
+        output_dir,
+        dpi=dpi,
+        lang=lang,
+        min_density=min_density,
+        fast_dpi=fast_dpi,
+        min_confidence=min_confidence,
+    )
+    return source_counts(results)
 
 
-def _slugify(name: str) -> str:
-    cleaned = re.sub(r"[^a-zA-Z0-9]+", "_", name).strip("_").lower()
-    return cleaned or "document"
+def _describe_counts(counts: Dict[str, int]) -> str:
+    return (
+        f"{sum(counts.values())} pages, {counts[SOURCE_OCR]} OCR'd, "
+        f"{counts[SOURCE_BLANK]} blank skipped, {counts[SOURCE_CACHE]} reused from cache"
+    )
 
 
-def _write_text_output(pages: List[str], output_path: Path) -> None:
-    normalized_pages = [page.strip() for page in pages]
-    combined = "\n\n".join(normalized_pages).strip()
-    output_path.write_text(combined, encoding="utf-8")
-
-
-def _write_json_output(
-    pages: List[str], source: Path, base_name: str, output_path: Path, *, dpi: int, lang: str
-) -> None:
-    payload = {
-        "source": str(source),
-        "base_name": base_name,
-        "page_count": len(pages),
-        "ocr": {"dpi": dpi, "lang": lang, "created_at": _timestamp()},
-        "pages": [
-            {
-                "page_number": idx + 1,
-                "text": page,
-                "char_length": len(page),
-            }
-            for idx, page in enumerate(pages)
-        ],
-    }
-    output_path.write_text(json.dumps(payload, indent=2, ensure_ascii=True), encoding="utf-8")
-
-
-def _ocr_pdf(pdf_path: Path, output_dir: Path, *, base_name: str, dpi: int, lang: str) -> int:
-    doc = fitz.open(str(pdf_path))
-    scale = dpi / 72.0
-    matrix = fitz.Matrix(scale, scale)
-    pages: List[str] = []
-    for page in doc:
-        pix = page.get_pixmap(matrix=matrix, alpha=False)
-        image = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        image = ImageOps.autocontrast(image.convert("L"))
-        text = pytesseract.image_to_string(image, lang=lang)
-        pages.append(text)
-
-    text_path = output_dir / f"{base_name}.txt"
-    json_path = output_dir / f"{base_name}.json"
-    _write_text_output(pages, text_path)
-    _write_json_output(pages, pdf_path, base_name, json_path, dpi=dpi, lang=lang)
-    return len(pages)
+def _add_counts(totals: Dict[str, int], counts: Dict[str, int]) -> None:
+    for source, count in counts.items():
+        totals[source] = totals.get(source, 0) + count
 
 
 def _parse_args() -> argparse.Namespace:
@@ -106,18 +107,65 @@ def _parse_args() -> argparse.Namespace:
         help="Glob pattern for exhibit PDFs.",
     )
     parser.add_argument("--dpi", type=int, default=300, help="Render DPI for OCR.")
+    parser.add_argument(
+        "--fast-dpi",
+        type=int,
+        default=DEFAULT_FAST_DPI,
+        help="First-pass OCR DPI; pages re-render at --dpi below --min-confidence (0 = single pass).",
+    )
+    parser.add_argument(
+        "--min-confidence",
+        type=float,
+        default=DEFAULT_MIN_CONFIDENCE,
+        help="Mean Tesseract word confidence needed to keep the first-pass text.",
+    )
     parser.add_argument("--lang", type=str, default="eng", help="OCR language.")
+    parser.add_argument(
+        "--min-text-density",
+        type=float,
+        default=DEFAULT_MIN_DENSITY,
+        help="OCR pages whose text layer has fewer non-space chars per square inch.",
+    )
+    parser.add_argument(
+        "--full-ocr",
+        action="store_true",
+        help="OCR every page, even pages with a usable text layer.",
+    )
+    parser.add_argument(
+        "--page-cache",
+        type=Path,
+        default=Path("extracted_text_full/ocr_page_cache.sqlite"),
+        help="SQLite OCR cache (page hashes and whole PDFs) shared across runs and scripts.",
+    )
+    parser.add_argument(
+        "--no-page-cache",
+        action="store_true",
+        help="Do not reuse or record cached OCR results.",
+    )
+    parser.add_argument(
+        "--keep-blank",
+        action="store_true",
+        help="OCR pages that look blank instead of skipping them.",
+    )
+    parser.add_argument(
+        "--ocr-workers",
+        type=int,
+        default=None,
+        help="Tesseract threads per PDF (default: CPU count).",
+    )
     parser.add_argument(
         "--force",
         action="store_true",
         help="Re-run OCR even if outputs already exist.",
     )
+    add_metrics_arguments(parser)
     return parser.parse_args()
 
 
 def main() -> None:
     args = _parse_args()
-    _ensure_tesseract()
+    metrics = metrics_from_args(args, "ocr_inconsistency_exhibits")
+    ensure_tesseract()
     input_dir = args.input_dir.expanduser().resolve()
     output_root = args.output_root.expanduser().resolve()
     output_root.mkdir(parents=True, exist_ok=True)
@@ -126,6 +174,8 @@ def main() -> None:
     if not pdfs:
         raise FileNotFoundError(f"No PDFs matched {args.pattern} under {input_dir}")
 
+    cache = None if args.no_page_cache else OcrCache(args.page_cache.expanduser().resolve())
+    totals: Dict[str, int] = {}
     for pdf_path in pdfs:
         slug = _slugify(pdf_path.stem)
         output_dir = output_root / slug
@@ -135,8 +185,29 @@ def main() -> None:
         if text_path.exists() and json_path.exists() and not args.force:
             print(f"Skipping OCR for {pdf_path.name}; outputs exist.")
             continue
-        pages = _ocr_pdf(pdf_path, output_dir, base_name=slug, dpi=args.dpi, lang=args.lang)
-        print(f"OCR complete: {pdf_path.name} ({pages} pages)")
+        with metrics.stage("ocr"):
+            counts = _ocr_pdf(
+                pdf_path,
+                output_dir,
+                base_name=slug,
+                dpi=args.dpi,
+                lang=args.lang,
+                min_density=args.min_text_density,
+                ocr_all=args.full_ocr,
+                fast_dpi=args.fast_dpi,
+                min_confidence=args.min_confidence,
+                cache=cache,
+                skip_blank=not args.keep_blank,
+                workers=args.ocr_workers,
+            )
+        metrics.count("documents")
+        _add_counts(totals, counts)
+        print(f"OCR complete: {pdf_path.name} ({_describe_counts(counts)})")
+    if cache is not None:
+        cache.close()
+    if totals:
+        print(f"OCR run: {_describe_counts(totals)}")
+    metrics.finish()
 
 
 if __name__ == "__main__":
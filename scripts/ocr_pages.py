@@ -0,0 +1,824 @@
+"""Page-level hybrid text extraction: keep the PDF text layer, OCR the rest.
+
+Mixed filings often pair a typed pleading (good text layer) with scanned
+exhibits (no text layer, or just a clerk's e-file stamp). Each page's text
+layer is measured in non-whitespace characters per square inch; only pages
+below ``min_density`` that actually carry raster images are rendered and
+sent to Tesseract. Every page records where its text came from
+(``text_layer`` or ``ocr``) so downstream tools can weigh OCR text.
+
+OCR is adaptive: pages are first read at ``fast_dpi`` and re-rendered at
+the full ``dpi`` only when Tesseract's mean word confidence falls below
+``min_confidence``. The DPI and confidence that produced each page's text
+are recorded alongside it.
+
+Before any OCR, each candidate page is rendered small in grayscale. Pages
+with (almost) no ink are skipped as ``blank``. With an ``OcrCache``, a
+page that was already OCR'd anywhere in the corpus (repeated cover
+sheets, certificates of service) reuses that text as ``ocr_cache``. A
+32x32 average hash of the small render only narrows the candidates: two
+pages count as the same only when the SHA-1 of their full-resolution OCR
+rasters match too, so pages that differ in a docket number or a date are
+still OCR'd separately. The cache
+also stores whole-document results keyed by the PDF's SHA-1 and the OCR
+settings, so byte-identical copies filed in several folders skip
+rendering entirely.
+
+``iter_pages`` runs as a small pipeline: one thread owns the PDF and
+renders pages straight to grayscale into a bounded queue, a pool of
+threads runs Tesseract on them, and results come back in page order as
+they settle, so ``write_outputs`` can stream a long scan to disk.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from hashlib import sha1
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import fitz
+    from PIL import Image
+
+from scripts.instrumentation import get_metrics
+
+# ~190 characters on a letter page; typed pages run 10-30 chars/sq in.
+DEFAULT_MIN_DENSITY = 2.0
+POINTS_PER_SQUARE_INCH = 72.0 * 72.0
+# Clean scans read at 150 DPI with 85-95 mean confidence; noisy ones drop below 70.
+DEFAULT_FAST_DPI = 150
+DEFAULT_MIN_CONFIDENCE = 75.0
+
+# Blank/duplicate screening renders at a resolution far below OCR's.
+SCREEN_DPI = 36
+HASH_SIZE = 32
+# Ink is anything clearly darker than the page background; a blank scan
+# has well under 0.1% of such pixels, a single typed line already ~0.3%.
+INK_CONTRAST = 64
+BLANK_MAX_INK = 0.001
+
+# How long a cache write waits for another process's write to finish.
+CACHE_BUSY_TIMEOUT = 300.0
+
+SOURCE_TEXT_LAYER = "text_layer"
+SOURCE_OCR = "ocr"
+SOURCE_BLANK = "blank"
+SOURCE_CACHE = "ocr_cache"
+SOURCES = (SOURCE_TEXT_LAYER, SOURCE_OCR, SOURCE_BLANK, SOURCE_CACHE)
+
+
+@dataclass
+class PageResult:
+    page_number: int
+    text: str
+    source: str
+    text_layer_density: float
+    dpi: int | None = None
+    confidence: float | None = None
+
+
+class OcrCache:
+    """Persistent OCR results shared across runs and scripts.
+
+    ``pages`` maps a page's average hash and the SHA-1 of its full-DPI OCR
+    raster, plus the OCR language and full DPI, to its text, so neither a
+    hash collision nor a changed setting reuses stale text.
+    ``documents`` maps a PDF's SHA-1 plus every extraction setting to its
+    per-page results. Safe to share between the render thread and the
+    consumer of ``iter_pages``, and between processes: the database runs in
+    WAL mode, every write commits at once, and a writer waits up to
+    ``CACHE_BUSY_TIMEOUT`` seconds for another process's write.
+    """
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), timeout=CACHE_BUSY_TIMEOUT, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(pages)")]
+        if columns and "raster_digest" not in columns:
+            # Caches written before raster digests matched pages on the average
+            # hash alone; neither their pages nor the documents built from them
+            # can be trusted.
+            self._conn.execute("DROP TABLE pages")
+            self._conn.execute("DROP TABLE IF EXISTS documents")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "page_hash TEXT NOT NULL, raster_digest TEXT NOT NULL, "
+            "lang TEXT NOT NULL, dpi INTEGER NOT NULL, "
+            "text TEXT NOT NULL, used_dpi INTEGER, confidence REAL, "
+            "PRIMARY KEY (page_hash, raster_digest, lang, dpi))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "digest TEXT NOT NULL, settings TEXT NOT NULL, pages TEXT NOT NULL, "
+            "PRIMARY KEY (digest, settings))"
+        )
+
+    def get(
+        self, page_hash: str, raster_digest: str, *, lang: str, dpi: int
+    ) -> Tuple[str, int, float] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text, used_dpi, confidence FROM pages "
+                "WHERE page_hash = ? AND raster_digest = ? AND lang = ? AND dpi = ?",
+                (page_hash, raster_digest, lang, dpi),
+            ).fetchone()
+        return None if row is None else (row[0], row[1], row[2])
+
+    def put(
+        self,
+        page_hash: str,
+        raster_digest: str,
+        text: str,
+        *,
+        lang: str,
+        dpi: int,
+        used_dpi: int,
+        confidence: float,
+    ) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (page_hash, raster_digest, lang, dpi, text, used_dpi, confidence),
+            )
+            self._conn.commit()
+
+    def get_document(self, digest: str, settings: str) -> List[PageResult] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT pages FROM documents WHERE digest = ? AND settings = ?",
+                (digest, settings),
+            ).fetchone()
+        if row is None:
+            return None
+        return [PageResult(**page) for page in json.loads(row[0])]
+
+    def put_document(self, digest: str, settings: str, results: Sequence[PageResult]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?)",
+                (digest, settings, json.dumps([asdict(result) for result in results])),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def file_digest(path: Path) -> str:
+    digest = sha1()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _timestamp() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def ensure_tesseract() -> None:
+    current = os.environ.get("TESSDATA_PREFIX")
+    if current and (Path(current) / "eng.traineddata").exists():
+        return
+    candidates = [
+        r"C:\Program Files\Tesseract-OCR\tessdata",
+        r"C:\Program Files (x86)\Tesseract-OCR\tessdata",
+    ]
+    for candidate in candidates:
+        if (Path(candidate) / "eng.traineddata").exists():
+            os.environ["TESSDATA_PREFIX"] = candidate
+            return
+
+
+def text_layer_density(text: str, rect: fitz.Rect) -> float:
+    """Non-whitespace characters per square inch of page area."""
+
+    area = (rect.width * rect.height) / POINTS_PER_SQUARE_INCH
+    if area <= 0:
+        return 0.0
+    return sum(1 for char in text if not char.isspace()) / area
+
+
+def needs_ocr(page: fitz.Page, density: float, min_density: float) -> bool:
+    """Sparse pages are OCR'd only when they actually draw a raster image.
+
+    ``get_image_info`` walks the page's content stream, unlike
+    ``get_images`` which also lists images from shared resource dicts.
+    """
+
+    return density < min_density and bool(page.get_image_info())
+
+
+def render_gray(page: fitz.Page, dpi: int = SCREEN_DPI) -> np.ndarray:
+    """Render ``page`` as a 2-D uint8 grayscale array."""
+
+    import fitz
+
+    scale = dpi / 72.0
+    pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale), colorspace=fitz.csGRAY, alpha=False)
+    pixels = np.frombuffer(pix.samples, dtype=np.uint8)
+    return pixels.reshape(pix.height, pix.stride)[:, : pix.width]
+
+
+def is_blank(pixels: np.ndarray, max_ink: float = BLANK_MAX_INK) -> bool:
+    """True when almost no pixels are clearly darker than the page background.
+
+    The background is the median gray level, so toned or yellowed scans of
+    empty pages still count as blank.
+    """
+
+    if pixels.size == 0:
+        return True
+    background = int(np.median(pixels))
+    ink = np.count_nonzero(pixels < background - INK_CONTRAST)
+    return ink / pixels.size < max_ink
+
+
+def average_hash(pixels: np.ndarray, size: int = HASH_SIZE) -> str:
+    """Return a ``size x size`` average hash of ``pixels`` as hex."""
+
+    from PIL import Image
+
+    small = Image.fromarray(pixels).resize((size, size), Image.Resampling.BOX)
+    values = np.asarray(small, dtype=np.float32)
+    return np.packbits(values > values.mean()).tobytes().hex()
+
+
+def raster_digest(image: Image.Image) -> str:
+    """Exact SHA-1 of an OCR raster's size and pixels.
+
+    Confirms what ``average_hash`` only suggests: two pages whose renders
+    share a digest give Tesseract identical input.
+    """
+
+    digest = sha1(f"{image.mode}:{image.width}x{image.height}:".encode("ascii"))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def _text_from_data(data: Dict[str, list]) -> Tuple[str, float]:
+    """Rebuild page text from ``image_to_data`` output and average word confidence."""
+
+    paragraphs: Dict[Tuple[int, int], Dict[int, List[str]]] = {}
+    confidences: List[float] = []
+    for idx, word in enumerate(data["text"]):
+        conf = float(data["conf"][idx])
+        if conf < 0 or not word.strip():
+            continue
+        paragraph = paragraphs.setdefault((data["block_num"][idx], data["par_num"][idx]), {})
+        paragraph.setdefault(data["line_num"][idx], []).append(word.strip())
+        confidences.append(conf)
+    text = "\n\n".join(
+        "\n".join(" ".join(words) for words in lines.values()) for lines in paragraphs.values()
+    )
+    mean_conf = sum(confidences) / len(confidences) if confidences else 0.0
+    return text, mean_conf
+
+
+def render_for_ocr(page: fitz.Page, *, dpi: int, clip: fitz.Rect | None = None) -> Image.Image:
+    """Render ``page`` (or its ``clip`` region) straight to an autocontrasted grayscale image."""
+
+    import fitz
+    from PIL import Image, ImageOps
+
+    scale = dpi / 72.0
+    pix = page.get_pixmap(
+        matrix=fitz.Matrix(scale, scale), clip=clip, colorspace=fitz.csGRAY, alpha=False
+    )
+    image = Image.frombytes("L", (pix.width, pix.height), pix.samples, "raw", "L", pix.stride)
+    return ImageOps.autocontrast(image)
+
+
+def _ocr_image(image: Image.Image, lang: str) -> Tuple[str, float]:
+    import pytesseract
+
+    get_metrics().count("tesseract_calls")
+    data = pytesseract.image_to_data(image, lang=lang, output_type=pytesseract.Output.DICT)
+    return _text_from_data(data)
+
+
+def ocr_page(
+    page: fitz.Page, *, dpi: int, lang: str, clip: fitz.Rect | None = None
+) -> Tuple[str, float]:
+    """OCR one page (or just its ``clip`` region) at ``dpi``.
+
+    Returns the text and its mean word confidence.
+    """
+
+    return _ocr_image(render_for_ocr(page, dpi=dpi, clip=clip), lang)
+
+
+def _first_pass_ok(text: str, confidence: float, min_confidence: float) -> bool:
+    return bool(text.strip()) and confidence >= min_confidence
+
+
+def _pick_pass(
+    fast: Tuple[str, float], retry: Tuple[str, float], fast_dpi: int, dpi: int
+) -> Tuple[str, int, float]:
+    """Keep the re-read unless the fast pass had text and higher confidence."""
+
+    if retry[1] >= fast[1] or not fast[0].strip():
+        return retry[0], dpi, retry[1]
+    return fast[0], fast_dpi, fast[1]
+
+
+def ocr_page_adaptive(
+    page: fitz.Page,
+    *,
+    dpi: int,
+    lang: str,
+    fast_dpi: int = DEFAULT_FAST_DPI,
+    min_confidence: float = DEFAULT_MIN_CONFIDENCE,
+) -> Tuple[str, int, float]:
+    """Read at ``fast_dpi`` first; re-read at ``dpi`` only if confidence is low.
+
+    Returns ``(text, dpi_used, confidence)``. ``fast_dpi`` of 0 (or not below
+    ``dpi``) means a single pass at ``dpi``.
+    """
+
+    if 0 < fast_dpi < dpi:
+        fast = ocr_page(page, dpi=fast_dpi, lang=lang)
+        if _first_pass_ok(*fast, min_confidence):
+            return fast[0], fast_dpi, fast[1]
+        return _pick_pass(fast, ocr_page(page, dpi=dpi, lang=lang), fast_dpi, dpi)
+    text, confidence = ocr_page(page, dpi=dpi, lang=lang)
+    return text, dpi, confidence
+
+
+@dataclass
+class _OcrJob:
+    """A rendered page on its way through the OCR workers."""
+
+    index: int
+    existing: str
+    density: float
+    page_hash: str | None
+    dpi: int
+    digest: str | None = None
+    image: Image.Image | None = None
+    fast: Tuple[str, float, int] | None = None
+
+
+def _put(channel: queue.Queue, item: object, stop: threading.Event) -> bool:
+    """Blocking put that gives up once ``stop`` is set."""
+
+    while not stop.is_set():
+        try:
+            channel.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _render_pages(
+    doc: fitz.Document,
+    *,
+    text_layer: Sequence[str] | None,
+    min_density: float,
+    ocr_all: bool,
+    dpi: int,
+    first_dpi: int,
+    lang: str,
+    skip_blank: bool,
+    cache: OcrCache | None,
+    jobs: queue.Queue,
+    rerender: queue.Queue,
+    events: queue.Queue,
+    stop: threading.Event,
+) -> None:
+    """Producer: the only thread touching ``doc`` (MuPDF is not thread-safe).
+
+    Pages that need no OCR are settled here; the rest are rendered in
+    grayscale and queued for the OCR workers. Re-render requests from
+    low-confidence first passes take priority over new pages.
+
+    With a cache, every OCR candidate is also rendered at the full ``dpi``
+    and digested, and a page reuses cached or earlier text only when both
+    its average hash and that digest match.
+    """
+
+    def serve(job: _OcrJob) -> bool:
+        if job.image is None:
+            job.image = render_for_ocr(doc[job.index], dpi=job.dpi)
+        return _put(jobs, job, stop)
+
+    try:
+        leaders: Dict[Tuple[str, str], int] = {}
+        for idx, page in enumerate(doc):
+            while True:
+                try:
+                    request = rerender.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None or not serve(request):
+                    return
+            if stop.is_set():
+                return
+            existing = text_layer[idx] if text_layer is not None else page.get_text()
+            existing = existing.strip()
+            density = text_layer_density(existing, page.rect)
+            if not (ocr_all or needs_ocr(page, density, min_density)):
+                events.put(("page", PageResult(idx + 1, existing, SOURCE_TEXT_LAYER, density)))
+                continue
+            page_hash = None
+            if skip_blank or cache is not None:
+                pixels = render_gray(page)
+                if skip_blank and is_blank(pixels):
+                    events.put(("page", PageResult(idx + 1, existing, SOURCE_BLANK, density)))
+                    continue
+                page_hash = average_hash(pixels)
+            job = _OcrJob(idx, existing, density, page_hash, first_dpi)
+            if cache is not None and page_hash is not None:
+                full = render_for_ocr(page, dpi=dpi)
+                job.digest = raster_digest(full)
+                if first_dpi == dpi:
+                    job.image = full
+                del full
+                cached = cache.get(page_hash, job.digest, lang=lang, dpi=dpi)
+                if cached is not None:
+                    events.put(("cached", (idx, existing, density, cached)))
+                    continue
+                key = (page_hash, job.digest)
+                if key in leaders:
+                    # Same raster earlier in this document: reuse its OCR once done.
+                    events.put(("follow", (idx, existing, density, leaders[key])))
+                    continue
+                leaders[key] = idx
+            if not serve(job):
+                return
+        while True:
+            request = rerender.get()
+            if request is None or not serve(request):
+                return
+    except BaseException as exc:  # surfaced to the consumer
+        events.put(("error", exc))
+
+
+def _ocr_worker(
+    *,
+    lang: str,
+    dpi: int,
+    min_confidence: float,
+    jobs: queue.Queue,
+    rerender: queue.Queue,
+    events: queue.Queue,
+    stop: threading.Event,
+) -> None:
+    """Consumer: OCR rendered pages; send low-confidence fast passes back for re-rendering."""
+
+    while not stop.is_set():
+        job = jobs.get()
+        if job is None:
+            return
+        try:
+            text, confidence = _ocr_image(job.image, lang)
+        except BaseException as exc:  # surfaced to the consumer
+            events.put(("error", exc))
+            return
+        job.image = None
+        if job.fast is not None:
+            fast_text, fast_confidence, fast_dpi = job.fast
+            result = _pick_pass((fast_text, fast_confidence), (text, confidence), fast_dpi, dpi)
+        elif job.dpi != dpi and not _first_pass_ok(text, confidence, min_confidence):
+            job.fast = (text, confidence, job.dpi)
+            job.dpi = dpi
+            rerender.put(job)
+            continue
+        else:
+            result = (text, job.dpi, confidence)
+        events.put(("ocr", (job, result)))
+
+
+def _settle(
+    idx: int,
+    existing: str,
+    density: float,
+    text: str,
+    source: str,
+    used_dpi: int,
+    confidence: float,
+) -> PageResult:
+    # An e-file stamp can out-read a blank scan; keep the longer text.
+    if len(text) >= len(existing):
+        return PageResult(idx + 1, text, source, density, used_dpi, confidence)
+    return PageResult(idx + 1, existing, SOURCE_TEXT_LAYER, density)
+
+
+def _stop_threads(
+    threads: List[threading.Thread],
+    workers: int,
+    jobs: queue.Queue,
+    rerender: queue.Queue,
+    stop: threading.Event,
+) -> None:
+    stop.set()
+    rerender.put(None)
+    for _ in range(workers):
+        while True:
+            try:
+                jobs.put_nowait(None)
+                break
+            except queue.Full:
+                try:
+                    jobs.get_nowait()
+                except queue.Empty:
+                    pass
+    for thread in threads:
+        thread.join()
+
+
+def iter_pages(
+    pdf_path: Path,
+    *,
+    dpi: int,
+    lang: str,
+    min_density: float = DEFAULT_MIN_DENSITY,
+    text_layer: Sequence[str] | None = None,
+    ocr_all: bool = False,
+    fast_dpi: int = DEFAULT_FAST_DPI,
+    min_confidence: float = DEFAULT_MIN_CONFIDENCE,
+    cache: OcrCache | None = None,
+    skip_blank: bool = True,
+    workers: int | None = None,
+) -> Iterator[PageResult]:
+    """Yield one result per page, in page order, as soon as each is settled.
+
+    ``text_layer`` lets callers that already extracted page text (e.g. with
+    pypdf) reuse it; otherwise PyMuPDF's text layer is used. ``ocr_all``
+    restores the old behaviour of OCR'ing every page. ``fast_dpi`` and
+    ``min_confidence`` control the two-pass OCR (see ``ocr_page_adaptive``).
+    Candidate pages are screened first: blank pages are skipped when
+    ``skip_blank`` is set, and pages already in ``cache`` reuse its text.
+    A PDF whose bytes and settings are already in ``cache`` is returned
+    without opening it; its OCR'd pages come back as ``ocr_cache``.
+
+    One thread renders pages in grayscale into a bounded queue while
+    ``workers`` threads (default: CPU count) run Tesseract on them, so
+    rendering and OCR overlap and at most ``2 * workers`` page images are
+    held in memory.
+    """
+
+    metrics = get_metrics()
+    digest = settings = None
+    if cache is not None and text_layer is None:
+        digest = file_digest(pdf_path)
+        settings = json.dumps(
+            {
+                "dpi": dpi,
+                "lang": lang,
+                "min_density": min_density,
+                "ocr_all": ocr_all,
+                "fast_dpi": fast_dpi,
+                "min_confidence": min_confidence,
+                "skip_blank": skip_blank,
+            },
+            sort_keys=True,
+        )
+        cached_pages = cache.get_document(digest, settings)
+        if cached_pages is not None:
+            metrics.count("ocr_documents_from_cache")
+            for result in cached_pages:
+                if result.source == SOURCE_OCR:
+                    result.source = SOURCE_CACHE
+                metrics.count(f"pages.{result.source}")
+            yield from cached_pages
+            return
+
+    # Only now: cached documents never load PyMuPDF.
+    import fitz
+
+    workers = max(1, workers or os.cpu_count() or 1)
+    jobs: queue.Queue = queue.Queue(maxsize=2 * workers)
+    rerender: queue.Queue = queue.Queue()
+    events: queue.Queue = queue.Queue()
+    stop = threading.Event()
+    doc = fitz.open(str(pdf_path))
+    page_count = doc.page_count
+    threads = [
+        threading.Thread(
+            target=_render_pages,
+            args=(doc,),
+            kwargs={
+                "text_layer": text_layer,
+                "min_density": min_density,
+                "ocr_all": ocr_all,
+                "dpi": dpi,
+                "first_dpi": fast_dpi if 0 < fast_dpi < dpi else dpi,
+                "lang": lang,
+                "skip_blank": skip_blank,
+                "cache": cache,
+                "jobs": jobs,
+                "rerender": rerender,
+                "events": events,
+                "stop": stop,
+            },
+            daemon=True,
+        )
+    ]
+    threads += [
+        threading.Thread(
+            target=_ocr_worker,
+            kwargs={
+                "lang": lang,
+                "dpi": dpi,
+                "min_confidence": min_confidence,
+                "jobs": jobs,
+                "rerender": rerender,
+                "events": events,
+                "stop": stop,
+            },
+            daemon=True,
+        )
+        for _ in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+
+    results: List[PageResult] = []
+    settled: Dict[int, PageResult] = {}
+    ocr_texts: Dict[int, Tuple[str, int, float]] = {}
+    followers: Dict[int, List[Tuple[int, str, float]]] = defaultdict(list)
+    try:
+        while len(results) < page_count:
+            kind, payload = events.get()
+            metrics.gauge("ocr_render_queue_depth", jobs.qsize())
+            metrics.gauge("ocr_rerender_queue_depth", rerender.qsize())
+            if kind == "error":
+                raise payload
+            if kind == "page":
+                settled[payload.page_number - 1] = payload
+            elif kind == "cached":
+                idx, existing, density, (text, used_dpi, confidence) = payload
+                settled[idx] = _settle(idx, existing, density, text, SOURCE_CACHE, used_dpi, confidence)
+            elif kind == "follow":
+                idx, existing, density, leader = payload
+                if leader in ocr_texts:
+                    text, used_dpi, confidence = ocr_texts[leader]
+                    settled[idx] = _settle(
+                        idx, existing, density, text, SOURCE_CACHE, used_dpi, confidence
+                    )
+                else:
+                    followers[leader].append((idx, existing, density))
+            else:
+                job, (text, used_dpi, confidence) = payload
+                text = text.strip()
+                ocr_texts[job.index] = (text, used_dpi, confidence)
+                if cache is not None and job.page_hash is not None and job.digest is not None:
+                    cache.put(
+                        job.page_hash,
+                        job.digest,
+                        text,
+                        lang=lang,
+                        dpi=dpi,
+                        used_dpi=used_dpi,
+                        confidence=confidence,
+                    )
+                settled[job.index] = _settle(
+                    job.index, job.existing, job.density, text, SOURCE_OCR, used_dpi, confidence
+                )
+                for idx, existing, density in followers.pop(job.index, []):
+                    settled[idx] = _settle(
+                        idx, existing, density, text, SOURCE_CACHE, used_dpi, confidence
+                    )
+            while len(results) in settled:
+                result = settled.pop(len(results))
+                results.append(result)
+                metrics.count(f"pages.{result.source}")
+                yield result
+    finally:
+        _stop_threads(threads, workers, jobs, rerender, stop)
+        doc.close()
+    if cache is not None and digest is not None:
+        cache.put_document(digest, settings, results)
+
+
+def extract_pages(
+    pdf_path: Path,
+    *,
+    dpi: int,
+    lang: str,
+    min_density: float = DEFAULT_MIN_DENSITY,
+    text_layer: Sequence[str] | None = None,
+    ocr_all: bool = False,
+    fast_dpi: int = DEFAULT_FAST_DPI,
+    min_confidence: float = DEFAULT_MIN_CONFIDENCE,
+    cache: OcrCache | None = None,
+    skip_blank: bool = True,
+    workers: int | None = None,
+) -> List[PageResult]:
+    """Return every page's result at once; see ``iter_pages``."""
+
+    return list(
+        iter_pages(
+            pdf_path,
+            dpi=dpi,
+            lang=lang,
+            min_density=min_density,
+            text_layer=text_layer,
+            ocr_all=ocr_all,
+            fast_dpi=fast_dpi,
+            min_confidence=min_confidence,
+            cache=cache,
+            skip_blank=skip_blank,
+            workers=workers,
+        )
+    )
+
+
+def source_counts(results: Sequence[PageResult]) -> Dict[str, int]:
+    """Return the number of pages per text source (every source is present)."""
+
+    counts = {source: 0 for source in SOURCES}
+    for result in results:
+        counts[result.source] += 1
+    return counts
+
+
+def write_outputs(
+    pages: Iterable[PageResult],
+    source: Path,
+    base_name: str,
+    output_dir: Path,
+    *,
+    dpi: int,
+    lang: str,
+    min_density: float,
+    fast_dpi: int = 0,
+    min_confidence: float | None = None,
+) -> List[PageResult]:
+    """Write ``<base_name>.txt`` and ``<base_name>.json`` like the ingest step.
+
+    Page text is appended to the ``.txt`` file as ``pages`` yields it (pass
+    ``iter_pages`` to stream a long scan); the ``.json`` with per-page
+    details is written at the end. Returns the pages written.
+    """
+
+    text_path = output_dir / f"{base_name}.txt"
+    json_path = output_dir / f"{base_name}.json"
+    partial_path = text_path.with_suffix(".txt.partial")
+    results: List[PageResult] = []
+    with partial_path.open("w", encoding="utf-8") as handle:
+        # Same layout as "\n\n".join(page texts).strip(), written incrementally.
+        separators = 0
+        for result in pages:
+            results.append(result)
+            text = result.text.strip()
+            if handle.tell():
+                separators += 1
+            if text:
+                handle.write("\n\n" * separators + text)
+                separators = 0
+    partial_path.replace(text_path)
+
+    counts = source_counts(results)
+    two_pass = 0 < fast_dpi < dpi
+    rerendered = sum(
+        1 for result in results if two_pass and result.source == SOURCE_OCR and result.dpi == dpi
+    )
+    payload = {
+        "source": str(source),
+        "base_name": base_name,
+        "page_count": len(results),
+        "ocr": {
+            "dpi": dpi,
+            "lang": lang,
+            "fast_dpi": fast_dpi,
+            "min_confidence": min_confidence,
+            "min_text_density": min_density,
+            "text_layer_pages": counts[SOURCE_TEXT_LAYER],
+            "ocr_pages": counts[SOURCE_OCR],
+            "blank_pages": counts[SOURCE_BLANK],
+            "cached_pages": counts[SOURCE_CACHE],
+            "rerendered_pages": rerendered,
+            "created_at": _timestamp(),
+        },
+        "pages": [
+            {
+                "page_number": result.page_number,
+                "text": result.text,
+                "char_length": len(result.text),
+                "source": result.source,
+                "text_layer_density": round(result.text_layer_density, 2),
+                "dpi": result.dpi,
+                "confidence": None if result.confidence is None else round(result.confidence, 1),
+            }
+            for result in results
+        ],
+    }
+    json_path.write_text(json.dumps(payload, indent=2, ensure_ascii=True), encoding="utf-8")
+    return results
@@ -0,0 +1,22 @@
+"""Deferred matplotlib import shared by the figure scripts.
+
+Importing ``matplotlib.pyplot`` costs about half a second, so the visual
+scripts call ``pyplot()`` inside the functions that draw instead of
+importing it at module level. ``--help``, cached-only paths and other
+scripts importing their helpers then never load it.
+"""
+
+from __future__ import annotations
+
+from types import ModuleType
+
+
+def pyplot() -> ModuleType:
+    """Return ``matplotlib.pyplot`` on the non-interactive Agg backend."""
+
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    return plt
@@ -0,0 +1,283 @@
+"""Interactive shell for ad-hoc queries against vector stores.
+
+Loads the stores (embeddings memory-mapped, BM25 indexes from disk) and the
+sentence-transformer model once, then answers query after query without
+reloading anything. Each answer reports its latency; after the first
+(warm-up) encode, semantic and hybrid queries on a case-sized store come
+back in well under 100 ms.
+
+Commands (``help <command>`` for details):
+    semantic | keyword | hybrid <text>   run one query in that mode
+    <text>                               run a query in the current mode
+    mode <semantic|keyword|hybrid>       change the current mode
+    k <n>                                hits per query
+    filer <name> ... | off               restrict to filer stores
+    source <text> | off                  restrict to source_pdf paths containing text
+    dates <from> [<to>] | off            keep chunks mentioning a date in the range (YYYY-MM-DD)
+    filters                              show the active settings
+    show <rank>                          full text of a hit from the last answer
+    quit                                 leave (also Ctrl-D)
+
+Usage:
+    python scripts/query_repl.py --store vector_store_case_docs_by_filer
+    python scripts/query_repl.py --store vector_store_case_docs --mode keyword
+"""
+
+from __future__ import annotations
+
+import argparse
+import cmd
+import shlex
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.analyze_vector_store import _extract_dates  # noqa: E402
+from scripts.hybrid_search import HybridSearcher, SearchHit, _format_hit, _normalize_ascii, _normalize_ws  # noqa: E402
+from scripts.warm_cache import load_sentence_model  # noqa: E402
+
+MODES = ("semantic", "keyword", "hybrid")
+
+
+def _parse_day(text: str) -> datetime:
+    try:
+        return datetime.strptime(text, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"expected a YYYY-MM-DD date, got {text!r}") from None
+
+
+class QueryShell(cmd.Cmd):
+    intro = "Type a query, or 'help' for commands."
+    prompt = "search> "
+
+    def __init__(self, searcher: HybridSearcher, *, mode: str = "hybrid", top_k: int = 10, rrf_k: int = 60) -> None:
+        super().__init__()
+        self.searcher = searcher
+        self.mode = mode
+        self.top_k = top_k
+        self.rrf_k = rrf_k
+        self.filers: List[str] | None = None
+        self.source: str | None = None
+        self.date_range: Tuple[datetime, datetime] | None = None
+        self.last_hits: List[SearchHit] = []
+        self._dates: Dict[Tuple[str, object], List[datetime]] | None = None
+
+    # Queries -----------------------------------------------------------
+
+    def search(self, query: str, mode: str) -> List[SearchHit]:
+        """Run ``query`` with the active filters and return its hits."""
+
+        if mode != "keyword" and self.searcher.encoder is None:
+            raise ValueError(f"{mode} search needs the model; restart without --no-model")
+        # Date filters apply after ranking, so rank every candidate first.
+        depth = self.searcher.total_docs if self.date_range else self.top_k
+        if mode == "keyword":
+            hits = self.searcher.keyword(query, depth, filers=self.filers, source=self.source)
+        elif mode == "semantic":
+            hits = self.searcher.semantic(query, depth, filers=self.filers, source=self.source)
+        else:
+            hits = self.searcher.hybrid(
+                query,
+                depth,
+                filers=self.filers,
+                source=self.source,
+                rrf_k=self.rrf_k,
+                candidates=depth if self.date_range else None,
+            )
+        if self.date_range:
+            hits = [hit for hit in hits if self._in_range(hit)][: self.top_k]
+        return hits
+
+    def _record_dates(self) -> Dict[Tuple[str, object], List[datetime]]:
+        if self._dates is None:
+            started = time.perf_counter()
+            self._dates = {
+                (store.filer, record.get("id")): [
+                    parsed for _, parsed, _ in _extract_dates(record.get("text", "")) if parsed is not None
+                ]
+                for store in self.searcher.stores
+                for record in store.records
+            }
+            print(f"(indexed chunk dates in {(time.perf_counter() - started) * 1000.0:.0f} ms)")
+        return self._dates
+
+    def _in_range(self, hit: SearchHit) -> bool:
+        start, end = self.date_range
+        dates = self._record_dates().get((hit.filer, hit.record.get("id")), [])
+        return any(start <= parsed <= end for parsed in dates)
+
+    def _run_query(self, query: str, mode: str) -> None:
+        query = query.strip()
+        if not query:
+            print("Enter some query text.")
+            return
+        started = time.perf_counter()
+        try:
+            hits = self.search(query, mode)
+        except ValueError as exc:
+            print(f"error: {exc}")
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        self.last_hits = hits
+        for rank, hit in enumerate(hits, start=1):
+            for line in _format_hit(rank, hit):
+                print(line)
+        print(f"{len(hits)} hits ({mode}, {elapsed_ms:.1f} ms)")
+
+    def default(self, line: str) -> None:
+        self._run_query(line, self.mode)
+
+    def emptyline(self) -> bool:
+        return False
+
+    def do_semantic(self, arg: str) -> None:
+        """semantic <text>: vector-similarity search."""
+        self._run_query(arg, "semantic")
+
+    def do_keyword(self, arg: str) -> None:
+        """keyword <text>: BM25 keyword search (no model needed)."""
+        self._run_query(arg, "keyword")
+
+    def do_hybrid(self, arg: str) -> None:
+        """hybrid <text>: BM25 and vector rankings fused with reciprocal rank fusion."""
+        self._run_query(arg, "hybrid")
+
+    # Settings ----------------------------------------------------------
+
+    def do_mode(self, arg: str) -> None:
+        """mode <semantic|keyword|hybrid>: mode used for bare query lines."""
+        if arg.strip() not in MODES:
+            print(f"Modes: {', '.join(MODES)}")
+            return
+        self.mode = arg.strip()
+
+    def do_k(self, arg: str) -> None:
+        """k <n>: number of hits per query."""
+        try:
+            top_k = int(arg)
+        except ValueError:
+            print("Usage: k <n>")
+            return
+        if top_k < 1:
+            print("k must be at least 1.")
+            return
+        self.top_k = top_k
+
+    def do_filer(self, arg: str) -> None:
+        """filer <name> ... | off: restrict hits to these filer stores (see 'filters')."""
+        names = shlex.split(arg)
+        if not names or names == ["off"]:
+            self.filers = None
+            return
+        known = {name.lower() for name in self.searcher.filers}
+        unknown = [name for name in names if name.lower() not in known]
+        if unknown:
+            print(f"Unknown filer(s): {', '.join(unknown)}. Available: {', '.join(self.searcher.filers)}")
+            return
+        self.filers = names
+
+    def do_source(self, arg: str) -> None:
+        """source <text> | off: keep chunks whose source_pdf path contains text (case-insensitive)."""
+        text = arg.strip()
+        self.source = None if text in ("", "off") else text
+
+    def do_dates(self, arg: str) -> None:
+        """dates <from> [<to>] | off: keep chunks that mention a date in the range (YYYY-MM-DD).
+
+        The first date filter scans every chunk's text for dates once; later
+        queries reuse the result.
+        """
+        parts = arg.split()
+        if not parts or parts == ["off"]:
+            self.date_range = None
+            return
+        try:
+            start = _parse_day(parts[0])
+            end = _parse_day(parts[1]) if len(parts) > 1 else datetime.max
+        except ValueError as exc:
+            print(f"error: {exc}")
+            return
+        self.date_range = (start, end)
+
+    def do_filters(self, arg: str) -> None:
+        """filters: show the mode, k and active filters."""
+        if self.date_range:
+            start, end = self.date_range
+            dates = f"{start:%Y-%m-%d} to {'any' if end == datetime.max else f'{end:%Y-%m-%d}'}"
+        else:
+            dates = "off"
+        print(f"mode {self.mode} | k {self.top_k}")
+        print(f"filer: {', '.join(self.filers) if self.filers else 'all'} ({', '.join(self.searcher.filers)})")
+        print(f"source: {self.source or 'off'} | dates: {dates}")
+
+    def do_show(self, arg: str) -> None:
+        """show <rank>: print the full text of a hit from the last answer."""
+        try:
+            hit = self.last_hits[int(arg) - 1]
+        except (ValueError, IndexError):
+            print(f"Usage: show <rank> (1-{len(self.last_hits)})" if self.last_hits else "No hits yet.")
+            return
+        record = hit.record
+        print(f"{_normalize_ascii(str(record.get('source_pdf', '')))} | chunk {record.get('chunk_index')}")
+        print(_normalize_ascii(_normalize_ws(record.get("text", ""))))
+
+    def do_quit(self, arg: str) -> bool:
+        """quit: leave the shell."""
+        return True
+
+    def do_EOF(self, arg: str) -> bool:  # noqa: N802 - cmd.Cmd naming
+        print()
+        return True
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Interactive semantic/keyword/hybrid search over vector stores.")
+    parser.add_argument(
+        "--store",
+        type=Path,
+        default=Path("vector_store_case_docs_by_filer"),
+        help="Vector store directory or root of per-filer stores.",
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="sentence-transformers/all-MiniLM-L6-v2",
+        help="SentenceTransformer model name (must match the stores).",
+    )
+    parser.add_argument(
+        "--no-model",
+        action="store_true",
+        help="Skip loading the model; only keyword queries work.",
+    )
+    parser.add_argument("--mode", choices=MODES, default="hybrid", help="Initial mode for bare query lines.")
+    parser.add_argument("--top-k", type=int, default=10, help="Hits per query.")
+    parser.add_argument("--rrf-k", type=int, default=60, help="Reciprocal rank fusion constant.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    started = time.perf_counter()
+    encoder = None
+    if not args.no_model:
+        encoder = load_sentence_model(args.model)
+    searcher = HybridSearcher.from_path(args.store, encoder=encoder)
+    if encoder is not None:
+        # The first encode pays for lazy model initialisation; do it before the first query.
+        searcher.encode(["warm up"])
+    mode = "keyword" if args.no_model else args.mode
+    print(
+        f"Loaded {searcher.total_docs} chunks from {len(searcher.stores)} store(s) "
+        f"in {time.perf_counter() - started:.1f} s"
+    )
+    QueryShell(searcher, mode=mode, top_k=args.top_k, rrf_k=args.rrf_k).cmdloop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+"""Keep report inputs warm in a resident process and run scripts inside it.
+
+Every report script starts by parsing ``28B_merged.json``, loading vector
+stores and, for the semantic ones, the MiniLM model. ``serve`` starts a
+daemon that runs report scripts in-process, with the ``scripts.warm_cache``
+loaders enabled. Those inputs then stay in memory between commands and
+are reloaded only when the files behind them change. ``run`` is a thin
+client: it sends the script name, its arguments and the working directory,
+and streams the script's output back.
+
+Edited ``scripts/*.py`` modules are reloaded before the next command, so
+iterating on a figure only re-runs the figure code. Commands run one at a
+time (scripts share ``sys.argv``, the working directory and stdout);
+``status`` lists the cached inputs and ``clear`` drops them.
+
+The daemon listens on a Unix socket (``reports/report_daemon.sock`` by
+default). Where Unix sockets are unavailable (Windows) it listens on
+``127.0.0.1:--port`` instead, which any local user can reach.
+
+Usage:
+    python scripts/report_daemon.py serve &
+    python scripts/report_daemon.py run build_case_visuals.py --json extracted_text_full/28b_merged/28B_merged.json
+    python scripts/report_daemon.py status
+    python scripts/report_daemon.py stop
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from types import ModuleType
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+SCRIPTS_DIR = ROOT / "scripts"
+DEFAULT_SOCKET = ROOT / "reports" / "report_daemon.sock"
+DEFAULT_PORT = 8765
+# Modules holding the daemon's own state; reloading them would drop it.
+NO_RELOAD = {"scripts.report_daemon", "scripts.warm_cache", "scripts.instrumentation"}
+HAS_UNIX_SOCKETS = hasattr(socket, "AF_UNIX")
+
+
+def _send(wfile: io.BufferedIOBase, message: dict) -> None:
+    wfile.write(json.dumps(message).encode("utf-8") + b"\n")
+    wfile.flush()
+
+
+class _StreamWriter(io.TextIOBase):
+    """File-like object forwarding a command's stdout or stderr to the client."""
+
+    def __init__(self, wfile: io.BufferedIOBase, name: str) -> None:
+        self.wfile = wfile
+        self.name = name
+        self.connected = True
+
+    @property
+    def encoding(self) -> str:
+        return "utf-8"
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        if text and self.connected:
+            try:
+                _send(self.wfile, {"stream": self.name, "data": text})
+            except OSError:
+                # The client went away; let the command finish quietly.
+                self.connected = False
+        return len(text)
+
+
+class ScriptRunner:
+    """Imports scripts once and runs their ``main()`` in this process, one at a time."""
+
+    def __init__(self) -> None:
+        self.started_unix = time.time()
+        self.commands = 0
+        self.failures = 0
+        self._stamps: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, script: str) -> str:
+        name = Path(script).name
+        name = name[:-3] if name.endswith(".py") else name
+        module = f"scripts.{name}"
+        if module in NO_RELOAD or not (SCRIPTS_DIR / f"{name}.py").is_file():
+            raise ValueError(f"Unknown script: {script}")
+        return module
+
+    def _script_modules(self) -> List[ModuleType]:
+        return [
+            module
+            for name, module in list(sys.modules.items())
+            if name.startswith("scripts.") and name not in NO_RELOAD and getattr(module, "__file__", None)
+        ]
+
+    def _refresh(self, name: str) -> ModuleType:
+        """Import ``name``, reloading edited ``scripts.*`` modules (and ``name`` if any were)."""
+
+        reloaded = set()
+        for module in self._script_modules():
+            stamp = Path(module.__file__).stat().st_mtime_ns
+            if self._stamps.get(module.__name__, stamp) != stamp:
+                importlib.reload(module)
+                reloaded.add(module.__name__)
+        module = importlib.import_module(name)
+        if reloaded and name not in reloaded:
+            module = importlib.reload(module)
+        for loaded in self._script_modules():
+            self._stamps[loaded.__name__] = Path(loaded.__file__).stat().st_mtime_ns
+        if not callable(getattr(module, "main", None)):
+            raise ValueError(f"{name} has no main()")
+        return module
+
+    def run(self, script: str, argv: List[str], cwd: str, out: _StreamWriter, err: _StreamWriter) -> int:
+        with self._lock:
+            code = self._run(script, argv, cwd, out, err)
+            self.commands += 1
+            self.failures += int(code != 0)
+        return code
+
+    def _run(self, script: str, argv: List[str], cwd: str, out: _StreamWriter, err: _StreamWriter) -> int:
+        previous_argv, previous_cwd = sys.argv, os.getcwd()
+        code = 1
+        with redirect_stdout(out), redirect_stderr(err):
+            try:
+                module = self._refresh(self.resolve(script))
+            except ValueError as exc:
+                print(f"error: {exc}", file=sys.stderr)
+                return 2
+            except Exception:
+                # E.g. a syntax error in a script edited since the last command.
+                traceback.print_exc()
+                return 1
+            try:
+                sys.argv = [module.__file__, *argv]
+                os.chdir(cwd)
+                module.main()
+                code = 0
+            except SystemExit as exc:
+                if isinstance(exc.code, int) or exc.code is None:
+                    code = exc.code or 0
+                else:
+                    print(exc.code, file=sys.stderr)
+            except Exception:
+                traceback.print_exc()
+            finally:
+                sys.argv = previous_argv
+                os.chdir(previous_cwd)
+                plt = sys.modules.get("matplotlib.pyplot")
+                if plt is not None:
+                    plt.close("all")
+        return code
+
+    def status(self) -> dict:
+        from scripts import warm_cache
+
+        return {
+            "pid": os.getpid(),
+            "uptime_seconds": round(time.time() - self.started_unix, 1),
+            "commands": self.commands,
+            "failures": self.failures,
+            "cache": warm_cache.entries(),
+        }
+
+
+def _handler(runner: ScriptRunner) -> type:
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            try:
+                request = json.loads(self.rfile.readline() or b"{}")
+            except ValueError:
+                _send(self.wfile, {"error": "malformed request"})
+                return
+            command = request.get("command")
+            if command == "run":
+                started = time.perf_counter()
+                code = runner.run(
+                    request.get("script", ""),
+                    [str(arg) for arg in request.get("argv", [])],
+                    request.get("cwd") or os.getcwd(),
+                    _StreamWriter(self.wfile, "stdout"),
+                    _StreamWriter(self.wfile, "stderr"),
+                )
+                try:
+                    _send(self.wfile, {"exit": code, "seconds": round(time.perf_counter() - started, 3)})
+                except OSError:
+                    pass
+            elif command == "status":
+                _send(self.wfile, runner.status())
+            elif command == "clear":
+                from scripts import warm_cache
+
+                _send(self.wfile, {"cleared": warm_cache.clear()})
+            elif command == "stop":
+                _send(self.wfile, {"stopping": True})
+                # shutdown() waits for serve_forever(), which is running this handler.
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+            else:
+                _send(self.wfile, {"error": f"unknown command: {command!r}"})
+
+    return Handler
+
+
+def _connect(socket_path: Path, port: int) -> socket.socket:
+    if HAS_UNIX_SOCKETS:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(str(socket_path))
+        return client
+    return socket.create_connection(("127.0.0.1", port))
+
+
+def _request(socket_path: Path, port: int, message: dict) -> Tuple[socket.socket, io.BufferedReader]:
+    client = _connect(socket_path, port)
+    client.sendall(json.dumps(message).encode("utf-8") + b"\n")
+    return client, client.makefile("rb")
+
+
+def make_server(socket_path: Path, port: int, runner: ScriptRunner) -> socketserver.BaseServer:
+    handler = _handler(runner)
+    if not HAS_UNIX_SOCKETS:
+        server: socketserver.BaseServer = socketserver.ThreadingTCPServer(("127.0.0.1", port), handler)
+    else:
+        if socket_path.exists():
+            try:
+                _connect(socket_path, port).close()
+            except OSError:
+                socket_path.unlink()  # Left behind by a daemon that died.
+            else:
+                raise SystemExit(f"A report daemon is already listening on {socket_path}")
+        socket_path.parent.mkdir(parents=True, exist_ok=True)
+        server = socketserver.ThreadingUnixStreamServer(str(socket_path), handler)
+        os.chmod(socket_path, 0o600)
+    # Status and stop requests are answered while a command runs.
+    server.daemon_threads = True
+    return server
+
+
+def serve(socket_path: Path, port: int) -> None:
+    from scripts import warm_cache
+
+    warm_cache.enable()
+    server = make_server(socket_path, port, ScriptRunner())
+    address = socket_path if HAS_UNIX_SOCKETS else f"127.0.0.1:{port}"
+    print(f"Report daemon {os.getpid()} listening on {address}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if HAS_UNIX_SOCKETS and socket_path.exists():
+            socket_path.unlink()
+    print("Report daemon stopped.")
+
+
+def run(socket_path: Path, port: int, script: str, argv: List[str]) -> int:
+    message = {"command": "run", "script": script, "argv": argv, "cwd": os.getcwd()}
+    client, reader = _request(socket_path, port, message)
+    with client, reader:
+        for line in reader:
+            reply = json.loads(line)
+            if "stream" in reply:
+                stream = sys.stdout if reply["stream"] == "stdout" else sys.stderr
+                stream.write(reply["data"])
+                stream.flush()
+            elif "exit" in reply:
+                return int(reply["exit"])
+            elif "error" in reply:
+                print(reply["error"], file=sys.stderr)
+                return 2
+    print("Report daemon closed the connection before the command finished.", file=sys.stderr)
+    return 1
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run report scripts in a resident process with warm inputs.")
+    parser.add_argument(
+        "--socket",
+        type=Path,
+        default=DEFAULT_SOCKET,
+        help="Unix socket the daemon listens on.",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help="Local TCP port, used instead of the socket where Unix sockets are unavailable.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("serve", help="Start the daemon in the foreground.")
+    run_parser = commands.add_parser("run", help="Run a script in the daemon.")
+    run_parser.add_argument("script", help="Script under scripts/, e.g. build_case_visuals.py.")
+    run_parser.add_argument("args", nargs=argparse.REMAINDER, help="Arguments for the script.")
+    commands.add_parser("status", help="Show uptime, command counts and cached inputs.")
+    commands.add_parser("clear", help="Drop every cached input.")
+    commands.add_parser("stop", help="Stop the daemon.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    socket_path = args.socket.expanduser().resolve()
+    if args.command == "serve":
+        serve(socket_path, args.port)
+        return
+    try:
+        if args.command == "run":
+            sys.exit(run(socket_path, args.port, args.script, args.args))
+        client, reader = _request(socket_path, args.port, {"command": args.command})
+        with client, reader:
+            print(json.dumps(json.loads(reader.readline()), indent=2))
+    except (FileNotFoundError, ConnectionRefusedError):
+        target = socket_path if HAS_UNIX_SOCKETS else f"127.0.0.1:{args.port}"
+        sys.exit(f"No report daemon at {target}; start one with: python scripts/report_daemon.py serve")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+"""Time the pipeline stages against a synthetic corpus.
+
+A corpus from ``synthetic_corpus.py`` is generated (or reused from
+``--corpus-dir``) and each stage is timed ``--repeat`` times on it: PDF
+ingest, chunking, per-document vectorizing, per-filer store merge, BM25
+index build, keyword/semantic/hybrid top-k search, exhibit contradiction
+finding and the page-JSON report builders. Embeddings come from
+``StubEncoder``, a hashed bag-of-words encoder, so the timings measure the
+pipeline's own code rather than the model. Stages whose dependencies are
+not installed are recorded as skipped.
+
+Results are written as JSON (commit, scale, per-stage runs and median) to
+``reports/benchmarks/`` so two commits can be compared with ``--compare``.
+
+Usage:
+    python scripts/run_benchmarks.py --scale medium
+    python scripts/run_benchmarks.py --scale medium --compare reports/benchmarks/abc1234_medium.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence, Tuple
+from unittest import mock
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.synthetic_corpus import (  # noqa: E402
+    SyntheticCorpus,
+    add_scale_arguments,
+    load_or_generate_corpus,
+    scale_from_args,
+)
+
+BENCH_VERSION = 1
+STUB_DIM = 384
+TOP_K = 10
+MAX_CHARS = 2000
+OVERLAP = 200
+MIN_CHARS = 50
+QUERIES = [
+    "motion to recuse the presiding judge",
+    "order of referral associate judge",
+    "protective order without notice",
+    "child support arrears attorney general",
+    "hearing on temporary orders denied",
+    "affidavit of indigency statement of inability",
+    "notice of final trial setting",
+    "Tex. R. Civ. P. 18a recusal",
+    "order vacated on rehearing",
+    "no hearing was held",
+]
+TOKEN = re.compile(r"[a-z0-9]+")
+
+
+class StubEncoder:
+    """Deterministic hashed bag-of-words vectors with the SentenceTransformer API."""
+
+    def __init__(self, model_name: str = "", dim: int = STUB_DIM) -> None:
+        self.model_name = model_name
+        self.dim = dim
+
+    def encode(
+        self,
+        sentences: Sequence[str],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        normalize_embeddings: bool = False,
+        **_kwargs: object,
+    ) -> np.ndarray:
+        vectors = np.zeros((len(sentences), self.dim), dtype=np.float32)
+        for row, text in enumerate(sentences):
+            for token in TOKEN.findall(text.lower()):
+                vectors[row, zlib.crc32(token.encode("utf-8")) % self.dim] += 1.0
+        if normalize_embeddings:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors /= np.maximum(norms, 1e-12)
+        return vectors
+
+
+class BenchmarkSkipped(Exception):
+    """Raised by a stage that cannot run in this environment."""
+
+
+@dataclass
+class StageTiming:
+    name: str
+    runs: List[float] = field(default_factory=list)
+    items: int = 0
+    unit: str = ""
+    skipped: str = ""
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.runs) if self.runs else 0.0
+
+
+@dataclass
+class BenchContext:
+    corpus: SyntheticCorpus
+    work_dir: Path
+    state: Dict[str, object] = field(default_factory=dict)
+
+    def need(self, key: str, stage: str) -> object:
+        if key not in self.state:
+            raise BenchmarkSkipped(f"needs the {stage} stage")
+        return self.state[key]
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")
+
+
+def _bench_ingest(ctx: BenchContext) -> Tuple[int, str]:
+    from scripts.ingest_merged_case import ingest_file
+
+    result = ingest_file(ctx.corpus.merged_pdf, ctx.work_dir / "ingest")
+    ctx.state["merged_text"] = result.text_path.read_text(encoding="utf-8")
+    return result.page_count, "pages"
+
+
+def _bench_chunk(ctx: BenchContext) -> Tuple[int, str]:
+    try:
+        from scripts.vectorize_case_docs import _chunk_text
+    except ImportError as exc:
+        raise BenchmarkSkipped(str(exc)) from exc
+
+    text = ctx.state.get("merged_text") or ctx.corpus.merged_text.read_text(encoding="utf-8")
+    chunks = _chunk_text(str(text), max_chars=MAX_CHARS, overlap=OVERLAP, min_chars=MIN_CHARS)
+    return len(chunks), "chunks"
+
+
+def _bench_vectorize(ctx: BenchContext) -> Tuple[int, str]:
+    try:
+        from scripts import vectorize_case_docs
+    except ImportError as exc:
+        raise BenchmarkSkipped(str(exc)) from exc
+
+    sources: Dict[str, List[Path]] = {}
+    with mock.patch.object(vectorize_case_docs, "_load_model", StubEncoder):
+        for document in ctx.corpus.documents:
+            filer = _slug(document.filer)
+            store_dir = ctx.work_dir / "sources" / filer / _slug(document.pdf_path.stem)
+            vectorize_case_docs.vectorize_document(
+                document.pdf_path,
+                store_dir,
+                text_output_dir=ctx.work_dir / "text" / filer / store_dir.name,
+                base_name=store_dir.name,
+                model_name="stub",
+                max_chars=MAX_CHARS,
+                overlap=OVERLAP,
+                min_chars=MIN_CHARS,
+                batch_size=32,
+            )
+            sources.setdefault(filer, []).append(store_dir)
+    ctx.state["sources"] = sources
+    return len(ctx.corpus.documents), "documents"
+
+
+def _bench_merge(ctx: BenchContext) -> Tuple[int, str]:
+    sources = ctx.need("sources", "vectorize")
+    from scripts.vectorize_case_docs import merge_vector_stores
+
+    stores_root = ctx.work_dir / "stores"
+    for filer, store_paths in sources.items():
+        merge_vector_stores(store_paths, stores_root / filer)
+    all_paths = [path for paths in sources.values() for path in paths]
+    merge_vector_stores(all_paths, ctx.work_dir / "all_store")
+    ctx.state["stores_root"] = stores_root
+    return len(all_paths), "stores"
+
+
+def _bench_bm25(ctx: BenchContext) -> Tuple[int, str]:
+    from scripts.hybrid_search import HybridSearcher
+
+    stores_root = ctx.need("stores_root", "merge")
+    searcher = HybridSearcher.from_path(stores_root, encoder=StubEncoder(), rebuild_index=True)
+    ctx.state["searcher"] = searcher
+    return searcher.total_docs, "chunks"
+
+
+def _bench_search(mode: str) -> Callable[[BenchContext], Tuple[int, str]]:
+    def run(ctx: BenchContext) -> Tuple[int, str]:
+        searcher = ctx.need("searcher", "bm25_index")
+        search = getattr(searcher, mode)
+        for query in QUERIES:
+            search(query, TOP_K)
+        return len(QUERIES), "queries"
+
+    return run
+
+
+def _bench_contradictions(ctx: BenchContext) -> Tuple[int, str]:
+    from scripts.analyze_exhibit_evidence import _find_contradictions
+    from scripts.warm_cache import load_store
+
+    ctx.need("stores_root", "merge")
+    embeddings, records = load_store(ctx.work_dir / "all_store")
+    found = _find_contradictions(
+        embeddings, records, similarity_threshold=0.5, min_polarity_hits=1, top_k=6
+    )
+    ctx.state["contradictions"] = len(found)
+    return len(records), "chunks"
+
+
+def _bench_script(script: str, *args: str) -> Callable[[BenchContext], Tuple[int, str]]:
+    def run(ctx: BenchContext) -> Tuple[int, str]:
+        reports = ctx.work_dir / "reports"
+        reports.mkdir(parents=True, exist_ok=True)
+        argv = [a.format(json=ctx.corpus.merged_json, reports=reports) for a in args]
+        completed = subprocess.run(
+            [sys.executable, str(ROOT / "scripts" / script), *argv],
+            cwd=ctx.work_dir,
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"{script} failed:\n{completed.stderr[-2000:]}")
+        payload = json.loads(ctx.corpus.merged_json.read_text(encoding="utf-8"))
+        return payload["page_count"], "pages"
+
+    return run
+
+
+STAGES: Dict[str, Callable[[BenchContext], Tuple[int, str]]] = {
+    "ingest": _bench_ingest,
+    "chunk": _bench_chunk,
+    "vectorize": _bench_vectorize,
+    "merge": _bench_merge,
+    "bm25_index": _bench_bm25,
+    "search_keyword": _bench_search("keyword"),
+    "search_semantic": _bench_search("semantic"),
+    "search_hybrid": _bench_search("hybrid"),
+    "contradictions": _bench_contradictions,
+    "report_insights": _bench_script(
+        "advanced_case_insights.py", "--json", "{json}", "--output-dir", "{reports}"
+    ),
+    "report_memorandum": _bench_script(
+        "build_case_memorandum.py", "--json", "{json}", "--output", "{reports}/memo.md"
+    ),
+}
+
+
+def run_stage(name: str, ctx: BenchContext, repeat: int) -> StageTiming:
+    timing = StageTiming(name)
+    try:
+        for _ in range(max(1, repeat)):
+            started = time.perf_counter()
+            timing.items, timing.unit = STAGES[name](ctx)
+            timing.runs.append(time.perf_counter() - started)
+    except BenchmarkSkipped as exc:
+        timing.skipped = str(exc) or "skipped"
+        timing.runs = []
+    return timing
+
+
+def _git_commit() -> str:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        )
+    except OSError:
+        return "unknown"
+    return completed.stdout.strip() or "unknown"
+
+
+def build_result(
+    timings: List[StageTiming], corpus: SyntheticCorpus, *, repeat: int, generate_seconds: float
+) -> dict:
+    stages = {}
+    for timing in timings:
+        if timing.skipped:
+            stages[timing.name] = {"skipped": timing.skipped}
+            continue
+        stages[timing.name] = {
+            "median_seconds": round(timing.median, 6),
+            "runs": [round(run, 6) for run in timing.runs],
+            "items": timing.items,
+            "unit": timing.unit,
+            "items_per_second": round(timing.items / timing.median, 3) if timing.median else None,
+        }
+    return {
+        "version": BENCH_VERSION,
+        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": asdict(corpus.scale),
+        "seed": corpus.seed,
+        "repeat": repeat,
+        "generate_seconds": round(generate_seconds, 3),
+        "stages": stages,
+    }
+
+
+def compare_results(current: dict, baseline: dict) -> List[str]:
+    """Return one line per stage with the baseline/current median ratio."""
+
+    lines = [f"Compared with {baseline.get('commit', '?')} ({baseline.get('created_at', '?')}):"]
+    if baseline.get("scale") != current.get("scale"):
+        lines.append("  warning: corpus scales differ")
+    for name, stage in current["stages"].items():
+        before = baseline.get("stages", {}).get(name, {})
+        now = stage.get("median_seconds")
+        then = before.get("median_seconds")
+        if not now or not then:
+            continue
+        lines.append(f"  {name:<18} {then:9.4f}s -> {now:9.4f}s  ({then / now:5.2f}x)")
+    return lines
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages on a synthetic corpus.")
+    add_scale_arguments(parser)
+    parser.add_argument(
+        "--corpus-dir",
+        type=Path,
+        default=None,
+        help="Keep the corpus here and reuse it when scale and seed match (default: temp dir).",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage.")
+    parser.add_argument(
+        "--stages",
+        nargs="*",
+        choices=sorted(STAGES),
+        default=None,
+        help="Run only these stages (default: all, in pipeline order).",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Result JSON (default: reports/benchmarks/<commit>_<scale>.json).",
+    )
+    parser.add_argument("--compare", type=Path, default=None, help="Earlier result JSON to compare with.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    scale = scale_from_args(args)
+    names = [name for name in STAGES if args.stages is None or name in args.stages]
+
+    with tempfile.TemporaryDirectory(prefix="bench_") as tmp:
+        corpus_dir = args.corpus_dir.expanduser().resolve() if args.corpus_dir else Path(tmp) / "corpus"
+        started = time.perf_counter()
+        corpus = load_or_generate_corpus(corpus_dir, scale, seed=args.seed)
+        generate_seconds = time.perf_counter() - started
+        print(f"Corpus ready in {generate_seconds:.1f}s: {len(corpus.documents)} documents -> {corpus_dir}")
+
+        ctx = BenchContext(corpus=corpus, work_dir=Path(tmp) / "work")
+        ctx.work_dir.mkdir(parents=True)
+        timings: List[StageTiming] = []
+        for name in names:
+            timing = run_stage(name, ctx, args.repeat)
+            timings.append(timing)
+            if timing.skipped:
+                print(f"- {name}: skipped ({timing.skipped})")
+            else:
+                print(f"- {name}: {timing.median:.4f}s median for {timing.items} {timing.unit}")
+
+    result = build_result(timings, corpus, repeat=args.repeat, generate_seconds=generate_seconds)
+    output = args.output or ROOT / "reports" / "benchmarks" / f"{result['commit']}_{args.scale}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    print(f"Results -> {output}")
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        for line in compare_results(result, baseline):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
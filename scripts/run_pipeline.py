@@ -0,0 +1,749 @@
+"""Run the case pipeline, rebuilding only stages whose inputs changed.
+
+Each stage declares the scripts it runs, the files or directories it reads
+and the ones it writes. A stage depends on every stage whose outputs overlap
+its inputs, and independent stages run side by side. After a stage succeeds
+the runner records a digest of its command, its inputs and the local
+``scripts`` modules those commands import in a build ledger
+(``reports/pipeline_ledger.json``). A later run skips the stage while that
+digest is unchanged and its outputs exist. File hashes are cached in the
+ledger by size and mtime, so a run where nothing changed only stats the
+inputs. With ``--metrics-dir`` every command also writes its stage timing
+report there, plus a live Prometheus textfile while it runs (see
+``scripts/instrumentation.py``).
+
+Usage:
+    python scripts/run_pipeline.py
+    python scripts/run_pipeline.py --dry-run
+    python scripts/run_pipeline.py --stage filer_visuals --force
+    python scripts/run_pipeline.py --metrics-dir reports/metrics
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+LEDGER_VERSION = 1
+DEFAULT_LEDGER = Path("reports/pipeline_ledger.json")
+DEFAULT_LOG_DIR = Path("reports/pipeline_logs")
+# Caches that scripts rebuild on their own; they never make a stage stale.
+IGNORED_NAMES = {"__pycache__", "bm25_index.npz", ".DS_Store"}
+IGNORED_SUFFIXES = (".pyc", ".tmp", ".partial")
+
+MERGED_JSON = "extracted_text_full/28b_merged/28B_merged.json"
+MERGED_TEXT = "extracted_text_full/28b_merged/28B_merged.txt"
+DOCKET_MAP = "reports/28b_docket_filer_map.csv"
+OCR_PAGE_CACHE = "extracted_text_full/ocr_page_cache.sqlite"
+
+STATUS_RAN = "ran"
+STATUS_SKIPPED = "up to date"
+STATUS_FAILED = "failed"
+STATUS_BLOCKED = "blocked"
+STATUS_STALE = "stale"
+
+
+@dataclass
+class Stage:
+    """One pipeline step.
+
+    ``commands`` are script invocations relative to the repository root,
+    run in order with the current interpreter. ``inputs`` must exist (or be
+    produced by another stage); ``optional`` inputs are hashed when present.
+    ``shared`` names files the stage updates in place alongside other
+    stages, such as a cache; stages sharing one never run at the same time.
+    """
+
+    name: str
+    commands: List[List[str]]
+    inputs: List[str]
+    outputs: List[str]
+    optional: List[str] = field(default_factory=list)
+    shared: List[str] = field(default_factory=list)
+
+
+@dataclass
+class StageResult:
+    name: str
+    status: str
+    reason: str = ""
+    seconds: float = 0.0
+
+
+STAGES: List[Stage] = [
+    Stage(
+        name="ingest_28b",
+        commands=[
+            [
+                "scripts/ingest_merged_case.py",
+                "--input",
+                "CASE DOCS/28B_merged.pdf",
+                "--output",
+                "extracted_text_full/28b_merged",
+            ]
+        ],
+        inputs=["CASE DOCS/28B_merged.pdf"],
+        outputs=[MERGED_JSON, MERGED_TEXT],
+    ),
+    Stage(
+        name="vectorize_28b",
+        commands=[["scripts/vectorize_case_docs.py", "--input", MERGED_TEXT, "--output", "vector_store_28b"]],
+        inputs=[MERGED_TEXT],
+        outputs=["vector_store_28b/embeddings.npy", "vector_store_28b/metadata.jsonl"],
+    ),
+    Stage(
+        name="case_docs_by_filer",
+        commands=[
+            ["scripts/vectorize_case_docs_by_filer.py", "--no-merge"],
+            ["scripts/ocr_case_docs_by_filer.py"],
+            ["scripts/vectorize_case_docs_by_filer.py", "--use-ocr", "--rebuild-empty"],
+        ],
+        inputs=["CASE DOCS"],
+        outputs=[
+            "vector_store_case_docs_by_filer_sources",
+            "extracted_text_full/case_docs_by_filer",
+            "vector_store_case_docs_by_filer",
+        ],
+        shared=[OCR_PAGE_CACHE],
+    ),
+    Stage(
+        name="inconsistencies",
+        commands=[
+            ["scripts/ocr_inconsistency_exhibits.py"],
+            ["scripts/vectorize_inconsistencies.py", "--use-ocr"],
+        ],
+        inputs=["INCONSISTENCIES"],
+        outputs=[
+            "extracted_text_full/inconsistencies",
+            "vector_store_inconsistencies_sources",
+            "vector_store_inconsistencies",
+        ],
+        shared=[OCR_PAGE_CACHE],
+    ),
+    Stage(
+        name="docket_map",
+        commands=[["scripts/build_docket_filer_map.py"]],
+        inputs=["CASE DOCKET", MERGED_JSON],
+        outputs=[
+            "reports/28b_docket_filer_ocr.csv",
+            DOCKET_MAP,
+            "reports/28b_docket_filer_conflicts.md",
+        ],
+    ),
+    Stage(
+        name="bookmark_map",
+        commands=[["scripts/build_bookmark_filer_map.py"]],
+        inputs=["CASE DOCS/28B.pdf", DOCKET_MAP],
+        outputs=[
+            "reports/28b_bookmark_index.csv",
+            "reports/28b_bookmark_documents.csv",
+            "reports/28b_bookmark_filer_summary.md",
+            "reports/28b_bookmark_filer_summary_leaf.md",
+        ],
+    ),
+    Stage(
+        name="provisional_filers",
+        commands=[["scripts/classify_case_docs.py"]],
+        inputs=["CASE DOCS"],
+        optional=[DOCKET_MAP],
+        outputs=["reports/case_docs_provisional_filers.csv"],
+    ),
+    Stage(
+        name="analyze_28b",
+        commands=[["scripts/analyze_vector_store.py", "--store", "vector_store_28b"]],
+        inputs=["vector_store_28b"],
+        outputs=[
+            "reports/28b_issue_evidence_matrix.md",
+            "reports/28b_timeline.md",
+            "reports/28b_citations.md",
+            "reports/28b_consistency_clusters.md",
+            "reports/28b_draft_scaffolds.md",
+            "vector_store_28b/citation_index.json",
+        ],
+    ),
+    Stage(
+        name="advanced_insights",
+        commands=[["scripts/advanced_case_insights.py", "--json", MERGED_JSON]],
+        inputs=[MERGED_JSON],
+        outputs=[
+            "reports/28b_advanced_insights.md",
+            "reports/28b_procedural_flags.md",
+            "reports/28b_motion_outcomes.md",
+            "reports/28b_actor_map.md",
+            "reports/28b_exhibit_index.md",
+            "reports/28b_correspondence_index.md",
+            "reports/28b_docket_entries.md",
+        ],
+    ),
+    Stage(
+        name="case_memorandum",
+        commands=[["scripts/build_case_memorandum.py", "--json", MERGED_JSON]],
+        inputs=[MERGED_JSON],
+        outputs=["reports/28b_case_memorandum.md"],
+    ),
+    Stage(
+        name="lawful_violations_map",
+        commands=[["scripts/build_lawful_violations_record_map.py"]],
+        inputs=["vector_store_28b/metadata.jsonl"],
+        outputs=["reports/28b_lawful_violations_record_map.md"],
+    ),
+    Stage(
+        name="party_action_map",
+        commands=[["scripts/build_party_action_map.py"]],
+        inputs=["vector_store_case_docs_by_filer", "reports/28b_party_action_names.txt"],
+        outputs=["reports/28b_party_actions.md"],
+    ),
+    Stage(
+        name="exhibit_evidence",
+        commands=[["scripts/analyze_exhibit_evidence.py"]],
+        inputs=["extracted_text_full/inconsistencies", "vector_store_inconsistencies"],
+        outputs=["reports/exhibit_evidence_review.md", "reports/exhibit_contradiction_pairs.csv"],
+    ),
+    Stage(
+        name="case_visuals",
+        commands=[["scripts/build_case_visuals.py", "--json", MERGED_JSON]],
+        inputs=[MERGED_JSON],
+        outputs=["reports/visuals"],
+    ),
+    Stage(
+        name="advanced_visuals",
+        commands=[["scripts/build_advanced_semantic_visuals.py", "--json", MERGED_JSON]],
+        inputs=[MERGED_JSON],
+        optional=["vector_store_research"],
+        outputs=["reports/visuals_advanced"],
+    ),
+    Stage(
+        name="filer_visuals",
+        commands=[
+            [
+                "scripts/build_filer_visuals.py",
+                "--json",
+                MERGED_JSON,
+                "--docket-filer-map",
+                DOCKET_MAP,
+            ]
+        ],
+        inputs=[MERGED_JSON, DOCKET_MAP],
+        optional=["vector_store_research"],
+        outputs=[
+            "reports/visuals_by_filer",
+            "reports/28b_filer_pages.csv",
+            "reports/28b_filer_docs.csv",
+            "reports/28b_filer_summary.md",
+        ],
+    ),
+    Stage(
+        name="filer_date_visuals",
+        commands=[["scripts/build_filer_date_visuals.py"]],
+        inputs=[MERGED_JSON, DOCKET_MAP],
+        outputs=[
+            "reports/visuals_by_filer_dates",
+            "reports/28b_filer_filing_dates.csv",
+            "reports/28b_filer_filing_dates_summary.md",
+        ],
+    ),
+    Stage(
+        name="expanded_visuals",
+        commands=[["scripts/build_expanded_visuals.py"]],
+        inputs=[MERGED_JSON, "vector_store_28b", DOCKET_MAP, "reports/28b_filer_pages.csv"],
+        outputs=["reports/visuals_expanded"],
+    ),
+    Stage(
+        name="citation_visuals",
+        commands=[["scripts/build_citation_visuals.py"]],
+        inputs=["reports/28b_citations.md"],
+        outputs=["reports/visuals_citations"],
+    ),
+    Stage(
+        name="exhibit_visuals",
+        commands=[["scripts/build_exhibit_evidence_visuals.py"]],
+        inputs=["extracted_text_full/inconsistencies"],
+        outputs=["reports/visuals_exhibits"],
+    ),
+    Stage(
+        name="inconsistency_visuals",
+        commands=[["scripts/build_inconsistency_visuals.py"]],
+        inputs=["vector_store_inconsistencies"],
+        outputs=[
+            "reports/visuals_inconsistencies",
+            "reports/inconsistencies_vector_search.md",
+            "reports/inconsistencies_narrative_shift.md",
+            "reports/inconsistencies_contradiction_edges.csv",
+        ],
+    ),
+]
+
+
+def _timestamp() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _overlaps(a: str, b: str) -> bool:
+    """True when one relative path is the other or lies inside it."""
+
+    parts_a = Path(a).parts
+    parts_b = Path(b).parts
+    size = min(len(parts_a), len(parts_b))
+    return parts_a[:size] == parts_b[:size]
+
+
+def _ignored(path: Path) -> bool:
+    return path.name in IGNORED_NAMES or path.name.endswith(IGNORED_SUFFIXES)
+
+
+def upstream_map(stages: Sequence[Stage], *, required: bool = False) -> Dict[str, Set[str]]:
+    """Return ``stage -> stages whose outputs overlap its inputs``.
+
+    With ``required`` only the required inputs are considered.
+    """
+
+    upstream: Dict[str, Set[str]] = {}
+    for stage in stages:
+        reads = stage.inputs if required else stage.inputs + stage.optional
+        upstream[stage.name] = {
+            other.name
+            for other in stages
+            if other.name != stage.name
+            and any(_overlaps(path, output) for path in reads for output in other.outputs)
+        }
+    _check_acyclic(upstream)
+    return upstream
+
+
+def _check_acyclic(upstream: Dict[str, Set[str]]) -> None:
+    done: Set[str] = set()
+    active: List[str] = []
+
+    def visit(name: str) -> None:
+        if name in done:
+            return
+        if name in active:
+            cycle = active[active.index(name) :] + [name]
+            raise ValueError(f"Pipeline stages form a cycle: {' -> '.join(cycle)}")
+        active.append(name)
+        for parent in sorted(upstream[name]):
+            visit(parent)
+        active.pop()
+        done.add(name)
+
+    for name in sorted(upstream):
+        visit(name)
+
+
+def select_stages(
+    stages: Sequence[Stage], names: Iterable[str] | None
+) -> List[Stage]:
+    """Return the named stages plus everything they depend on, in declared order."""
+
+    if not names:
+        return list(stages)
+    known = {stage.name for stage in stages}
+    wanted = list(names)
+    unknown = [name for name in wanted if name not in known]
+    if unknown:
+        raise ValueError(f"Unknown stage(s): {', '.join(unknown)} (known: {', '.join(sorted(known))})")
+    upstream = upstream_map(stages)
+    keep: Set[str] = set()
+    while wanted:
+        name = wanted.pop()
+        if name not in keep:
+            keep.add(name)
+            wanted.extend(upstream[name])
+    return [stage for stage in stages if stage.name in keep]
+
+
+def script_modules(script: Path, root: Path) -> List[Path]:
+    """Return ``script`` and the local ``scripts`` modules it imports, recursively."""
+
+    seen: Dict[Path, None] = {}
+    pending = [script]
+    while pending:
+        path = pending.pop()
+        if path in seen or not path.exists():
+            continue
+        seen[path] = None
+        tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+        for node in ast.walk(tree):
+            modules: List[str] = []
+            if isinstance(node, ast.ImportFrom) and node.module:
+                if node.module == "scripts":
+                    modules = [f"scripts.{alias.name}" for alias in node.names]
+                else:
+                    modules = [node.module]
+            elif isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            for module in modules:
+                if module.startswith("scripts."):
+                    pending.append(root / Path(*module.split(".")).with_suffix(".py"))
+    return sorted(seen)
+
+
+class FileHasher:
+    """SHA-1 of files, reused while a file's size and mtime are unchanged."""
+
+    def __init__(self, root: Path, known: Dict[str, List] | None = None) -> None:
+        self.root = root
+        self.known: Dict[str, List] = dict(known or {})
+        self._lock = threading.Lock()
+
+    def _file(self, path: Path) -> str:
+        rel = path.relative_to(self.root).as_posix()
+        stat = path.stat()
+        with self._lock:
+            entry = self.known.get(rel)
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return entry[2]
+        digest = hashlib.sha1()
+        with path.open("rb") as handle:
+            for block in iter(lambda: handle.read(1 << 20), b""):
+                digest.update(block)
+        value = digest.hexdigest()
+        with self._lock:
+            self.known[rel] = [stat.st_size, stat.st_mtime_ns, value]
+        return value
+
+    def tree(self, rel: str, exclude: Sequence[str] = ()) -> List[Tuple[str, str]]:
+        """Return ``(relative path, sha1)`` for a file or every file under a directory."""
+
+        path = self.root / rel
+        if path.is_file():
+            return [(rel, self._file(path))]
+        entries: List[Tuple[str, str]] = []
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames[:] = sorted(name for name in dirnames if name not in IGNORED_NAMES)
+            for name in sorted(filenames):
+                file_path = Path(dirpath) / name
+                file_rel = file_path.relative_to(self.root).as_posix()
+                if _ignored(file_path) or any(_overlaps(file_rel, skip) for skip in exclude):
+                    continue
+                entries.append((file_rel, self._file(file_path)))
+        return entries
+
+
+def stage_digest(stage: Stage, hasher: FileHasher) -> str:
+    """Digest of the stage's commands, inputs and the code those commands run."""
+
+    digest = hashlib.sha1(json.dumps(stage.commands).encode("utf-8"))
+    scripts: Dict[Path, None] = {}
+    for command in stage.commands:
+        for module in script_modules(hasher.root / command[0], hasher.root):
+            scripts[module] = None
+    paths = [module.relative_to(hasher.root).as_posix() for module in scripts]
+    paths += stage.inputs + stage.optional
+    for rel in paths:
+        if not (hasher.root / rel).exists():
+            digest.update(f"{rel}\0missing\n".encode("utf-8"))
+            continue
+        # A stage that writes inside its own input directory must not see
+        # its outputs as changed inputs on the next run.
+        for file_rel, file_hash in hasher.tree(rel, exclude=stage.outputs):
+            digest.update(f"{file_rel}\0{file_hash}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def read_ledger(path: Path) -> dict:
+    if not path.exists():
+        return {"version": LEDGER_VERSION, "stages": {}, "files": {}}
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    if payload.get("version") != LEDGER_VERSION:
+        return {"version": LEDGER_VERSION, "stages": {}, "files": {}}
+    return payload
+
+
+def save_ledger(ledger: dict, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(ledger, indent=2, sort_keys=True), encoding="utf-8")
+    tmp_path.replace(path)
+
+
+def _stale_reason(stage: Stage, digest: str, record: dict | None, root: Path) -> str:
+    if record is None:
+        return "never run"
+    missing = [output for output in stage.outputs if not (root / output).exists()]
+    if missing:
+        return f"missing output {missing[0]}"
+    if record.get("digest") != digest:
+        return "inputs changed"
+    return ""
+
+
+def _metrics_args(stage: Stage, index: int, metrics_dir: Path | None) -> List[str]:
+    if metrics_dir is None:
+        return []
+    name = stage.name if len(stage.commands) == 1 else f"{stage.name}_{index + 1}"
+    return [
+        "--metrics-out",
+        str(metrics_dir / f"{name}.json"),
+        "--metrics-textfile",
+        str(metrics_dir / f"{name}.prom"),
+    ]
+
+
+def _run_commands(
+    stage: Stage, root: Path, log_path: Path, metrics_dir: Path | None = None
+) -> Tuple[bool, float]:
+    started = time.perf_counter()
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with log_path.open("w", encoding="utf-8") as log:
+        for index, command in enumerate(stage.commands):
+            command = [*command, *_metrics_args(stage, index, metrics_dir)]
+            log.write(f"$ python {' '.join(command)}\n")
+            log.flush()
+            completed = subprocess.run(
+                [sys.executable, *command],
+                cwd=root,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+            )
+            if completed.returncode != 0:
+                log.write(f"exit status {completed.returncode}\n")
+                return False, time.perf_counter() - started
+    return True, time.perf_counter() - started
+
+
+def _evaluate(
+    stage: Stage,
+    *,
+    root: Path,
+    hasher: FileHasher,
+    record: dict | None,
+    force: bool,
+    dry_run: bool,
+    log_dir: Path,
+    metrics_dir: Path | None,
+) -> StageResult:
+    """Hash a ready stage and run it when stale."""
+
+    digest = stage_digest(stage, hasher)
+    reason = "forced" if force else _stale_reason(stage, digest, record, root)
+    if not reason:
+        return StageResult(stage.name, STATUS_SKIPPED)
+    if dry_run:
+        return StageResult(stage.name, STATUS_STALE, reason)
+    ok, seconds = _run_commands(stage, root, log_dir / f"{stage.name}.log", metrics_dir)
+    status = STATUS_RAN if ok else STATUS_FAILED
+    return StageResult(stage.name, status, reason, seconds)
+
+
+def run_pipeline(
+    stages: Sequence[Stage],
+    *,
+    root: Path,
+    ledger_path: Path,
+    log_dir: Path,
+    jobs: int = 1,
+    force: Iterable[str] = (),
+    dry_run: bool = False,
+    metrics_dir: Path | None = None,
+) -> List[StageResult]:
+    """Run stale stages in dependency order, up to ``jobs`` at a time.
+
+    A stage waits while a running stage holds one of its ``shared`` files.
+    Stages named in ``force`` run even when up to date. A stage whose
+    required input is missing and not produced by another stage is
+    ``blocked``, as is every stage that needs the outputs of a blocked or
+    failed stage; stages that only list them as optional still run.
+    With ``dry_run`` nothing is executed and stages that would run are
+    reported ``stale``; their dependents are reported from the current tree.
+    ``metrics_dir`` passes ``--metrics-out``/``--metrics-textfile`` to every
+    command it runs.
+    """
+
+    upstream = upstream_map(stages)
+    needs = upstream_map(stages, required=True)
+    produced = [output for stage in stages for output in stage.outputs]
+    by_name = {stage.name: stage for stage in stages}
+    forced = set(force)
+    ledger = read_ledger(ledger_path)
+    hasher = FileHasher(root, ledger.get("files"))
+    results: Dict[str, StageResult] = {}
+    pending = [stage.name for stage in stages]
+    running: Dict[Future, str] = {}
+
+    def ready(name: str) -> bool:
+        if not all(parent in results for parent in upstream[name]):
+            return False
+        held = {path for other in running.values() for path in by_name[other].shared}
+        return not held.intersection(by_name[name].shared)
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while pending or running:
+            for name in list(pending):
+                # Checked one at a time: a stage started in this pass may hold a shared file.
+                if not ready(name):
+                    continue
+                pending.remove(name)
+                stage = by_name[name]
+                failed = [
+                    parent
+                    for parent in sorted(needs[name])
+                    if results[parent].status in (STATUS_FAILED, STATUS_BLOCKED)
+                ]
+                if failed:
+                    reason = f"upstream {failed[0]} {results[failed[0]].status}"
+                    results[name] = StageResult(name, STATUS_BLOCKED, reason)
+                    continue
+                missing = [
+                    path
+                    for path in stage.inputs
+                    if not (root / path).exists()
+                    and not (dry_run and any(_overlaps(path, output) for output in produced))
+                ]
+                if missing:
+                    results[name] = StageResult(name, STATUS_BLOCKED, f"missing input {missing[0]}")
+                    continue
+                future = pool.submit(
+                    _evaluate,
+                    stage,
+                    root=root,
+                    hasher=hasher,
+                    record=ledger["stages"].get(name),
+                    force=name in forced,
+                    dry_run=dry_run,
+                    log_dir=log_dir,
+                    metrics_dir=metrics_dir,
+                )
+                running[future] = name
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                result = future.result()
+                results[name] = result
+                _report(result, log_dir)
+                if result.status == STATUS_RAN:
+                    # Record the inputs as the stage left them, so a script that
+                    # touches its own inputs does not look stale next time.
+                    ledger["stages"][name] = {
+                        "digest": stage_digest(by_name[name], hasher),
+                        "finished": _timestamp(),
+                        "seconds": round(result.seconds, 2),
+                    }
+                    ledger["files"] = hasher.known
+                    save_ledger(ledger, ledger_path)
+    if not dry_run:
+        ledger["files"] = {rel: entry for rel, entry in hasher.known.items() if (root / rel).exists()}
+        save_ledger(ledger, ledger_path)
+    ordered = [results[stage.name] for stage in stages]
+    for result in ordered:
+        if result.status == STATUS_BLOCKED:
+            _report(result, log_dir)
+    return ordered
+
+
+def _report(result: StageResult, log_dir: Path) -> None:
+    if result.status == STATUS_RAN:
+        print(f"[{result.name}] ran in {result.seconds:.1f}s ({result.reason})")
+    elif result.status == STATUS_FAILED:
+        print(f"[{result.name}] FAILED after {result.seconds:.1f}s; see {log_dir / (result.name + '.log')}")
+    elif result.status == STATUS_STALE:
+        print(f"[{result.name}] would run ({result.reason})")
+    elif result.status == STATUS_BLOCKED:
+        print(f"[{result.name}] blocked: {result.reason}")
+    else:
+        print(f"[{result.name}] up to date")
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the case pipeline, rebuilding only stale stages.")
+    parser.add_argument(
+        "--stage",
+        nargs="*",
+        default=None,
+        help="Run only these stages (and the stages they depend on).",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-run the selected --stage names (or every stage) even if up to date.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Maximum stages run at the same time.",
+    )
+    parser.add_argument(
+        "--ledger",
+        type=Path,
+        default=DEFAULT_LEDGER,
+        help="Build ledger with stage digests and cached file hashes.",
+    )
+    parser.add_argument(
+        "--log-dir",
+        type=Path,
+        default=DEFAULT_LOG_DIR,
+        help="Directory for per-stage output logs.",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Report which stages are stale without running anything.",
+    )
+    parser.add_argument(
+        "--metrics-dir",
+        type=Path,
+        default=None,
+        help="Have every stage write its timing report (<stage>.json) and live metrics (<stage>.prom) here.",
+    )
+    parser.add_argument(
+        "--list",
+        action="store_true",
+        help="List the stages with their dependencies and exit.",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    stages = select_stages(STAGES, args.stage)
+    if args.list:
+        upstream = upstream_map(STAGES)
+        for stage in stages:
+            after = ", ".join(sorted(upstream[stage.name])) or "-"
+            shared = f"; not alongside other users of {', '.join(stage.shared)}" if stage.shared else ""
+            print(f"{stage.name}: after {after}{shared}")
+        return
+
+    if args.force:
+        force = args.stage or [stage.name for stage in stages]
+    else:
+        force = []
+    started = time.perf_counter()
+    results = run_pipeline(
+        stages,
+        root=ROOT,
+        ledger_path=(ROOT / args.ledger).resolve(),
+        log_dir=(ROOT / args.log_dir).resolve(),
+        jobs=args.jobs,
+        force=force,
+        dry_run=args.dry_run,
+        metrics_dir=(ROOT / args.metrics_dir).resolve() if args.metrics_dir else None,
+    )
+    elapsed = time.perf_counter() - started
+    counts: Dict[str, int] = {}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+    print(f"Pipeline finished in {elapsed:.1f}s: {summary}")
+    if counts.get(STATUS_FAILED):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
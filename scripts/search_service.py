@@ -0,0 +1,342 @@
+"""Local HTTP search service over one or more vector stores.
+
+The service loads the stores (see ``hybrid_search.discover_stores``) and
+the sentence-transformer model once. Queries that arrive within
+``--batch-wait-ms`` of each other are coalesced: their texts are encoded in
+one encoder call, and every embedding block is multiplied with all of their
+vectors at once (``HybridSearcher.semantic_batch``). Several analysts
+querying together therefore share one model and one pass over the stores.
+
+Endpoints:
+    GET  /search?q=motion+to+recuse&k=10&filer=associate_judge&source=recusal
+    POST /search  {"query": "...", "top_k": 10, "filers": ["..."], "source": "...", "mode": "hybrid"}
+    GET  /health
+
+``filer`` may be repeated and names store directories (filers); ``source``
+keeps chunks whose ``source_pdf`` contains it. ``mode=hybrid`` fuses the
+semantic ranking with BM25. Hits carry ``source_pdf``, ``page``, the chunk
+position and a snippet.
+
+Usage:
+    python scripts/search_service.py --store vector_store_case_docs_by_filer --port 8750
+    curl 'http://127.0.0.1:8750/search?q=motion+to+recuse&k=5'
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.hybrid_search import (  # noqa: E402
+    HybridSearcher,
+    SearchHit,
+    _normalize_ascii,
+    _snippet,
+    fuse_rankings,
+)
+from scripts.instrumentation import add_metrics_arguments, get_metrics, metrics_from_args  # noqa: E402
+from scripts.warm_cache import load_sentence_model  # noqa: E402
+
+MODES = ("semantic", "hybrid")
+MAX_TOP_K = 100
+
+
+@dataclass
+class SearchRequest:
+    query: str
+    top_k: int = 10
+    filers: List[str] | None = None
+    source: str | None = None
+    mode: str = "semantic"
+    rrf_k: int = 60
+    received: float = field(default_factory=time.perf_counter)
+    result: Future = field(default_factory=Future)
+
+
+class QueryBatcher:
+    """Collects concurrent requests and answers them with one encode and one scan."""
+
+    def __init__(self, searcher: HybridSearcher, *, max_wait: float = 0.005, max_batch: int = 64) -> None:
+        self.searcher = searcher
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self.batches = 0
+        self.queries = 0
+        self._queue: queue.Queue[SearchRequest | None] = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="search-batcher", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def submit(self, request: SearchRequest) -> Future:
+        self._queue.put(request)
+        return request.result
+
+    def _collect(self, first: SearchRequest) -> Tuple[List[SearchRequest], bool]:
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch, stopping = self._collect(first)
+            try:
+                results = self._search(batch)
+            except Exception as exc:  # Reported to every waiting request.
+                for request in batch:
+                    request.result.set_exception(exc)
+                continue
+            for request, hits in zip(batch, results):
+                request.result.set_result(hits)
+
+    def _search(self, batch: List[SearchRequest]) -> List[List[SearchHit]]:
+        metrics = get_metrics()
+        self.batches += 1
+        self.queries += len(batch)
+        metrics.count("batches")
+        metrics.count("queries", len(batch))
+        metrics.gauge("last_batch_size", len(batch))
+        with metrics.stage("encode"):
+            vectors = self.searcher.encode([request.query for request in batch])
+        depths = [
+            max(request.top_k * 4, 50) if request.mode == "hybrid" else request.top_k for request in batch
+        ]
+        with metrics.stage("scan"):
+            semantic = self.searcher.semantic_batch(
+                vectors,
+                depths,
+                filers=[request.filers for request in batch],
+                sources=[request.source for request in batch],
+            )
+        results: List[List[SearchHit]] = []
+        for request, depth, hits in zip(batch, depths, semantic):
+            if request.mode == "hybrid":
+                keyword = self.searcher.keyword(request.query, depth, filers=request.filers, source=request.source)
+                hits = fuse_rankings(keyword, hits, top_k=request.top_k, rrf_k=request.rrf_k)
+            results.append(hits)
+        return results
+
+
+def hit_payload(rank: int, hit: SearchHit) -> dict:
+    record = hit.record
+    return {
+        "rank": rank,
+        "score": round(hit.score, 6),
+        "filer": hit.filer,
+        "source_pdf": _normalize_ascii(str(record.get("source_pdf", ""))),
+        "page": record.get("page"),
+        "chunk_index": record.get("chunk_index"),
+        "vector_id": record.get("vector_id"),
+        "bm25_rank": hit.bm25_rank,
+        "vector_rank": hit.vector_rank,
+        "snippet": _snippet(record.get("text", "")),
+    }
+
+
+def parse_request(params: dict) -> SearchRequest:
+    """Build a request from query-string lists or a JSON body; raise ValueError if invalid."""
+
+    def first(*names: str) -> object:
+        for name in names:
+            value = params.get(name)
+            if isinstance(value, list):
+                value = value[0] if value else None
+            if value not in (None, ""):
+                return value
+        return None
+
+    query = str(first("query", "q") or "").strip()
+    if not query:
+        raise ValueError("missing query")
+    top_k = int(first("top_k", "k") or 10)
+    if not 1 <= top_k <= MAX_TOP_K:
+        raise ValueError(f"top_k must be between 1 and {MAX_TOP_K}")
+    mode = str(first("mode") or "semantic")
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {', '.join(MODES)}")
+    filers = params.get("filers", params.get("filer"))
+    if isinstance(filers, str):
+        filers = [filers]
+    source = first("source")
+    return SearchRequest(
+        query=query,
+        top_k=top_k,
+        filers=[str(name) for name in filers] if filers else None,
+        source=str(source) if source is not None else None,
+        mode=mode,
+        rrf_k=int(first("rrf_k") or 60),
+    )
+
+
+def _handler(searcher: HybridSearcher, batcher: QueryBatcher, timeout: float) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status: int, payload: dict) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _search(self, params: dict) -> None:
+            try:
+                request = parse_request(params)
+            except ValueError as exc:
+                self._reply(400, {"error": str(exc)})
+                return
+            known = {name.lower() for name in searcher.filers}
+            unknown = sorted(name for name in request.filers or [] if name.lower() not in known)
+            if unknown:
+                self._reply(400, {"error": f"unknown filer(s): {', '.join(unknown)}"})
+                return
+            try:
+                hits = batcher.submit(request).result(timeout=timeout)
+            except Exception as exc:
+                self._reply(500, {"error": f"{type(exc).__name__}: {exc}"})
+                return
+            self._reply(
+                200,
+                {
+                    "query": request.query,
+                    "mode": request.mode,
+                    "took_ms": round((time.perf_counter() - request.received) * 1000.0, 2),
+                    "hits": [hit_payload(rank, hit) for rank, hit in enumerate(hits, start=1)],
+                },
+            )
+
+        def do_GET(self) -> None:  # noqa: N802 - http.server naming
+            url = urlsplit(self.path)
+            if url.path == "/search":
+                self._search(parse_qs(url.query))
+            elif url.path == "/health":
+                self._reply(
+                    200,
+                    {
+                        "stores": len(searcher.stores),
+                        "chunks": searcher.total_docs,
+                        "filers": searcher.filers,
+                        "queries": batcher.queries,
+                        "batches": batcher.batches,
+                    },
+                )
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self) -> None:  # noqa: N802 - http.server naming
+            if urlsplit(self.path).path != "/search":
+                self._reply(404, {"error": "not found"})
+                return
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                params = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._reply(400, {"error": "body must be JSON"})
+                return
+            if not isinstance(params, dict):
+                self._reply(400, {"error": "body must be a JSON object"})
+                return
+            self._search(params)
+
+        def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+            pass
+
+    return Handler
+
+
+def make_server(
+    searcher: HybridSearcher,
+    batcher: QueryBatcher,
+    *,
+    host: str = "127.0.0.1",
+    port: int = 8750,
+    timeout: float = 60.0,
+) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), _handler(searcher, batcher, timeout))
+    server.daemon_threads = True
+    return server
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve semantic search over vector stores on a local HTTP port.")
+    parser.add_argument(
+        "--store",
+        type=Path,
+        default=Path("vector_store_case_docs_by_filer"),
+        help="Store directory or root of per-filer stores.",
+    )
+    parser.add_argument(
+        "--model",
+        default="sentence-transformers/all-MiniLM-L6-v2",
+        help="SentenceTransformer model name (must match the stores).",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on.")
+    parser.add_argument("--port", type=int, default=8750, help="Port to listen on.")
+    parser.add_argument(
+        "--batch-wait-ms",
+        type=float,
+        default=5.0,
+        help="How long the first query of a batch waits for others to join it.",
+    )
+    parser.add_argument("--max-batch", type=int, default=64, help="Most queries encoded together.")
+    add_metrics_arguments(parser)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    metrics = metrics_from_args(args, "search_service")
+    with metrics.stage("load_model"):
+        encoder = load_sentence_model(args.model)
+    with metrics.stage("load"):
+        searcher = HybridSearcher.from_path(args.store, encoder=encoder)
+    metrics.count("chunks", searcher.total_docs)
+
+    batcher = QueryBatcher(searcher, max_wait=args.batch_wait_ms / 1000.0, max_batch=args.max_batch)
+    batcher.start()
+    server = make_server(searcher, batcher, host=args.host, port=args.port)
+    host, port = server.server_address[:2]
+    print(f"Searching {searcher.total_docs} chunks in {len(searcher.stores)} store(s)")
+    print(f"Serving http://{host}:{port}/search?q=...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.stop()
+        metrics.finish()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""Generate synthetic case corpora for benchmarks and tests.
+
+The corpus mirrors the layout the pipeline reads: filer folders of PDFs
+under ``CASE DOCS``, a merged PDF whose trailing pages are a docket sheet
+("ALL TRANSACTIONS FOR A CASE" followed by ``MM/DD/YYYY`` lines), and the
+page-level JSON/text that ``ingest_merged_case.py`` would write for it.
+Page text is built from a fixed vocabulary with cause and docket numbers,
+dates, exhibit references, rules, outcomes and polarity terms, so the
+analyses have something to find. Output depends only on the scale and the
+seed, which keeps benchmark runs comparable across commits.
+
+Usage:
+    python scripts/synthetic_corpus.py --output /tmp/corpus --scale medium
+    python scripts/synthetic_corpus.py --output /tmp/corpus --pages 2000 --documents 150
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import textwrap
+from dataclasses import asdict, dataclass, replace
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+CORPUS_VERSION = 1
+MANIFEST_FILENAME = "corpus.json"
+MERGED_NAME = "28B_merged"
+DOCKET_HEADER = "ALL TRANSACTIONS FOR A CASE"
+DOCKET_LINES_PER_PAGE = 40
+SENTENCES_PER_PAGE = 18
+LINE_WIDTH = 110
+LINE_HEIGHT = 4.2
+
+FILER_NAMES = [
+    "ASSOCIATE JUDGE",
+    "DISTRICT JUDGE",
+    "CHARLES DUSTIN MYERS",
+    "OFFICE OF THE ATTORNEY GENERAL",
+    "APPELLATE JUDGES",
+    "REGIONAL JUDGE",
+    "RODERICK D MARX",
+    "JUSTICE OF THE PEACE JUDGE",
+]
+DOCUMENT_TYPES = [
+    "PETITION FOR PROTECTIVE ORDER",
+    "MOTION TO RECUSE",
+    "EXHIBIT {exhibit}",
+    "ORDER ON TEMPORARY ORDERS",
+    "ORIGINAL PETITION FOR DIVORCE",
+    "RESPONSE TO MOTION",
+    "NOTICE OF HEARING",
+    "STATEMENT OF INABILITY TO AFFORD COSTS",
+]
+PARTIES = [
+    "Petitioner",
+    "Respondent",
+    "the Associate Judge",
+    "the District Clerk",
+    "the Office of the Attorney General",
+    "Counsel for Petitioner",
+    "the Court Coordinator",
+]
+ACTIONS = [
+    "filed a motion to recuse the presiding judge",
+    "requested a hearing on temporary orders",
+    "served notice of the final trial setting",
+    "objected to the order of referral",
+    "moved to compel discovery responses",
+    "sought a protective order without notice",
+    "asked the court to reconsider child support arrears",
+    "submitted an affidavit of indigency",
+]
+OUTCOMES = [
+    "The motion was granted.",
+    "The motion was denied.",
+    "The court finds the request was not timely.",
+    "The request was dismissed for want of prosecution.",
+    "The objection was overruled.",
+    "The court concludes that notice was never provided.",
+    "It is ordered that the hearing be reset.",
+    "The order was vacated on rehearing.",
+]
+RULES = [
+    "Tex. R. Civ. P. 18a",
+    "Tex. R. Civ. P. 91",
+    "Tex. R. App. P. 52.3",
+    "Tex. Fam. Code sec. 201.005",
+    "Tex. Gov. Code sec. 74.053",
+    "42 U.S.C. sec. 1983",
+]
+DOCKET_EVENTS = [
+    "MOTION TO RECUSE Filed by Respondent",
+    "ORDER OF REFERRAL Signed",
+    "NOTICE OF HEARING Issued",
+    "TEMPORARY ORDERS Signed",
+    "PETITION FOR PROTECTIVE ORDER Filed by Petitioner",
+    "RESPONSE Filed by Respondent",
+    "ASSOCIATE JUDGE'S REPORT Filed",
+    "NOTICE OF APPEAL Filed",
+]
+
+
+@dataclass
+class CorpusScale:
+    """How much of each kind of content to generate."""
+
+    pages: int
+    documents: int
+    filers: int
+    docket_lines: int
+    dates: int
+    exhibits: int
+
+
+SCALES: Dict[str, CorpusScale] = {
+    "small": CorpusScale(pages=60, documents=12, filers=4, docket_lines=80, dates=40, exhibits=10),
+    "medium": CorpusScale(pages=600, documents=80, filers=8, docket_lines=600, dates=200, exhibits=60),
+    "large": CorpusScale(pages=4800, documents=400, filers=8, docket_lines=3000, dates=800, exhibits=300),
+}
+
+
+@dataclass
+class SyntheticDocument:
+    filer: str
+    title: str
+    pdf_path: Path
+    pages: List[str]
+
+
+@dataclass
+class SyntheticCorpus:
+    root: Path
+    scale: CorpusScale
+    seed: int
+    documents: List[SyntheticDocument]
+    merged_pdf: Path
+    merged_json: Path
+    merged_text: Path
+
+    @property
+    def case_docs(self) -> Path:
+        return self.root / "CASE DOCS"
+
+
+def _format_date(day: date, style: int) -> str:
+    if style == 0:
+        return f"{day.strftime('%B')} {day.day}, {day.year}"
+    return day.strftime("%m/%d/%Y")
+
+
+def _date_pool(rng: random.Random, count: int) -> List[date]:
+    start = date(2022, 1, 3)
+    span = (date(2025, 12, 31) - start).days
+    return sorted(start + timedelta(days=rng.randrange(span)) for _ in range(max(1, count)))
+
+
+def _sentence(rng: random.Random, dates: List[date], exhibits: List[str]) -> str:
+    kind = rng.randrange(5)
+    when = _format_date(rng.choice(dates), rng.randrange(2))
+    if kind == 0:
+        return f"On {when}, {rng.choice(PARTIES)} {rng.choice(ACTIONS)}."
+    if kind == 1:
+        return f"{rng.choice(OUTCOMES)} See {rng.choice(exhibits)} and {rng.choice(RULES)}."
+    if kind == 2:
+        return (
+            f"Cause No. 322-7{rng.randrange(10000, 99999)}-23 was set for hearing on {when} "
+            f"under appeal No. 02-2{rng.randrange(4, 6)}-00{rng.randrange(100, 999)}-CV."
+        )
+    if kind == 3:
+        party = rng.choice(PARTIES)
+        return f"{party[0].upper()}{party[1:]} did not receive notice and no hearing was held before {when}."
+    return f"As shown in {rng.choice(exhibits)}, {rng.choice(PARTIES).lower()} {rng.choice(ACTIONS)}."
+
+
+def _page_text(
+    rng: random.Random, title: str, page_number: int, dates: List[date], exhibits: List[str]
+) -> str:
+    lines = [f"{title} - Page {page_number}", "IN THE 322ND DISTRICT COURT OF TARRANT COUNTY, TEXAS"]
+    lines.extend(_sentence(rng, dates, exhibits) for _ in range(SENTENCES_PER_PAGE))
+    return "\n".join(lines)
+
+
+def _docket_pages(rng: random.Random, count: int, dates: List[date]) -> List[str]:
+    entries = [
+        f"{_format_date(rng.choice(dates), 1)} {rng.choice(DOCKET_EVENTS)}" for _ in range(count)
+    ]
+    pages: List[str] = []
+    for start in range(0, len(entries), DOCKET_LINES_PER_PAGE):
+        body = entries[start : start + DOCKET_LINES_PER_PAGE]
+        pages.append("\n".join([DOCKET_HEADER, "Date Filed Description", *body]))
+    return pages
+
+
+def _write_pdf(pages: List[str], path: Path) -> None:
+    from fpdf import FPDF
+
+    # Plain positioned text lines; multi_cell layout is several times slower.
+    pdf = FPDF(format="letter")
+    pdf.set_auto_page_break(False)
+    pdf.set_font("Helvetica", size=9)
+    for text in pages:
+        pdf.add_page()
+        y = 15.0
+        for line in text.splitlines():
+            for part in textwrap.wrap(line, LINE_WIDTH) or [""]:
+                pdf.text(12, y, part)
+                y += LINE_HEIGHT
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pdf.output(str(path))
+
+
+def _split_pages(rng: random.Random, total: int, documents: int) -> List[int]:
+    """Split ``total`` pages over ``documents`` documents, each getting at least one."""
+
+    counts = [1] * documents
+    for _ in range(total - documents):
+        counts[rng.randrange(documents)] += 1
+    return counts
+
+
+def generate_corpus(root: Path, scale: CorpusScale, *, seed: int = 0) -> SyntheticCorpus:
+    """Write a synthetic corpus under ``root`` and return its layout."""
+
+    rng = random.Random(seed)
+    dates = _date_pool(rng, scale.dates)
+    exhibits = [f"Exhibit {idx + 1}" for idx in range(max(1, scale.exhibits))]
+    filers = FILER_NAMES[: max(1, min(scale.filers, len(FILER_NAMES)))]
+    docket_pages = _docket_pages(rng, scale.docket_lines, dates)
+    documents_count = max(1, scale.documents)
+    body_pages = max(documents_count, scale.pages - len(docket_pages))
+
+    documents: List[SyntheticDocument] = []
+    for idx, page_count in enumerate(_split_pages(rng, body_pages, documents_count)):
+        filer = filers[idx % len(filers)]
+        title = DOCUMENT_TYPES[idx % len(DOCUMENT_TYPES)].format(exhibit=idx + 1)
+        pages = [
+            _page_text(rng, title, number + 1, dates, exhibits) for number in range(page_count)
+        ]
+        pdf_path = root / "CASE DOCS" / filer / f"{idx + 1:04d} {title}.pdf"
+        _write_pdf(pages, pdf_path)
+        documents.append(SyntheticDocument(filer, title, pdf_path, pages))
+
+    merged_pages = [page for document in documents for page in document.pages] + docket_pages
+    merged_pdf = root / "CASE DOCS" / f"{MERGED_NAME}.pdf"
+    _write_pdf(merged_pages, merged_pdf)
+
+    extract_dir = root / "extracted_text_full" / MERGED_NAME.lower()
+    extract_dir.mkdir(parents=True, exist_ok=True)
+    merged_json = extract_dir / f"{MERGED_NAME}.json"
+    merged_text = extract_dir / f"{MERGED_NAME}.txt"
+    merged_text.write_text("\n\n".join(merged_pages), encoding="utf-8")
+    payload = {
+        "source": str(merged_pdf),
+        "base_name": MERGED_NAME,
+        "page_count": len(merged_pages),
+        "pages": [
+            {"page_number": idx + 1, "text": text, "char_length": len(text)}
+            for idx, text in enumerate(merged_pages)
+        ],
+    }
+    merged_json.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+    manifest = {
+        "version": CORPUS_VERSION,
+        "seed": seed,
+        "scale": asdict(scale),
+        "documents": len(documents),
+        "pages": len(merged_pages),
+        "docket_pages": len(docket_pages),
+    }
+    (root / MANIFEST_FILENAME).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return SyntheticCorpus(root, scale, seed, documents, merged_pdf, merged_json, merged_text)
+
+
+def load_or_generate_corpus(root: Path, scale: CorpusScale, *, seed: int = 0) -> SyntheticCorpus:
+    """Reuse a corpus already generated under ``root`` with the same scale and seed."""
+
+    manifest_path = root / MANIFEST_FILENAME
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if (
+            manifest.get("version") == CORPUS_VERSION
+            and manifest.get("seed") == seed
+            and manifest.get("scale") == asdict(scale)
+        ):
+            return _read_corpus(root, scale, seed)
+    return generate_corpus(root, scale, seed=seed)
+
+
+def _read_corpus(root: Path, scale: CorpusScale, seed: int) -> SyntheticCorpus:
+    case_docs = root / "CASE DOCS"
+    documents = [
+        SyntheticDocument(pdf_path.parent.name, pdf_path.stem.split(" ", 1)[1], pdf_path, [])
+        for pdf_path in sorted(case_docs.glob("*/*.pdf"), key=lambda path: path.name)
+    ]
+    extract_dir = root / "extracted_text_full" / MERGED_NAME.lower()
+    return SyntheticCorpus(
+        root,
+        scale,
+        seed,
+        documents,
+        case_docs / f"{MERGED_NAME}.pdf",
+        extract_dir / f"{MERGED_NAME}.json",
+        extract_dir / f"{MERGED_NAME}.txt",
+    )
+
+
+def add_scale_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add ``--scale``, per-dimension overrides and ``--seed`` to ``parser``."""
+
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="Preset corpus size.")
+    for name in ("pages", "documents", "filers", "docket-lines", "dates", "exhibits"):
+        parser.add_argument(f"--{name}", type=int, default=None, help=f"Override the preset's {name}.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the corpus content.")
+
+
+def scale_from_args(args: argparse.Namespace) -> CorpusScale:
+    overrides = {
+        field_name: getattr(args, field_name)
+        for field_name in asdict(SCALES[args.scale])
+        if getattr(args, field_name) is not None
+    }
+    return replace(SCALES[args.scale], **overrides)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate a synthetic case corpus.")
+    parser.add_argument("--output", type=Path, required=True, help="Directory to write the corpus into.")
+    add_scale_arguments(parser)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    scale = scale_from_args(args)
+    corpus = generate_corpus(args.output.expanduser().resolve(), scale, seed=args.seed)
+    total_pages = json.loads((corpus.root / MANIFEST_FILENAME).read_text(encoding="utf-8"))["pages"]
+    print(
+        f"Generated {len(corpus.documents)} documents in {min(scale.filers, len(FILER_NAMES))} filer "
+        f"folders ({total_pages} merged pages) -> {corpus.root}"
+    )
+
+
+if __name__ == "__main__":
+    main()
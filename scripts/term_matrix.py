@@ -0,0 +1,122 @@
+"""Sparse page x term keyword counts shared by the visual builders.
+
+Keyword analytics in the visual scripts all reduce to "how many times does
+term T occur on page P" (``str.count`` semantics on the lowercased ASCII
+page text). ``build_term_matrix`` computes those counts once into CSR
+arrays; category scores, issue tags, dominant-issue flows and binned
+series are then plain NumPy operations over the matrix.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+
+
+@dataclass
+class TermMatrix:
+    """Page x term counts in CSR layout.
+
+    Row ``p`` holds ``counts[indptr[p]:indptr[p + 1]]`` for the term ids in
+    ``indices`` over the same range; absent terms are implicit zeros.
+    """
+
+    terms: List[str]
+    term_index: Dict[str, int]
+    indptr: np.ndarray
+    indices: np.ndarray
+    counts: np.ndarray
+
+    @property
+    def n_pages(self) -> int:
+        return len(self.indptr) - 1
+
+    def category_counts(self, categories: Dict[str, List[str]]) -> np.ndarray:
+        """Return a dense ``pages x categories`` array of summed keyword counts.
+
+        Each category score is the sum of its keywords' counts, so a keyword
+        listed twice counts twice, exactly like summing ``str.count`` calls.
+        """
+
+        weights = np.zeros((len(self.terms), len(categories)), dtype=np.int64)
+        for col, keywords in enumerate(categories.values()):
+            for keyword in keywords:
+                weights[self.term_index[keyword], col] += 1
+        result = np.zeros((self.n_pages, len(categories)), dtype=np.int64)
+        if len(self.indices):
+            rows = np.repeat(np.arange(self.n_pages), np.diff(self.indptr))
+            np.add.at(result, rows, self.counts[:, None] * weights[self.indices])
+        return result
+
+
+def build_term_matrix(texts: Sequence[str], terms: Iterable[str]) -> TermMatrix:
+    """Count every term in every (already lowercased) page text."""
+
+    vocab = list(dict.fromkeys(terms))
+    indptr = np.zeros(len(texts) + 1, dtype=np.int64)
+    indices: List[int] = []
+    counts: List[int] = []
+    for row, text in enumerate(texts):
+        for term_id, term in enumerate(vocab):
+            count = text.count(term)
+            if count:
+                indices.append(term_id)
+                counts.append(count)
+        indptr[row + 1] = len(indices)
+    return TermMatrix(
+        terms=vocab,
+        term_index={term: idx for idx, term in enumerate(vocab)},
+        indptr=indptr,
+        indices=np.asarray(indices, dtype=np.int32),
+        counts=np.asarray(counts, dtype=np.int64),
+    )
+
+
+def category_terms(*category_maps: Dict[str, List[str]]) -> List[str]:
+    """Return the distinct keywords of one or more category maps, in order."""
+
+    return list(
+        dict.fromkeys(
+            keyword
+            for categories in category_maps
+            for keywords in categories.values()
+            for keyword in keywords
+        )
+    )
+
+
+def dominant_flows(
+    scores: np.ndarray,
+    active: np.ndarray,
+    *,
+    min_active: int = 2,
+    include_dominant: bool = True,
+) -> np.ndarray:
+    """Count ``dominant -> active`` pairs over pages with enough active columns.
+
+    The dominant column of a page is the first highest ``scores`` entry among
+    its ``active`` columns. Returns a ``columns x columns`` count matrix; with
+    ``include_dominant=False`` a page does not count its own dominant column.
+    """
+
+    columns = scores.shape[1]
+    rows = active.sum(axis=1) >= min_active
+    if not rows.any():
+        return np.zeros((columns, columns), dtype=np.int64)
+    masked = np.where(active[rows], scores[rows], -np.inf)
+    dominant = np.zeros((int(rows.sum()), columns), dtype=np.int64)
+    dominant[np.arange(len(dominant)), masked.argmax(axis=1)] = 1
+    flows = dominant.T @ active[rows].astype(np.int64)
+    if not include_dominant:
+        np.fill_diagonal(flows, 0)
+    return flows
+
+
+def bin_rows(values: np.ndarray, bin_size: int) -> np.ndarray:
+    """Sum consecutive rows of ``values`` in bins of ``bin_size`` pages."""
+
+    if len(values) == 0:
+        return np.zeros((0,) + values.shape[1:], dtype=values.dtype)
+    return np.add.reduceat(values, np.arange(0, len(values), bin_size), axis=0)
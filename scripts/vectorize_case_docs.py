@@ -9,16 +9,20 @@ import sys
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable, List, Tuple
+from typing import TYPE_CHECKING, Iterable, List, Tuple
 
 import numpy as np
-from sentence_transformers import SentenceTransformer
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
 ROOT = Path(__file__).resolve().parent.parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 from scripts.ingest_merged_case import ingest_file  # noqa: E402
+from scripts.instrumentation import add_metrics_arguments, get_metrics, metrics_from_args  # noqa: E402
+from scripts.warm_cache import load_sentence_model  # noqa: E402
 
 
 @dataclass
@@ -107,6 +111,10 @@ def _write_manifest(
     output_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
 
 
+def _load_model(model_name: str) -> SentenceTransformer:
+    return load_sentence_model(model_name)
+
+
 def _vectorize_text(
     text: str,
     *,
@@ -116,14 +124,19 @@ def _vectorize_text(
     overlap: int,
     min_chars: int,
 ) -> Tuple[List[Tuple[int, str]], np.ndarray]:
-    chunks = _chunk_text(text, max_chars=max_chars, overlap=overlap, min_chars=min_chars)
-    model = SentenceTransformer(model_name)
-    embeddings = model.encode(
-        [chunk for _, chunk in chunks],
-        batch_size=batch_size,
-        show_progress_bar=True,
-        normalize_embeddings=True,
-    )
+    metrics = get_metrics()
+    with metrics.stage("chunk"):
+        chunks = _chunk_text(text, max_chars=max_chars, overlap=overlap, min_chars=min_chars)
+    metrics.count("chunks", len(chunks))
+    with metrics.stage("load_model"):
+        model = _load_model(model_name)
+    with metrics.stage("embed"):
+        embeddings = model.encode(
+            [chunk for _, chunk in chunks],
+            batch_size=batch_size,
+            show_progress_bar=True,
+            normalize_embeddings=True,
+        )
     embeddings = np.asarray(embeddings, dtype=np.float32)
     return chunks, embeddings
 
@@ -322,6 +335,7 @@ def _parse_args() -> argparse.Namespace:
         default=None,
         help="Vector store directories to merge; defaults to vector_store, vector_store_research, and the new output.",
     )
+    add_metrics_arguments(parser)
     return parser.parse_args()
 
 
@@ -340,23 +354,27 @@ def _resolve_merge_sources(
 
 def main() -> None:
     args = _parse_args()
-    result = vectorize_document(
-        args.input,
-        args.output,
-        text_output_dir=args.text_output_dir,
-        base_name=args.base_name,
-        model_name=args.model,
-        max_chars=args.max_chars,
-        overlap=args.overlap,
-        min_chars=args.min_chars,
-        batch_size=args.batch_size,
-    )
+    metrics = metrics_from_args(args, "vectorize_case_docs")
+    with metrics.stage("vectorize"):
+        result = vectorize_document(
+            args.input,
+            args.output,
+            text_output_dir=args.text_output_dir,
+            base_name=args.base_name,
+            model_name=args.model,
+            max_chars=args.max_chars,
+            overlap=args.overlap,
+            min_chars=args.min_chars,
+            batch_size=args.batch_size,
+        )
     print(f"Saved {result.total_chunks} chunks to {result.output_dir}")
 
     if args.merge_into:
         sources = _resolve_merge_sources(result.output_dir, args.merge_sources)
-        merge_vector_stores(sources, args.merge_into)
+        with metrics.stage("merge"):
+            merge_vector_stores(sources, args.merge_into)
         print(f"Merged stores into {args.merge_into}")
+    metrics.finish()
 
 
 if __name__ == "__main__":
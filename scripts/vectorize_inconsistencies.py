@@ -15,6 +15,7 @@ ROOT = Path(__file__).resolve().parent.parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+from scripts.instrumentation import add_metrics_arguments, metrics_from_args  # noqa: E402
 from scripts.vectorize_case_docs import merge_vector_stores, vectorize_document  # noqa: E402
 
 
@@ -128,11 +129,13 @@ def _parse_args() -> argparse.Namespace:
         action="store_true",
         help="Skip merging per-document stores into the merged output.",
     )
+    add_metrics_arguments(parser)
     return parser.parse_args()
 
 
 def main() -> None:
     args = _parse_args()
+    metrics = metrics_from_args(args, "vectorize_inconsistencies")
     input_dir = args.input_dir.expanduser().resolve()
     output_dir = args.output_dir.expanduser().resolve()
     sources_dir = args.sources_dir.expanduser().resolve()
@@ -161,17 +164,19 @@ def main() -> None:
 
         use_ocr = args.use_ocr and text_path.exists() and text_path.stat().st_size > 0
         input_path = text_path if use_ocr else pdf_path
-        result = vectorize_document(
-            input_path,
-            store_dir,
-            text_output_dir=text_dir if not use_ocr else None,
-            base_name=slug if not use_ocr else None,
-            model_name=args.model,
-            max_chars=args.max_chars,
-            overlap=args.overlap,
-            min_chars=args.min_chars,
-            batch_size=args.batch_size,
-        )
+        with metrics.stage("vectorize"):
+            result = vectorize_document(
+                input_path,
+                store_dir,
+                text_output_dir=text_dir if not use_ocr else None,
+                base_name=slug if not use_ocr else None,
+                model_name=args.model,
+                max_chars=args.max_chars,
+                overlap=args.overlap,
+                min_chars=args.min_chars,
+                batch_size=args.batch_size,
+            )
+        metrics.count("documents")
         if use_ocr:
             _rewrite_metadata_source(store_dir / "metadata.jsonl", pdf_path)
             _rewrite_manifest_source(store_dir / "manifest.json", pdf_path)
@@ -183,13 +188,13 @@ def main() -> None:
 
     if args.no_merge:
         print("Skipping merge step.")
-        return
-
-    if not store_paths:
-        raise ValueError("No PDFs found to vectorize.")
-
-    merge_vector_stores(store_paths, output_dir)
-    print(f"Merged {len(store_paths)} stores into {output_dir}")
+    else:
+        if not store_paths:
+            raise ValueError("No PDFs found to vectorize.")
+        with metrics.stage("merge"):
+            merge_vector_stores(store_paths, output_dir)
+        print(f"Merged {len(store_paths)} stores into {output_dir}")
+    metrics.finish()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,141 @@
+"""Shared loaders for the inputs most report scripts start from.
+
+Report scripts read the merged page JSON, vector stores (``embeddings.npy``
+plus ``metadata.jsonl``) and the MiniLM model through these helpers. In a
+normal run each call simply loads. Inside ``report_daemon.py``, ``enable()``
+turns on an in-process cache, so later commands reuse what earlier ones
+loaded. Entries are keyed by what was loaded plus the size and mtime of
+the files behind it; when a file changes, the next call reloads it and
+replaces the old entry.
+
+Cached values are shared between commands: callers must treat them as
+read-only. Store embeddings are memory-mapped read-only, so an accidental
+in-place write fails loudly instead of leaking into the next command.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, Sequence, Tuple, TypeVar
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+T = TypeVar("T")
+Stamp = Tuple[Tuple[str, int, int], ...]
+
+_ENABLED = False
+_LOCK = threading.RLock()
+_CACHE: Dict[Tuple[str, str], "_Entry"] = {}
+
+
+@dataclass
+class _Entry:
+    stamp: Stamp
+    value: object
+    load_seconds: float
+    loaded_unix: float = field(default_factory=time.time)
+    hits: int = 0
+
+
+def enable(enabled: bool = True) -> None:
+    """Keep loaded inputs in memory across calls (used by the report daemon)."""
+
+    global _ENABLED
+    _ENABLED = enabled
+    if not enabled:
+        clear()
+
+
+def clear() -> int:
+    """Drop every cached entry; return how many there were."""
+
+    with _LOCK:
+        count = len(_CACHE)
+        _CACHE.clear()
+    return count
+
+
+def entries() -> List[dict]:
+    """Describe the cached entries (for ``report_daemon.py status``)."""
+
+    with _LOCK:
+        return [
+            {
+                "kind": kind,
+                "key": key,
+                "load_seconds": round(entry.load_seconds, 3),
+                "age_seconds": round(time.time() - entry.loaded_unix, 1),
+                "hits": entry.hits,
+            }
+            for (kind, key), entry in _CACHE.items()
+        ]
+
+
+def _stamp(paths: Sequence[Path]) -> Stamp:
+    stamp: List[Tuple[str, int, int]] = []
+    for path in paths:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            stamp.append((str(path), -1, -1))
+            continue
+        stamp.append((str(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(stamp)
+
+
+def cached(kind: str, key: str, paths: Sequence[Path], load: Callable[[], T]) -> T:
+    """Return ``load()``, reusing the cached value while ``paths`` are unchanged."""
+
+    if not _ENABLED:
+        return load()
+    stamp = _stamp(paths)
+    with _LOCK:
+        entry = _CACHE.get((kind, key))
+        if entry is not None and entry.stamp == stamp:
+            entry.hits += 1
+            return entry.value  # type: ignore[return-value]
+        started = time.perf_counter()
+        value = load()
+        _CACHE[(kind, key)] = _Entry(stamp, value, time.perf_counter() - started)
+        return value
+
+
+def load_json(path: Path) -> dict:
+    """Parse a JSON file such as ``28B_merged.json``."""
+
+    path = path.resolve()
+    return cached("json", str(path), [path], lambda: json.loads(path.read_text(encoding="utf-8")))
+
+
+def load_store(store_dir: Path) -> Tuple[np.ndarray, List[dict]]:
+    """Return a vector store's embeddings (memory-mapped) and metadata records."""
+
+    store_dir = store_dir.resolve()
+
+    def load() -> Tuple[np.ndarray, List[dict]]:
+        embeddings = np.load(store_dir / "embeddings.npy", mmap_mode="r")
+        records = [
+            json.loads(line)
+            for line in (store_dir / "metadata.jsonl").read_text(encoding="utf-8").splitlines()
+            if line.strip()
+        ]
+        return embeddings, records
+
+    paths = [store_dir / "embeddings.npy", store_dir / "metadata.jsonl"]
+    return cached("store", str(store_dir), paths, load)
+
+
+def load_sentence_model(model_name: str) -> SentenceTransformer:
+    def load() -> SentenceTransformer:
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(model_name)
+
+    return cached("model", model_name, [], load)
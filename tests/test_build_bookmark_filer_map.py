@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+# Ensure repository root is on the import path for local modules.
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.build_bookmark_filer_map import BookmarkEntry, _resolve_unknowns_by_context, _score_title
+
+
+def _unknown(index: int, page: int) -> BookmarkEntry:
+    return BookmarkEntry(
+        index=index,
+        depth=0,
+        title="Exhibit",
+        start_page=page,
+        end_page=page,
+        has_children=False,
+        filer="unknown",
+        date=None,
+        substance="Exhibit",
+        score=0,
+        mapped_by="title",
+    )
+
+
+def test_unknown_bookmarks_are_resolved_with_content_rules() -> None:
+    pages = {
+        1: "Respectfully submitted,\n/s/ Cooper L. Carter\nMax Altman & Johnson",
+        # Title words only: every filing in the case names the respondent.
+        2: "The Respondent's answer and objection to the petitioner's motion.",
+        3: "FILEMARK 42\nNOTICE",
+    }
+    entries = [_unknown(1, 1), _unknown(2, 2), _unknown(3, 3)]
+
+    resolved, overrides = _resolve_unknowns_by_context(
+        entries, pages, {"42": "oag"}, [], context_pages=1, min_score=3
+    )
+
+    assert [(entry.filer, entry.mapped_by) for entry in resolved] == [
+        ("cooper_carter", "text"),
+        ("unknown", "title"),
+        ("oag", "filemark"),
+    ]
+    assert [override["index"] for override in overrides] == [1, 3]
+    # The same words in a bookmark title do name the filer.
+    assert _score_title("Respondent's Answer and Objection")[0] == "charles_dustin_myers"
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import csv
+import sys
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+import cv2
+import numpy as np
+import pytest
+
+# Ensure repository root is on the import path for local modules.
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts import build_docket_filer_map as docket_map
+from scripts.build_docket_filer_map import (
+    CACHE_FILENAME,
+    COLOR_BANDS,
+    HUE_CLASS_LUT,
+    _build_filemark_index,
+    _correct_filemark,
+    _edit_distance,
+    _label_classes,
+    _open_classes,
+)
+
+S_THR = 40
+V_THR = 40
+
+
+def _hsv_strip() -> np.ndarray:
+    """Every OpenCV hue against saturation/value pairs on both sides of the thresholds."""
+
+    levels = [(255, 255), (S_THR, V_THR), (S_THR - 1, 255), (255, V_THR - 1), (0, 0), (128, 200)]
+    hues = np.arange(180, dtype=np.uint8)
+    rows = [np.stack([hues, np.full_like(hues, s), np.full_like(hues, v)], axis=-1) for s, v in levels]
+    return np.ascontiguousarray(np.stack(rows))
+
+
+def _band_mask(hsv: np.ndarray, bands: List[Tuple[int, int]]) -> np.ndarray:
+    """The pre-LUT mask: one ``cv2.inRange`` per hue band, OR'd together."""
+
+    mask = np.zeros(hsv.shape[:2], dtype=np.uint8)
+    for lo, hi in bands:
+        mask = cv2.bitwise_or(mask, cv2.inRange(hsv, np.array([lo, S_THR, V_THR]), np.array([hi, 255, 255])))
+    return mask
+
+
+def test_label_bits_match_per_band_in_range_masks() -> None:
+    hsv = _hsv_strip()
+
+    labels = _label_classes(hsv, S_THR, V_THR)
+
+    for bit, (color, bands) in enumerate(COLOR_BANDS.items()):
+        expected = _band_mask(hsv, bands) > 0
+        np.testing.assert_array_equal((labels >> bit) & 1 == 1, expected, err_msg=color)
+    # Green and light blue overlap on 80-85: those pixels carry both bits.
+    green, light_blue = (1 << list(COLOR_BANDS).index(name) for name in ("green", "light_blue"))
+    assert np.all(labels[0, 80:86] == green | light_blue)
+    assert labels[0, 79] == green and labels[0, 86] == light_blue
+    # Below either threshold nothing is labelled, whatever the hue.
+    assert not labels[2:5].any()
+    assert not HUE_CLASS_LUT[180:].any()
+
+
+def test_opening_matches_per_class_morphology() -> None:
+    rng = np.random.default_rng(7)
+    hsv = _hsv_strip()
+    # Blobs of random hues with speckle, so the opening both keeps and clears pixels.
+    blocks = rng.integers(0, 180, size=(6, 9), dtype=np.uint8)
+    hues = np.kron(blocks, np.ones((5, 5), dtype=np.uint8))
+    hues[rng.random(hues.shape) < 0.1] = rng.integers(0, 180, dtype=np.uint8)
+    noisy = np.stack([hues, np.full_like(hues, 200), np.full_like(hues, 200)], axis=-1)
+
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+    for image in (hsv, noisy):
+        opened = _open_classes(_label_classes(image, S_THR, V_THR))
+        for bit, bands in enumerate(COLOR_BANDS.values()):
+            expected = cv2.morphologyEx(_band_mask(image, bands), cv2.MORPH_OPEN, kernel, iterations=1)
+            np.testing.assert_array_equal((opened >> bit) & 1 == 1, expected > 0)
+
+
+def test_filemark_correction() -> None:
+    index = _build_filemark_index({"7", "14", "16", "101", "250", "1203"})
+
+    assert _correct_filemark("101", index) == ("101", False)
+    assert _correct_filemark("", index) == (None, False)
+    # One substitution, insertion or deletion away from a single filemark.
+    assert _correct_filemark("102", index) == ("101", True)
+    assert _correct_filemark("1011", index) == ("101", True)
+    assert _correct_filemark("25", index) == ("250", True)
+    assert _correct_filemark("120", index) == ("1203", True)
+    # "14" and "16" are both one edit and one number away from "15".
+    assert _correct_filemark("15", index) == (None, False)
+    # A nearer number breaks the tie: "17" -> "16" (1 away), not "7" (10 away).
+    assert _correct_filemark("17", index) == ("16", True)
+    # Nothing valid within one edit: the raw reading stands.
+    assert _correct_filemark("9999", index) == ("9999", False)
+    assert _correct_filemark("41", index) == ("41", False)
+    assert _correct_filemark("123456", index) == ("123456", False)
+
+
+def test_filemark_index_finds_every_one_edit_neighbour() -> None:
+    valid = {str(number) for number in range(0, 400, 7)} | {"12", "21", "1000"}
+    index = _build_filemark_index(valid)
+
+    for raw in map(str, range(0, 1200)):
+        found = {
+            candidate
+            for variant in docket_map._deletion_variants(raw)
+            for candidate in index.neighbours.get(variant, ())
+        }
+        assert found >= {candidate for candidate in valid if _edit_distance(raw, candidate) <= 1}, raw
+
+
+def _write_images(images_dir: Path, contents: dict) -> None:
+    images_dir.mkdir(parents=True, exist_ok=True)
+    for name, text in contents.items():
+        (images_dir / name).write_text(text, encoding="utf-8")
+
+
+def _stub_parser(log_path: Path) -> Callable:
+    """A ``_parse_image`` reading the filemark straight from the file, logging each call.
+
+    Pool workers are forked, so the stub reaches them; they append to one log file.
+    """
+
+    def parse(image_path: Path, ocr) -> List[Tuple[str, List[str]]]:
+        with log_path.open("a", encoding="utf-8") as handle:
+            handle.write(image_path.name + "\n")
+        return [("green", [image_path.read_text(encoding="utf-8")])]
+
+    return parse
+
+
+def _refuse(image_path: Path, ocr) -> List[Tuple[str, List[str]]]:
+    raise AssertionError(f"{image_path.name} should have come from the cache")
+
+
+def _run(monkeypatch: pytest.MonkeyPatch, tmp_path: Path, parse: Callable) -> List[Tuple[str, str]]:
+    monkeypatch.setattr(docket_map, "_parse_image", parse)
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "build_docket_filer_map.py",
+            "--images-dir",
+            str(tmp_path / "docket"),
+            "--json",
+            str(tmp_path / "missing.json"),
+            "--output-dir",
+            str(tmp_path / "reports"),
+            "--workers",
+            "2",
+        ],
+    )
+    docket_map.main()
+    with (tmp_path / "reports" / "28b_docket_filer_ocr.csv").open(newline="", encoding="utf-8") as handle:
+        return [(row["source_image"], row["filemark"]) for row in csv.DictReader(handle)]
+
+
+def _parsed(log_path: Path) -> List[str]:
+    if not log_path.exists():
+        return []
+    names = sorted(log_path.read_text(encoding="utf-8").split())
+    log_path.unlink()
+    return names
+
+
+def test_parse_cache_reuses_unchanged_images(monkeypatch: pytest.MonkeyPatch, tmp_path: Path, capsys) -> None:
+    log_path = tmp_path / "parsed.log"
+    # c.png is byte-identical to a.png.
+    _write_images(tmp_path / "docket", {"a.png": "101", "b.png": "102", "c.png": "101", "d.png": "7"})
+
+    first = _run(monkeypatch, tmp_path, _stub_parser(log_path))
+    assert first == [("a.png", "101"), ("b.png", "102"), ("c.png", "101"), ("d.png", "7")]
+    parsed = _parsed(log_path)
+    assert len(parsed) == 3 and {"b.png", "d.png"} < set(parsed)
+    assert (tmp_path / "reports" / CACHE_FILENAME).exists()
+
+    # Nothing changed: every row is rebuilt from the cache without parsing.
+    assert _run(monkeypatch, tmp_path, _refuse) == first
+    assert "Parsed 0 new or changed images; reused 4" in capsys.readouterr().out
+
+    (tmp_path / "docket" / "b.png").write_text("105", encoding="utf-8")
+    changed = _run(monkeypatch, tmp_path, _stub_parser(log_path))
+    assert _parsed(log_path) == ["b.png"]
+    assert changed == [("a.png", "101"), ("b.png", "105"), ("c.png", "101"), ("d.png", "7")]
+
+    monkeypatch.setattr(docket_map, "PARSER_VERSION", docket_map.PARSER_VERSION + 1)
+    assert _run(monkeypatch, tmp_path, _stub_parser(log_path)) == changed
+    assert len(_parsed(log_path)) == 3
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import re
+import sys
+from pathlib import Path
+from typing import List
+
+import pytest
+
+# Ensure repository root is on the import path for local modules.
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts import build_lawful_violations_record_map as record_map
+from scripts.build_lawful_violations_record_map import (
+    CLAIMS,
+    _claim_hits,
+    _compile_scanner,
+    _literal_prefix,
+    _normalize_ascii,
+    _normalize_ws,
+    _scan_records,
+    _scan_text,
+)
+
+TEXTS = [
+    "Respondent’s PAYPAL account received $1,576 on 12/15/2023 from Daniel Branthoover.",
+    "She travelled to Yukon,\nOklahoma for assistance in\n\ndrafting the initial documents.",
+    "AFFIDAVIT OF INABILITY to pay costs — indigency was never contested; it was false.",
+    "No hearing took place and there was no transcript and no reporter present.",
+    "The associate judge acted without an order of referral under Tex. Fam. Code § 201.006.",
+    "Cooper L. Carter handed the court the temporary orders and a proposed order.",
+    "The regional presiding judge's assignment of John H. Cayce under 74.055 and 74.054.",
+    "A motion to nonsuit; the application for protective order was nonsuited.",
+    "Nothing relevant here at all.",
+    "1576 dollars, not 15760; recusal papers were split by the court coordinator.",
+    "",
+]
+
+EXTRA_CLAIMS = [
+    {
+        "id": "X1",
+        "section": "Patterns without a literal prefix",
+        "claim": "",
+        "queries": [
+            r"(?:motion|petition) to (?:recuse|nonsuit)",
+            r"\d+ dollars",
+            r"colou?r",
+            r"non-?suit(?:ed)?",
+            r"^the associate",
+            r"recusal|referral",
+            r"Tex\. Fam\. Code \S+ \d+\.\d+",
+        ],
+    },
+]
+
+
+def _records(texts: List[str]) -> List[dict]:
+    return [
+        {"id": f"r{idx}", "vector_id": idx, "chunk_index": idx, "source_pdf": f"doc{idx % 3}.pdf", "text": text}
+        for idx, text in enumerate(texts)
+    ]
+
+
+def _per_query_hits(records: List[dict], queries: List[str], max_hits: int) -> List[dict]:
+    """The pre-scanner loop: every query searched on its own in every normalized chunk."""
+
+    patterns = [re.compile(query, re.IGNORECASE) for query in queries]
+    scored = []
+    for record in records:
+        cleaned = _normalize_ws(_normalize_ascii(record.get("text", "")))
+        matches = [pattern.search(cleaned) for pattern in patterns]
+        score = sum(1 for match in matches if match)
+        if score:
+            first = next(match for match in matches if match)
+            scored.append((score, record, cleaned, first.span()))
+    scored.sort(key=lambda item: (-item[0], item[1].get("vector_id", 0)))
+    return [
+        {
+            "score": score,
+            "vector_id": record.get("vector_id"),
+            "chunk_index": record.get("chunk_index"),
+            "source_pdf": record.get("source_pdf", ""),
+            "snippet": record_map._snippet_from_span(cleaned, span),
+        }
+        for score, record, cleaned, span in scored[:max_hits]
+    ]
+
+
+def test_literal_prefix_is_read_from_the_query() -> None:
+    assert _literal_prefix(r"Cooper L\. Carter") == "cooper l. carter"
+    assert _literal_prefix(r"\b1576\b") == "1576"
+    assert _literal_prefix(r"^Order") == "order"
+    assert _literal_prefix(r"colou?r") == "colo"
+    assert _literal_prefix(r"ax{2}") == "a"
+    assert _literal_prefix(r"Tex\. Fam\. Code \d+") == "tex. fam. code "
+    assert _literal_prefix(r"\d+ days") == ""
+    assert _literal_prefix(r"(?:motion|petition) to") == ""
+    assert _literal_prefix(r"recusal|referral") == ""
+
+
+def test_single_pass_scan_matches_per_query_search() -> None:
+    claims = CLAIMS + EXTRA_CLAIMS
+    scanner = _compile_scanner(claims)
+    queries = [query for claim in claims for query in claim["queries"]]
+    assert scanner.unanchored_ids  # the fallback path is exercised
+
+    for text in TEXTS:
+        cleaned = _normalize_ws(_normalize_ascii(text))
+        expected = {}
+        for query in queries:
+            match = re.search(query, cleaned, re.IGNORECASE)
+            if match:
+                expected[query] = match.span()
+        scan = _scan_text(text, scanner)
+        found = {}
+        if scan is not None:
+            assert scan.cleaned == cleaned
+            for claim, pattern_ids in zip(claims, scanner.claim_pattern_ids):
+                for query, idx in zip(claim["queries"], pattern_ids):
+                    if idx in scan.spans:
+                        found[query] = scan.spans[idx]
+        assert found == expected, text
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_claim_hits_match_per_query_loop(monkeypatch: pytest.MonkeyPatch, workers: int) -> None:
+    # Force the process pool on a small store when workers > 1.
+    monkeypatch.setattr(record_map, "PARALLEL_MIN_RECORDS", 1)
+    monkeypatch.setattr(record_map, "SCAN_BATCH_SIZE", 4)
+    records = _records(TEXTS * 3)
+
+    scans = _scan_records(records, workers)
+
+    for claim, pattern_ids in zip(CLAIMS, record_map.SCANNER.claim_pattern_ids):
+        assert _claim_hits(records, scans, pattern_ids, 5) == _per_query_hits(records, claim["queries"], 5)
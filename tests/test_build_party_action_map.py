@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+# Ensure repository root is on the import path for local modules.
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.build_party_action_map import (
+    ActionHit,
+    Party,
+    _extract_dates,
+    _extract_party_hits,
+    _load_party_list,
+    _normalize_ascii,
+    _normalize_ws,
+    _snippet,
+    _write_report,
+)
+
+NAMES = [
+    "John Smith|Mr. Smith",
+    "Jane Q. Doe|Jane Doe|Ms. Doe",
+    "Ann Lee",
+    "Anne Smith",
+    "Associate Judge|the associate judge",
+]
+
+STORES = {
+    "district_clerk": [
+        "On January 16, 2024 John Smith filed a motion. Jane Doe responded on 1/22/2024.",
+        "Mr. Smith’s counsel — Ms. Doe — appeared.\n\nThe associate judge signed the order.",
+        "JOHN SMITH and ANNE SMITH were present. Ann Lee was not.",
+    ],
+    "associate_judge": [
+        "The Associate Judge found that John Q. Smith lacked standing. Anne Smithson testified.",
+        "Smith-Jones is not a party. John Smith. Mr. Smith again on Feb 3, 2024.",
+        "",
+        "Ann Leeds, Anne, and Jane Q. Doe met. Jane Q. Doe left.",
+    ],
+    "respondent": [
+        "John Smith filed a motion. Jane Doe responded on 1/22/2024.",
+        "Nothing about any party here.",
+        "Anne Smith asked the associate judge to recuse on 3/4/24! John Smith objected?",
+    ],
+}
+
+
+def _write_stores(root: Path) -> Path:
+    vector_id = 0
+    for filer, texts in STORES.items():
+        store = root / filer
+        store.mkdir(parents=True)
+        lines = []
+        for chunk_index, text in enumerate(texts):
+            source = f"CASE DOCS/{filer}/doc{chunk_index % 2}.pdf"
+            lines.append(
+                json.dumps(
+                    {"vector_id": vector_id, "chunk_index": chunk_index, "source_pdf": source, "text": text}
+                )
+            )
+            vector_id += 1
+        (store / "metadata.jsonl").write_text("\n".join(lines), encoding="utf-8")
+    return root
+
+
+def _per_party_hits(store_root: Path, parties: List[Party]) -> Dict[str, List[ActionHit]]:
+    """The pre-matcher loop: each party's regexes over each record, then each sentence."""
+
+    results: Dict[str, List[ActionHit]] = {party.label: [] for party in parties}
+    seen: Dict[str, set] = {party.label: set() for party in parties}
+    for store_dir in sorted(store_root.iterdir(), key=lambda p: p.name.lower()):
+        for line in (store_dir / "metadata.jsonl").read_text(encoding="utf-8").splitlines():
+            record = json.loads(line)
+            text = record.get("text", "")
+            if not text:
+                continue
+            normalized = _normalize_ascii(_normalize_ws(text))
+            sentences = [
+                chunk.strip() for chunk in re.split(r"(?<=[.!?])\s+|\n{2,}", normalized) if chunk.strip()
+            ]
+            for party in parties:
+                if not any(pattern.search(normalized) for pattern in party.patterns):
+                    continue
+                for sentence in sentences:
+                    if not any(pattern.search(sentence) for pattern in party.patterns):
+                        continue
+                    key = (sentence, record.get("source_pdf", ""))
+                    if key in seen[party.label]:
+                        continue
+                    seen[party.label].add(key)
+                    dates = _extract_dates(sentence)
+                    date_text, date_value = dates[0] if dates else (None, None)
+                    results[party.label].append(
+                        ActionHit(
+                            date_text=date_text,
+                            date_value=date_value,
+                            snippet=_snippet(sentence),
+                            source_pdf=record.get("source_pdf", ""),
+                            vector_id=int(record.get("vector_id", 0)),
+                            chunk_index=int(record.get("chunk_index", 0)),
+                            filer=store_dir.name,
+                        )
+                    )
+    return results
+
+
+def test_party_matcher_matches_per_party_regex_loop(tmp_path: Path) -> None:
+    store_root = _write_stores(tmp_path / "stores")
+    parties = _load_party_list(None, NAMES)
+
+    hits = _extract_party_hits(store_root, parties, max_per_party=80, workers=1)
+
+    assert hits == _per_party_hits(store_root, parties)
+    assert all(hits[party.label] for party in parties)
+
+
+def _report(tmp_path: Path, store_root: Path, max_per_party: int, workers: int) -> str:
+    parties = _load_party_list(None, NAMES)
+    hits = _extract_party_hits(store_root, parties, max_per_party, workers)
+    output = tmp_path / f"actions_{max_per_party}_{workers}.md"
+    _write_report(output, store_root, parties, hits, max_per_party)
+    return "\n".join(
+        line for line in output.read_text(encoding="utf-8").splitlines() if not line.startswith("Generated:")
+    )
+
+
+def test_serial_and_parallel_scans_write_the_same_report(tmp_path: Path) -> None:
+    store_root = _write_stores(tmp_path / "stores")
+
+    for max_per_party in (80, 2):
+        serial = _report(tmp_path, store_root, max_per_party, workers=1)
+        assert _report(tmp_path, store_root, max_per_party, workers=3) == serial
+    assert "- No mentions found" not in serial
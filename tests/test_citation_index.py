@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+# Ensure repository root is on the import path for local modules.
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.citation_index import INDEX_FILENAME, load_or_update_index, read_index
+
+
+def _write_metadata(store_dir: Path, texts: list[str]) -> None:
+    records = [
+        {"id": f"doc-{idx}", "vector_id": idx, "text": text} for idx, text in enumerate(texts)
+    ]
+    (store_dir / "metadata.jsonl").write_text(
+        "\n".join(json.dumps(record) for record in records), encoding="utf-8"
+    )
+
+
+def test_index_dedupes_and_updates_incrementally(tmp_path: Path) -> None:
+    _write_metadata(
+        tmp_path,
+        [
+            "Cause No. 02-24-00123-CV under Rule 91 and again Rule 91.",
+            "See In re Myers and Tex. Fam. Code sec. 85.001.",
+        ],
+    )
+    index = load_or_update_index(tmp_path)
+
+    assert index.postings["docket_numbers"] == {"02-24-00123-CV": [0]}
+    assert index.postings["rules"] == {"Rule 91": [0]}
+    assert (tmp_path / INDEX_FILENAME).exists()
+
+    _write_metadata(
+        tmp_path,
+        [
+            "Cause No. 02-24-00123-CV under Rule 91 and again Rule 91.",
+            "See In re Myers and Tex. Fam. Code sec. 85.001.",
+            "Appeal 02-24-00123-CV remains pending.",
+        ],
+    )
+    updated = load_or_update_index(tmp_path)
+
+    assert updated.postings["docket_numbers"] == {"02-24-00123-CV": [0, 2]}
+    assert sorted(updated.records) == ["doc-0", "doc-1", "doc-2"]
+    assert read_index(tmp_path).postings == updated.postings
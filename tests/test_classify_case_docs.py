@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import csv
+import sys
+from pathlib import Path
+
+from fpdf import FPDF
+
+# Ensure repository root is on the import path for local modules.
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.classify_case_docs import _write_csv, classify_all
+
+
+def _create_filing(path: Path) -> Path:
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Helvetica", size=12)
+    pdf.multi_cell(0, 10, "CAUSE NO. 2023-12345\nIN THE DISTRICT COURT\nRESPONDENT'S MOTION TO RECUSE")
+    pdf.add_page()
+    pdf.set_font("Helvetica", size=12)
+    pdf.multi_cell(0, 10, "Respectfully submitted,\nCounsel for Respondent")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pdf.output(path)
+    return path
+
+
+def test_unreadable_pdf_gets_an_error_row(tmp_path: Path, capsys) -> None:
+    good = _create_filing(tmp_path / "CASE DOCS" / "respondent" / "motion.pdf")
+    broken = tmp_path / "CASE DOCS" / "respondent" / "truncated.pdf"
+    broken.write_bytes(b"%PDF-1.4\n%truncated upload")
+    later = _create_filing(tmp_path / "CASE DOCS" / "respondent" / "reply.pdf")
+
+    rows = classify_all([good, broken, later])
+    output = tmp_path / "labels.csv"
+    _write_csv(output, rows)
+
+    with output.open(newline="", encoding="utf-8") as handle:
+        written = list(csv.DictReader(handle))
+    assert [Path(row["pdf"]).name for row in written] == ["motion.pdf", "truncated.pdf", "reply.pdf"]
+    assert written[0]["basis"] != "error" and written[2]["basis"] != "error"
+    assert written[0]["pages"] == "2"
+    error = written[1]
+    assert (error["basis"], error["pages"], error["provisional_filer"]) == ("error", "0", "unknown")
+    assert error["signals"]
+    assert "truncated.pdf" in capsys.readouterr().err
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+from typing import Iterator, List
+
+import numpy as np
+import pytest
+
+# Ensure repository root is on the import path for local modules.
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts import disk_cache
+from scripts.disk_cache import evict, memoize
+
+CALLS: List[str] = []
+
+
+@memoize(ignore=("verbose",))
+def _scaled(values: np.ndarray, factor: float, verbose: bool = False) -> np.ndarray:
+    CALLS.append("scaled")
+    return values * factor
+
+
+@memoize()
+def _summary(path: Path, labels: List[str]) -> dict:
+    CALLS.append("summary")
+    return {"size": len(path.read_bytes()), "labels": sorted(set(labels))}
+
+
+@pytest.fixture
+def cache_dir(tmp_path: Path) -> Iterator[Path]:
+    CALLS.clear()
+    disk_cache.configure(tmp_path / "cache")
+    yield tmp_path / "cache"
+    disk_cache.configure(None)
+
+
+def test_memoize_reuses_results_until_inputs_change(cache_dir: Path, tmp_path: Path) -> None:
+    values = np.arange(4, dtype=np.float32)
+    first = _scaled(values, 2.0)
+    again = _scaled(values.copy(), 2.0, verbose=True)
+    changed = _scaled(values + 1, 2.0)
+
+    assert CALLS == ["scaled", "scaled"]
+    np.testing.assert_array_equal(again, first)
+    np.testing.assert_array_equal(changed, (values + 1) * 2.0)
+    assert len(list((cache_dir / "test_disk_cache._scaled").glob("*.npy"))) == 2
+
+    source = tmp_path / "input.txt"
+    source.write_text("abc", encoding="utf-8")
+    assert _summary(source, ["b", "a"]) == {"size": 3, "labels": ["a", "b"]}
+    assert _summary(source, ["b", "a"]) == {"size": 3, "labels": ["a", "b"]}
+    source.write_text("abcd", encoding="utf-8")
+    assert _summary(source, ["b", "a"])["size"] == 4
+    assert CALLS.count("summary") == 2
+
+    assert disk_cache.stats()["test_disk_cache._summary"]["hits"] >= 1
+
+
+def test_disabled_cache_always_computes(tmp_path: Path) -> None:
+    CALLS.clear()
+    disk_cache.configure(None)
+    _scaled(np.ones(2), 3.0)
+    _scaled(np.ones(2), 3.0)
+    assert CALLS == ["scaled", "scaled"]
+
+
+def test_evict_removes_least_recently_used(cache_dir: Path) -> None:
+    entries = []
+    for idx in range(3):
+        path = cache_dir / "stage" / f"{idx}.pkl"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x" * 100)
+        os.utime(path, ns=(idx * 10**9, idx * 10**9))
+        entries.append(path)
+    os.utime(entries[0])  # A hit makes the oldest entry the most recent.
+
+    removed = evict(cache_dir, max_bytes=150)
+
+    assert removed == [entries[1], entries[2]]
+    assert entries[0].exists()
+
+
+def test_unhashable_arguments_are_rejected(cache_dir: Path) -> None:
+    with pytest.raises(TypeError, match="Cannot fingerprint"):
+        _scaled(np.ones(2), object())
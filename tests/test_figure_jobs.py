@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Ensure repository root is on the import path for local modules.
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.figure_jobs import FigureJob, render_figures
+from scripts.plotting import pyplot
+
+
+def _plot_bars(output_path: Path, values: list[int], *, title: str) -> str:
+    plt = pyplot()
+    plt.figure(figsize=(3, 2))
+    plt.bar(range(len(values)), values)
+    plt.title(title)
+    plt.savefig(output_path, dpi=40)
+    plt.close()
+    return output_path.name
+
+
+def _fail(message: str) -> None:
+    raise ValueError(message)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_render_figures_returns_results_in_job_order(tmp_path: Path, workers: int) -> None:
+    jobs = [
+        FigureJob(_plot_bars, (tmp_path / f"figure_{idx}.png", [idx, idx + 1]), {"title": f"Figure {idx}"})
+        for idx in range(3)
+    ]
+
+    assert render_figures(jobs, workers) == ["figure_0.png", "figure_1.png", "figure_2.png"]
+    assert all((tmp_path / f"figure_{idx}.png").stat().st_size > 0 for idx in range(3))
+
+
+def test_render_figures_raises_job_errors() -> None:
+    with pytest.raises(ValueError, match="no data"):
+        render_figures([FigureJob(_fail, ("no data",)), FigureJob(_fail, ("other",))], workers=2)
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Ensure repository root is on the import path for local modules.
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.hybrid_search import INDEX_FILENAME, HybridSearcher
+
+
+def _write_store(store_dir: Path, texts: list[str], sources: list[str]) -> None:
+    store_dir.mkdir(parents=True)
+    records = [
+        {
+            "id": f"{store_dir.name}-{idx}",
+            "vector_id": idx,
+            "source_pdf": source,
+            "chunk_index": idx,
+            "text": text,
+        }
+        for idx, (text, source) in enumerate(zip(texts, sources))
+    ]
+    (store_dir / "metadata.jsonl").write_text(
+        "\n".join(json.dumps(record) for record in records), encoding="utf-8"
+    )
+    embeddings = np.eye(len(texts), 4, dtype=np.float32)
+    np.save(store_dir / "embeddings.npy", embeddings)
+
+
+def _build_root(tmp_path: Path) -> Path:
+    root = tmp_path / "stores"
+    _write_store(
+        root / "associate_judge",
+        ["Order of referral to the associate judge.", "Notice of hearing on temporary orders."],
+        ["CASE DOCS\\ASSOCIATE JUDGE\\referral.pdf", "CASE DOCS\\ASSOCIATE JUDGE\\notice.pdf"],
+    )
+    _write_store(
+        root / "district_judge",
+        ["Motion to recuse the judge was denied.", "The referral order was signed."],
+        ["CASE DOCS\\DISTRICT JUDGE\\recusal.pdf", "CASE DOCS\\DISTRICT JUDGE\\order.pdf"],
+    )
+    return root
+
+
+def test_keyword_search_ranks_and_persists_index(tmp_path: Path) -> None:
+    root = _build_root(tmp_path)
+    searcher = HybridSearcher.from_path(root)
+
+    hits = searcher.keyword("referral associate judge", top_k=3)
+
+    assert hits[0].record["text"].startswith("Order of referral")
+    assert {hit.filer for hit in hits} == {"associate_judge", "district_judge"}
+    assert (root / "associate_judge" / INDEX_FILENAME).exists()
+
+
+def test_filters_restrict_filer_and_source(tmp_path: Path) -> None:
+    searcher = HybridSearcher.from_path(_build_root(tmp_path))
+
+    by_filer = searcher.keyword("referral", top_k=5, filers=["district_judge"])
+    by_source = searcher.keyword("referral", top_k=5, source="associate judge/referral")
+
+    assert [hit.filer for hit in by_filer] == ["district_judge"]
+    assert [hit.record["id"] for hit in by_source] == ["associate_judge-0"]
+
+
+def test_hybrid_fuses_keyword_and_vector_ranks(tmp_path: Path) -> None:
+    searcher = HybridSearcher.from_path(_build_root(tmp_path))
+    query_vector = np.array([0.0, 1.0, 0.0, 0.0], dtype=np.float32)
+
+    hits = searcher.hybrid("notice hearing", top_k=2, query_vector=query_vector)
+
+    assert hits[0].record["text"].startswith("Notice of hearing")
+    assert hits[0].bm25_rank == 1
+    assert hits[0].vector_rank is not None
+
+
+def test_semantic_batch_matches_single_queries(tmp_path: Path) -> None:
+    searcher = HybridSearcher.from_path(_build_root(tmp_path), block_size=1)
+    vectors = np.eye(2, 4, dtype=np.float32)
+
+    batched = searcher.semantic_batch(vectors, [2, 1], filers=[None, ["district_judge"]], sources=["notice", None])
+    single = [
+        searcher.semantic(vectors[0], 2, source="notice"),
+        searcher.semantic(vectors[1], 1, filers=["district_judge"]),
+    ]
+
+    assert [[hit.record["id"] for hit in hits] for hits in batched] == [["associate_judge-1"], ["district_judge-1"]]
+    assert [[hit.record["id"] for hit in hits] for hits in single] == [["associate_judge-1"], ["district_judge-1"]]
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+from typing import List
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Each costs 0.1-0.5 s to import (torch behind sentence_transformers far more),
+# so scripts load them only in the code paths that use them.
+HEAVY = {
+    "matplotlib",
+    "sentence_transformers",
+    "torch",
+    "cv2",
+    "fitz",
+    "pymupdf",
+    "pytesseract",
+    "PIL",
+    "pypdf",
+    "PyPDF2",
+    "fpdf",
+}
+MODULES = sorted(path.stem for path in (ROOT / "scripts").glob("*.py") if path.stem != "__init__")
+
+
+def _imported(module: str) -> List[str]:
+    """Names of every module loaded by ``import scripts.<module>``, from ``-X importtime``."""
+
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import scripts.{module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    assert completed.returncode == 0, completed.stderr[-2000:]
+    return [
+        line.rsplit("|", 1)[1].strip()
+        for line in completed.stderr.splitlines()
+        if line.startswith("import time:") and "|" in line
+    ]
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_script_import_skips_heavy_dependencies(module: str) -> None:
+    loaded = {name.split(".", 1)[0] for name in _imported(module)}
+    assert not loaded & HEAVY, f"scripts.{module} imports {sorted(loaded & HEAVY)} at module level"
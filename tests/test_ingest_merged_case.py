@@ -48,6 +48,7 @@ def test_ingest_pdf_creates_outputs(tmp_path: Path) -> None:
     assert payload["pages"][1]["page_number"] == 2
     assert payload["pages"][0]["char_length"] > 0
     assert payload["pages"][1]["char_length"] > 0
+    assert [page["source"] for page in payload["pages"]] == ["text_layer", "text_layer"]
 
 
 def test_ingest_plain_text(tmp_path: Path) -> None:
@@ -72,3 +73,32 @@ def test_rejects_unsupported_extension(tmp_path: Path) -> None:
 
     with pytest.raises(UnsupportedFileTypeError):
         ingest_file(bogus, tmp_path)
+
+
+def test_ocr_ingest_records_dpi_and_confidence(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    from PIL import Image, ImageDraw
+
+    from scripts import ocr_pages
+    from scripts.ingest_merged_case import OcrOptions
+
+    monkeypatch.setattr(ocr_pages, "_ocr_image", lambda image, lang: ("Scanned exhibit text", 91.26))
+    scan = Image.new("L", (850, 1100), 255)
+    ImageDraw.Draw(scan).rectangle((100, 100, 700, 400), fill=0)
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Helvetica", size=12)
+    pdf.multi_cell(0, 10, "Typed pleading text. " * 40)
+    pdf.add_page()
+    pdf.image(scan, x=0, y=0, w=210, h=297)
+    pdf_path = tmp_path / "mixed.pdf"
+    pdf.output(pdf_path)
+
+    result = ingest_file(pdf_path, tmp_path / "out", ocr=OcrOptions(dpi=200, fast_dpi=100))
+
+    payload = json.loads(result.json_path.read_text(encoding="utf-8"))
+    typed, scanned = payload["pages"]
+    assert (typed["source"], typed["dpi"], typed["confidence"]) == ("text_layer", None, None)
+    assert typed["text_layer_density"] > 2.0
+    assert (scanned["source"], scanned["dpi"], scanned["confidence"]) == ("ocr", 100, 91.3)
+    assert scanned["text"] == "Scanned exhibit text"
+    assert scanned["text_layer_density"] == 0.0
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Ensure repository root is on the import path for local modules.
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.instrumentation import add_metrics_arguments, get_metrics, metrics_from_args
+
+
+def _allocate(size: int) -> int:
+    return len(bytearray(size))
+
+
+def test_metrics_report_nested_stages_counters_and_profile(tmp_path: Path) -> None:
+    parser = argparse.ArgumentParser()
+    add_metrics_arguments(parser)
+    output = tmp_path / "metrics" / "run.json"
+    args = parser.parse_args(["--profile", "--metrics-out", str(output)])
+    metrics = metrics_from_args(args, "example")
+    assert get_metrics() is metrics
+
+    with metrics.stage("load"):
+        _allocate(8 * 1024 * 1024)
+        with metrics.stage("parse"):
+            get_metrics().count("pages", 3)
+    for _ in range(2):
+        with metrics.stage("write"):
+            get_metrics().count("pages")
+    metrics.finish()
+
+    report = json.loads(output.read_text(encoding="utf-8"))
+    assert report["script"] == "example"
+    assert set(report["stages"]) == {"load", "load/parse", "write"}
+    assert report["stages"]["write"]["calls"] == 2
+    assert report["counters"] == {"pages": 5}
+    # The nested stage must not hide the allocation made before it started.
+    assert report["stages"]["load"]["tracemalloc_peak_mb"] >= 8
+    assert report["stages"]["load/parse"]["tracemalloc_peak_mb"] < 8
+    assert report["profile"]["stage"] in {"load", "write"}
+    assert Path(report["profile"]["path"]).exists()
+
+
+def test_metrics_write_nothing_unless_asked(tmp_path: Path) -> None:
+    parser = argparse.ArgumentParser()
+    add_metrics_arguments(parser)
+    metrics = metrics_from_args(parser.parse_args([]), "quiet")
+    with metrics.stage("work"):
+        metrics.count("items")
+    assert metrics.finish() is None
+    assert metrics.stages["work"].calls == 1
+
+
+def test_exporter_serves_and_writes_prometheus_text(tmp_path: Path) -> None:
+    from urllib.request import urlopen
+
+    from scripts.instrumentation import Metrics
+    from scripts.metrics_exporter import MetricsExporter
+
+    metrics = Metrics("ocr_case_docs_by_filer")
+    textfile = tmp_path / "ocr.prom"
+    exporter = MetricsExporter(metrics, textfile=textfile, port=0, interval=60)
+    exporter.start()
+    try:
+        metrics.count("pages.ocr", 4)
+        metrics.gauge("ocr_render_queue_depth", 2)
+        try:
+            with metrics.stage("ocr"):
+                raise RuntimeError("tesseract crashed")
+        except RuntimeError:
+            pass
+        with urlopen(f"http://127.0.0.1:{exporter.port}/metrics") as response:
+            live = response.read().decode("utf-8")
+    finally:
+        exporter.stop()
+
+    labels = 'script="ocr_case_docs_by_filer",run="ocr"'
+    assert f"pipeline_pages_ocr_total{{{labels}}} 4" in live
+    assert f"pipeline_ocr_render_queue_depth{{{labels}}} 2" in live
+    assert f'pipeline_stage_errors_total{{{labels},stage="ocr"}} 1' in live
+    assert "# TYPE pipeline_pages_ocr_per_second gauge" in live
+    assert textfile.read_text(encoding="utf-8").count("# TYPE pipeline_pages_ocr_total counter") == 1
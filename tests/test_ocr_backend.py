@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import re
+import sys
+import threading
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pytesseract
+import pytest
+from PIL import Image
+
+# Ensure repository root is on the import path for local modules.
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts import ocr_backend
+from scripts.ocr_backend import MIN_BATCH, MIN_CROPS_PER_WORKER, BatchTesseract
+
+
+def _crops(count: int) -> List[np.ndarray]:
+    """Crops whose pixel value is their index, so the stubs can tell them apart."""
+
+    return [np.full((8, 8), idx, dtype=np.uint8) for idx in range(count)]
+
+
+def _text(image: Image.Image) -> str:
+    return f"crop {image.getpixel((0, 0))}\n"
+
+
+class FakeTesseract:
+    """Stands in for the ``tesseract`` binary and the per-call pytesseract path."""
+
+    def __init__(self, drop: int | None = None) -> None:
+        self.drop = drop
+        self.list_runs: List[int] = []
+        self.single_calls = 0
+        self._lock = threading.Lock()
+
+    def run_tesseract(self, input_filename, output_filename_base, extension, lang, config="", *args, **kwargs):
+        separator = re.search(r"-c page_separator=(\S+)", config).group(1)
+        paths = Path(input_filename).read_text(encoding="utf-8").split()
+        texts = [_text(Image.open(path)) for path in paths]
+        if self.drop is not None:
+            # An unreadable image: tesseract skips it and carries on.
+            del texts[self.drop]
+        with self._lock:
+            self.list_runs.append(len(paths))
+        Path(f"{output_filename_base}.{extension}").write_text(
+            "".join(text + separator for text in texts), encoding="utf-8"
+        )
+
+    def image_to_string(self, image, lang=None, config=""):
+        with self._lock:
+            self.single_calls += 1
+        return _text(image)
+
+
+@pytest.fixture
+def fake(monkeypatch: pytest.MonkeyPatch):
+    def install(drop: int | None = None) -> FakeTesseract:
+        stub = FakeTesseract(drop)
+        monkeypatch.setattr(pytesseract.pytesseract, "run_tesseract", stub.run_tesseract)
+        monkeypatch.setattr(pytesseract, "image_to_string", stub.image_to_string)
+        return stub
+
+    return install
+
+
+def test_batch_splits_one_text_per_crop(fake) -> None:
+    stub = fake()
+
+    texts = BatchTesseract(workers=1).image_to_string(_crops(5), "--psm 7")
+
+    assert texts == [f"crop {idx}\n" for idx in range(5)]
+    assert (stub.list_runs, stub.single_calls) == ([5], 0)
+
+
+def test_dropped_image_falls_back_to_per_call(fake) -> None:
+    stub = fake(drop=2)
+
+    texts = BatchTesseract(workers=1).image_to_string(_crops(5), "--psm 7")
+
+    assert texts == [f"crop {idx}\n" for idx in range(5)]
+    assert (stub.list_runs, stub.single_calls) == ([5], 5)
+
+
+def test_ignored_separator_falls_back_to_per_call(fake, monkeypatch: pytest.MonkeyPatch) -> None:
+    stub = fake()
+
+    def form_feeds(input_filename, output_filename_base, extension, lang, config="", *args, **kwargs):
+        # An older build: page_separator unknown, pages split by form feeds.
+        paths = Path(input_filename).read_text(encoding="utf-8").split()
+        texts = [_text(Image.open(path)) for path in paths]
+        Path(f"{output_filename_base}.{extension}").write_text("\f".join(texts), encoding="utf-8")
+
+    monkeypatch.setattr(pytesseract.pytesseract, "run_tesseract", form_feeds)
+
+    texts = BatchTesseract(workers=1).image_to_string(_crops(4))
+
+    assert texts == [f"crop {idx}\n" for idx in range(4)]
+    assert stub.single_calls == 4
+
+
+def test_small_batches_skip_the_list_file(fake) -> None:
+    stub = fake()
+
+    texts = BatchTesseract(workers=4).image_to_string(_crops(MIN_BATCH - 1))
+
+    assert texts == [f"crop {idx}\n" for idx in range(MIN_BATCH - 1)]
+    assert (stub.list_runs, stub.single_calls) == ([], MIN_BATCH - 1)
+    assert BatchTesseract().image_to_string([]) == []
+
+
+def test_workers_keep_crop_order(fake) -> None:
+    stub = fake()
+    count = 3 * MIN_CROPS_PER_WORKER + 5
+
+    texts = BatchTesseract(workers=8).image_to_string(_crops(count))
+
+    assert texts == [f"crop {idx}\n" for idx in range(count)]
+    # Three workers, each list long enough to be worth its model load.
+    assert len(stub.list_runs) == 3 and min(stub.list_runs) >= MIN_CROPS_PER_WORKER
+    assert stub.single_calls == 0
+
+
+def test_make_backend_rejects_unknown_names() -> None:
+    assert isinstance(ocr_backend.make_backend("per-call"), ocr_backend.PerCallTesseract)
+    with pytest.raises(ValueError):
+        ocr_backend.make_backend("cloud")
@@ -0,0 +1,342 @@
+from __future__ import annotations
+
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+import numpy as np
+import pytest
+from fpdf import FPDF
+from PIL import Image, ImageDraw
+
+# Ensure repository root is on the import path for local modules.
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts import ocr_pages
+from scripts.ocr_pages import (
+    OcrCache,
+    _pick_pass,
+    average_hash,
+    extract_pages,
+    is_blank,
+    iter_pages,
+    raster_digest,
+    render_gray,
+)
+
+
+def _scan(mark: bool = False) -> Image.Image:
+    """A 'scanned' letter page of text lines; ``mark`` adds a small docket-number-sized blot."""
+
+    image = Image.new("L", (850, 1100), 255)
+    draw = ImageDraw.Draw(image)
+    for top in range(100, 900, 60):
+        draw.rectangle((100, top, 700, top + 20), fill=0)
+    if mark:
+        draw.rectangle((720, 100, 730, 110), fill=0)
+    return image
+
+
+def _create_scan_pdf(path: Path, scans: Sequence[Image.Image]) -> Path:
+    pdf = FPDF(unit="pt", format="letter")
+    for scan in scans:
+        pdf.add_page()
+        pdf.image(scan, x=0, y=0, w=612, h=792)
+    pdf.output(path)
+    return path
+
+
+def _create_mixed_pdf(path: Path, pages: Sequence[Tuple[str, Image.Image | None]]) -> Path:
+    """Pages with a typed text layer, a scanned image, or both."""
+
+    pdf = FPDF(unit="pt", format="letter")
+    pdf.set_font("Helvetica", size=11)
+    for text, scan in pages:
+        pdf.add_page()
+        if scan is not None:
+            pdf.image(scan, x=0, y=0, w=612, h=792)
+        if text:
+            pdf.set_xy(36, 36)
+            pdf.multi_cell(540, 14, text)
+    pdf.output(path)
+    return path
+
+
+@pytest.fixture
+def ocr_calls(monkeypatch: pytest.MonkeyPatch) -> List[str]:
+    """Stub Tesseract: each distinct raster reads as its own text."""
+
+    calls: List[str] = []
+
+    def fake_ocr(image: Image.Image, lang: str) -> tuple:
+        digest = raster_digest(image)
+        calls.append(digest)
+        return f"scan {digest[:12]}", 90.0
+
+    monkeypatch.setattr(ocr_pages, "_ocr_image", fake_ocr)
+    return calls
+
+
+def test_near_identical_pages_share_average_hash(tmp_path: Path) -> None:
+    import fitz
+
+    pdf_path = _create_scan_pdf(tmp_path / "scan.pdf", [_scan(), _scan(mark=True)])
+    with fitz.open(str(pdf_path)) as doc:
+        hashes = [average_hash(render_gray(page)) for page in doc]
+
+    # The fixture reproduces a real collision; the tests below depend on it.
+    assert hashes[0] == hashes[1]
+
+
+def test_near_identical_pages_in_one_document_are_ocred_separately(
+    tmp_path: Path, ocr_calls: List[str]
+) -> None:
+    pdf_path = _create_scan_pdf(tmp_path / "scan.pdf", [_scan(), _scan(mark=True), _scan()])
+    cache = OcrCache(tmp_path / "cache.sqlite")
+
+    results = extract_pages(pdf_path, dpi=150, lang="eng", fast_dpi=0, cache=cache, workers=2)
+    cache.close()
+
+    assert len(ocr_calls) == 2
+    assert [result.source for result in results] == ["ocr", "ocr", "ocr_cache"]
+    assert results[0].text != results[1].text
+    assert results[2].text == results[0].text
+
+
+def test_near_identical_page_in_another_document_is_not_taken_from_cache(
+    tmp_path: Path, ocr_calls: List[str]
+) -> None:
+    first = _create_scan_pdf(tmp_path / "first.pdf", [_scan()])
+    second = _create_scan_pdf(tmp_path / "second.pdf", [_scan(mark=True)])
+    third = _create_scan_pdf(tmp_path / "third.pdf", [_scan(), _scan(mark=True)])
+    cache = OcrCache(tmp_path / "cache.sqlite")
+
+    first_page = extract_pages(first, dpi=150, lang="eng", fast_dpi=0, cache=cache)[0]
+    second_page = extract_pages(second, dpi=150, lang="eng", fast_dpi=0, cache=cache)[0]
+    assert second_page.source == "ocr"
+    assert second_page.text != first_page.text
+
+    # Both rasters are now cached under the same average hash.
+    reused = extract_pages(third, dpi=150, lang="eng", fast_dpi=0, cache=cache)
+    cache.close()
+    assert len(ocr_calls) == 2
+    assert [page.source for page in reused] == ["ocr_cache", "ocr_cache"]
+    assert [page.text for page in reused] == [first_page.text, second_page.text]
+
+
+def test_cache_written_before_raster_digests_is_discarded(tmp_path: Path) -> None:
+    path = tmp_path / "cache.sqlite"
+    conn = sqlite3.connect(str(path))
+    conn.execute(
+        "CREATE TABLE pages (page_hash TEXT NOT NULL, lang TEXT NOT NULL, dpi INTEGER NOT NULL, "
+        "text TEXT NOT NULL, used_dpi INTEGER, confidence REAL, PRIMARY KEY (page_hash, lang, dpi))"
+    )
+    conn.execute("CREATE TABLE documents (digest TEXT, settings TEXT, pages TEXT)")
+    conn.execute("INSERT INTO pages VALUES ('abc', 'eng', 300, 'stale', 300, 90.0)")
+    conn.execute("INSERT INTO documents VALUES ('d', 's', '[]')")
+    conn.commit()
+    conn.close()
+
+    cache = OcrCache(path)
+    assert cache.get("abc", "any", lang="eng", dpi=300) is None
+    assert cache.get_document("d", "s") is None
+    cache.put("abc", "digest", "fresh", lang="eng", dpi=300, used_dpi=300, confidence=91.0)
+    assert cache.get("abc", "digest", lang="eng", dpi=300) == ("fresh", 300, 91.0)
+    cache.close()
+
+
+def test_cache_writes_are_visible_to_other_connections_at_once(tmp_path: Path) -> None:
+    path = tmp_path / "cache.sqlite"
+    writer = OcrCache(path)
+    reader = OcrCache(path)
+
+    writer.put("abc", "digest", "text", lang="eng", dpi=300, used_dpi=150, confidence=88.0)
+
+    assert reader.get("abc", "digest", lang="eng", dpi=300) == ("text", 150, 88.0)
+    mode = sqlite3.connect(str(path)).execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode == "wal"
+    reader.close()
+    writer.close()
+
+
+PLEADING = "COMES NOW the Respondent and files this response to the motion. " * 20
+
+
+def test_only_sparse_pages_with_images_are_ocred(tmp_path: Path, ocr_calls: List[str]) -> None:
+    pdf_path = _create_mixed_pdf(
+        tmp_path / "mixed.pdf",
+        [
+            (PLEADING, _scan()),  # typed page with a letterhead image
+            ("Filed 1/2/2023", _scan()),  # scanned exhibit behind an e-file stamp
+            ("Filed 1/2/2023", None),  # nearly empty typed page, nothing to OCR
+        ],
+    )
+
+    results = extract_pages(pdf_path, dpi=150, lang="eng", fast_dpi=0, workers=1)
+
+    assert [result.source for result in results] == ["text_layer", "ocr", "text_layer"]
+    assert len(ocr_calls) == 1
+    assert results[0].text_layer_density > 2.0 > results[1].text_layer_density
+    assert results[1].text.startswith("scan ")
+    assert (results[1].dpi, results[1].confidence) == (150, 90.0)
+    assert results[2].text == "Filed 1/2/2023" and results[2].dpi is None
+
+    everything = extract_pages(pdf_path, dpi=150, lang="eng", fast_dpi=0, ocr_all=True, workers=1)
+    # ocr_all reads the typed page too, but its longer text layer wins; the
+    # stamp-only page has too little ink to be worth a Tesseract call.
+    assert [result.source for result in everything] == ["text_layer", "ocr", "blank"]
+    assert everything[2].text == "Filed 1/2/2023"
+    assert len(ocr_calls) == 3
+
+
+def test_low_confidence_first_pass_is_rerendered_at_full_dpi(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    widths: List[int] = []
+
+    def fake_ocr(image: Image.Image, lang: str) -> tuple:
+        widths.append(image.width)
+        # Page 2 reads poorly at the fast DPI; page 1 is clean.
+        noisy = len(widths) > 1 and image.width < 1000
+        return ("p4ge" if noisy else "page text"), (40.0 if noisy else 92.0)
+
+    monkeypatch.setattr(ocr_pages, "_ocr_image", fake_ocr)
+    pdf_path = _create_scan_pdf(tmp_path / "scan.pdf", [_scan(), _scan(mark=True)])
+
+    results = extract_pages(
+        pdf_path, dpi=200, lang="eng", fast_dpi=100, min_confidence=75.0, skip_blank=False, workers=1
+    )
+
+    assert widths == [850, 850, 1700]
+    assert [(result.text, result.dpi, result.confidence) for result in results] == [
+        ("page text", 100, 92.0),
+        ("page text", 200, 92.0),
+    ]
+
+
+def test_pick_pass_keeps_a_better_fast_pass() -> None:
+    assert _pick_pass(("fast", 70.0), ("full", 60.0), 150, 300) == ("fast", 150, 70.0)
+    assert _pick_pass(("fast", 70.0), ("full", 71.0), 150, 300) == ("full", 300, 71.0)
+    assert _pick_pass(("", 80.0), ("full", 10.0), 150, 300) == ("full", 300, 10.0)
+
+
+def test_blank_scans_are_skipped(tmp_path: Path, ocr_calls: List[str]) -> None:
+    specks = Image.new("L", (850, 1100), 235)  # yellowed paper with two specks of dust
+    ImageDraw.Draw(specks).point([(400, 500), (401, 500)], fill=0)
+    pdf_path = _create_scan_pdf(tmp_path / "scan.pdf", [specks, _scan()])
+
+    results = extract_pages(pdf_path, dpi=150, lang="eng", fast_dpi=0, workers=1)
+    assert [result.source for result in results] == ["blank", "ocr"]
+    assert len(ocr_calls) == 1
+
+    kept = extract_pages(pdf_path, dpi=150, lang="eng", fast_dpi=0, skip_blank=False, workers=1)
+    assert [result.source for result in kept] == ["ocr", "ocr"]
+
+
+def test_is_blank_uses_the_page_background() -> None:
+    toned = np.full((100, 100), 200, dtype=np.uint8)
+    assert is_blank(toned)
+    toned[10:12, 10:60] = 20
+    assert not is_blank(toned)
+    assert is_blank(np.zeros((0, 0), dtype=np.uint8))
+
+
+def test_document_cache_skips_byte_identical_copies(tmp_path: Path, ocr_calls: List[str]) -> None:
+    original = _create_mixed_pdf(tmp_path / "exhibit.pdf", [(PLEADING, None), ("", _scan())])
+    copy = tmp_path / "copy" / "exhibit.pdf"
+    copy.parent.mkdir()
+    copy.write_bytes(original.read_bytes())
+    cache = OcrCache(tmp_path / "cache.sqlite")
+
+    first = extract_pages(original, dpi=150, lang="eng", fast_dpi=0, cache=cache)
+    again = extract_pages(copy, dpi=150, lang="eng", fast_dpi=0, cache=cache)
+
+    assert len(ocr_calls) == 1
+    assert [result.source for result in first] == ["text_layer", "ocr"]
+    assert [result.source for result in again] == ["text_layer", "ocr_cache"]
+    assert [result.text for result in again] == [result.text for result in first]
+
+    # Other settings miss the document entry but still reuse the page.
+    other = extract_pages(copy, dpi=150, lang="eng", fast_dpi=0, min_density=1.0, cache=cache)
+    assert [result.source for result in other] == ["text_layer", "ocr_cache"]
+    assert len(ocr_calls) == 1
+    # A different full DPI misses both.
+    extract_pages(copy, dpi=120, lang="eng", fast_dpi=0, cache=cache)
+    assert len(ocr_calls) == 2
+    cache.close()
+
+
+def test_repeated_pages_follow_a_leader_still_being_ocred(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    calls: List[str] = []
+
+    def slow_ocr(image: Image.Image, lang: str) -> tuple:
+        digest = raster_digest(image)
+        calls.append(digest)
+        time.sleep(0.3)  # long enough for the renderer to reach the repeats
+        return f"scan {digest[:12]}", 90.0
+
+    monkeypatch.setattr(ocr_pages, "_ocr_image", slow_ocr)
+    scans = [_scan(), _scan(), _scan(mark=True), _scan()]
+    pdf_path = _create_mixed_pdf(
+        tmp_path / "scan.pdf", [("", scans[0]), ("", scans[1]), ("", scans[2]), (PLEADING, scans[3])]
+    )
+    cache = OcrCache(tmp_path / "cache.sqlite")
+
+    results = extract_pages(pdf_path, dpi=150, lang="eng", fast_dpi=0, cache=cache, workers=2)
+    cache.close()
+
+    assert len(calls) == 2
+    assert [result.page_number for result in results] == [1, 2, 3, 4]
+    assert [result.source for result in results] == ["ocr", "ocr_cache", "ocr", "text_layer"]
+    assert results[1].text == results[0].text != results[2].text
+
+
+def _ocr_threads() -> List[threading.Thread]:
+    return [
+        thread
+        for thread in threading.enumerate()
+        if getattr(thread, "_target", None) in (ocr_pages._render_pages, ocr_pages._ocr_worker)
+    ]
+
+
+def test_abandoned_iteration_stops_render_and_ocr_threads(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    ocr_calls: List[int] = []
+
+    def slow_ocr(image: Image.Image, lang: str) -> tuple:
+        ocr_calls.append(image.width)
+        time.sleep(0.1)
+        return "page text", 90.0
+
+    monkeypatch.setattr(ocr_pages, "_ocr_image", slow_ocr)
+    pdf_path = _create_scan_pdf(tmp_path / "scan.pdf", [_scan()] * 12)
+
+    pages = iter_pages(pdf_path, dpi=150, lang="eng", fast_dpi=0, skip_blank=False, workers=1)
+    first = next(pages)
+    assert first.page_number == 1
+    assert _ocr_threads()
+    pages.close()
+
+    assert not _ocr_threads()
+    # The render queue is bounded, so the renderer stopped well short of the end.
+    assert len(ocr_calls) < 12
+
+
+def test_ocr_failure_is_raised_and_threads_stop(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    def broken_ocr(image: Image.Image, lang: str) -> tuple:
+        raise RuntimeError("tesseract is not installed")
+
+    monkeypatch.setattr(ocr_pages, "_ocr_image", broken_ocr)
+    pdf_path = _create_scan_pdf(tmp_path / "scan.pdf", [_scan(), _scan(mark=True), _scan()])
+
+    with pytest.raises(RuntimeError, match="tesseract"):
+        extract_pages(pdf_path, dpi=150, lang="eng", fast_dpi=0, skip_blank=False, workers=2)
+    assert not _ocr_threads()
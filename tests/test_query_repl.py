@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Ensure repository root is on the import path for local modules.
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.hybrid_search import HybridSearcher
+from scripts.query_repl import QueryShell
+
+
+def _build_store(tmp_path: Path) -> Path:
+    store_dir = tmp_path / "district_judge"
+    store_dir.mkdir()
+    texts = [
+        "Notice of hearing set for March 3, 2023 on temporary orders.",
+        "Notice of hearing reset to 11/15/2024 after the motion to recuse.",
+        "Order of referral to the associate judge.",
+    ]
+    records = [
+        {"id": f"chunk-{idx}", "vector_id": idx, "source_pdf": f"CASE DOCS\\{idx}.pdf", "chunk_index": idx, "text": text}
+        for idx, text in enumerate(texts)
+    ]
+    (store_dir / "metadata.jsonl").write_text("\n".join(json.dumps(record) for record in records), encoding="utf-8")
+    np.save(store_dir / "embeddings.npy", np.eye(3, 4, dtype=np.float32))
+    return store_dir
+
+
+def test_shell_applies_filters_between_queries(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    shell = QueryShell(HybridSearcher.from_path(_build_store(tmp_path)), mode="keyword", top_k=5)
+
+    shell.onecmd("notice hearing")
+    assert [hit.record["id"] for hit in shell.last_hits] == ["chunk-0", "chunk-1"]
+
+    shell.onecmd("dates 2024-01-01 2024-12-31")
+    shell.onecmd("notice hearing")
+    assert [hit.record["id"] for hit in shell.last_hits] == ["chunk-1"]
+
+    shell.onecmd("dates off")
+    shell.onecmd("source 0.pdf")
+    shell.onecmd("keyword notice hearing")
+    assert [hit.record["id"] for hit in shell.last_hits] == ["chunk-0"]
+
+    shell.onecmd("semantic notice")
+    output = capsys.readouterr().out
+    assert "hits (keyword," in output
+    assert "error: semantic search needs the model" in output
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import json
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# Ensure repository root is on the import path for local modules.
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts import report_daemon, warm_cache
+
+pytestmark = pytest.mark.skipif(not report_daemon.HAS_UNIX_SOCKETS, reason="needs Unix sockets")
+
+
+def _write_case(path: Path, text: str) -> None:
+    pages = [{"page_number": 1, "text": text}, {"page_number": 2, "text": "ORDER DENIED on 01/02/2020"}]
+    path.write_text(json.dumps({"page_count": len(pages), "pages": pages}), encoding="utf-8")
+
+
+def _run(socket_path: Path, script: str, argv: list[str]) -> tuple[int, str]:
+    # The daemon redirects this process's stdout while it runs a command, so
+    # read the replies directly instead of going through report_daemon.run().
+    message = {"command": "run", "script": script, "argv": argv, "cwd": str(Path.cwd())}
+    client, reader = report_daemon._request(socket_path, 0, message)
+    output = []
+    with client, reader:
+        for line in reader:
+            reply = json.loads(line)
+            if "exit" in reply:
+                return reply["exit"], "".join(output)
+            output.append(reply["data"])
+    raise AssertionError("daemon closed the connection early")
+
+
+def _json_entry() -> dict:
+    return next(entry for entry in warm_cache.entries() if entry["kind"] == "json")
+
+
+def test_daemon_reuses_inputs_until_they_change(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    case = tmp_path / "case.json"
+    _write_case(case, "MOTION TO RECUSE filed 03/04/2021")
+    socket_path = tmp_path / "daemon.sock"
+    warm_cache.enable()
+    server = report_daemon.make_server(socket_path, 0, report_daemon.ScriptRunner())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        argv = ["--json", str(case), "--output", "memo.md"]
+        for _ in range(2):
+            code, output = _run(socket_path, "build_case_memorandum.py", argv)
+            assert code == 0 and "Wrote case memorandum" in output
+        assert (tmp_path / "memo.md").exists()
+        assert _json_entry()["hits"] == 1
+
+        _write_case(case, "MOTION TO RECUSE filed 03/04/2021 and amended")
+        assert _run(socket_path, "build_case_memorandum.py", argv)[0] == 0
+        assert _json_entry()["hits"] == 0
+
+        code, output = _run(socket_path, "no_such_script.py", [])
+        assert code == 2 and "Unknown script" in output
+    finally:
+        server.shutdown()
+        server.server_close()
+        warm_cache.enable(False)
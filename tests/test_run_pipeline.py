@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+# Ensure repository root is on the import path for local modules.
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.run_pipeline import Stage, run_pipeline
+
+COPY_SCRIPT = """
+import sys
+from pathlib import Path
+
+source, target = Path(sys.argv[1]), Path(sys.argv[2])
+target.parent.mkdir(parents=True, exist_ok=True)
+target.write_text(source.read_text().upper())
+with open("runs.log", "a") as log:
+    log.write(target.name + "\\n")
+"""
+
+
+def _stages() -> list[Stage]:
+    return [
+        Stage(
+            name="upper",
+            commands=[["tools/copy.py", "data/in.txt", "build/mid.txt"]],
+            inputs=["data/in.txt"],
+            outputs=["build/mid.txt"],
+        ),
+        Stage(
+            name="final",
+            commands=[["tools/copy.py", "build/mid.txt", "build/out.txt"]],
+            inputs=["build/mid.txt"],
+            outputs=["build/out.txt"],
+        ),
+        Stage(
+            name="side",
+            commands=[["tools/copy.py", "data/other.txt", "build/side.txt"]],
+            inputs=["data/other.txt"],
+            outputs=["build/side.txt"],
+        ),
+        Stage(
+            name="missing",
+            commands=[["tools/copy.py", "data/absent.txt", "build/never.txt"]],
+            inputs=["data/absent.txt"],
+            outputs=["build/never.txt"],
+        ),
+    ]
+
+
+def _run(root: Path) -> dict[str, str]:
+    (root / "runs.log").write_text("")
+    results = run_pipeline(
+        _stages(),
+        root=root,
+        ledger_path=root / "ledger.json",
+        log_dir=root / "logs",
+        jobs=2,
+    )
+    return {result.name: result.status for result in results}
+
+
+def test_pipeline_reruns_only_stale_stages(tmp_path: Path) -> None:
+    (tmp_path / "tools").mkdir()
+    (tmp_path / "tools" / "copy.py").write_text(COPY_SCRIPT)
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "in.txt").write_text("alpha")
+    (tmp_path / "data" / "other.txt").write_text("beta")
+
+    first = _run(tmp_path)
+    assert first == {"upper": "ran", "final": "ran", "side": "ran", "missing": "blocked"}
+    assert (tmp_path / "build" / "out.txt").read_text() == "ALPHA"
+
+    assert _run(tmp_path) == {
+        "upper": "up to date",
+        "final": "up to date",
+        "side": "up to date",
+        "missing": "blocked",
+    }
+    assert (tmp_path / "runs.log").read_text() == ""
+
+    (tmp_path / "data" / "in.txt").write_text("gamma")
+    (tmp_path / "build" / "side.txt").unlink()
+    changed = _run(tmp_path)
+    assert changed["upper"] == changed["final"] == changed["side"] == "ran"
+    assert (tmp_path / "build" / "out.txt").read_text() == "GAMMA"
+
+    # Same content after a rewrite: the hash, not the mtime, decides.
+    (tmp_path / "data" / "in.txt").write_text("gamma")
+    assert _run(tmp_path)["upper"] == "up to date"
+
+
+SLOW_SCRIPT = """
+import sys
+import time
+from pathlib import Path
+
+name = sys.argv[1]
+with open("runs.log", "a") as log:
+    log.write("start " + name + "\\n")
+time.sleep(0.3)
+with open("runs.log", "a") as log:
+    log.write("end " + name + "\\n")
+Path("build").mkdir(exist_ok=True)
+Path("build", name + ".txt").write_text(name)
+"""
+
+
+def test_stages_sharing_a_file_do_not_overlap(tmp_path: Path) -> None:
+    (tmp_path / "tools").mkdir()
+    (tmp_path / "tools" / "slow.py").write_text(SLOW_SCRIPT)
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "in.txt").write_text("alpha")
+    (tmp_path / "runs.log").write_text("")
+    stages = [
+        Stage(
+            name=name,
+            commands=[["tools/slow.py", name]],
+            inputs=["data/in.txt"],
+            outputs=[f"build/{name}.txt"],
+            shared=["cache.sqlite"],
+        )
+        for name in ("first", "second")
+    ]
+
+    results = run_pipeline(
+        stages, root=tmp_path, ledger_path=tmp_path / "ledger.json", log_dir=tmp_path / "logs", jobs=2
+    )
+
+    assert [result.status for result in results] == ["ran", "ran"]
+    assert (tmp_path / "runs.log").read_text().split("\n")[:4] == [
+        "start first",
+        "end first",
+        "start second",
+        "end second",
+    ]
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import json
+import sys
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+# Ensure repository root is on the import path for local modules.
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.hybrid_search import HybridSearcher
+from scripts.search_service import QueryBatcher, make_server
+
+
+class _KeywordEncoder:
+    """Maps each query to the axis of the first keyword it mentions and records batch sizes."""
+
+    KEYWORDS = ("referral", "hearing", "recuse", "signed")
+
+    def __init__(self) -> None:
+        self.batches: List[int] = []
+
+    def encode(self, texts: List[str], normalize_embeddings: bool = True) -> np.ndarray:
+        self.batches.append(len(texts))
+        vectors = np.zeros((len(texts), 4), dtype=np.float32)
+        for row, text in enumerate(texts):
+            axis = next(idx for idx, word in enumerate(self.KEYWORDS) if word in text.lower())
+            vectors[row, axis] = 1.0
+        return vectors
+
+
+def _write_store(store_dir: Path, texts: List[str], sources: List[str], axes: List[int]) -> None:
+    store_dir.mkdir(parents=True)
+    records = [
+        {"id": f"{store_dir.name}-{idx}", "vector_id": idx, "source_pdf": source, "chunk_index": idx, "text": text}
+        for idx, (text, source) in enumerate(zip(texts, sources))
+    ]
+    (store_dir / "metadata.jsonl").write_text("\n".join(json.dumps(record) for record in records), encoding="utf-8")
+    np.save(store_dir / "embeddings.npy", np.eye(4, dtype=np.float32)[axes])
+
+
+def _get(base: str, path: str) -> dict:
+    with urllib.request.urlopen(base + path, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def test_concurrent_queries_share_one_batch(tmp_path: Path) -> None:
+    root = tmp_path / "stores"
+    _write_store(
+        root / "associate_judge",
+        ["Order of referral to the associate judge.", "Notice of hearing on temporary orders."],
+        ["CASE DOCS\\ASSOCIATE JUDGE\\referral.pdf", "CASE DOCS\\ASSOCIATE JUDGE\\notice.pdf"],
+        [0, 1],
+    )
+    _write_store(
+        root / "district_judge",
+        ["Motion to recuse the judge was denied.", "The referral order was signed."],
+        ["CASE DOCS\\DISTRICT JUDGE\\recusal.pdf", "CASE DOCS\\DISTRICT JUDGE\\order.pdf"],
+        [2, 3],
+    )
+    encoder = _KeywordEncoder()
+    searcher = HybridSearcher.from_path(root, encoder=encoder)
+    batcher = QueryBatcher(searcher, max_wait=0.5, max_batch=3)
+    batcher.start()
+    server = make_server(searcher, batcher, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        paths = ["/search?q=referral&k=1", "/search?q=recuse&k=1", "/search?q=hearing&k=1&filer=district_judge"]
+        replies: dict = {}
+        threads = [threading.Thread(target=lambda p=p: replies.__setitem__(p, _get(base, p))) for p in paths]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert encoder.batches == [3]
+        assert replies[paths[0]]["hits"][0]["source_pdf"].endswith("referral.pdf")
+        assert replies[paths[1]]["hits"][0]["snippet"] == "Motion to recuse the judge was denied."
+        assert {hit["filer"] for hit in replies[paths[2]]["hits"]} == {"district_judge"}
+        assert _get(base, "/health")["batches"] == 1
+
+        request = urllib.request.Request(
+            base + "/search",
+            data=json.dumps({"query": "hearing", "top_k": 1, "filers": ["nobody"]}).encode("utf-8"),
+            method="POST",
+        )
+        try:
+            urllib.request.urlopen(request, timeout=10)
+        except urllib.error.HTTPError as exc:
+            assert exc.code == 400
+        else:
+            raise AssertionError("unknown filer was accepted")
+    finally:
+        server.shutdown()
+        server.server_close()
+        batcher.stop()
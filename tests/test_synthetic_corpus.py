@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+# Ensure repository root is on the import path for local modules.
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.ingest_merged_case import ingest_file
+from scripts.synthetic_corpus import CorpusScale, DOCKET_HEADER, generate_corpus
+
+
+def test_corpus_matches_scale_and_ingests(tmp_path: Path) -> None:
+    scale = CorpusScale(pages=12, documents=3, filers=2, docket_lines=45, dates=5, exhibits=2)
+    corpus = generate_corpus(tmp_path / "corpus", scale, seed=7)
+
+    assert len(corpus.documents) == 3
+    assert sorted(path.name for path in corpus.case_docs.iterdir() if path.is_dir()) == [
+        "ASSOCIATE JUDGE",
+        "DISTRICT JUDGE",
+    ]
+    payload = json.loads(corpus.merged_json.read_text(encoding="utf-8"))
+    assert payload["page_count"] == 12
+    assert [page["text"].startswith(DOCKET_HEADER) for page in payload["pages"]][-3:] == [
+        False,
+        True,
+        True,
+    ]
+
+    result = ingest_file(corpus.merged_pdf, tmp_path / "ingest")
+    assert result.page_count == 12
+    ingested = json.loads(result.json_path.read_text(encoding="utf-8"))["pages"]
+    assert ingested[0]["text"].startswith(f"{corpus.documents[0].title} - Page 1")
+
+    again = generate_corpus(tmp_path / "again", scale, seed=7)
+    assert json.loads(again.merged_json.read_text(encoding="utf-8"))["pages"] == payload["pages"]
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+# Ensure repository root is on the import path for local modules.
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.term_matrix import TermMatrix, bin_rows, build_term_matrix, category_terms
+
+PAGES = [
+    "order of referral signed by the associate judge. order entered.",
+    "",
+    "motion to recuse; motion to recuse denied. recusal hearing set.",
+    "no keywords on this page",
+    "the associate judge's order of referral and the standing order of referral",
+    "recuse recuse recuse",
+]
+
+CATEGORIES = {
+    "referral": ["order of referral", "associate judge", "order"],
+    "recusal": ["recus", "motion to recuse", "recusal"],
+    # Never occurs anywhere, and lists a keyword twice.
+    "appeal": ["mandamus", "notice of appeal", "mandamus"],
+}
+
+
+def _dense(matrix: TermMatrix) -> np.ndarray:
+    dense = np.zeros((matrix.n_pages, len(matrix.terms)), dtype=np.int64)
+    for row in range(matrix.n_pages):
+        span = slice(matrix.indptr[row], matrix.indptr[row + 1])
+        dense[row, matrix.indices[span]] = matrix.counts[span]
+    return dense
+
+
+def _counters(pages: List[str], terms: List[str]) -> List[Counter]:
+    return [Counter({term: page.count(term) for term in terms}) for page in pages]
+
+
+def test_sparse_counts_match_dense_counter() -> None:
+    terms = category_terms(CATEGORIES)
+    assert terms.count("mandamus") == 1
+
+    matrix = build_term_matrix(PAGES, terms + ["order"])
+    counters = _counters(PAGES, terms)
+
+    assert matrix.terms == terms
+    assert matrix.n_pages == len(PAGES)
+    expected = np.array([[counter[term] for term in terms] for counter in counters])
+    np.testing.assert_array_equal(_dense(matrix), expected)
+    # Absent terms and empty pages are implicit zeros, never stored.
+    assert np.all(matrix.counts > 0)
+    assert matrix.indptr[2] == matrix.indptr[1]
+    absent = [matrix.term_index["mandamus"], matrix.term_index["notice of appeal"]]
+    assert not np.isin(matrix.indices, absent).any()
+
+
+def test_category_counts_sum_keyword_counts() -> None:
+    matrix = build_term_matrix(PAGES, category_terms(CATEGORIES))
+    counters = _counters(PAGES, category_terms(CATEGORIES))
+
+    scores = matrix.category_counts(CATEGORIES)
+
+    expected = np.array(
+        [[sum(counter[keyword] for keyword in keywords) for keywords in CATEGORIES.values()] for counter in counters]
+    )
+    np.testing.assert_array_equal(scores, expected)
+    assert not scores[:, 2].any()
+    np.testing.assert_array_equal(bin_rows(scores, 4), [expected[:4].sum(axis=0), expected[4:].sum(axis=0)])
+
+
+def test_empty_matrix() -> None:
+    matrix = build_term_matrix([], ["order"])
+    assert matrix.n_pages == 0
+    assert matrix.category_counts({"referral": ["order"]}).shape == (0, 1)
+    assert bin_rows(np.zeros((0, 1), dtype=np.int64), 5).shape == (0, 1)
+
+    nothing = build_term_matrix(["no hits", "none"], ["order"])
+    np.testing.assert_array_equal(nothing.category_counts({"referral": ["order"]}), [[0], [0]])